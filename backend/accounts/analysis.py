@@ -0,0 +1,468 @@
+"""
+Numeric helpers used to turn stored columnar data into compact chart payloads.
+"""
+import math
+
+import numpy as np
+
+DEFAULT_CHART_POINTS = 500
+MAX_CHART_POINTS = 5000
+DEFAULT_HISTOGRAM_BINS = 30
+MAX_HISTOGRAM_BINS = 200
+
+# Resolution of the distributions precomputed at ingest
+DISTRIBUTION_BINS = 128
+ECDF_POINTS = 101
+KDE_POINTS = 100
+# Quantiles kept per column so distributions can be merged on append
+QUANTILE_POINTS = 1001
+
+
+def lttb(x, y, threshold):
+    """
+    Largest-Triangle-Three-Buckets downsampling.
+
+    Keeps the first and last points and, for every bucket in between, the
+    point forming the largest triangle with the previously kept point and
+    the average of the next bucket. Returns the selected indices.
+    """
+    n = len(x)
+    if threshold >= n or threshold < 3:
+        return np.arange(n)
+
+    every = (n - 2) / (threshold - 2)
+    # Bucket boundaries for the n-2 interior points
+    edges = (np.arange(threshold - 1) * every).astype(np.int64) + 1
+    edges[-1] = n - 1
+
+    selected = np.empty(threshold, dtype=np.int64)
+    selected[0] = 0
+    selected[-1] = n - 1
+    a = 0
+
+    for i in range(threshold - 2):
+        start, end = edges[i], edges[i + 1]
+        next_start = end
+        next_end = edges[i + 2] if i + 2 < len(edges) else n
+        avg_x = x[next_start:next_end].mean()
+        avg_y = y[next_start:next_end].mean()
+
+        bucket_x = x[start:end]
+        bucket_y = y[start:end]
+        area = np.abs((x[a] - avg_x) * (bucket_y - y[a]) - (x[a] - bucket_x) * (avg_y - y[a]))
+        a = start + int(np.argmax(area))
+        selected[i + 1] = a
+
+    return selected
+
+
+def line_series(values, points=DEFAULT_CHART_POINTS):
+    """Row-index/value series for line and area charts, LTTB-downsampled"""
+    values = np.asarray(values, dtype=np.float64)
+    row_index = np.flatnonzero(~np.isnan(values))
+    if row_index.size == 0:
+        return {'x': [], 'y': [], 'total_points': 0}
+    y = values[row_index]
+    x = row_index.astype(np.float64)
+    keep = lttb(x, y, points)
+    return {
+        'x': row_index[keep].tolist(),
+        'y': y[keep].tolist(),
+        'total_points': int(row_index.size),
+    }
+
+
+def histogram_bins(values, bins=DEFAULT_HISTOGRAM_BINS):
+    """Pre-binned counts for histogram and density charts"""
+    values = np.asarray(values, dtype=np.float64)
+    values = values[~np.isnan(values)]
+    if values.size == 0:
+        return {'edges': [], 'counts': []}
+    counts, edges = np.histogram(values, bins=bins)
+    return {'edges': edges.tolist(), 'counts': counts.tolist()}
+
+
+def box_stats(values):
+    """Quantiles and Tukey whiskers for box plots"""
+    values = np.asarray(values, dtype=np.float64)
+    values = values[~np.isnan(values)]
+    if values.size == 0:
+        return {}
+    q1, median, q3 = np.percentile(values, [25, 50, 75])
+    iqr = q3 - q1
+    low_fence, high_fence = q1 - 1.5 * iqr, q3 + 1.5 * iqr
+    inside = values[(values >= low_fence) & (values <= high_fence)]
+    return {
+        'min': float(values.min()),
+        'q1': float(q1),
+        'median': float(median),
+        'q3': float(q3),
+        'max': float(values.max()),
+        'whislo': float(inside.min()) if inside.size else float(q1),
+        'whishi': float(inside.max()) if inside.size else float(q3),
+    }
+
+
+def chart_series(dataset, columns, points=DEFAULT_CHART_POINTS, bins=DEFAULT_HISTOGRAM_BINS):
+    """Per-column chart payloads computed from a columnar dataset"""
+    series = {}
+    for name in columns:
+        values = dataset.numeric(name)
+        series[name] = {
+            'line': line_series(values, points),
+            'histogram': histogram_bins(values, bins),
+            'box': box_stats(values),
+        }
+    return series
+
+
+def kde_from_histogram(edges, counts, std, points=KDE_POINTS):
+    """
+    Gaussian KDE evaluated on a regular grid from pre-binned counts.
+
+    Uses Scott's rule for the bandwidth (the scipy ``gaussian_kde`` default)
+    with every bin centre weighted by its count, so the cost depends on the
+    number of bins rather than the number of rows.
+    """
+    edges = np.asarray(edges, dtype=np.float64)
+    counts = np.asarray(counts, dtype=np.float64)
+    n = counts.sum()
+    if n < 2 or not std or std <= 0:
+        return {'x': [], 'density': []}
+    bandwidth = std * n ** (-1 / 5)
+    centers = (edges[:-1] + edges[1:]) / 2
+    grid = np.linspace(edges[0], edges[-1], points)
+    z = (grid[:, None] - centers[None, :]) / bandwidth
+    density = np.exp(-0.5 * z * z) @ counts / (n * bandwidth * math.sqrt(2 * math.pi))
+    return {'x': grid.tolist(), 'density': density.tolist()}
+
+
+def _rebin(edges, counts, new_edges):
+    """Spread binned counts onto new edges, assuming values are uniform within a bin"""
+    cumulative = np.concatenate([[0.0], np.cumsum(counts)])
+    return np.diff(np.interp(new_edges, edges, cumulative))
+
+
+class DistributionAccumulator:
+    """
+    Mergeable histogram and quantile summary of one numeric column.
+
+    A batch of values is summarised exactly (``QUANTILE_POINTS`` quantiles and
+    a ``DISTRIBUTION_BINS`` histogram over its range). Merging re-bins both
+    histograms onto the combined range and inverts the count-weighted mixture
+    of the two CDFs, so appended rows never require a pass over older data.
+    """
+
+    def __init__(self):
+        self.n = 0
+        self.quantiles = None
+        self.edges = None
+        self.counts = None
+
+    @classmethod
+    def from_values(cls, values):
+        values = np.asarray(values, dtype=np.float64)
+        values = values[~np.isnan(values)]
+        acc = cls()
+        if values.size:
+            acc.n = int(values.size)
+            acc.quantiles = np.quantile(values, np.linspace(0, 1, QUANTILE_POINTS))
+            counts, acc.edges = np.histogram(values, bins=DISTRIBUTION_BINS)
+            acc.counts = counts.astype(np.float64)
+        return acc
+
+    @property
+    def min(self):
+        return float(self.quantiles[0])
+
+    @property
+    def max(self):
+        return float(self.quantiles[-1])
+
+    def quantile(self, p):
+        return float(np.interp(p, np.linspace(0, 1, QUANTILE_POINTS), self.quantiles))
+
+    def state(self):
+        return {'n': self.n, 'quantiles': self.quantiles, 'edges': self.edges, 'counts': self.counts}
+
+    @classmethod
+    def from_state(cls, state):
+        acc = cls()
+        acc.n, acc.quantiles, acc.edges, acc.counts = state['n'], state['quantiles'], state['edges'], state['counts']
+        return acc
+
+    def merge(self, other):
+        if other.n == 0:
+            return
+        if self.n == 0:
+            self.n, self.quantiles, self.edges, self.counts = other.n, other.quantiles, other.edges, other.counts
+            return
+
+        lo, hi = min(self.edges[0], other.edges[0]), max(self.edges[-1], other.edges[-1])
+        edges = np.linspace(lo, hi, DISTRIBUTION_BINS + 1)
+        counts = _rebin(self.edges, self.counts, edges) + _rebin(other.edges, other.counts, edges)
+
+        p = np.linspace(0, 1, QUANTILE_POINTS)
+        grid = np.union1d(self.quantiles, other.quantiles)
+        n = self.n + other.n
+        cdf = (self.n * np.interp(grid, self.quantiles, p) + other.n * np.interp(grid, other.quantiles, p)) / n
+        quantiles = np.interp(p, cdf, grid)
+        quantiles[0] = min(self.quantiles[0], other.quantiles[0])
+        quantiles[-1] = max(self.quantiles[-1], other.quantiles[-1])
+
+        self.n, self.quantiles, self.edges, self.counts = n, quantiles, edges, counts
+
+    def summary(self, std):
+        """Histogram, ECDF quantile points and KDE grid as stored on an upload"""
+        if self.n == 0:
+            return {}
+        counts = np.round(self.counts).astype(np.int64)
+        probabilities = np.linspace(0, 1, ECDF_POINTS)
+        return {
+            'histogram': {'edges': self.edges.tolist(), 'counts': counts.tolist()},
+            'ecdf': {
+                'x': np.interp(probabilities, np.linspace(0, 1, QUANTILE_POINTS), self.quantiles).tolist(),
+                'p': probabilities.tolist(),
+            },
+            'kde': kde_from_histogram(self.edges, self.counts, std),
+        }
+
+
+class CoMomentAccumulator:
+    """
+    Mergeable pairwise moments for a fixed set of numeric columns.
+
+    For every column pair (i, j) it tracks, over the rows where both values
+    are present, the row count ``n[i, j]``, the mean of column i ``mean[i, j]``,
+    the sum of squared deviations of column i ``m2[i, j]`` and the co-moment
+    ``c[i, j]``. The diagonal therefore holds the plain per-column count, mean
+    and M2. Chunks are folded in with Chan's parallel update, so the result
+    is exact after a single pass and two accumulators can be merged.
+    """
+
+    def __init__(self, k):
+        self.k = k
+        self.n = np.zeros((k, k))
+        self.mean = np.zeros((k, k))
+        self.m2 = np.zeros((k, k))
+        self.c = np.zeros((k, k))
+
+    def update(self, block):
+        """Fold in an (rows, k) float array where NaN marks missing values"""
+        block = np.asarray(block, dtype=np.float64)
+        if block.size == 0:
+            return
+        valid = ~np.isnan(block)
+        counts = valid.sum(axis=0)
+        # Shift by the chunk means so the sums below do not lose precision
+        shift = np.where(counts > 0, np.nansum(block, axis=0) / np.maximum(counts, 1), 0.0)
+        centered = np.where(valid, block - shift, 0.0)
+        mask = valid.astype(np.float64)
+
+        n = mask.T @ mask
+        s = centered.T @ mask
+        q = (centered * centered).T @ mask
+        p = centered.T @ centered
+        safe_n = np.where(n > 0, n, 1.0)
+
+        other = CoMomentAccumulator(self.k)
+        other.n = n
+        other.mean = np.where(n > 0, s / safe_n + shift[:, None], 0.0)
+        other.m2 = np.where(n > 0, q - s * s / safe_n, 0.0)
+        other.c = np.where(n > 0, p - s * s.T / safe_n, 0.0)
+        self.merge(other)
+
+    def state(self):
+        return {'k': self.k, 'n': self.n, 'mean': self.mean, 'm2': self.m2, 'c': self.c}
+
+    @classmethod
+    def from_state(cls, state):
+        acc = cls(state['k'])
+        acc.n, acc.mean, acc.m2, acc.c = state['n'], state['mean'], state['m2'], state['c']
+        return acc
+
+    def merge(self, other):
+        n = self.n + other.n
+        safe_n = np.where(n > 0, n, 1.0)
+        delta = other.mean - self.mean
+        weight = self.n * other.n / safe_n
+        self.mean = self.mean + delta * other.n / safe_n
+        self.m2 = self.m2 + other.m2 + delta * delta * weight
+        self.c = self.c + other.c + delta * delta.T * weight
+        self.n = n
+
+    def counts(self):
+        return np.diag(self.n)
+
+    def means(self):
+        return np.diag(self.mean)
+
+    def stds(self):
+        n = self.counts()
+        with np.errstate(invalid='ignore', divide='ignore'):
+            return np.where(n > 1, np.sqrt(np.diag(self.m2) / (n - 1)), np.nan)
+
+    def pearson(self):
+        with np.errstate(invalid='ignore', divide='ignore'):
+            r = self.c / np.sqrt(self.m2 * self.m2.T)
+        r = np.where((self.n > 1) & np.isfinite(r), np.clip(r, -1.0, 1.0), np.nan)
+        return r
+
+    def covariance(self):
+        with np.errstate(invalid='ignore', divide='ignore'):
+            return np.where(self.n > 1, self.c / (self.n - 1), np.nan)
+
+
+def _condensed(matrix, digits=4):
+    """Upper triangle (i < j) of a square matrix, row by row, NaN as None"""
+    i, j = np.triu_indices(matrix.shape[0], k=1)
+    values = np.round(matrix[i, j], digits)
+    return [None if np.isnan(v) else float(v) for v in values]
+
+
+def correlation_summary(columns, accumulator):
+    """Compact pairwise statistics stored with an upload"""
+    return {
+        'columns': list(columns),
+        'pearson': _condensed(accumulator.pearson()),
+        'covariance': _condensed(accumulator.covariance(), digits=6),
+        'pair_counts': [int(v) for v in _condensed(accumulator.n, digits=0)],
+    }
+
+
+def correlation_matrix(correlations):
+    """Expand the condensed Pearson coefficients into a full square matrix"""
+    columns = correlations.get('columns', [])
+    k = len(columns)
+    matrix = np.eye(k)
+    if k > 1:
+        i, j = np.triu_indices(k, k=1)
+        values = np.array([np.nan if v is None else v for v in correlations['pearson']], dtype=np.float64)
+        matrix[i, j] = values
+        matrix[j, i] = values
+    return columns, matrix
+
+
+def top_correlations(correlations, limit=10):
+    """Strongest absolute correlations as (column_a, column_b, r) triples"""
+    columns = correlations.get('columns', [])
+    pairs = []
+    if len(columns) > 1:
+        i, j = np.triu_indices(len(columns), k=1)
+        for a, b, r in zip(i, j, correlations['pearson']):
+            if r is not None:
+                pairs.append((columns[a], columns[b], r))
+    pairs.sort(key=lambda pair: abs(pair[2]), reverse=True)
+    return pairs[:limit]
+
+
+# Text columns with more distinct values than this are not grouped on
+MAX_GROUP_CARDINALITY = 50
+
+
+class GroupByAccumulator:
+    """
+    Mergeable per-group count, mean, M2, min and max for a fixed set of
+    numeric columns, keyed by the dictionary codes of one text column.
+
+    Slot 0 collects rows where the group value is missing and slot ``code + 1``
+    the rows of each dictionary code. Every chunk is reduced with
+    ``np.bincount`` (one hash-free aggregation pass per column) and folded in
+    with Chan's parallel update, so the statistics match a full-table groupby.
+    """
+
+    def __init__(self, k):
+        self.k = k
+        self.rows = np.zeros(0)
+        self.n = np.zeros((0, k))
+        self.mean = np.zeros((0, k))
+        self.m2 = np.zeros((0, k))
+        self.min = np.full((0, k), np.inf)
+        self.max = np.full((0, k), -np.inf)
+
+    def _grow(self, size):
+        extra = size - self.rows.size
+        if extra <= 0:
+            return
+        self.rows = np.concatenate([self.rows, np.zeros(extra)])
+        self.n = np.vstack([self.n, np.zeros((extra, self.k))])
+        self.mean = np.vstack([self.mean, np.zeros((extra, self.k))])
+        self.m2 = np.vstack([self.m2, np.zeros((extra, self.k))])
+        self.min = np.vstack([self.min, np.full((extra, self.k), np.inf)])
+        self.max = np.vstack([self.max, np.full((extra, self.k), -np.inf)])
+
+    def update(self, codes, block):
+        """Fold in group codes (-1 for missing) and an aligned (rows, k) float block"""
+        slots = np.asarray(codes, dtype=np.int64) + 1
+        if slots.size == 0:
+            return
+        block = np.asarray(block, dtype=np.float64).reshape(slots.size, self.k)
+        size = int(slots.max()) + 1
+
+        other = GroupByAccumulator(self.k)
+        other._grow(size)
+        other.rows = np.bincount(slots, minlength=size).astype(np.float64)
+        for j in range(self.k):
+            valid = ~np.isnan(block[:, j])
+            s, x = slots[valid], block[valid, j]
+            n = np.bincount(s, minlength=size).astype(np.float64)
+            mean = np.bincount(s, weights=x, minlength=size) / np.where(n > 0, n, 1.0)
+            d = x - mean[s]
+            other.n[:, j] = n
+            other.mean[:, j] = mean
+            other.m2[:, j] = np.bincount(s, weights=d * d, minlength=size)
+            np.minimum.at(other.min[:, j], s, x)
+            np.maximum.at(other.max[:, j], s, x)
+        self.merge(other)
+
+    def merge(self, other):
+        size = max(self.rows.size, other.rows.size)
+        self._grow(size)
+        other._grow(size)
+        n = self.n + other.n
+        safe_n = np.where(n > 0, n, 1.0)
+        delta = other.mean - self.mean
+        self.mean = self.mean + delta * other.n / safe_n
+        self.m2 = self.m2 + other.m2 + delta * delta * self.n * other.n / safe_n
+        self.n = n
+        self.rows = self.rows + other.rows
+        self.min = np.minimum(self.min, other.min)
+        self.max = np.maximum(self.max, other.max)
+
+    def state(self):
+        return {
+            'k': self.k, 'rows': self.rows, 'n': self.n, 'mean': self.mean,
+            'm2': self.m2, 'min': self.min, 'max': self.max,
+        }
+
+    @classmethod
+    def from_state(cls, state):
+        acc = cls(state['k'])
+        acc.rows, acc.n, acc.mean, acc.m2 = state['rows'], state['n'], state['mean'], state['m2']
+        acc.min, acc.max = state['min'], state['max']
+        return acc
+
+    def summary(self, labels, columns):
+        """Groups ordered by row count, each with per-column statistics"""
+        groups = []
+        with np.errstate(invalid='ignore', divide='ignore'):
+            std = np.where(self.n > 1, np.sqrt(self.m2 / (self.n - 1)), np.nan)
+        for slot in np.argsort(-self.rows, kind='stable'):
+            if self.rows[slot] == 0:
+                continue
+            stats = {}
+            for j, name in enumerate(columns):
+                count = int(self.n[slot, j])
+                stats[name] = {
+                    'count': count,
+                    'mean': float(self.mean[slot, j]) if count else None,
+                    'std': None if np.isnan(std[slot, j]) else float(std[slot, j]),
+                    'min': float(self.min[slot, j]) if count else None,
+                    'max': float(self.max[slot, j]) if count else None,
+                }
+            groups.append({
+                'group': None if slot == 0 else labels[slot - 1],
+                'rows': int(self.rows[slot]),
+                'stats': stats,
+            })
+        return groups
@@ -0,0 +1,111 @@
+"""
+Concurrent ingest of several uploaded files.
+
+Batch uploads are first streamed to storage, then every stored file is
+ingested into its own columnar copy by a shared process pool. The pool is
+bounded, so a large batch (or several batches at once) never runs more than
+``BATCH_WORKERS`` parsers side by side; the remaining files wait in the
+pool's queue. Workers only read the stored file and write the artifact
+directory, database rows are created by the calling request.
+"""
+import os
+import threading
+import zipfile
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from concurrent.futures.process import BrokenProcessPool
+
+from .ingest import iter_chunks, run_ingest, file_extension, ALLOWED_EXTENSIONS
+
+BATCH_WORKERS = min(4, os.cpu_count() or 1)
+MAX_BATCH_FILES = 100
+
+_pool = None
+_pool_lock = threading.Lock()
+
+
+def _get_pool():
+    global _pool
+    with _pool_lock:
+        if _pool is None:
+            _pool = ProcessPoolExecutor(max_workers=BATCH_WORKERS)
+        return _pool
+
+
+def _reset_pool(broken):
+    global _pool
+    with _pool_lock:
+        if _pool is broken:
+            _pool = None
+    broken.shutdown(wait=False, cancel_futures=True)
+
+
+def ingest_file(full_path, file_ext, artifact_dir, schema=None):
+    """Worker entry point: ingest one stored file into its columnar copy"""
+    return run_ingest(iter_chunks(full_path, file_ext, schema=schema), artifact_dir)
+
+
+def _is_data_file(info):
+    name = os.path.basename(info.filename)
+    # Directories and macOS resource forks are not data files
+    return not (info.is_dir() or not name or name.startswith('.') or info.filename.startswith('__MACOSX/'))
+
+
+def iter_zip_members(fileobj):
+    """Yield ``(name, file object)`` for every file inside a ZIP archive"""
+    with zipfile.ZipFile(fileobj) as archive:
+        for info in archive.infolist():
+            if not _is_data_file(info):
+                continue
+            with archive.open(info) as member:
+                yield os.path.basename(info.filename), member
+
+
+def batch_size(uploaded_files):
+    """
+    Bytes and number of uploads a batch would store, counting every
+    supported file inside its ZIP archives (uncompressed) separately.
+    """
+    total_bytes = files = 0
+    for uploaded_file in uploaded_files:
+        if file_extension(uploaded_file.name) != '.zip':
+            if file_extension(uploaded_file.name) in ALLOWED_EXTENSIONS:
+                total_bytes += uploaded_file.size
+                files += 1
+            continue
+        try:
+            with zipfile.ZipFile(uploaded_file) as archive:
+                members = [
+                    info for info in archive.infolist()
+                    if _is_data_file(info) and file_extension(info.filename) in ALLOWED_EXTENSIONS
+                ]
+        except zipfile.BadZipFile:
+            continue
+        total_bytes += sum(info.file_size for info in members)
+        files += len(members)
+    return total_bytes, files
+
+
+def analyze_batch(jobs):
+    """
+    Ingest ``(key, full_path, file_ext, artifact_dir, schema)`` jobs in the
+    shared process pool and yield ``(key, result, error)`` as each one
+    finishes.
+    """
+    pool = _get_pool()
+    futures = {}
+    try:
+        for key, full_path, file_ext, artifact_dir, schema in jobs:
+            futures[pool.submit(ingest_file, full_path, file_ext, artifact_dir, schema)] = key
+    except BrokenProcessPool:
+        _reset_pool(pool)
+        raise
+
+    for future in as_completed(futures):
+        try:
+            yield futures[future], future.result(), None
+        except BrokenProcessPool as e:
+            # A crashed worker takes the whole pool down; start a fresh one next time
+            _reset_pool(pool)
+            yield futures[future], None, f'Worker process failed: {e}'
+        except Exception as e:
+            yield futures[future], None, str(e)
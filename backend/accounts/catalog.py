@@ -0,0 +1,142 @@
+"""
+Schema search across a user's uploads.
+
+Every upload's columns are written to ``UploadColumn`` when it is ingested,
+under a normalized name (lower case, runs of anything but letters and
+digits collapsed to ``_``) and a coarse kind derived from the inferred
+dtype. "Which uploads have a pressure column" is then an indexed lookup on
+``(user, normalized)``, without opening any upload. The same index ranks
+uploads by how many columns they share, which picks candidates for
+comparison.
+"""
+import re
+from collections import defaultdict
+
+from django.db.models import Count
+
+from .models import UploadColumn
+
+COLUMN_KINDS = ('numeric', 'datetime', 'boolean', 'text')
+MAX_SEARCH_TERMS = 20
+DEFAULT_COMPARABLE_UPLOADS = 10
+MIN_COMPARABLE_OVERLAP = 0.5
+
+
+class CatalogError(ValueError):
+    """Raised for malformed schema search parameters"""
+
+
+def normalize_column(name):
+    """``'Flow Rate (m3/h)'`` -> ``'flow_rate_m3_h'``"""
+    return re.sub(r'[^0-9a-z]+', '_', str(name).strip().lower()).strip('_')
+
+
+def column_kind(dtype):
+    """Coarse kind of a stored dtype name"""
+    dtype = str(dtype or '').lower()
+    if dtype.startswith(('int', 'uint', 'float')):
+        return 'numeric'
+    if dtype.startswith('datetime'):
+        return 'datetime'
+    if dtype in ('bool', 'boolean'):
+        return 'boolean'
+    return 'text'
+
+
+def index_upload(upload):
+    """Replace the indexed columns of an upload; call in the transaction that saves it"""
+    UploadColumn.objects.filter(upload=upload).delete()
+    data_types = upload.data_types or {}
+    UploadColumn.objects.bulk_create([
+        UploadColumn(
+            user_id=upload.user_id,
+            upload=upload,
+            position=position,
+            name=str(name)[:255],
+            normalized=normalize_column(name)[:255],
+            dtype=str(data_types.get(name, ''))[:50],
+            kind=column_kind(data_types.get(name)),
+        )
+        for position, name in enumerate(upload.column_names or [])
+    ])
+
+
+def _matches(user, term, kind, partial):
+    columns = UploadColumn.objects.filter(user=user)
+    if kind:
+        columns = columns.filter(kind=kind)
+    columns = columns.filter(normalized__contains=term) if partial else columns.filter(normalized=term)
+    return columns.values_list('upload_id', 'name', 'dtype', 'kind')
+
+
+def search_schema(user, columns=None, kind=None, match='all', partial=False):
+    """
+    Uploads with a column for every (``match='all'``) or any
+    (``match='any'``) of the ``columns`` names, optionally only columns of
+    one ``kind``. With no names, uploads with any column of ``kind``.
+    Returns the matching upload primary keys, each with its matched
+    columns by search term.
+    """
+    terms = []
+    for name in columns or []:
+        term = normalize_column(name)
+        if term and term not in terms:
+            terms.append(term)
+    if kind and kind not in COLUMN_KINDS:
+        raise CatalogError(f'kind must be one of: {", ".join(COLUMN_KINDS)}')
+    if match not in ('all', 'any'):
+        raise CatalogError('match must be all or any')
+    if not terms and not kind:
+        raise CatalogError('Provide at least one column name or a kind')
+    if len(terms) > MAX_SEARCH_TERMS:
+        raise CatalogError(f'At most {MAX_SEARCH_TERMS} column names can be searched at once')
+
+    found = defaultdict(lambda: defaultdict(list))
+    for term in terms or ['']:
+        for upload_id, name, dtype, column_type in _matches(user, term, kind, partial or not term):
+            found[upload_id][term or kind].append({'name': name, 'dtype': dtype, 'kind': column_type})
+
+    required = len(terms) if match == 'all' else 1
+    return {upload_id: dict(matched) for upload_id, matched in found.items() if len(matched) >= required}
+
+
+def comparable_uploads(upload, limit=DEFAULT_COMPARABLE_UPLOADS, min_overlap=MIN_COMPARABLE_OVERLAP):
+    """
+    Other uploads of the same user ranked by the overlap (Jaccard index) of
+    their normalized column names with ``upload``. Columns that share a name
+    but not a kind are reported as type mismatches.
+    """
+    mine = dict(UploadColumn.objects.filter(upload=upload).values_list('normalized', 'kind'))
+    if not mine:
+        return []
+
+    shared = defaultdict(dict)
+    rows = (
+        UploadColumn.objects.filter(user_id=upload.user_id, normalized__in=list(mine))
+        .exclude(upload=upload)
+        .values_list('upload_id', 'normalized', 'kind')
+    )
+    for upload_id, normalized, column_type in rows:
+        shared[upload_id][normalized] = column_type
+    if not shared:
+        return []
+
+    widths = dict(
+        UploadColumn.objects.filter(upload_id__in=list(shared))
+        .order_by()
+        .values_list('upload_id')
+        .annotate(width=Count('normalized', distinct=True))
+    )
+    ranked = []
+    for upload_id, columns in shared.items():
+        overlap = len(columns) / (len(mine) + widths[upload_id] - len(columns))
+        if overlap < min_overlap:
+            continue
+        ranked.append({
+            'id': upload_id,
+            'overlap': round(overlap, 3),
+            'shared_columns': len(columns),
+            'type_mismatches': sorted(name for name, column_type in columns.items() if column_type != mine[name]),
+        })
+    ranked.sort(key=lambda entry: (-entry['overlap'], len(entry['type_mismatches']), -entry['id']))
+    return ranked[:limit]
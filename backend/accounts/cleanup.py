@@ -0,0 +1,135 @@
+"""
+Garbage collection of stored files that nothing refers to any more.
+
+Uploads that fail half way, deleted accounts and abandoned resumable
+uploads can leave files behind. The collector snapshots every path the
+database refers to (upload and version files, artifact directories and the
+part files of open upload sessions), then makes a single scan of the
+``uploads/`` and ``artifacts/`` trees and deletes what is not referenced,
+in batches.
+
+Files younger than ``min_age`` are never touched, so an upload that is
+still being written before its row exists is safe. An orphaned artifact
+directory is removed as a whole, and only once every file in it is older
+than ``min_age``.
+"""
+import os
+import time
+from collections import defaultdict
+
+from django.utils import timezone
+
+from . import storage
+from .columnar import artifact_dir_for
+from .models import Upload, UploadVersion, UploadSession
+from .resumable import SESSION_MAX_AGE
+
+GC_BATCH_SIZE = 500
+GC_MIN_AGE_SECONDS = 3600
+
+SCANNED_PREFIXES = ('uploads', 'artifacts')
+
+
+def referenced_paths():
+    """Stored file names and artifact directories the database refers to"""
+    files = set(Upload.objects.values_list('file_path', flat=True))
+    files.update(UploadVersion.objects.values_list('file_path', flat=True))
+    files.update(UploadSession.objects.filter(status__in=['Open', 'Processing']).values_list('part_path', flat=True))
+    artifacts = set()
+    for artifact_path, username, upload_id in Upload.objects.values_list('artifact_path', 'user__username', 'upload_id'):
+        # Uploads that predate artifacts get theirs on first read
+        artifacts.add(artifact_path or artifact_dir_for(username, upload_id))
+    files.discard('')
+    return files, artifacts
+
+
+def _artifact_dir(name):
+    """``artifacts/<user>/<upload_id>`` part of a stored artifact file name"""
+    return '/'.join(name.split('/')[:3])
+
+
+def find_orphans(entries, files, artifacts, cutoff):
+    """
+    Orphaned ``(name, size)`` pairs among scanned ``(name, size, modified)``
+    entries, given the referenced paths and a modification time cutoff.
+    """
+    orphan_artifacts = defaultdict(list)
+    newest = {}
+    for name, size, modified in entries:
+        if name.startswith('artifacts/'):
+            directory = _artifact_dir(name)
+            if directory in artifacts:
+                continue
+            orphan_artifacts[directory].append((name, size))
+            newest[directory] = max(newest.get(directory, 0), modified)
+        elif name not in files and modified < cutoff:
+            yield name, size
+    for directory, members in orphan_artifacts.items():
+        if newest[directory] < cutoff:
+            yield from members
+
+
+def _batches(items, size):
+    batch = []
+    for item in items:
+        batch.append(item)
+        if len(batch) == size:
+            yield batch
+            batch = []
+    if batch:
+        yield batch
+
+
+def expire_sessions(max_age=SESSION_MAX_AGE, dry_run=False):
+    """
+    Delete unfinished upload sessions idle for longer than ``max_age``,
+    including ones left processing by a crashed worker; return (sessions, bytes)
+    """
+    stale = UploadSession.objects.filter(status__in=['Open', 'Processing'], updated_at__lt=timezone.now() - max_age)
+    count, reclaimed = 0, 0
+    for session in stale:
+        path = storage.part_file(session.part_path) if session.part_path else None
+        if path and os.path.exists(path):
+            reclaimed += os.path.getsize(path)
+            if not dry_run:
+                os.remove(path)
+        if not dry_run:
+            session.delete()
+        count += 1
+    return count, reclaimed
+
+
+def collect_garbage(batch_size=GC_BATCH_SIZE, min_age=GC_MIN_AGE_SECONDS, session_max_age=SESSION_MAX_AGE,
+                    dry_run=False, log=print):
+    """
+    Expire stale upload sessions, then delete orphaned files from storage
+    (and from the node-local cache of a remote backend) in batches.
+    Returns counts and bytes reclaimed.
+    """
+    sessions, session_bytes = expire_sessions(session_max_age, dry_run)
+    if sessions:
+        log(f"{'Would expire' if dry_run else 'Expired'} {sessions} upload sessions ({session_bytes} bytes)")
+
+    files, artifacts = referenced_paths()
+    cutoff = time.time() - min_age
+    totals = {'sessions': sessions, 'files': 0, 'bytes': session_bytes, 'batches': 0}
+
+    sources = [(storage.scan, storage.delete), (storage.scan_cache, lambda name: os.remove(storage.cache_path(name)))]
+    for scan, remove in sources:
+        for prefix in SCANNED_PREFIXES:
+            orphans = find_orphans(scan(prefix), files, artifacts, cutoff)
+            for batch in _batches(orphans, batch_size):
+                if not dry_run:
+                    for name, _ in batch:
+                        try:
+                            remove(name)
+                        except FileNotFoundError:
+                            pass
+                reclaimed = sum(size for _, size in batch)
+                totals['files'] += len(batch)
+                totals['bytes'] += reclaimed
+                totals['batches'] += 1
+                log(f"{'Would delete' if dry_run else 'Deleted'} {len(batch)} files under {prefix}/ ({reclaimed} bytes)")
+            if not dry_run:
+                storage.prune_empty_dirs(prefix)
+    return totals
@@ -0,0 +1,385 @@
+"""
+Columnar copies of uploaded datasets.
+
+Every upload is mirrored into an artifact directory holding one raw binary
+file per column plus a ``manifest.json``. Each column is stored by kind:
+
+- numeric columns as float64, NaN for missing values;
+- datetime columns as int64 nanoseconds since the epoch in UTC, with
+  ``NAT`` for missing values;
+- text columns dictionary encoded as int32 codes (-1 for missing values),
+  with the dictionary kept next to them;
+- text columns with more than ``MAX_DICTIONARY_SIZE`` distinct values
+  (identifiers, free text) as plain strings: UTF-8 bytes in one file and
+  the int64 end offset of every value in another. A missing value is stored
+  as the bitwise complement of its (unchanged) end offset.
+
+A dictionary column that outgrows the limit is rewritten as a plain string
+column. Values that do not fit a numeric or datetime column (text further
+down a column typed from its first chunk) are stored as missing and counted
+as ``invalid`` in the column's manifest entry. Raw files can be appended chunk by chunk and read back with
+``numpy.memmap`` so nothing ever has to re-parse the original CSV/Excel.
+"""
+import json
+import os
+import shutil
+
+import numpy as np
+import pandas as pd
+
+from . import storage
+
+MANIFEST_NAME = 'manifest.json'
+
+NUMERIC = 'numeric'
+CATEGORY = 'category'
+DATETIME = 'datetime'
+STRING = 'string'
+
+KIND_DTYPES = {
+    NUMERIC: np.dtype('<f8'),
+    CATEGORY: np.dtype('<i4'),
+    DATETIME: np.dtype('<i8'),
+    STRING: np.dtype('<i8'),
+}
+
+# Text columns with more distinct values are stored as plain strings
+MAX_DICTIONARY_SIZE = 65_536
+
+# Missing datetime value; the int64 view of NaT
+NAT = np.iinfo(np.int64).min
+
+
+def artifact_dir_for(username, upload_id):
+    """Storage-relative directory holding the columnar copy of an upload"""
+    return f'artifacts/{username}/{upload_id}'
+
+
+def _column_kind(series):
+    if pd.api.types.is_bool_dtype(series) or pd.api.types.is_numeric_dtype(series):
+        return NUMERIC
+    if pd.api.types.is_datetime64_any_dtype(series):
+        return DATETIME
+    return CATEGORY
+
+
+def to_nanoseconds(series):
+    """Timestamps as int64 nanoseconds in UTC, ``NAT`` where missing or unparseable"""
+    if not pd.api.types.is_datetime64_any_dtype(series):
+        series = pd.to_datetime(series, errors='coerce')
+    if getattr(series.dt, 'tz', None) is not None:
+        series = series.dt.tz_convert('UTC').dt.tz_localize(None)
+    return series.to_numpy(dtype='datetime64[ns]').view('<i8')
+
+
+def _encode_strings(series, base):
+    """End offsets (complemented where missing) and UTF-8 bytes of text values, after ``base`` bytes"""
+    values = series.to_numpy(dtype=object)
+    present = series.notna().to_numpy()
+    encoded = [str(value).encode() for value in values[present]]
+    lengths = np.zeros(len(values), dtype='<i8')
+    lengths[present] = np.fromiter(map(len, encoded), dtype='<i8', count=len(encoded))
+    ends = base + np.cumsum(lengths)
+    return np.where(present, ends, ~ends), b''.join(encoded)
+
+
+def _string_end(offsets):
+    """Byte length of the data behind a string column's last offset"""
+    if not len(offsets):
+        return 0
+    last = int(offsets[-1])
+    return ~last if last < 0 else last
+
+
+class ColumnarWriter:
+    """Append DataFrame chunks to a columnar artifact directory"""
+
+    def __init__(self, directory, manifest=None):
+        self.directory = directory
+        os.makedirs(directory, exist_ok=True)
+        self.manifest = manifest or {'rows': 0, 'columns': []}
+        self._dictionaries = {}
+        self._string_sizes = {}
+        # Dictionaries of columns the last append rewrote as plain strings
+        self.converted = {}
+        self._obsolete = []
+        for col in self.manifest['columns']:
+            if col['kind'] == CATEGORY:
+                self._dictionaries[col['name']] = _read_dictionary(directory, col)
+            # Drop anything a failed append left behind the last committed row
+            path = os.path.join(directory, col['file'])
+            size = self.manifest['rows'] * KIND_DTYPES[col['kind']].itemsize
+            if os.path.exists(path) and os.path.getsize(path) > size:
+                os.truncate(path, size)
+            if col['kind'] == STRING:
+                offsets = np.fromfile(path, dtype=KIND_DTYPES[STRING]) if self.manifest['rows'] else []
+                end = _string_end(offsets)
+                data_path = os.path.join(directory, col['data'])
+                if os.path.exists(data_path) and os.path.getsize(data_path) > end:
+                    os.truncate(data_path, end)
+                self._string_sizes[col['name']] = end
+
+    def _init_columns(self, chunk):
+        for idx, name in enumerate(chunk.columns):
+            kind = _column_kind(chunk[name])
+            col = {'name': str(name), 'kind': kind, 'file': f'c{idx}.bin'}
+            if kind == CATEGORY:
+                col['dictionary'] = f'c{idx}.dict.json'
+                self._dictionaries[col['name']] = {}
+            self.manifest['columns'].append(col)
+
+    def _to_strings(self, col):
+        """Rewrite a dictionary column as plain strings, in new files until ``close()`` commits them"""
+        dictionary = self.dictionary(col['name'])
+        codes = np.empty(0, dtype=KIND_DTYPES[CATEGORY])
+        if self.manifest['rows']:
+            codes = np.fromfile(os.path.join(self.directory, col['file']), dtype=codes.dtype, count=self.manifest['rows'])
+        labels = np.array(dictionary + [None], dtype=object)
+        offsets, data = _encode_strings(pd.Series(labels[codes], dtype=object), 0)
+
+        stem = os.path.splitext(col['file'])[0]
+        self._obsolete += [col['file'], col['dictionary']]
+        col.update(kind=STRING, file=f'{stem}.offsets.bin', data=f'{stem}.str')
+        del col['dictionary']
+        with open(os.path.join(self.directory, col['file']), 'wb') as fh:
+            fh.write(offsets.tobytes())
+        with open(os.path.join(self.directory, col['data']), 'wb') as fh:
+            fh.write(data)
+        self._string_sizes[col['name']] = len(data)
+        del self._dictionaries[col['name']]
+        self.converted[col['name']] = dictionary
+
+    def append(self, chunk):
+        """Append a chunk and return its encoded column arrays by name"""
+        chunk = chunk.rename(columns=str)
+        encoded = {}
+        self.converted = {}
+        if not self.manifest['columns']:
+            self._init_columns(chunk)
+
+        for col in self.manifest['columns']:
+            if col['name'] in chunk.columns:
+                series = chunk[col['name']]
+            else:
+                series = pd.Series([None] * len(chunk), index=chunk.index)
+
+            if col['kind'] == NUMERIC:
+                values = pd.to_numeric(series, errors='coerce').to_numpy(dtype='<f8', na_value=np.nan)
+                self._count_invalid(col, series, np.isnan(values))
+            elif col['kind'] == DATETIME:
+                values = to_nanoseconds(series)
+                self._count_invalid(col, series, values == NAT)
+            elif col['kind'] == CATEGORY:
+                values = self._encode(col, series)
+            if col['kind'] == STRING:
+                values, data = _encode_strings(series, self._string_sizes[col['name']])
+                with open(os.path.join(self.directory, col['data']), 'ab') as fh:
+                    fh.write(data)
+                self._string_sizes[col['name']] += len(data)
+
+            with open(os.path.join(self.directory, col['file']), 'ab') as fh:
+                fh.write(np.ascontiguousarray(values).tobytes())
+            encoded[col['name']] = values
+
+        self.manifest['rows'] += len(chunk)
+        return encoded
+
+    def _count_invalid(self, col, series, missing):
+        """Count the values of a chunk that did not parse as the column's kind and are stored as missing"""
+        invalid = int((series.notna().to_numpy() & missing).sum())
+        if invalid:
+            col['invalid'] = col.get('invalid', 0) + invalid
+
+    def kind(self, name):
+        return next(col['kind'] for col in self.manifest['columns'] if col['name'] == name)
+
+    def invalid(self):
+        """``{column: count}`` of values stored as missing because they did not fit the column's kind"""
+        return {col['name']: col['invalid'] for col in self.manifest['columns'] if col.get('invalid')}
+
+    def cardinality(self, name):
+        """Distinct non-null values seen so far in a text column; plain string columns exceed the dictionary limit"""
+        lookup = self._dictionaries.get(name)
+        return len(lookup) if lookup is not None else MAX_DICTIONARY_SIZE + 1
+
+    def dictionary(self, name):
+        """Values of a text column in code order"""
+        lookup = self._dictionaries[name]
+        return sorted(lookup, key=lookup.get)
+
+    def _encode(self, col, series):
+        """Dictionary codes of a chunk, or None after rewriting the column as plain strings"""
+        lookup = self._dictionaries[col['name']]
+        codes, uniques = pd.factorize(series.astype('object').where(series.notna(), None))
+        if len(lookup) + len(uniques) > MAX_DICTIONARY_SIZE:
+            new = len(uniques) if not lookup else sum(str(value) not in lookup for value in uniques)
+            if len(lookup) + new > MAX_DICTIONARY_SIZE:
+                self._to_strings(col)
+                return None
+        mapping = np.empty(len(uniques), dtype='<i4')
+        for i, value in enumerate(uniques):
+            key = str(value)
+            if key not in lookup:
+                lookup[key] = len(lookup)
+            mapping[i] = lookup[key]
+        out = np.full(len(codes), -1, dtype='<i4')
+        present = codes >= 0
+        out[present] = mapping[codes[present]]
+        return out
+
+    def close(self):
+        for col in self.manifest['columns']:
+            if col['kind'] == CATEGORY:
+                values = self.dictionary(col['name'])
+                with open(os.path.join(self.directory, col['dictionary']), 'w') as fh:
+                    json.dump(values, fh)
+        # The manifest commits the appended rows, so it is replaced atomically
+        path = os.path.join(self.directory, MANIFEST_NAME)
+        with open(path + '.tmp', 'w') as fh:
+            json.dump(self.manifest, fh)
+        os.replace(path + '.tmp', path)
+        for name in self._obsolete:
+            try:
+                os.remove(os.path.join(self.directory, name))
+            except FileNotFoundError:
+                pass
+        self._obsolete = []
+        return self.manifest
+
+
+def _read_dictionary(directory, col):
+    path = os.path.join(directory, col['dictionary'])
+    if not os.path.exists(path):
+        return {}
+    with open(path) as fh:
+        return {value: code for code, value in enumerate(json.load(fh))}
+
+
+class ColumnarDataset:
+    """Read-only, memory-mapped view over a columnar artifact directory"""
+
+    def __init__(self, directory):
+        self.directory = directory
+        with open(os.path.join(directory, MANIFEST_NAME)) as fh:
+            self.manifest = json.load(fh)
+        self.rows = self.manifest['rows']
+        self._columns = {col['name']: col for col in self.manifest['columns']}
+        self._dictionaries = {}
+        self._string_data = {}
+
+    @property
+    def column_names(self):
+        return [col['name'] for col in self.manifest['columns']]
+
+    def kind(self, name):
+        return self._columns[name]['kind']
+
+    def has_column(self, name):
+        return name in self._columns
+
+    def raw(self, name):
+        """Memory-mapped raw values (float64, int32 dictionary codes, int64 nanoseconds or string end offsets)"""
+        col = self._columns[name]
+        dtype = KIND_DTYPES[col['kind']]
+        if self.rows == 0:
+            return np.empty(0, dtype=dtype)
+        return np.memmap(os.path.join(self.directory, col['file']), dtype=dtype,
+                         mode='r', shape=(self.rows,))
+
+    def numeric(self, name):
+        if self.kind(name) != NUMERIC:
+            raise ValueError(f'Column "{name}" is not numeric')
+        return self.raw(name)
+
+    def dictionary(self, name):
+        if name not in self._dictionaries:
+            col = self._columns[name]
+            with open(os.path.join(self.directory, col['dictionary'])) as fh:
+                self._dictionaries[name] = np.array(json.load(fh), dtype=object)
+        return self._dictionaries[name]
+
+    def text(self, name, positions):
+        """Values of a plain string column at row positions, None where missing"""
+        positions = np.asarray(positions, dtype=np.int64)
+        if name not in self._string_data:
+            path = os.path.join(self.directory, self._columns[name]['data'])
+            self._string_data[name] = np.memmap(path, dtype=np.uint8, mode='r') if os.path.getsize(path) else np.empty(0, np.uint8)
+        data = self._string_data[name]
+        raw = self.raw(name)
+        if not positions.size:
+            return np.empty(0, dtype=object)
+        ends = np.asarray(raw[positions])
+        missing = ends < 0
+        ends = np.where(missing, ~ends, ends)
+        before = np.asarray(raw[np.maximum(positions - 1, 0)])
+        starts = np.where(positions > 0, np.where(before < 0, ~before, before), 0)
+        if positions[-1] - positions[0] + 1 == positions.size:
+            # A contiguous run of rows is one contiguous run of bytes
+            base = int(starts[0])
+            blob = data[base:int(ends[-1])].tobytes()
+            values = [None if m else blob[s - base:e - base].decode() for s, e, m in zip(starts.tolist(), ends.tolist(), missing)]
+        else:
+            values = [None if m else data[s:e].tobytes().decode() for s, e, m in zip(starts.tolist(), ends.tolist(), missing)]
+        return np.array(values, dtype=object)
+
+    def decode(self, name, positions=None):
+        """Python values for a column, optionally restricted to row positions"""
+        kind = self.kind(name)
+        if kind == STRING:
+            return self.text(name, np.arange(self.rows) if positions is None else positions).tolist()
+        values = self.raw(name)
+        if positions is not None:
+            values = values[positions]
+        if kind == NUMERIC:
+            return [None if np.isnan(v) else float(v) for v in values]
+        if kind == DATETIME:
+            return [None if v == NAT else str(pd.Timestamp(int(v))) for v in values]
+        dictionary = self.dictionary(name)
+        return [None if code < 0 else dictionary[code] for code in values]
+
+    def to_frame(self, rows=None):
+        """DataFrame of the first ``rows`` rows (all rows by default)"""
+        rows = self.rows if rows is None else min(rows, self.rows)
+        data = {}
+        for name in self.column_names:
+            kind = self.kind(name)
+            if kind == STRING:
+                data[name] = self.text(name, np.arange(rows))
+                continue
+            values = np.asarray(self.raw(name)[:rows])
+            if kind == NUMERIC:
+                data[name] = values
+            elif kind == DATETIME:
+                data[name] = values.view('datetime64[ns]')
+            else:
+                labels = np.append(self.dictionary(name), None)
+                data[name] = labels[values]
+        return pd.DataFrame(data, columns=self.column_names)
+
+
+def open_dataset(upload):
+    """
+    Open the columnar copy of an upload, building it from the original file
+    for uploads that predate columnar artifacts.
+    """
+    # Imported here: the ingest builds on this module
+    from .ingest import file_extension, iter_chunks, run_ingest
+
+    if not upload.artifact_path:
+        upload.artifact_path = artifact_dir_for(upload.user.username, upload.upload_id)
+        upload.save(update_fields=['artifact_path'])
+
+    directory = storage.local_dir(upload.artifact_path)
+    if not os.path.exists(os.path.join(directory, MANIFEST_NAME)):
+        # Anything a failed build left behind would be appended to
+        if os.path.isdir(directory):
+            shutil.rmtree(directory)
+        with storage.local_path(upload.file_path) as full_path:
+            run_ingest(iter_chunks(full_path, file_extension(upload.filename)), directory)
+        storage.publish_dir(upload.artifact_path)
+    return ColumnarDataset(directory)
+
+
+def delete_dataset(artifact_path):
+    """Remove the columnar copy of an upload if it exists"""
+    storage.delete_dir(artifact_path)
@@ -0,0 +1,135 @@
+"""
+Comparison of several uploads from their stored summaries.
+
+Nothing here touches the uploaded files or their columnar copies: schema,
+summary statistics, ECDF quantiles and column profiles saved at ingest are
+enough to align the uploads column by column and measure how far each one
+has drifted from the first (baseline) upload.
+"""
+import numpy as np
+
+MAX_COMPARE_UPLOADS = 20
+
+COMPARED_STATS = ('count', 'mean', 'std', 'min', '25%', '50%', '75%', 'max')
+
+# Upload fields the comparison reads; everything else stays deferred
+SUMMARY_FIELDS = (
+    'upload_id', 'filename', 'upload_date', 'rows', 'columns', 'column_names',
+    'data_types', 'missing_values', 'summary_stats', 'distributions', 'column_profiles',
+)
+
+
+def _ecdf(distribution):
+    ecdf = (distribution or {}).get('ecdf') or {}
+    if not ecdf.get('x'):
+        return None
+    return np.asarray(ecdf['x'], dtype=np.float64), np.asarray(ecdf['p'], dtype=np.float64)
+
+
+def ks_distance(a, b):
+    """
+    Kolmogorov-Smirnov distance between two columns given their stored ECDF
+    quantile points, evaluated on the union of both quantile grids.
+    """
+    (xa, pa), (xb, pb) = a, b
+    grid = np.union1d(xa, xb)
+    fa = np.interp(grid, xa, pa, left=0.0, right=1.0)
+    fb = np.interp(grid, xb, pb, left=0.0, right=1.0)
+    return float(np.max(np.abs(fa - fb)))
+
+
+def wasserstein_distance(a, b):
+    """Earth mover's distance, the mean gap between matching quantiles"""
+    (xa, pa), (xb, pb) = a, b
+    if pa.size == pb.size and np.allclose(pa, pb):
+        return float(np.mean(np.abs(xa - xb)))
+    p = np.union1d(pa, pb)
+    return float(np.mean(np.abs(np.interp(p, pa, xa) - np.interp(p, pb, xb))))
+
+
+def _delta(value, base):
+    if value is None or base is None:
+        return None, None
+    change = value - base
+    pct = change / abs(base) * 100 if base else None
+    return change, pct
+
+
+def _schema(uploads, columns):
+    base = set(uploads[0].column_names)
+    base_types = uploads[0].data_types or {}
+    changes = []
+    for upload in uploads:
+        names = set(upload.column_names)
+        types = upload.data_types or {}
+        changes.append({
+            'added': [col for col in upload.column_names if col not in base],
+            'removed': [col for col in uploads[0].column_names if col not in names],
+            'type_changes': {
+                col: {'from': base_types.get(col), 'to': types.get(col)}
+                for col in upload.column_names
+                if col in base and types.get(col) != base_types.get(col)
+            },
+        })
+    return {
+        'columns': columns,
+        'presence': {col: [col in upload.column_names for upload in uploads] for col in columns},
+        'dtypes': {col: [(upload.data_types or {}).get(col) for upload in uploads] for col in columns},
+        'changes': changes,
+    }
+
+
+def compare_uploads(uploads):
+    """Aligned schema, stat deltas and distribution shift for ``uploads``"""
+    columns = []
+    for upload in uploads:
+        columns.extend(col for col in upload.column_names if col not in columns)
+
+    compared = {}
+    for col in columns:
+        stats = [(upload.summary_stats or {}).get(col) for upload in uploads]
+        profiles = [(upload.column_profiles or {}).get(col) for upload in uploads]
+        entry = {
+            'missing': [(upload.missing_values or {}).get(col) for upload in uploads],
+            'distinct': [profile.get('distinct') if profile else None for profile in profiles],
+        }
+
+        if any(stats):
+            base = stats[0] or {}
+            entry['stats'] = {
+                name: [s.get(name) if s else None for s in stats] for name in COMPARED_STATS
+            }
+            entry['deltas'] = {}
+            entry['pct_change'] = {}
+            for name in COMPARED_STATS:
+                pairs = [_delta(s.get(name) if s else None, base.get(name)) for s in stats]
+                entry['deltas'][name] = [change for change, _ in pairs]
+                entry['pct_change'][name] = [pct for _, pct in pairs]
+
+            ecdfs = [_ecdf((upload.distributions or {}).get(col)) for upload in uploads]
+            baseline = ecdfs[0]
+            entry['ks'] = [
+                ks_distance(baseline, ecdf) if baseline is not None and ecdf is not None else None
+                for ecdf in ecdfs
+            ]
+            entry['wasserstein'] = [
+                wasserstein_distance(baseline, ecdf) if baseline is not None and ecdf is not None else None
+                for ecdf in ecdfs
+            ]
+        compared[col] = entry
+
+    return {
+        'uploads': [
+            {
+                'upload_id': str(upload.upload_id),
+                'filename': upload.filename,
+                'upload_date': upload.upload_date.isoformat(),
+                'rows': upload.rows,
+                'columns': upload.columns,
+            }
+            for upload in uploads
+        ],
+        'baseline': str(uploads[0].upload_id),
+        'schema': _schema(uploads, columns),
+        'columns': compared,
+    }
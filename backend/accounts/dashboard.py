@@ -0,0 +1,67 @@
+"""
+Dashboard summary.
+
+The counters come from the user's ``StorageUsage`` row, which is kept up
+to date as uploads are added and deleted. The recent uploads are read with
+``values()`` over a handful of small columns, so no analysis JSON or data
+preview is loaded. Only the group statistics of the latest completed upload
+are read, for the dashboard's group table. The whole summary costs three
+indexed queries, however many uploads the user has.
+"""
+from .models import StorageUsage, Upload
+
+DEFAULT_RECENT_UPLOADS = 10
+MAX_RECENT_UPLOADS = 100
+
+RECENT_UPLOAD_FIELDS = ('id', 'upload_id', 'filename', 'upload_date', 'rows', 'columns', 'file_size', 'status')
+LATEST_GROUPS_FIELDS = ('upload_id', 'filename', 'group_stats')
+
+
+def upload_row(values):
+    """Lightweight history row from an ``Upload.objects.values()`` dict"""
+    return {
+        'id': values['id'],
+        'upload_id': str(values['upload_id']),
+        'filename': values['filename'],
+        'upload_date': values['upload_date'].isoformat(),
+        'upload_date_formatted': values['upload_date'].strftime('%b %d, %Y'),
+        'rows': values['rows'] or 0,
+        'columns': values.get('columns') or 0,
+        'file_size': values['file_size'] or 0,
+        'status': values['status'],
+    }
+
+
+def latest_groups(user):
+    """Group statistics of the user's latest completed upload, or ``None``"""
+    values = Upload.objects.filter(user=user, status='Completed').order_by('-upload_date').values(
+        *LATEST_GROUPS_FIELDS
+    ).first()
+    if not values or not values['group_stats']:
+        return None
+    return {
+        'upload_id': str(values['upload_id']),
+        'filename': values['filename'],
+        'group_stats': values['group_stats'],
+    }
+
+
+def dashboard_summary(user, recent=DEFAULT_RECENT_UPLOADS):
+    """Upload counters, the ``recent`` most recent uploads and the latest group statistics of a user"""
+    usage = StorageUsage.objects.filter(user=user).first() or StorageUsage(user=user)
+    rows = [
+        upload_row(values)
+        for values in Upload.objects.filter(user=user).order_by('-upload_date').values(*RECENT_UPLOAD_FIELDS)[:recent]
+    ]
+    return {
+        'total_uploads': usage.uploads,
+        'completed': usage.completed,
+        'failed': usage.uploads - usage.completed,
+        'success_rate': round(usage.completed / usage.uploads * 100, 1) if usage.uploads else 0,
+        'total_rows': usage.total_rows,
+        'total_bytes': usage.total_bytes,
+        'total_mb': round(usage.total_bytes / (1024 * 1024), 2),
+        'last_upload': rows[0] if rows else None,
+        'recent': rows,
+        'latest_groups': latest_groups(user),
+    }
@@ -0,0 +1,133 @@
+"""
+Search, filters and sort for the upload history.
+
+Everything runs in the database. Status, date range and sort keys are
+served by composite ``(user, ...)`` indexes. A B-tree cannot serve
+filename substring search, so it uses a search index created by migration
+0016:
+
+- on PostgreSQL, a ``pg_trgm`` GIN index over ``UPPER(filename)``, which
+  backs ``icontains`` directly;
+- on SQLite, an FTS5 table with the trigram tokenizer, kept in sync by
+  triggers.
+
+Terms shorter than three characters cannot be matched by trigrams. They,
+and databases without a search index, fall back to a plain ``icontains``
+scan of the user's uploads.
+"""
+from datetime import datetime, time, timedelta
+
+from django.db import connections
+from django.db.models.expressions import RawSQL
+from django.utils import timezone
+from django.utils.dateparse import parse_date, parse_datetime
+
+from .models import Upload
+
+FTS_TABLE = 'accounts_upload_fts'
+MIN_INDEXED_TERM = 3
+
+HISTORY_SORT_FIELDS = ('upload_date', 'filename', 'rows', 'file_size')
+DEFAULT_HISTORY_SORT = '-upload_date'
+MAX_HISTORY_PAGE_SIZE = 500
+
+HISTORY_STATUSES = tuple(value for value, _ in Upload.STATUS_CHOICES)
+
+_fts_available = {}
+
+
+class HistoryError(ValueError):
+    """Raised for malformed history search parameters"""
+
+
+def has_fts(connection):
+    """
+    Whether the SQLite filename search table and the triggers that keep it
+    in sync exist. SQLite drops the triggers when a migration rebuilds the
+    uploads table, and search then scans until they are recreated.
+    """
+    if connection.vendor != 'sqlite':
+        return False
+    if connection.alias not in _fts_available:
+        with connection.cursor() as cursor:
+            cursor.execute(
+                "SELECT COUNT(*) FROM sqlite_master WHERE name = %s OR (type = 'trigger' AND name IN (%s, %s, %s))",
+                [FTS_TABLE] + [f'{FTS_TABLE}_{suffix}' for suffix in ('ai', 'ad', 'au')],
+            )
+            _fts_available[connection.alias] = cursor.fetchone()[0] == 4
+    return _fts_available[connection.alias]
+
+
+def search_filenames(queryset, term):
+    """Uploads whose filename contains ``term``, case-insensitively"""
+    connection = connections[queryset.db]
+    if len(term) >= MIN_INDEXED_TERM and has_fts(connection):
+        phrase = '"' + term.replace('"', '""') + '"'
+        return queryset.filter(id__in=RawSQL(
+            f'SELECT rowid FROM {FTS_TABLE} WHERE {FTS_TABLE} MATCH %s', (phrase,)
+        ))
+    return queryset.filter(filename__icontains=term)
+
+
+def _parse_bound(value, name, end=False):
+    """Timezone-aware bound for a date or datetime; a plain ``end`` date covers the whole day"""
+    try:
+        day = parse_date(value)
+        stamp = None if day else parse_datetime(value)
+    except ValueError:
+        day = stamp = None
+    if day:
+        stamp = datetime.combine(day + timedelta(days=1) if end else day, time.min)
+    elif stamp is None:
+        raise HistoryError(f'{name} must be an ISO 8601 date or datetime')
+    elif end:
+        stamp += timedelta(microseconds=1)
+    if timezone.is_naive(stamp):
+        stamp = timezone.make_aware(stamp)
+    return stamp
+
+
+def filter_history(queryset, search=None, status=None, start=None, end=None, sort=None):
+    """
+    Apply filename search, a status filter, an inclusive upload date range
+    and a sort key (a field name, ``-`` prefixed for descending).
+    """
+    if search:
+        queryset = search_filenames(queryset, search.strip())
+    if status:
+        if status not in HISTORY_STATUSES:
+            raise HistoryError(f'status must be one of: {", ".join(HISTORY_STATUSES)}')
+        queryset = queryset.filter(status=status)
+    if start:
+        queryset = queryset.filter(upload_date__gte=_parse_bound(start, 'start'))
+    if end:
+        queryset = queryset.filter(upload_date__lt=_parse_bound(end, 'end', end=True))
+
+    sort = sort or DEFAULT_HISTORY_SORT
+    field = sort.lstrip('-')
+    if field not in HISTORY_SORT_FIELDS:
+        raise HistoryError(f'sort must be one of: {", ".join(HISTORY_SORT_FIELDS)} (prefix - for descending)')
+    direction = '-' if sort.startswith('-') else ''
+    return queryset.order_by(f'{direction}{field}', f'{direction}id')
+
+
+def history_query(user, params):
+    """Filtered, sorted uploads of a user and the page bounds from request query parameters"""
+    queryset = filter_history(
+        Upload.objects.filter(user=user),
+        search=params.get('search') or None,
+        status=params.get('status') or None,
+        start=params.get('start') or None,
+        end=params.get('end') or None,
+        sort=params.get('sort') or None,
+    )
+    try:
+        offset = int(params.get('offset', 0))
+        limit = int(params['limit']) if params.get('limit') else None
+    except ValueError:
+        raise HistoryError('limit and offset must be integers')
+    if offset < 0 or (limit is not None and limit < 1):
+        raise HistoryError('limit must be positive and offset must not be negative')
+    if limit is not None:
+        limit = min(limit, MAX_HISTORY_PAGE_SIZE)
+    return queryset, offset, limit
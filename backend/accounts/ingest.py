@@ -0,0 +1,524 @@
+"""
+Chunked ingest pipeline for uploaded files.
+
+The file is parsed in chunks; every chunk is appended to the columnar copy
+and folded into mergeable accumulators, so the original file is read once
+and never has to fit in memory. Order statistics and distributions are
+computed afterwards from the newly written rows of the memory-mapped
+columnar copy and merged into the accumulators.
+
+The accumulators are saved next to the columnar copy, so rows appended
+later are folded into the existing statistics without re-reading older
+rows. Only fixed-size state is saved (JSON plus an ``.npz`` of arrays); the
+time-series rollups are reloaded from the arrays already written for them.
+"""
+import datetime
+import json
+import logging
+import os
+import uuid
+import zipfile
+
+import numpy as np
+import openpyxl
+import pandas as pd
+
+from chemizer.profiling import span, timed
+
+from .analysis import (
+    CoMomentAccumulator, DistributionAccumulator, GroupByAccumulator,
+    MAX_GROUP_CARDINALITY, correlation_summary,
+)
+from .columnar import ColumnarWriter, ColumnarDataset, NUMERIC, CATEGORY, DATETIME, STRING, NAT
+from .outliers import detect_column_outliers
+from .schema import SCHEMA_SAMPLE_ROWS, TEXT_TYPES, apply_schema, infer_schema, narrow, read_options
+from .sketches import ColumnSketch
+from .timeseries import TimeSeriesAccumulator, datetime_columns
+
+try:
+    from python_calamine import CalamineWorkbook
+except ImportError:
+    CalamineWorkbook = None
+
+logger = logging.getLogger(__name__)
+
+INGEST_CHUNK_ROWS = 100_000
+PREVIEW_ROWS = 100
+STATE_NAME = 'ingest_state.json'
+STATE_VERSION = 1
+# Written by older versions; never loaded, removed on the next save
+LEGACY_STATE_NAME = 'ingest_state.pkl'
+
+ALLOWED_EXTENSIONS = ('.csv', '.xlsx', '.xls', '.csv.gz', '.csv.zst', '.zip')
+
+# Compressed CSVs are decompressed in a stream by the CSV reader itself
+COMPRESSION = {
+    '.csv': None,
+    '.csv.gz': 'gzip',
+    '.csv.zst': 'zstd',
+    '.zip': 'zip',
+}
+
+
+class AppendError(ValueError):
+    """Raised when appended rows do not fit the existing dataset"""
+
+
+class ArchiveError(ValueError):
+    """Raised when a ZIP upload does not hold exactly one CSV file"""
+
+
+def file_extension(file_name):
+    """Lower-cased extension of a file name, keeping ``.csv`` of compressed CSVs"""
+    base, ext = os.path.splitext(file_name.lower())
+    if ext in ('.gz', '.zst') and base.endswith('.csv'):
+        return '.csv' + ext
+    return ext
+
+
+def _check_archive(path):
+    with zipfile.ZipFile(path) as archive:
+        names = [info.filename for info in archive.infolist() if not info.is_dir()]
+    if len(names) != 1 or not names[0].lower().endswith('.csv'):
+        raise ArchiveError('ZIP uploads must contain exactly one CSV file')
+
+
+def _header(row):
+    """Column names of a header row, named and de-duplicated like ``read_excel``"""
+    names, seen = [], {}
+    for i, value in enumerate(row):
+        name = f'Unnamed: {i}' if value is None or value == '' else str(value)
+        if name in seen:
+            seen[name] += 1
+            name = f'{name}.{seen[name]}'
+        seen.setdefault(name, 0)
+        names.append(name)
+    return names
+
+
+def _calamine_value(value):
+    # Match openpyxl: empty cells are None, whole floats ints, dates datetimes
+    if value == '':
+        return None
+    if type(value) is float and value.is_integer():
+        return int(value)
+    if type(value) is datetime.date:
+        return datetime.datetime.combine(value, datetime.time())
+    return value
+
+
+def _sheet_rows(path):
+    """Rows of the first worksheet as lists, streamed from the workbook"""
+    if CalamineWorkbook is not None:
+        sheet = CalamineWorkbook.from_path(path).get_sheet_by_index(0)
+        for row in sheet.iter_rows():
+            yield [_calamine_value(value) for value in row]
+        return
+
+    workbook = openpyxl.load_workbook(path, read_only=True, data_only=True)
+    try:
+        for row in workbook.worksheets[0].iter_rows(values_only=True):
+            yield list(row)
+    finally:
+        workbook.close()
+
+
+def iter_excel_chunks(path, chunk_rows=INGEST_CHUNK_ROWS):
+    """
+    Yield DataFrame chunks of the first sheet of an ``.xlsx`` workbook
+    without loading it whole: calamine is used when it is installed,
+    otherwise openpyxl in read-only mode.
+    """
+    rows = _sheet_rows(path)
+    header = next(rows, None)
+    if header is None:
+        return
+    while header and header[-1] is None:
+        header.pop()
+    columns = _header(header)
+    width = len(columns)
+
+    buffer, blank, emitted = [], [], False
+    for row in rows:
+        row = (row + [None] * (width - len(row)))[:width]
+        # Blank rows only count when data follows them, like read_excel's trailing trim
+        if all(value is None for value in row):
+            blank.append(row)
+            continue
+        buffer.extend(blank)
+        blank = []
+        buffer.append(row)
+        if len(buffer) >= chunk_rows:
+            yield pd.DataFrame(buffer[:chunk_rows], columns=columns).infer_objects()
+            buffer, emitted = buffer[chunk_rows:], True
+    if buffer or not emitted:
+        yield pd.DataFrame(buffer, columns=columns).infer_objects()
+
+
+def _iter_typed_csv(path, compression, chunk_rows, schema):
+    """
+    Chunks of a CSV parsed with the dtypes of ``schema``. Should a value
+    further down the file not fit its column type, the remaining rows are
+    parsed with the reader's own type inference instead.
+    """
+    done = 0
+    try:
+        for chunk in pd.read_csv(path, chunksize=chunk_rows, compression=compression, **read_options(schema)):
+            done += len(chunk)
+            yield narrow(chunk, schema)
+        return
+    except (ValueError, TypeError, OverflowError) as e:
+        logger.warning('Typed parsing stopped, inferring numeric types for the rest', extra={'rows_parsed': done, 'error': str(e)})
+
+    # Only numeric conversions fail, so text, category and datetime columns keep their types.
+    # The file is parsed again from the top: quoted values may span lines, so the rows already
+    # yielded can only be skipped once parsed, not by line number.
+    schema = {col: kind for col, kind in schema.items() if kind in TEXT_TYPES}
+    skip = done
+    for chunk in pd.read_csv(path, chunksize=chunk_rows, compression=compression, **read_options(schema)):
+        if skip >= len(chunk):
+            skip -= len(chunk)
+            continue
+        yield chunk.iloc[skip:]
+        skip = 0
+
+
+def iter_chunks(path, file_ext, chunk_rows=INGEST_CHUNK_ROWS, schema=None):
+    """
+    Yield DataFrame chunks of a (possibly compressed) CSV or Excel file.
+
+    Column types are inferred from the first ``SCHEMA_SAMPLE_ROWS`` rows;
+    ``schema`` (``{column: type}``) overrides them for the columns it names
+    that the file has.
+    """
+    schema = schema or {}
+    if file_ext in COMPRESSION:
+        if file_ext == '.zip':
+            _check_archive(path)
+        compression = COMPRESSION[file_ext]
+        sample = pd.read_csv(path, nrows=SCHEMA_SAMPLE_ROWS, compression=compression)
+        schema = {**infer_schema(sample), **{col: kind for col, kind in schema.items() if col in sample.columns}}
+        yield from _iter_typed_csv(path, compression, chunk_rows, schema)
+        return
+
+    if file_ext == '.xlsx':
+        chunks = iter_excel_chunks(path, chunk_rows)
+    else:
+        chunks = iter([pd.read_excel(path)])
+    for i, chunk in enumerate(chunks):
+        if i == 0:
+            schema = {**infer_schema(chunk.head(SCHEMA_SAMPLE_ROWS)), **schema}
+        yield apply_schema(chunk, schema)
+
+
+def _merge_dtype(previous, current):
+    if previous is None or previous == current:
+        return current
+    dtypes = [pd.api.types.pandas_dtype(d) for d in (previous, current)]
+    if all(pd.api.types.is_integer_dtype(d) for d in dtypes):
+        return 'int64'
+    if all(pd.api.types.is_numeric_dtype(d) for d in dtypes):
+        return 'float64'
+    return 'object'
+
+
+def _describe(accumulator, index, distribution):
+    """describe()-compatible summary for one numeric column"""
+    count = int(accumulator.counts()[index])
+    if count == 0:
+        return {'count': 0, 'mean': None, 'std': None, 'min': None,
+                '25%': None, '50%': None, '75%': None, 'max': None}
+    std = accumulator.stds()[index]
+    return {
+        'count': float(count),
+        'mean': float(accumulator.means()[index]),
+        'std': None if np.isnan(std) else float(std),
+        'min': distribution.min,
+        '25%': distribution.quantile(0.25),
+        '50%': distribution.quantile(0.5),
+        '75%': distribution.quantile(0.75),
+        'max': distribution.max,
+    }
+
+
+def _label(writer, col):
+    """Display value of a sketch key of a column"""
+    if col['kind'] == CATEGORY:
+        return writer.dictionary(col['name']).__getitem__
+    if col['kind'] == DATETIME:
+        return lambda key: str(pd.Timestamp(int(key)))
+    if col['kind'] == STRING:
+        return str
+    return float
+
+
+def _pack(value, arrays):
+    """Swap every array in ``value`` for its key in ``arrays``"""
+    if isinstance(value, np.ndarray):
+        key = f'a{len(arrays)}'
+        arrays[key] = value
+        return {'array': key}
+    if isinstance(value, dict):
+        return {name: _pack(item, arrays) for name, item in value.items()}
+    if isinstance(value, list):
+        return [_pack(item, arrays) for item in value]
+    return value
+
+
+def _unpack(value, arrays):
+    if isinstance(value, dict):
+        if list(value) == ['array']:
+            return arrays[value['array']]
+        return {name: _unpack(item, arrays) for name, item in value.items()}
+    if isinstance(value, list):
+        return [_unpack(item, arrays) for item in value]
+    return value
+
+
+class IngestState:
+    """Mergeable accumulators behind the analysis fields of one upload"""
+
+    def __init__(self):
+        self.rows = 0
+        self.data_types = {}
+        self.missing_values = {}
+        self.preview = []
+        self.numeric_columns = None
+        self.comoments = None
+        self.groupers = {}
+        self.sketches = {}
+        self.distributions = {}
+        self.summary_stats = {}
+        self.outliers = {}
+        self.time_series = None
+
+    def _accumulators(self):
+        # Name-keyed accumulators are kept as [name, state] pairs so column names never become keys
+        return {
+            'comoments': self.comoments.state() if self.comoments else None,
+            'groupers': [[name, grouper.state()] for name, grouper in self.groupers.items()],
+            'sketches': [[name, sketch.state()] for name, sketch in self.sketches.items()],
+            'distributions': [[name, acc.state()] for name, acc in self.distributions.items()],
+            'time_series': self.time_series.state() if self.time_series else None,
+        }
+
+    @classmethod
+    def load(cls, directory):
+        """Saved state of a columnar copy, or None if missing, of another version or out of date"""
+        path = os.path.join(directory, STATE_NAME)
+        try:
+            with open(path) as fh:
+                saved = json.load(fh)
+        except (FileNotFoundError, ValueError):
+            return None
+        if saved.get('version') != STATE_VERSION or saved['rows'] != ColumnarDataset(directory).rows:
+            return None
+        with np.load(os.path.join(directory, saved['arrays']), allow_pickle=False) as npz:
+            accumulators = _unpack(saved['accumulators'], dict(npz))
+
+        state = cls()
+        state.rows = saved['rows']
+        state.data_types = saved['data_types']
+        state.missing_values = saved['missing_values']
+        state.preview = saved['preview']
+        state.numeric_columns = saved['numeric_columns']
+        state.summary_stats = saved['summary_stats']
+        state.outliers = saved['outliers']
+        if accumulators['comoments']:
+            state.comoments = CoMomentAccumulator.from_state(accumulators['comoments'])
+        state.groupers = {name: GroupByAccumulator.from_state(s) for name, s in accumulators['groupers']}
+        state.sketches = {name: ColumnSketch.from_state(s) for name, s in accumulators['sketches']}
+        state.distributions = {name: DistributionAccumulator.from_state(s) for name, s in accumulators['distributions']}
+        if accumulators['time_series']:
+            state.time_series = TimeSeriesAccumulator.from_state(accumulators['time_series'], directory)
+        return state
+
+    def save(self, directory):
+        """Write the arrays to a new ``.npz``, then switch the JSON over to it"""
+        path = os.path.join(directory, STATE_NAME)
+        try:
+            with open(path) as fh:
+                previous = json.load(fh).get('arrays')
+        except (FileNotFoundError, ValueError):
+            previous = None
+
+        arrays = {}
+        accumulators = _pack(self._accumulators(), arrays)
+        name = f'ingest_state_{uuid.uuid4().hex}.npz'
+        np.savez(os.path.join(directory, name), **arrays)
+        with open(path + '.tmp', 'w') as fh:
+            json.dump({
+                'version': STATE_VERSION,
+                'rows': self.rows,
+                'arrays': name,
+                'data_types': self.data_types,
+                'missing_values': self.missing_values,
+                'preview': self.preview,
+                'numeric_columns': self.numeric_columns,
+                'summary_stats': self.summary_stats,
+                'outliers': self.outliers,
+                'accumulators': accumulators,
+            }, fh)
+        os.replace(path + '.tmp', path)
+
+        for stale in (previous, LEGACY_STATE_NAME):
+            if stale:
+                try:
+                    os.remove(os.path.join(directory, stale))
+                except FileNotFoundError:
+                    pass
+
+    def update(self, chunk, encoded, writer):
+        """Fold one parsed chunk and its encoded columns into the accumulators"""
+        columns = writer.manifest['columns']
+        if self.numeric_columns is None:
+            self.numeric_columns = [col['name'] for col in columns if col['kind'] == NUMERIC]
+            self.comoments = CoMomentAccumulator(len(self.numeric_columns))
+            self.sketches = {col['name']: ColumnSketch() for col in columns}
+            if self.numeric_columns:
+                self.groupers = {
+                    col['name']: GroupByAccumulator(len(self.numeric_columns))
+                    for col in columns if col['kind'] == CATEGORY
+                }
+            time_columns = datetime_columns(chunk)
+            if time_columns:
+                self.time_series = TimeSeriesAccumulator(time_columns, self.numeric_columns)
+
+        for col, dtype in chunk.dtypes.items():
+            self.data_types[col] = _merge_dtype(self.data_types.get(col), str(dtype))
+        for name, dictionary in writer.converted.items():
+            self.sketches[name].relabel(dictionary)
+        for col in columns:
+            name, kind = col['name'], col['kind']
+            values = encoded[name]
+            if kind == NUMERIC:
+                present = ~np.isnan(values)
+            elif kind == DATETIME:
+                present = values != NAT
+            else:
+                present = values >= 0
+            self.missing_values[name] = self.missing_values.get(name, 0) + int(values.size - present.sum())
+            if kind == STRING:
+                # Plain strings are sketched by value; the stored offsets mean nothing across rows
+                keys = chunk[name].to_numpy(dtype=object)[present] if name in chunk.columns else []
+                self.sketches[name].update(np.array([str(key) for key in keys], dtype=object))
+            else:
+                self.sketches[name].update(values[present])
+
+        if len(self.preview) < PREVIEW_ROWS:
+            head = chunk.head(PREVIEW_ROWS - len(self.preview))
+            for col in head.select_dtypes(include=['datetime', 'datetimetz']).columns:
+                head[col] = head[col].astype(str).where(head[col].notna())
+            head = head.astype(object).fillna('N/A')
+            self.preview.extend(head.to_dict(orient='records'))
+
+        if self.numeric_columns:
+            block = np.column_stack([encoded[name] for name in self.numeric_columns])
+            self.comoments.update(block)
+            for name in list(self.groupers):
+                # High-cardinality columns are identifiers, not groups
+                if writer.cardinality(name) > MAX_GROUP_CARDINALITY:
+                    del self.groupers[name]
+                else:
+                    self.groupers[name].update(encoded[name], block)
+
+        if self.time_series:
+            self.time_series.update(chunk, encoded)
+
+    def finish(self, dataset, directory, start):
+        """Merge order statistics of the rows from ``start`` on and flag outliers in every row"""
+        self.rows = dataset.rows
+        column_files = {col['name']: col['file'] for col in dataset.manifest['columns']}
+        for i, name in enumerate(self.numeric_columns or []):
+            values = dataset.numeric(name)
+            distribution = self.distributions.setdefault(name, DistributionAccumulator())
+            distribution.merge(DistributionAccumulator.from_values(values[start:]))
+            self.summary_stats[name] = _describe(self.comoments, i, distribution)
+            # The fences move with the appended rows, so earlier rows are flagged again too
+            self.outliers[name] = detect_column_outliers(
+                values, self.summary_stats[name], distribution.quantiles, directory, column_files[name],
+            )
+        if self.time_series:
+            self.time_series.save(directory)
+
+    def results(self, writer):
+        """Analysis fields stored on ``Upload``"""
+        manifest = writer.manifest
+        numeric_columns = self.numeric_columns or []
+        stds = self.comoments.stds() if numeric_columns else []
+        distributions = {
+            name: self.distributions[name].summary(0.0 if np.isnan(stds[i]) else stds[i])
+            for i, name in enumerate(numeric_columns)
+        }
+        correlations = correlation_summary(numeric_columns, self.comoments) if len(numeric_columns) > 1 else {}
+        group_stats = {
+            name: {
+                'columns': numeric_columns,
+                'groups': grouper.summary(writer.dictionary(name), numeric_columns),
+            }
+            for name, grouper in self.groupers.items()
+            if 0 < writer.cardinality(name) * 2 <= manifest['rows']
+        }
+        column_profiles = {
+            col['name']: self.sketches[col['name']].summary(_label(writer, col))
+            for col in manifest['columns']
+        }
+        for name, count in writer.invalid().items():
+            column_profiles[name]['invalid'] = count
+
+        return {
+            'rows': manifest['rows'],
+            'columns': len(manifest['columns']),
+            'column_names': [col['name'] for col in manifest['columns']],
+            'data_types': self.data_types,
+            'missing_values': self.missing_values,
+            'summary_stats': self.summary_stats,
+            'distributions': distributions,
+            'correlations': correlations,
+            'group_stats': group_stats,
+            'column_profiles': column_profiles,
+            'outliers': self.outliers,
+            'time_series': self.time_series.summary() if self.time_series else {},
+            'data_preview': self.preview,
+        }
+
+
+def run_ingest(chunks, directory, append=False):
+    """
+    Stream chunks into a columnar copy at ``directory`` and return the
+    analysis fields stored on ``Upload``.
+
+    With ``append`` the rows are added to the existing copy and merged into
+    its saved accumulators; the returned fields then describe all rows.
+    """
+    state, manifest = IngestState(), None
+    if append:
+        state = IngestState.load(directory)
+        if state is None:
+            raise AppendError('Dataset has no saved statistics to append to')
+        manifest = ColumnarDataset(directory).manifest
+
+    writer = ColumnarWriter(directory, manifest)
+    start = writer.manifest['rows']
+    known = {col['name'] for col in writer.manifest['columns']}
+
+    for chunk in timed(chunks, 'parse'):
+        chunk = chunk.rename(columns=str)
+        if append:
+            unknown = [col for col in chunk.columns if col not in known]
+            if unknown:
+                raise AppendError(f'Columns not in the existing dataset: {", ".join(unknown)}')
+        with span('write'):
+            encoded = writer.append(chunk)
+        with span('stats'):
+            state.update(chunk, encoded, writer)
+
+    with span('write'):
+        writer.close()
+    invalid = writer.invalid()
+    if invalid:
+        logger.warning('Values stored as missing that did not fit their column type', extra={'invalid': invalid})
+    with span('stats'):
+        state.finish(ColumnarDataset(directory), directory, start)
+        state.save(directory)
+        return state.results(writer)
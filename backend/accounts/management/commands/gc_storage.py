@@ -0,0 +1,37 @@
+from datetime import timedelta
+
+from django.core.management.base import BaseCommand, CommandError
+
+from accounts.cleanup import GC_BATCH_SIZE, GC_MIN_AGE_SECONDS, collect_garbage
+from accounts.resumable import SESSION_MAX_AGE
+
+
+class Command(BaseCommand):
+    help = (
+        'Delete stored uploads, artifacts and upload session parts that no database row refers to. '
+        'Safe to run from cron on every node.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--dry-run', action='store_true', help='Report what would be deleted without deleting')
+        parser.add_argument('--batch-size', type=int, default=GC_BATCH_SIZE, help='Files deleted per batch')
+        parser.add_argument('--min-age', type=int, default=GC_MIN_AGE_SECONDS,
+                            help='Only delete files older than this many seconds')
+        parser.add_argument('--session-max-age', type=int, default=SESSION_MAX_AGE.days,
+                            help='Expire open upload sessions idle for this many days')
+
+    def handle(self, *args, **options):
+        if options['batch_size'] < 1:
+            raise CommandError('--batch-size must be positive')
+        totals = collect_garbage(
+            batch_size=options['batch_size'],
+            min_age=options['min_age'],
+            session_max_age=timedelta(days=options['session_max_age']),
+            dry_run=options['dry_run'],
+            log=self.stdout.write,
+        )
+        verb = 'Would reclaim' if options['dry_run'] else 'Reclaimed'
+        self.stdout.write(self.style.SUCCESS(
+            f"{verb} {totals['bytes'] / 1024 / 1024:.1f} MB: {totals['files']} files in "
+            f"{totals['batches']} batches, {totals['sessions']} expired upload sessions"
+        ))
@@ -0,0 +1,18 @@
+# Generated by Django 4.2.7 on 2026-10-19 13:16
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('accounts', '0003_upload'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='upload',
+            name='artifact_path',
+            field=models.CharField(blank=True, default='', max_length=500),
+        ),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 4.2.7 on 2026-10-19 13:17
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('accounts', '0004_upload_artifact_path'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='upload',
+            name='distributions',
+            field=models.JSONField(default=dict),
+        ),
+    ]
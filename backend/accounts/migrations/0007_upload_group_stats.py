@@ -0,0 +1,18 @@
+# Generated by Django 4.2.7 on 2026-10-19 13:23
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('accounts', '0006_upload_correlations'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='upload',
+            name='group_stats',
+            field=models.JSONField(default=dict),
+        ),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 4.2.7 on 2026-10-19 13:26
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('accounts', '0007_upload_group_stats'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='upload',
+            name='column_profiles',
+            field=models.JSONField(default=dict),
+        ),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 4.2.7 on 2026-10-19 13:28
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('accounts', '0008_upload_column_profiles'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='upload',
+            name='outliers',
+            field=models.JSONField(default=dict),
+        ),
+    ]
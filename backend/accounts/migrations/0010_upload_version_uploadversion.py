@@ -0,0 +1,47 @@
+# Generated by Django 4.2.7 on 2026-10-19 13:32
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('accounts', '0009_upload_outliers'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='upload',
+            name='version',
+            field=models.IntegerField(default=1),
+        ),
+        migrations.CreateModel(
+            name='UploadVersion',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('version', models.IntegerField()),
+                ('filename', models.CharField(max_length=255)),
+                ('file_path', models.CharField(max_length=500)),
+                ('file_size', models.BigIntegerField(default=0)),
+                ('rows_added', models.IntegerField(default=0)),
+                ('rows', models.IntegerField(default=0)),
+                ('columns', models.IntegerField(default=0)),
+                ('column_names', models.JSONField(default=list)),
+                ('data_types', models.JSONField(default=dict)),
+                ('missing_values', models.JSONField(default=dict)),
+                ('summary_stats', models.JSONField(default=dict)),
+                ('distributions', models.JSONField(default=dict)),
+                ('correlations', models.JSONField(default=dict)),
+                ('group_stats', models.JSONField(default=dict)),
+                ('column_profiles', models.JSONField(default=dict)),
+                ('outliers', models.JSONField(default=dict)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('upload', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='versions', to='accounts.upload')),
+            ],
+            options={
+                'ordering': ['version'],
+                'unique_together': {('upload', 'version')},
+            },
+        ),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 4.2.7 on 2026-10-19 13:50
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('accounts', '0011_uploadsession'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='uploadsession',
+            name='schema',
+            field=models.JSONField(default=dict),
+        ),
+    ]
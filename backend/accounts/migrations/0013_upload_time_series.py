@@ -0,0 +1,18 @@
+# Generated by Django 4.2.7 on 2026-10-19 16:05
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('accounts', '0012_uploadsession_schema'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='upload',
+            name='time_series',
+            field=models.JSONField(default=dict),
+        ),
+    ]
@@ -0,0 +1,51 @@
+# Generated by Django 4.2.7 on 2026-10-19 17:20
+
+from django.conf import settings
+from django.db import migrations, models
+from django.db.models import Count, Q, Sum
+import django.db.models.deletion
+
+
+def count_existing_uploads(apps, schema_editor):
+    Upload = apps.get_model('accounts', 'Upload')
+    StorageUsage = apps.get_model('accounts', 'StorageUsage')
+    totals = Upload.objects.values('user_id').annotate(
+        uploads=Count('id'),
+        completed=Count('id', filter=Q(status='Completed')),
+        total_bytes=Sum('file_size'),
+        total_rows=Sum('rows'),
+    )
+    StorageUsage.objects.bulk_create([
+        StorageUsage(
+            user_id=row['user_id'],
+            uploads=row['uploads'],
+            completed=row['completed'],
+            total_bytes=row['total_bytes'] or 0,
+            total_rows=row['total_rows'] or 0,
+        )
+        for row in totals
+    ])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+        ('accounts', '0013_upload_time_series'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='StorageUsage',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('uploads', models.IntegerField(default=0)),
+                ('completed', models.IntegerField(default=0)),
+                ('total_bytes', models.BigIntegerField(default=0)),
+                ('total_rows', models.BigIntegerField(default=0)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+                ('user', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, related_name='storage_usage', to=settings.AUTH_USER_MODEL)),
+            ],
+        ),
+        migrations.RunPython(count_existing_uploads, migrations.RunPython.noop),
+    ]
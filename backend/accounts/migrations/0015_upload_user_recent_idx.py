@@ -0,0 +1,17 @@
+# Generated by Django 4.2.7 on 2026-10-19 14:09
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('accounts', '0014_storageusage'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='upload',
+            index=models.Index(fields=['user', '-upload_date'], name='upload_user_recent_idx'),
+        ),
+    ]
@@ -0,0 +1,67 @@
+# Generated by Django 4.2.7 on 2026-10-19 14:11
+
+from django.db import migrations, models, transaction
+from django.db.utils import DatabaseError
+
+TRIGRAM_INDEX = 'upload_filename_trgm_idx'
+FTS_TABLE = 'accounts_upload_fts'
+
+SQLITE_FTS = [
+    f"CREATE VIRTUAL TABLE {FTS_TABLE} USING fts5("
+    f"filename, content='accounts_upload', content_rowid='id', tokenize='trigram')",
+    f"CREATE TRIGGER {FTS_TABLE}_ai AFTER INSERT ON accounts_upload BEGIN "
+    f"INSERT INTO {FTS_TABLE}(rowid, filename) VALUES (new.id, new.filename); END",
+    f"CREATE TRIGGER {FTS_TABLE}_ad AFTER DELETE ON accounts_upload BEGIN "
+    f"INSERT INTO {FTS_TABLE}({FTS_TABLE}, rowid, filename) VALUES ('delete', old.id, old.filename); END",
+    f"CREATE TRIGGER {FTS_TABLE}_au AFTER UPDATE OF filename ON accounts_upload BEGIN "
+    f"INSERT INTO {FTS_TABLE}({FTS_TABLE}, rowid, filename) VALUES ('delete', old.id, old.filename); "
+    f"INSERT INTO {FTS_TABLE}(rowid, filename) VALUES (new.id, new.filename); END",
+    f"INSERT INTO {FTS_TABLE}({FTS_TABLE}) VALUES ('rebuild')",
+]
+
+
+def create_search_index(apps, schema_editor):
+    """Trigram GIN index on PostgreSQL, trigram FTS5 table on SQLite"""
+    vendor = schema_editor.connection.vendor
+    if vendor == 'postgresql':
+        schema_editor.execute('CREATE EXTENSION IF NOT EXISTS pg_trgm')
+        schema_editor.execute(
+            f'CREATE INDEX {TRIGRAM_INDEX} ON accounts_upload USING gin (UPPER(filename::text) gin_trgm_ops)'
+        )
+    elif vendor == 'sqlite':
+        try:
+            with transaction.atomic(using=schema_editor.connection.alias):
+                for statement in SQLITE_FTS:
+                    schema_editor.execute(statement)
+        except DatabaseError:
+            # SQLite built without FTS5 or the trigram tokenizer: search scans instead
+            pass
+
+
+def drop_search_index(apps, schema_editor):
+    vendor = schema_editor.connection.vendor
+    if vendor == 'postgresql':
+        schema_editor.execute(f'DROP INDEX IF EXISTS {TRIGRAM_INDEX}')
+    elif vendor == 'sqlite':
+        for trigger in ('ai', 'ad', 'au'):
+            schema_editor.execute(f'DROP TRIGGER IF EXISTS {FTS_TABLE}_{trigger}')
+        schema_editor.execute(f'DROP TABLE IF EXISTS {FTS_TABLE}')
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('accounts', '0015_upload_user_recent_idx'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='upload',
+            index=models.Index(fields=['user', 'status', '-upload_date'], name='upload_user_status_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='upload',
+            index=models.Index(fields=['user', 'filename'], name='upload_user_filename_idx'),
+        ),
+        migrations.RunPython(create_search_index, drop_search_index),
+    ]
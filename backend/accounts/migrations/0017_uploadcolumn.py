@@ -0,0 +1,70 @@
+# Generated by Django 4.2.7 on 2026-10-19 14:13
+
+from django.conf import settings
+from django.db import migrations, models
+import django.db.models.deletion
+import re
+
+
+def _kind(dtype):
+    dtype = str(dtype or '').lower()
+    if dtype.startswith(('int', 'uint', 'float')):
+        return 'numeric'
+    if dtype.startswith('datetime'):
+        return 'datetime'
+    if dtype in ('bool', 'boolean'):
+        return 'boolean'
+    return 'text'
+
+
+def index_existing_uploads(apps, schema_editor):
+    Upload = apps.get_model('accounts', 'Upload')
+    UploadColumn = apps.get_model('accounts', 'UploadColumn')
+    uploads = Upload.objects.values_list('id', 'user_id', 'column_names', 'data_types')
+    for upload_id, user_id, column_names, data_types in uploads.iterator():
+        data_types = data_types or {}
+        UploadColumn.objects.bulk_create([
+            UploadColumn(
+                user_id=user_id,
+                upload_id=upload_id,
+                position=position,
+                name=str(name)[:255],
+                normalized=re.sub(r'[^0-9a-z]+', '_', str(name).strip().lower()).strip('_')[:255],
+                dtype=str(data_types.get(name, ''))[:50],
+                kind=_kind(data_types.get(name)),
+            )
+            for position, name in enumerate(column_names or [])
+        ])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+        ('accounts', '0016_upload_history_search'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='UploadColumn',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('position', models.IntegerField()),
+                ('name', models.CharField(max_length=255)),
+                ('normalized', models.CharField(max_length=255)),
+                ('dtype', models.CharField(blank=True, default='', max_length=50)),
+                ('kind', models.CharField(max_length=20)),
+                ('upload', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='column_index', to='accounts.upload')),
+                ('user', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='upload_columns', to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'ordering': ['upload', 'position'],
+                'indexes': [models.Index(fields=['user', 'normalized'], name='column_user_name_idx'), models.Index(fields=['user', 'kind', 'normalized'], name='column_user_kind_idx')],
+            },
+        ),
+        migrations.AddConstraint(
+            model_name='uploadcolumn',
+            constraint=models.UniqueConstraint(fields=('upload', 'position'), name='unique_upload_column_position'),
+        ),
+        migrations.RunPython(index_existing_uploads, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 4.2.7 on 2026-10-19 14:40
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('accounts', '0017_uploadcolumn'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='uploadsession',
+            name='status',
+            field=models.CharField(choices=[('Open', 'Open'), ('Processing', 'Processing'), ('Completed', 'Completed')], default='Open', max_length=20),
+        ),
+    ]
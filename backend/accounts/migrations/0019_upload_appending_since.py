@@ -0,0 +1,18 @@
+# Generated by Django 4.2.7 on 2026-10-19 14:42
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('accounts', '0018_uploadsession_processing'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='upload',
+            name='appending_since',
+            field=models.DateTimeField(blank=True, null=True),
+        ),
+    ]
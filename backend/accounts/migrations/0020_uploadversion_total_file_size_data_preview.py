@@ -0,0 +1,38 @@
+# Generated by Django 4.2.7 on 2026-10-19 15:02
+
+from django.db import migrations, models
+
+
+def fill_existing_versions(apps, schema_editor):
+    Upload = apps.get_model('accounts', 'Upload')
+    UploadVersion = apps.get_model('accounts', 'UploadVersion')
+    for upload in Upload.objects.filter(versions__isnull=False).distinct().only('id', 'data_preview').iterator():
+        total = 0
+        versions = list(UploadVersion.objects.filter(upload_id=upload.id).only('id', 'file_size', 'rows').order_by('version'))
+        for version in versions:
+            total += version.file_size
+            version.total_file_size = total
+            # Appends never change the first rows, so a version's preview is a prefix of the current one
+            version.data_preview = upload.data_preview[:version.rows]
+        UploadVersion.objects.bulk_update(versions, ['total_file_size', 'data_preview'])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('accounts', '0019_upload_appending_since'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='uploadversion',
+            name='data_preview',
+            field=models.JSONField(default=list),
+        ),
+        migrations.AddField(
+            model_name='uploadversion',
+            name='total_file_size',
+            field=models.BigIntegerField(default=0),
+        ),
+        migrations.RunPython(fill_existing_versions, migrations.RunPython.noop),
+    ]
@@ -1,9 +1,14 @@
 from django.db import models
+from django.db.models import Count, F, Q, Sum
 from django.contrib.auth.models import User
 from django.utils import timezone
 from datetime import timedelta
 import random
 import string
+
+# An append claim older than this was left by a worker that died
+APPEND_TIMEOUT = timedelta(hours=1)
+
 class EmailOTP(models.Model):
     email = models.EmailField()
     otp = models.CharField(max_length=6)
@@ -53,6 +58,7 @@ class Upload(models.Model):
     upload_id = models.CharField(max_length=100, unique=True)
     filename = models.CharField(max_length=255)
     file_path = models.CharField(max_length=500)
+    artifact_path = models.CharField(max_length=500, blank=True, default='')
 
     rows = models.IntegerField(default=0)
     columns = models.IntegerField(default=0)
@@ -62,14 +68,210 @@ class Upload(models.Model):
     data_types = models.JSONField(default=dict)
     missing_values = models.JSONField(default=dict)
     summary_stats = models.JSONField(default=dict)
+    distributions = models.JSONField(default=dict)
+    correlations = models.JSONField(default=dict)
+    group_stats = models.JSONField(default=dict)
+    column_profiles = models.JSONField(default=dict)
+    outliers = models.JSONField(default=dict)
+    time_series = models.JSONField(default=dict)
     data_preview = models.JSONField(default=list) 
 
     status = models.CharField(max_length=20, choices=STATUS_CHOICES, default='Processing')
+    version = models.IntegerField(default=1)
+    # Set while a request appends rows, so appends run one at a time without a long transaction
+    appending_since = models.DateTimeField(null=True, blank=True)
     upload_date = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
     
     class Meta:
         ordering = ['-upload_date']
+        indexes = [
+            # Recent uploads of a user, newest first
+            models.Index(fields=['user', '-upload_date'], name='upload_user_recent_idx'),
+            # History filtered by status and sorted by name
+            models.Index(fields=['user', 'status', '-upload_date'], name='upload_user_status_idx'),
+            models.Index(fields=['user', 'filename'], name='upload_user_filename_idx'),
+        ]
     
     def __str__(self):
-        return f"{self.filename} - {self.user.username}"
\ No newline at end of file
+        return f"{self.filename} - {self.user.username}"
+
+    def is_appending(self):
+        return self.appending_since is not None and timezone.now() - self.appending_since < APPEND_TIMEOUT
+
+    def snapshot(self, filename, file_path, file_size, rows_added):
+        """Record the current analysis as a new version"""
+        return UploadVersion.objects.create(
+            upload=self,
+            version=self.version,
+            filename=filename,
+            file_path=file_path,
+            file_size=file_size,
+            total_file_size=self.file_size,
+            rows_added=rows_added,
+            **{field: getattr(self, field) for field in VERSION_FIELDS}
+        )
+
+    def apply_version(self, snapshot):
+        """Show the analysis of an earlier version on this (unsaved) instance"""
+        for field in VERSION_FIELDS:
+            setattr(self, field, getattr(snapshot, field))
+        self.file_size = snapshot.total_file_size
+        self.version = snapshot.version
+
+
+# Analysis fields copied into every UploadVersion
+VERSION_FIELDS = (
+    'rows', 'columns', 'column_names', 'data_types', 'missing_values', 'summary_stats',
+    'distributions', 'correlations', 'group_stats', 'column_profiles', 'outliers', 'data_preview',
+)
+
+
+class UploadVersion(models.Model):
+    """Snapshot of an upload's analysis after each file added to it"""
+    upload = models.ForeignKey(Upload, on_delete=models.CASCADE, related_name='versions')
+    version = models.IntegerField()
+    filename = models.CharField(max_length=255)
+    file_path = models.CharField(max_length=500)
+    # Size of the file added in this version, and of all files up to it
+    file_size = models.BigIntegerField(default=0)
+    total_file_size = models.BigIntegerField(default=0)
+
+    rows_added = models.IntegerField(default=0)
+    rows = models.IntegerField(default=0)
+    columns = models.IntegerField(default=0)
+
+    column_names = models.JSONField(default=list)
+    data_types = models.JSONField(default=dict)
+    missing_values = models.JSONField(default=dict)
+    summary_stats = models.JSONField(default=dict)
+    distributions = models.JSONField(default=dict)
+    correlations = models.JSONField(default=dict)
+    group_stats = models.JSONField(default=dict)
+    column_profiles = models.JSONField(default=dict)
+    outliers = models.JSONField(default=dict)
+    data_preview = models.JSONField(default=list)
+
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        ordering = ['version']
+        unique_together = ('upload', 'version')
+
+    def __str__(self):
+        return f"{self.upload.filename} v{self.version}"
+
+
+class UploadSession(models.Model):
+    """Resumable upload of one large file, sent as numbered chunks"""
+    STATUS_CHOICES = [
+        ('Open', 'Open'),
+        ('Processing', 'Processing'),
+        ('Completed', 'Completed'),
+    ]
+
+    user = models.ForeignKey(User, on_delete=models.CASCADE, related_name='upload_sessions')
+    session_id = models.CharField(max_length=100, unique=True)
+    filename = models.CharField(max_length=255)
+    part_path = models.CharField(max_length=500)
+    total_size = models.BigIntegerField()
+    chunk_size = models.IntegerField()
+    received = models.JSONField(default=list)
+    schema = models.JSONField(default=dict)
+    status = models.CharField(max_length=20, choices=STATUS_CHOICES, default='Open')
+    upload = models.ForeignKey(Upload, on_delete=models.SET_NULL, null=True, blank=True, related_name='+')
+
+    created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        ordering = ['-created_at']
+
+    def __str__(self):
+        return f"{self.filename} ({self.session_id}) - {self.user.username}"
+
+    @property
+    def total_chunks(self):
+        return -(-self.total_size // self.chunk_size)
+
+    def chunk_length(self, index):
+        """Expected size in bytes of chunk ``index``"""
+        return min(self.chunk_size, self.total_size - index * self.chunk_size)
+
+    def missing_chunks(self):
+        received = set(self.received)
+        return [index for index in range(self.total_chunks) if index not in received]
+
+
+class StorageUsage(models.Model):
+    """Running totals of a user's uploads, changed in the same transaction as the uploads"""
+    user = models.OneToOneField(User, on_delete=models.CASCADE, related_name='storage_usage')
+    uploads = models.IntegerField(default=0)
+    completed = models.IntegerField(default=0)
+    total_bytes = models.BigIntegerField(default=0)
+    total_rows = models.BigIntegerField(default=0)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    def __str__(self):
+        return f"{self.user.username}: {self.uploads} uploads, {self.total_bytes} bytes"
+
+    @classmethod
+    def adjust(cls, user, uploads=0, completed=0, total_bytes=0, total_rows=0):
+        """Add deltas to a user's totals; call inside the transaction that changes the uploads"""
+        cls.objects.get_or_create(user=user)
+        cls.objects.filter(user=user).update(
+            uploads=F('uploads') + uploads,
+            completed=F('completed') + completed,
+            total_bytes=F('total_bytes') + total_bytes,
+            total_rows=F('total_rows') + total_rows,
+            updated_at=timezone.now(),
+        )
+
+    @classmethod
+    def record(cls, upload, sign=1):
+        """Count an upload in (``sign=1``) or out of (``sign=-1``) its user's totals"""
+        cls.adjust(
+            upload.user,
+            uploads=sign,
+            completed=sign if upload.status == 'Completed' else 0,
+            total_bytes=sign * upload.file_size,
+            total_rows=sign * upload.rows,
+        )
+
+    @classmethod
+    def recount(cls, user):
+        """Rebuild a user's totals from their uploads"""
+        totals = Upload.objects.filter(user=user).aggregate(
+            uploads=Count('id'),
+            completed=Count('id', filter=Q(status='Completed')),
+            total_bytes=Sum('file_size'),
+            total_rows=Sum('rows'),
+        )
+        usage, _ = cls.objects.update_or_create(
+            user=user, defaults={field: value or 0 for field, value in totals.items()}
+        )
+        return usage
+
+
+class UploadColumn(models.Model):
+    """One column of an upload, indexed by normalized name and type for schema search"""
+    user = models.ForeignKey(User, on_delete=models.CASCADE, related_name='upload_columns')
+    upload = models.ForeignKey(Upload, on_delete=models.CASCADE, related_name='column_index')
+    position = models.IntegerField()
+    name = models.CharField(max_length=255)
+    normalized = models.CharField(max_length=255)
+    dtype = models.CharField(max_length=50, blank=True, default='')
+    kind = models.CharField(max_length=20)
+
+    class Meta:
+        ordering = ['upload', 'position']
+        indexes = [
+            models.Index(fields=['user', 'normalized'], name='column_user_name_idx'),
+            models.Index(fields=['user', 'kind', 'normalized'], name='column_user_kind_idx'),
+        ]
+        constraints = [
+            models.UniqueConstraint(fields=['upload', 'position'], name='unique_upload_column_position'),
+        ]
+
+    def __str__(self):
+        return f"{self.name} ({self.kind}) - {self.upload_id}"
@@ -0,0 +1,177 @@
+"""
+Outlier detection over the columnar copy of an upload.
+
+Each numeric column is scanned in fixed-size blocks and every row is tested
+against three rules:
+
+* ``iqr``: outside the Tukey fences ``[Q1 - 1.5 IQR, Q3 + 1.5 IQR]``
+* ``robust_z``: modified z-score ``0.6745 (x - median) / MAD`` above 3.5
+* ``rolling_z``: z-score against the previous ``ROLLING_WINDOW`` values
+  above 3, which catches local excursions in ordered (time series) data
+
+Flagged rows are stored as a packed bitmap next to the column file, one bit
+per row, so even millions of rows cost only a few hundred kilobytes.
+"""
+import os
+
+import numpy as np
+
+from .analysis import QUANTILE_POINTS
+
+OUTLIER_BLOCK_ROWS = 1_000_000
+IQR_MULTIPLIER = 1.5
+ROBUST_Z_THRESHOLD = 3.5
+ROLLING_WINDOW = 50
+ROLLING_MIN_PERIODS = 10
+ROLLING_Z_THRESHOLD = 3.0
+OUTLIER_SAMPLE = 10
+
+METHODS = ('iqr', 'robust_z', 'rolling_z')
+
+
+def bitmap_file(column_file):
+    return os.path.splitext(column_file)[0] + '.outliers.bits'
+
+
+def robust_scale(quantiles, median):
+    """
+    MAD scaled to a standard deviation, with a mean-absolute-deviation
+    fallback. Evaluated on evenly spaced quantiles of the column, which
+    stand in for the values themselves and can be merged across appends.
+    """
+    deviation = np.abs(np.asarray(quantiles) - median)
+    mad = np.median(deviation)
+    if mad > 0:
+        return mad / 0.6745
+    mean_ad = np.mean(deviation)
+    return mean_ad * 1.2533 if mean_ad > 0 else 0.0
+
+
+def rolling_zscore(values, window=ROLLING_WINDOW, min_periods=ROLLING_MIN_PERIODS,
+                   history=None, centre=0.0):
+    """
+    z-score of every value against the mean and standard deviation of the
+    ``window`` non-missing values before it. ``history`` holds the values
+    preceding ``values`` when a column is processed block by block, and
+    ``centre`` (typically the column median) keeps the running sums precise.
+    """
+    history = np.empty(0) if history is None else np.asarray(history, dtype=np.float64)
+    values = np.asarray(values, dtype=np.float64)
+    series = np.concatenate([history, values])
+    valid = ~np.isnan(series)
+    x = np.where(valid, series - centre, 0.0)
+
+    count = np.concatenate([[0], np.cumsum(valid)])
+    total = np.concatenate([[0.0], np.cumsum(x)])
+    squares = np.concatenate([[0.0], np.cumsum(x * x)])
+
+    # Window over the previous `window` valid values, found through the valid-count prefix
+    positions = np.arange(history.size, series.size)
+    end = count[positions]
+    start_count = np.maximum(end - window, 0)
+    start = np.searchsorted(count, start_count, side='left')
+
+    n = end - count[start]
+    s = total[positions] - total[start]
+    q = squares[positions] - squares[start]
+    with np.errstate(invalid='ignore', divide='ignore'):
+        mean = s / n
+        std = np.sqrt(np.maximum(q - s * s / n, 0.0) / (n - 1))
+        z = (x[positions] - mean) / std
+    usable = valid[positions] & (n >= min_periods) & (std > 0)
+    return np.where(usable, z, np.nan)
+
+
+def detect_column_outliers(values, stats, quantiles, directory, column_file, block_rows=OUTLIER_BLOCK_ROWS):
+    """
+    Flag outliers in one numeric column, write its bitmap and return the
+    per-method counts, thresholds and a sample of the most extreme rows.
+
+    Every row is tested against the fences of the whole column, so after
+    rows are appended the column is scanned again: flags of earlier rows
+    must agree with the thresholds reported. ``quantiles`` are evenly
+    spaced quantiles of the column used for the MAD; they are computed from
+    ``values`` when not given.
+    """
+    rows = len(values)
+    if not stats.get('count'):
+        return {}
+    if quantiles is None:
+        quantiles = np.nanquantile(values, np.linspace(0, 1, QUANTILE_POINTS))
+
+    q1, q3, median = stats['25%'], stats['75%'], stats['50%']
+    iqr = q3 - q1
+    low_fence, high_fence = q1 - IQR_MULTIPLIER * iqr, q3 + IQR_MULTIPLIER * iqr
+    scale = robust_scale(quantiles, median)
+
+    counts = dict.fromkeys(METHODS, 0)
+    flagged_total = 0
+    sample_rows = np.zeros(0, dtype=np.int64)
+    sample_scores = np.zeros(0)
+    sample_methods = np.zeros(0, dtype=np.uint8)
+    bitmap = bitmap_file(column_file)
+
+    # Blocks start on byte boundaries, so packed blocks concatenate into one bitmap
+    block_rows -= block_rows % 8
+    with open(os.path.join(directory, bitmap), 'wb') as fh:
+        for block_start in range(0, rows, block_rows):
+            stop = min(block_start + block_rows, rows)
+            block = np.asarray(values[block_start:stop], dtype=np.float64)
+            history = values[max(0, block_start - ROLLING_WINDOW * 4):block_start]
+
+            with np.errstate(invalid='ignore', divide='ignore'):
+                robust = (block - median) / scale if scale > 0 else np.zeros_like(block)
+            rolling = rolling_zscore(block, history=history, centre=median)
+
+            methods = np.zeros(block.size, dtype=np.uint8)
+            masks = (
+                (block < low_fence) | (block > high_fence),
+                np.abs(robust) > ROBUST_Z_THRESHOLD,
+                np.abs(rolling) > ROLLING_Z_THRESHOLD,
+            )
+            for bit, (method, mask) in enumerate(zip(METHODS, masks)):
+                counts[method] += int(mask.sum())
+                methods |= mask.astype(np.uint8) << bit
+            flagged = methods > 0
+            flagged_total += int(flagged.sum())
+            fh.write(np.packbits(flagged).tobytes())
+
+            # Keep only the most extreme flagged rows seen so far
+            positions = np.flatnonzero(flagged)
+            sample_rows = np.concatenate([sample_rows, positions + block_start])
+            sample_scores = np.concatenate([sample_scores, np.abs(np.nan_to_num(robust[positions]))])
+            sample_methods = np.concatenate([sample_methods, methods[positions]])
+            if sample_rows.size > OUTLIER_SAMPLE:
+                keep = np.argpartition(-sample_scores, OUTLIER_SAMPLE - 1)[:OUTLIER_SAMPLE]
+                sample_rows, sample_scores, sample_methods = sample_rows[keep], sample_scores[keep], sample_methods[keep]
+
+    sample = [
+        {
+            'row': int(sample_rows[i]),
+            'value': float(values[sample_rows[i]]),
+            'methods': [method for bit, method in enumerate(METHODS) if sample_methods[i] >> bit & 1],
+        }
+        for i in np.argsort(-sample_scores, kind='stable')
+    ]
+
+    return {
+        'flagged': flagged_total,
+        'counts': counts,
+        'thresholds': {
+            'iqr_low': float(low_fence),
+            'iqr_high': float(high_fence),
+            'median': float(median),
+            'robust_scale': float(scale),
+            'robust_z': ROBUST_Z_THRESHOLD,
+            'rolling_window': ROLLING_WINDOW,
+            'rolling_z': ROLLING_Z_THRESHOLD,
+        },
+        'bitmap': bitmap,
+        'sample': sample,
+    }
+
+
+def read_outlier_rows(directory, bitmap, rows):
+    """Row positions flagged in a stored outlier bitmap"""
+    packed = np.fromfile(os.path.join(directory, bitmap), dtype=np.uint8)
+    return np.flatnonzero(np.unpackbits(packed, count=rows))
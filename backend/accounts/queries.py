@@ -0,0 +1,293 @@
+"""
+Row queries over the columnar copy of an upload.
+
+Filters are pushed down to the memory-mapped column files and evaluated in
+fixed-size blocks, so unsorted pages stop scanning as soon as enough rows
+match. Text predicates on dictionary columns are resolved against the
+dictionary first and then compared as integer codes; plain string columns
+are decoded block by block. Datetime filters compare int64 nanoseconds.
+"""
+import base64
+import json
+import operator
+
+import numpy as np
+import pandas as pd
+
+from .columnar import NUMERIC, DATETIME, STRING, NAT
+
+DEFAULT_PAGE_SIZE = 100
+MAX_PAGE_SIZE = 1000
+SCAN_BLOCK_ROWS = 1_000_000
+
+FILTER_OPERATORS = ('eq', 'ne', 'gt', 'gte', 'lt', 'lte', 'contains', 'isnull', 'notnull')
+UNARY_OPERATORS = ('isnull', 'notnull')
+TEXT_COMPARISONS = {
+    'eq': operator.eq, 'ne': operator.ne,
+    'gt': operator.gt, 'gte': operator.ge,
+    'lt': operator.lt, 'lte': operator.le,
+}
+
+
+class QueryError(ValueError):
+    """Raised for malformed row query parameters"""
+
+
+def encode_cursor(key, row):
+    payload = json.dumps({'k': key, 'r': int(row)}).encode()
+    return base64.urlsafe_b64encode(payload).decode()
+
+
+def decode_cursor(cursor):
+    try:
+        payload = json.loads(base64.urlsafe_b64decode(cursor.encode()))
+        return payload['k'], int(payload['r'])
+    except Exception:
+        raise QueryError('Invalid cursor')
+
+
+def parse_filter(spec):
+    """Parse ``column:op[:value]`` into a (column, op, value) triple"""
+    parts = spec.split(':', 2)
+    if len(parts) < 2 or parts[1] not in FILTER_OPERATORS:
+        raise QueryError(f'Invalid filter "{spec}". Use column:op:value with op in {", ".join(FILTER_OPERATORS)}')
+    column, op = parts[0], parts[1]
+    if op in UNARY_OPERATORS:
+        return column, op, None
+    if len(parts) != 3:
+        raise QueryError(f'Filter "{spec}" needs a value')
+    return column, op, parts[2]
+
+
+def _text_test(op, value):
+    """Vectorized comparison of a block of decoded strings (None where missing) with ``value``"""
+    def test(values):
+        present = np.array([v is not None for v in values], dtype=bool)
+        strings = pd.Series(values[present], dtype=object)
+        if op == 'contains':
+            matched = strings.str.contains(value, case=False, regex=False)
+        else:
+            matched = TEXT_COMPARISONS[op](strings, value)
+        mask = np.zeros(len(values), dtype=bool)
+        mask[present] = matched.to_numpy(dtype=bool)
+        return mask
+    return test
+
+
+class RowQuery:
+    """Projection, filters, sort and pagination over a ColumnarDataset"""
+
+    def __init__(self, dataset, columns=None, filters=None, sort=None,
+                 limit=DEFAULT_PAGE_SIZE, offset=0, cursor=None):
+        self.dataset = dataset
+        self.columns = columns or dataset.column_names
+        self.filters = [parse_filter(spec) for spec in (filters or [])]
+        self.descending = bool(sort and sort.startswith('-'))
+        self.sort = sort.lstrip('-') if sort else None
+        self.limit = limit
+        self.offset = offset
+        self.cursor = decode_cursor(cursor) if cursor else None
+
+        if not 1 <= self.limit <= MAX_PAGE_SIZE:
+            raise QueryError(f'limit must be between 1 and {MAX_PAGE_SIZE}')
+        if self.offset < 0:
+            raise QueryError('offset must be non-negative')
+        if self.cursor and self.offset:
+            raise QueryError('Use either offset or cursor, not both')
+
+        referenced = list(self.columns) + [f[0] for f in self.filters] + ([self.sort] if self.sort else [])
+        unknown = sorted({name for name in referenced if not dataset.has_column(name)})
+        if unknown:
+            raise QueryError(f'Unknown columns: {", ".join(unknown)}')
+
+        self._predicates = [self._compile(*f) for f in self.filters]
+
+    def _compile(self, column, op, value):
+        """Turn a filter into a function of (start, stop) -> boolean mask"""
+        kind = self.dataset.kind(column)
+
+        if kind == NUMERIC:
+            if op in UNARY_OPERATORS:
+                test = np.isnan if op == 'isnull' else (lambda v: ~np.isnan(v))
+            elif op == 'contains':
+                raise QueryError(f'contains is not supported on numeric column "{column}"')
+            else:
+                try:
+                    number = float(value)
+                except ValueError:
+                    raise QueryError(f'Filter value for numeric column "{column}" must be a number')
+                test = {
+                    'eq': lambda v: v == number,
+                    'ne': lambda v: (v != number) & ~np.isnan(v),
+                    'gt': lambda v: v > number,
+                    'gte': lambda v: v >= number,
+                    'lt': lambda v: v < number,
+                    'lte': lambda v: v <= number,
+                }[op]
+        elif kind == DATETIME:
+            if op in UNARY_OPERATORS:
+                test = (lambda v: v == NAT) if op == 'isnull' else (lambda v: v != NAT)
+            elif op == 'contains':
+                raise QueryError(f'contains is not supported on datetime column "{column}"')
+            else:
+                try:
+                    stamp = pd.Timestamp(value)
+                except ValueError:
+                    raise QueryError(f'Filter value for datetime column "{column}" must be an ISO 8601 timestamp')
+                if stamp.tzinfo is not None:
+                    stamp = stamp.tz_convert('UTC').tz_localize(None)
+                moment = stamp.value
+                test = {
+                    'eq': lambda v: v == moment,
+                    'ne': lambda v: (v != moment) & (v != NAT),
+                    'gt': lambda v: v > moment,
+                    'gte': lambda v: v >= moment,
+                    'lt': lambda v: (v < moment) & (v != NAT),
+                    'lte': lambda v: (v <= moment) & (v != NAT),
+                }[op]
+        elif kind == STRING:
+            if op in UNARY_OPERATORS:
+                test = (lambda v: v < 0) if op == 'isnull' else (lambda v: v >= 0)
+            else:
+                text = _text_test(op, value)
+                return lambda start, stop: text(self.dataset.text(column, np.arange(start, stop)))
+        else:
+            dictionary = self.dataset.dictionary(column)
+            if op == 'isnull':
+                test = lambda c: c < 0
+            elif op == 'notnull':
+                test = lambda c: c >= 0
+            elif op == 'contains':
+                needle = value.lower()
+                codes = np.array([i for i, v in enumerate(dictionary) if needle in str(v).lower()], dtype='<i4')
+                test = lambda c: np.isin(c, codes)
+            elif op in ('eq', 'ne'):
+                matches = np.flatnonzero(dictionary == value)
+                code = int(matches[0]) if matches.size else -2
+                test = (lambda c: c == code) if op == 'eq' else (lambda c: (c != code) & (c >= 0))
+            else:
+                # Range comparisons on text follow dictionary string order
+                ordered = np.array([str(v) for v in dictionary], dtype=object)
+                compare = {
+                    'gt': ordered > value,
+                    'gte': ordered >= value,
+                    'lt': ordered < value,
+                    'lte': ordered <= value,
+                }[op]
+                codes = np.flatnonzero(compare).astype('<i4')
+                test = lambda c: np.isin(c, codes)
+
+        raw = self.dataset.raw(column)
+        return lambda start, stop: test(raw[start:stop])
+
+    def _block_mask(self, start, stop):
+        mask = np.ones(stop - start, dtype=bool)
+        for predicate in self._predicates:
+            mask &= predicate(start, stop)
+            if not mask.any():
+                break
+        return mask
+
+    def _sort_keys(self, positions):
+        """Ascending sort keys where nulls always sort last"""
+        kind = self.dataset.kind(self.sort)
+        raw = np.asarray(self.dataset.raw(self.sort)[positions])
+        if kind == NUMERIC:
+            keys = raw.astype(np.float64)
+            if self.descending:
+                keys = -keys
+        elif kind == DATETIME:
+            keys = np.where(raw == NAT, np.nan, raw.astype(np.float64))
+            if self.descending:
+                keys = -keys
+        elif kind == STRING:
+            # Rank of each value among the distinct values matched, the same on every page
+            codes, _ = pd.factorize(pd.Series(self.dataset.text(self.sort, positions), dtype=object), sort=True)
+            keys = np.where(codes < 0, np.nan, codes.astype(np.float64))
+            if self.descending:
+                keys = -keys
+        else:
+            dictionary = self.dataset.dictionary(self.sort)
+            ranks = np.empty(len(dictionary) + 1, dtype=np.float64)
+            order = np.argsort(np.array([str(v) for v in dictionary], dtype=object), kind='stable')
+            ranks[order] = np.arange(len(dictionary))
+            ranks[-1] = np.nan
+            keys = ranks[raw]
+            if self.descending:
+                keys = -keys
+        return np.where(np.isnan(keys), np.inf, keys)
+
+    def _scan_unsorted(self):
+        after = self.cursor[1] if self.cursor else -1
+        skip = self.offset
+        wanted = self.limit + 1
+        found = []
+        start = after + 1
+        while start < self.dataset.rows and wanted > 0:
+            stop = min(start + SCAN_BLOCK_ROWS, self.dataset.rows)
+            positions = np.flatnonzero(self._block_mask(start, stop)) + start
+            if skip:
+                dropped = min(skip, positions.size)
+                positions = positions[dropped:]
+                skip -= dropped
+            found.append(positions[:wanted])
+            wanted -= min(wanted, positions.size)
+            start = stop
+        positions = np.concatenate(found) if found else np.empty(0, dtype=np.int64)
+        return positions, None
+
+    def _scan_sorted(self):
+        matched = [np.flatnonzero(self._block_mask(start, min(start + SCAN_BLOCK_ROWS, self.dataset.rows))) + start
+                   for start in range(0, self.dataset.rows, SCAN_BLOCK_ROWS)]
+        positions = np.concatenate(matched) if matched else np.empty(0, dtype=np.int64)
+        keys = self._sort_keys(positions)
+        total = int(positions.size)
+
+        if self.cursor:
+            last_key, last_row = self.cursor
+            last_key = np.inf if last_key is None else float(last_key)
+            after = (keys > last_key) | ((keys == last_key) & (positions > last_row))
+            positions, keys = positions[after], keys[after]
+
+        take = self.offset + self.limit + 1
+        if take < positions.size:
+            # Only the leading page needs a full ordering
+            candidates = np.argpartition(keys, take - 1)[:take]
+            boundary = keys[candidates].max()
+            candidates = np.flatnonzero(keys <= boundary)
+            positions, keys = positions[candidates], keys[candidates]
+        order = np.lexsort((positions, keys))[self.offset:self.offset + self.limit + 1]
+        return positions[order], (keys[order], total)
+
+    def execute(self):
+        if self.sort:
+            positions, (keys, total) = self._scan_sorted()
+        else:
+            positions, _ = self._scan_unsorted()
+            keys, total = None, None
+
+        has_more = positions.size > self.limit
+        positions = positions[:self.limit]
+
+        next_cursor = None
+        if has_more and positions.size:
+            last = positions.size - 1
+            key = None
+            if keys is not None:
+                key = None if np.isinf(keys[last]) else float(keys[last])
+            next_cursor = encode_cursor(key, positions[last])
+
+        values = {name: self.dataset.decode(name, positions) for name in self.columns}
+        rows = [
+            {'_row': int(position), **{name: values[name][i] for name in self.columns}}
+            for i, position in enumerate(positions)
+        ]
+        return {
+            'columns': self.columns,
+            'rows': rows,
+            'limit': self.limit,
+            'offset': self.offset,
+            'has_more': bool(has_more),
+            'next_cursor': next_cursor,
+            'total_matched': total,
+        }
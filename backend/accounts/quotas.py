@@ -0,0 +1,62 @@
+"""
+Per-user storage quotas.
+
+Limits come from the ``STORAGE_QUOTA_BYTES`` and ``STORAGE_QUOTA_UPLOADS``
+settings, where 0 means unlimited. They are checked against the user's
+``StorageUsage`` totals before a file is stored. Bytes promised to open
+resumable upload sessions count as used, so a large file is refused when
+its session is created, before any of it is sent. Each file inside a batch
+ZIP is an upload of its own and counts against the upload limit.
+"""
+from django.conf import settings
+from django.db.models import Sum
+
+from .models import StorageUsage, UploadSession
+
+
+class QuotaExceeded(Exception):
+    """Raised when storing a file would take a user over their quota"""
+
+
+def usage_for(user):
+    """The user's totals, counting bytes reserved by unfinished upload sessions"""
+    usage = StorageUsage.objects.filter(user=user).first() or StorageUsage(user=user)
+    reserved = UploadSession.objects.filter(user=user, status__in=['Open', 'Processing']).aggregate(total=Sum('total_size'))['total'] or 0
+    return usage, reserved
+
+
+def check_quota(user, incoming_bytes, incoming_uploads=1):
+    """Raise QuotaExceeded unless ``incoming_bytes`` in ``incoming_uploads`` new uploads still fit"""
+    usage, reserved = usage_for(user)
+    byte_limit = settings.STORAGE_QUOTA_BYTES
+    upload_limit = settings.STORAGE_QUOTA_UPLOADS
+
+    if byte_limit and usage.total_bytes + reserved + incoming_bytes > byte_limit:
+        available = max(byte_limit - usage.total_bytes - reserved, 0)
+        raise QuotaExceeded(
+            f'Storage quota exceeded: {incoming_bytes / 1024 / 1024:.1f} MB requested, '
+            f'{available / 1024 / 1024:.1f} MB of {byte_limit / 1024 / 1024:.1f} MB available'
+        )
+    if upload_limit and usage.uploads + incoming_uploads > upload_limit:
+        raise QuotaExceeded(f'Upload quota exceeded: at most {upload_limit} uploads are allowed')
+
+
+def usage_summary(user):
+    """Totals and quota headroom for the ``/usage/`` endpoint"""
+    usage, reserved = usage_for(user)
+    byte_limit = settings.STORAGE_QUOTA_BYTES
+    upload_limit = settings.STORAGE_QUOTA_UPLOADS
+    return {
+        'uploads': usage.uploads,
+        'completed': usage.completed,
+        'total_bytes': usage.total_bytes,
+        'total_mb': round(usage.total_bytes / (1024 * 1024), 2),
+        'total_rows': usage.total_rows,
+        'reserved_bytes': reserved,
+        'quota': {
+            'bytes': byte_limit or None,
+            'uploads': upload_limit or None,
+            'bytes_remaining': max(byte_limit - usage.total_bytes - reserved, 0) if byte_limit else None,
+            'uploads_remaining': max(upload_limit - usage.uploads, 0) if upload_limit else None,
+        },
+    }
@@ -0,0 +1,86 @@
+"""
+Resumable chunked uploads.
+
+A client opens a session for one file, then PUTs the file as numbered
+chunks of ``chunk_size`` bytes in any order (and as often as needed after a
+dropped connection). Every chunk carries its SHA-256 and is spooled from the
+request stream to a temporary file, then copied to its offset in a
+preallocated part file once verified, so the server never holds more than
+``STREAM_BLOCK`` bytes of it in memory. Once
+all chunks have arrived the session is completed and the part file is
+analyzed like a regular upload.
+"""
+import hashlib
+import os
+import shutil
+import tempfile
+from datetime import timedelta
+
+DEFAULT_CHUNK_SIZE = 8 * 1024 * 1024
+MIN_CHUNK_SIZE = 256 * 1024
+MAX_CHUNK_SIZE = 64 * 1024 * 1024
+STREAM_BLOCK = 1024 * 1024
+
+# Open sessions idle for longer are expired by the storage garbage collector
+SESSION_MAX_AGE = timedelta(days=7)
+
+
+class ChunkError(ValueError):
+    """Raised when a chunk does not match its declared size or checksum"""
+
+
+def part_path_for(username, session_id):
+    """Storage path of the part file a session is assembled into"""
+    return f'uploads/{username}/sessions/{session_id}.part'
+
+
+def allocate_part(path, total_size):
+    """Create the (sparse) part file a session's chunks are written into"""
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    with open(path, 'wb') as fh:
+        fh.truncate(total_size)
+
+
+def write_chunk(path, offset, stream, length, checksum):
+    """
+    Copy ``length`` bytes from ``stream`` to ``offset`` in the part file
+    once they match the hex SHA-256 ``checksum``. The chunk is spooled to a
+    temporary file next to the part file first, so a chunk that fails
+    verification never touches the part file, not even when an accepted
+    copy of it is already there.
+    """
+    digest = hashlib.sha256()
+    written = 0
+    with tempfile.SpooledTemporaryFile(max_size=STREAM_BLOCK, dir=os.path.dirname(path)) as spool:
+        while written < length:
+            block = stream.read(min(STREAM_BLOCK, length - written))
+            if not block:
+                break
+            digest.update(block)
+            spool.write(block)
+            written += len(block)
+        if written == length and stream.read(1):
+            written += 1
+
+        if written != length:
+            raise ChunkError(f'Expected {length} bytes, received {written}')
+        if digest.hexdigest() != checksum.lower():
+            raise ChunkError('Chunk checksum does not match')
+
+        spool.seek(0)
+        with open(path, 'r+b') as fh:
+            fh.seek(offset)
+            shutil.copyfileobj(spool, fh, STREAM_BLOCK)
+
+
+def received_ranges(session):
+    """Byte ranges ``[start, end)`` already received, merged where adjacent"""
+    ranges = []
+    for index in sorted(session.received):
+        start = index * session.chunk_size
+        end = start + session.chunk_length(index)
+        if ranges and ranges[-1][1] == start:
+            ranges[-1][1] = end
+        else:
+            ranges.append([start, end])
+    return ranges
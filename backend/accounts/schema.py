@@ -0,0 +1,188 @@
+"""
+Column schemas for typed, low-memory parsing.
+
+The schema of a file is inferred from a sample of its first rows: integer
+widths, floats that fit float32 exactly, booleans, datetimes and
+low-cardinality text (parsed as ``category``). The file is then parsed with
+those explicit dtypes, so the CSV reader neither re-infers types per chunk
+nor keeps repeated strings as separate Python objects. Users can override
+the type of any column.
+
+The CSV reader silently wraps integers that overflow int32 and rounds
+decimals to float32, so 32-bit columns are parsed at 64 bits and narrowed
+chunk by chunk, only where every value survives the cast.
+"""
+import json
+import warnings
+
+import numpy as np
+import pandas as pd
+
+try:
+    import pyarrow  # noqa: F401
+    STRING_DTYPE = 'string[pyarrow]'
+except ImportError:
+    # Python-backed strings take more memory, but text columns still stay text
+    STRING_DTYPE = 'string'
+
+SCHEMA_SAMPLE_ROWS = 10_000
+CATEGORY_MAX_DISTINCT = 1_000
+CATEGORY_MAX_RATIO = 0.5
+
+# Schema types and the dtypes they are parsed as
+SCHEMA_DTYPES = {
+    'int32': 'int64',
+    'int64': 'int64',
+    'float32': 'float64',
+    'float64': 'float64',
+    'bool': 'bool',
+    'category': 'category',
+    'datetime': None,
+    'string': STRING_DTYPE,
+}
+
+# Types whose columns are narrowed after parsing
+NARROW_DTYPES = {
+    'int32': np.int32,
+    'float32': np.float32,
+}
+
+# Types that cannot make the CSV reader fail on unexpected values
+TEXT_TYPES = ('category', 'string', 'datetime')
+
+
+class SchemaError(ValueError):
+    """Raised for a schema override that names unknown columns or types"""
+
+
+def _is_datetime(values):
+    first = values.iloc[0]
+    if not isinstance(first, str) or first.strip().isdigit():
+        return False
+    fmt = pd.tseries.api.guess_datetime_format(first)
+    if fmt is None:
+        return False
+    parsed = pd.to_datetime(values, format=fmt, errors='coerce')
+    return bool(parsed.notna().all())
+
+
+def infer_column_type(series):
+    """Schema type of one column from a sample of its values, None if all missing"""
+    values = series.dropna()
+    if values.empty:
+        return None
+    if pd.api.types.is_bool_dtype(series):
+        return 'bool'
+    if pd.api.types.is_integer_dtype(series):
+        info = np.iinfo(np.int32)
+        return 'int32' if info.min < values.min() and values.max() < info.max else 'int64'
+    if pd.api.types.is_float_dtype(series):
+        # float32 only when it holds every sampled value exactly
+        exact = np.array_equal(values.to_numpy().astype(np.float32).astype(np.float64), values.to_numpy())
+        return 'float32' if exact else 'float64'
+    if pd.api.types.is_datetime64_any_dtype(series):
+        return 'datetime'
+    if _is_datetime(values.astype(str)):
+        return 'datetime'
+    distinct = values.nunique()
+    if distinct <= CATEGORY_MAX_DISTINCT and distinct <= CATEGORY_MAX_RATIO * len(values):
+        return 'category'
+    return 'string'
+
+
+def infer_schema(sample):
+    """Schema type of every column of a sample DataFrame that has values"""
+    schema = {str(col): infer_column_type(sample[col]) for col in sample.columns}
+    return {col: kind for col, kind in schema.items() if kind}
+
+
+def schema_from_dtypes(data_types):
+    """Schema matching the dtypes recorded for an existing upload"""
+    schema = {}
+    for col, dtype in (data_types or {}).items():
+        dtype = str(dtype)
+        if dtype.lower() in ('int8', 'int16', 'int32'):
+            schema[col] = 'int32'
+        elif dtype.lower() == 'int64':
+            schema[col] = 'int64'
+        elif dtype in ('float32', 'float64', 'category'):
+            schema[col] = dtype
+        elif dtype in ('bool', 'boolean'):
+            schema[col] = 'bool'
+        elif dtype.startswith('datetime64'):
+            schema[col] = 'datetime'
+        else:
+            schema[col] = 'string'
+    return schema
+
+
+def parse_overrides(overrides, columns=None):
+    """Validate a ``{column: type}`` override, given as a dict or JSON string"""
+    if not overrides:
+        return {}
+    if isinstance(overrides, str):
+        try:
+            overrides = json.loads(overrides)
+        except ValueError:
+            raise SchemaError('Schema must be a JSON object of column types')
+    if not isinstance(overrides, dict):
+        raise SchemaError('Schema must be a JSON object of column types')
+    invalid = {col: kind for col, kind in overrides.items() if kind not in SCHEMA_DTYPES}
+    if invalid:
+        raise SchemaError(
+            f'Unknown column types: {", ".join(f"{c}={k}" for c, k in invalid.items())}. '
+            f'Allowed: {", ".join(SCHEMA_DTYPES)}'
+        )
+    if columns is not None:
+        unknown = [col for col in overrides if col not in columns]
+        if unknown:
+            raise SchemaError(f'Schema names unknown columns: {", ".join(unknown)}')
+    return {str(col): kind for col, kind in overrides.items()}
+
+
+def read_options(schema):
+    """``read_csv`` keyword arguments that parse with the dtypes of ``schema``"""
+    dtype = {col: SCHEMA_DTYPES[kind] for col, kind in schema.items() if SCHEMA_DTYPES[kind]}
+    parse_dates = [col for col, kind in schema.items() if kind == 'datetime']
+    options = {'dtype': dtype}
+    if parse_dates:
+        options['parse_dates'] = parse_dates
+    return options
+
+
+def narrow(frame, schema):
+    """Cast int32/float32 columns of a parsed chunk down where that is lossless"""
+    for col, kind in schema.items():
+        if kind not in NARROW_DTYPES or col not in frame.columns:
+            continue
+        series = frame[col]
+        if not pd.api.types.is_numeric_dtype(series) or pd.api.types.is_bool_dtype(series):
+            continue
+        if pd.api.types.is_integer_dtype(series):
+            info = np.iinfo(np.int32)
+            if series.empty or info.min <= series.min() and series.max() <= info.max:
+                frame[col] = series.astype(np.int32)
+        else:
+            values = series.to_numpy(dtype=np.float64)
+            narrowed = values.astype(np.float32)
+            if np.array_equal(narrowed.astype(np.float64), values, equal_nan=True):
+                frame[col] = narrowed
+    return frame
+
+
+def apply_schema(frame, schema):
+    """Cast an already parsed chunk (e.g. from Excel) to the dtypes of ``schema``"""
+    for col, kind in schema.items():
+        if col not in frame.columns:
+            continue
+        try:
+            with warnings.catch_warnings():
+                warnings.simplefilter('ignore')
+                if kind == 'datetime':
+                    frame[col] = pd.to_datetime(frame[col])
+                elif SCHEMA_DTYPES[kind]:
+                    frame[col] = frame[col].astype(SCHEMA_DTYPES[kind])
+        except (ValueError, TypeError, OverflowError):
+            # Values the sample did not show keep their parsed type
+            pass
+    return narrow(frame, schema)
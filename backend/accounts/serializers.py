@@ -1,6 +1,6 @@
 from rest_framework import serializers
 from django.contrib.auth.models import User
-from .models import Profile, Upload  
+from .models import Profile, Upload, UploadVersion
 
 class RegisterSerializer(serializers.Serializer):
     username = serializers.CharField(max_length=150)
@@ -51,7 +51,7 @@ class UploadSerializer(serializers.ModelSerializer):
         fields = [
             'id', 'upload_id', 'filename', 'username', 'rows', 'columns',
             'file_size', 'file_size_mb', 'column_names', 'data_types', 
-            'missing_values', 'summary_stats', 'data_preview', 'status', # ADDED data_preview
+            'missing_values', 'summary_stats', 'distributions', 'correlations', 'group_stats', 'column_profiles', 'outliers', 'time_series', 'data_preview', 'status', 'version', # ADDED data_preview
             'upload_date', 'upload_date_formatted'
         ]
         read_only_fields = ['id', 'upload_id', 'upload_date', 'user']
@@ -62,4 +62,27 @@ class UploadSerializer(serializers.ModelSerializer):
     
     def get_file_size_mb(self, obj):
         """Convert bytes to MB"""
-        return round(obj.file_size / (1024 * 1024), 2)
\ No newline at end of file
+        return round(obj.file_size / (1024 * 1024), 2)
+
+
+class UploadListSerializer(UploadSerializer):
+    """An upload as a row of the history list, without its analysis fields"""
+
+    # Analysis JSON left out of the list; querysets for it should defer these
+    DEFERRED_FIELDS = (
+        'column_names', 'data_types', 'missing_values', 'summary_stats', 'distributions', 'correlations',
+        'group_stats', 'column_profiles', 'outliers', 'time_series', 'data_preview',
+    )
+
+    class Meta(UploadSerializer.Meta):
+        fields = [
+            'id', 'upload_id', 'filename', 'username', 'rows', 'columns',
+            'file_size', 'file_size_mb', 'status', 'version',
+            'upload_date', 'upload_date_formatted'
+        ]
+
+
+class UploadVersionSerializer(serializers.ModelSerializer):
+    class Meta:
+        model = UploadVersion
+        fields = ['version', 'filename', 'file_size', 'total_file_size', 'rows_added', 'rows', 'columns', 'created_at']
@@ -0,0 +1,163 @@
+"""
+Fixed-size sketches for column cardinality and frequent values.
+
+Both sketches are updated once per ingest chunk with vectorized NumPy
+operations and can be merged, so their memory use does not grow with the
+number of rows or distinct values.
+"""
+import numpy as np
+import pandas as pd
+
+HLL_PRECISION = 12
+TOPK_CAPACITY = 64
+TOP_VALUES = 10
+
+
+class HyperLogLog:
+    """
+    HyperLogLog distinct-value estimator over 64-bit value hashes.
+
+    With ``2 ** precision`` one-byte registers (4 KiB at the default
+    precision) the relative standard error is about ``1.04 / sqrt(2 ** p)``,
+    roughly 1.6%.
+    """
+
+    def __init__(self, precision=HLL_PRECISION):
+        self.precision = precision
+        self.registers = np.zeros(1 << precision, dtype=np.uint8)
+
+    def update(self, hashes):
+        hashes = np.asarray(hashes, dtype=np.uint64)
+        if hashes.size == 0:
+            return
+        tail_bits = 64 - self.precision
+        index = (hashes >> np.uint64(tail_bits)).astype(np.int64)
+        tail = hashes & np.uint64((1 << tail_bits) - 1)
+        # The tail fits in a float64 mantissa, so frexp yields its exact bit length
+        _, bit_length = np.frexp(tail.astype(np.float64))
+        rank = np.where(tail > 0, tail_bits - bit_length + 1, tail_bits + 1).astype(np.uint8)
+        np.maximum.at(self.registers, index, rank)
+
+    def merge(self, other):
+        np.maximum(self.registers, other.registers, out=self.registers)
+
+    def estimate(self):
+        m = self.registers.size
+        alpha = 0.7213 / (1 + 1.079 / m)
+        raw = alpha * m * m / np.sum(np.ldexp(1.0, -self.registers.astype(np.int64)))
+        empty = int(np.count_nonzero(self.registers == 0))
+        if raw <= 2.5 * m and empty:
+            # Linear counting is more accurate for small cardinalities
+            return int(round(m * np.log(m / empty)))
+        return int(round(raw))
+
+
+class SpaceSaving:
+    """
+    Space-Saving heavy hitters with a fixed number of counters.
+
+    Each chunk is counted exactly with ``np.unique`` and merged in as a
+    weighted summary. Counts are upper bounds; ``count - error`` is a
+    guaranteed lower bound on the true frequency.
+    """
+
+    def __init__(self, capacity=TOPK_CAPACITY):
+        self.capacity = capacity
+        self.counts = {}
+        self.errors = {}
+        # Upper bound on the frequency of any key without a counter
+        self.floor = 0
+
+    def update(self, keys):
+        keys = np.asarray(keys)
+        if keys.size == 0:
+            return
+        values, counts = np.unique(keys, return_counts=True)
+        order = np.argsort(-counts, kind='stable')
+        other = SpaceSaving(self.capacity)
+        kept = order[:self.capacity]
+        other.counts = dict(zip(values[kept].tolist(), counts[kept].tolist()))
+        # Anything dropped from the chunk occurred at most this often
+        other.floor = int(counts[order[self.capacity]]) if order.size > self.capacity else 0
+        other.errors = {key: 0 for key in other.counts}
+        self.merge(other)
+
+    def _min_count(self):
+        if len(self.counts) < self.capacity:
+            return self.floor
+        return min(self.counts.values())
+
+    def merge(self, other):
+        own_min, other_min = self._min_count(), other._min_count()
+        counts, errors = {}, {}
+        for key in set(self.counts) | set(other.counts):
+            counts[key] = self.counts.get(key, own_min) + other.counts.get(key, other_min)
+            errors[key] = self.errors.get(key, own_min) + other.errors.get(key, other_min)
+        top = sorted(counts, key=counts.get, reverse=True)
+        kept, dropped = top[:self.capacity], top[self.capacity:]
+        self.floor = max(own_min + other_min, counts[dropped[0]] if dropped else 0)
+        self.counts = {key: counts[key] for key in kept}
+        self.errors = {key: min(errors[key], counts[key]) for key in kept}
+
+    def top(self, limit=TOP_VALUES):
+        keys = sorted(self.counts, key=self.counts.get, reverse=True)[:limit]
+        return [(key, int(self.counts[key]), int(self.errors[key])) for key in keys]
+
+
+class ColumnSketch:
+    """Distinct count and frequent values of one column"""
+
+    def __init__(self):
+        self.distinct = HyperLogLog()
+        self.frequent = SpaceSaving()
+        self.count = 0
+
+    def update(self, keys):
+        """Fold in the non-null keys (float values, dictionary codes, nanoseconds or strings) of a chunk"""
+        keys = np.asarray(keys)
+        if keys.size == 0:
+            return
+        self.count += keys.size
+        self.distinct.update(pd.util.hash_array(keys))
+        self.frequent.update(keys)
+
+    def merge(self, other):
+        self.distinct.merge(other.distinct)
+        self.frequent.merge(other.frequent)
+        self.count += other.count
+
+    def relabel(self, dictionary):
+        """Switch from dictionary codes to the values themselves as keys"""
+        self.distinct = HyperLogLog(self.distinct.precision)
+        # The dictionary holds every distinct value seen, which is all the estimator depends on
+        self.distinct.update(pd.util.hash_array(np.array(dictionary, dtype=object)))
+        self.frequent.counts = {dictionary[key]: count for key, count in self.frequent.counts.items()}
+        self.frequent.errors = {dictionary[key]: error for key, error in self.frequent.errors.items()}
+
+    def state(self):
+        """Registers plus JSON-safe counters, for ``IngestState.save``"""
+        return {
+            'count': self.count,
+            'registers': self.distinct.registers,
+            'floor': self.frequent.floor,
+            'frequent': [[key, count, self.frequent.errors[key]] for key, count in self.frequent.counts.items()],
+        }
+
+    @classmethod
+    def from_state(cls, state):
+        sketch = cls()
+        sketch.count = state['count']
+        sketch.distinct.precision = int(np.log2(state['registers'].size))
+        sketch.distinct.registers = state['registers']
+        sketch.frequent.floor = state['floor']
+        sketch.frequent.counts = {key: count for key, count, _ in state['frequent']}
+        sketch.frequent.errors = {key: error for key, _, error in state['frequent']}
+        return sketch
+
+    def summary(self, label=float, limit=TOP_VALUES):
+        """Distinct estimate and top values, with ``label`` turning a key into its display value"""
+        top_values = []
+        for key, count, error in self.frequent.top(limit):
+            top_values.append({'value': label(key), 'count': count, 'error': error})
+        distinct = min(self.distinct.estimate(), self.count)
+        return {'distinct': distinct, 'top_values': top_values}
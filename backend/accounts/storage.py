@@ -0,0 +1,307 @@
+"""
+Storage layer for uploaded files and their columnar artifacts.
+
+Everything goes through Django's ``default_storage``, so the backend is
+chosen with the ``STORAGES`` setting: the local filesystem by default, or
+any remote backend such as S3 (``django-storages``). Files are always read
+and written in blocks of ``STREAM_BLOCK`` bytes, and byte ranges can be
+read without fetching the whole file.
+
+Parsing, memory-mapping and random-access writes need real files. On the
+local filesystem these are the stored files themselves. With a remote
+backend, uploads are streamed to a temporary file while they are parsed,
+and artifact directories are mirrored into a cache under
+``STORAGE_CACHE_ROOT``. Only files that changed on either side are copied.
+"""
+import json
+import os
+import shutil
+import tempfile
+from contextlib import contextmanager
+
+import numpy as np
+from django.conf import settings
+from django.core.files import File
+from django.core.files.storage import default_storage
+
+STREAM_BLOCK = 1024 * 1024
+SYNC_INDEX = '.synced.json'
+
+
+def is_local():
+    """Whether stored files are plain files on this machine"""
+    try:
+        default_storage.path('')
+    except NotImplementedError:
+        return False
+    return True
+
+
+def cache_path(name):
+    """Node-local path for a storage name when the backend is remote"""
+    return os.path.join(settings.STORAGE_CACHE_ROOT, name)
+
+
+def save(name, content):
+    """Stream a file object to storage and return its stored name"""
+    return default_storage.save(name, content if hasattr(content, 'chunks') else File(content))
+
+
+def size(name):
+    return default_storage.size(name)
+
+
+def exists(name):
+    return default_storage.exists(name)
+
+
+def delete(name):
+    """Delete a stored file, ignoring names that do not exist"""
+    if name and default_storage.exists(name):
+        default_storage.delete(name)
+
+
+def iter_range(name, start=0, end=None, block=STREAM_BLOCK):
+    """Yield the bytes ``[start, end)`` of a stored file in blocks"""
+    if end is not None and end <= start:
+        return
+    bucket = getattr(default_storage, 'bucket', None)
+    if bucket is not None:
+        # S3-compatible backends fetch only the requested range
+        key = default_storage._normalize_name(name)
+        span = f'bytes={start}-' + ('' if end is None else str(end - 1))
+        yield from bucket.Object(key).get(Range=span)['Body'].iter_chunks(block)
+        return
+
+    with default_storage.open(name, 'rb') as fh:
+        fh.seek(start)
+        remaining = None if end is None else end - start
+        while remaining is None or remaining > 0:
+            data = fh.read(block if remaining is None else min(block, remaining))
+            if not data:
+                break
+            if remaining is not None:
+                remaining -= len(data)
+            yield data
+
+
+def read_range(name, start, end):
+    """Bytes ``[start, end)`` of a stored file"""
+    return b''.join(iter_range(name, start, end))
+
+
+def open_memmap(name, dtype, shape, offset=0):
+    """
+    Read-only array view over a stored binary file: memory-mapped on the
+    local filesystem, read as one byte range otherwise.
+    """
+    dtype = np.dtype(dtype)
+    if is_local():
+        return np.memmap(default_storage.path(name), dtype=dtype, mode='r', shape=shape, offset=offset)
+    length = int(np.prod(shape)) * dtype.itemsize
+    return np.frombuffer(read_range(name, offset, offset + length), dtype=dtype).reshape(shape)
+
+
+def _download(name, path):
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    with open(path + '.tmp', 'wb') as fh:
+        for data in iter_range(name):
+            fh.write(data)
+    os.replace(path + '.tmp', path)
+
+
+@contextmanager
+def local_path(name):
+    """Path of a readable local copy of a stored file for the duration of the block"""
+    if is_local():
+        yield default_storage.path(name)
+        return
+    suffix = os.path.basename(name)
+    fd, path = tempfile.mkstemp(suffix=f'_{suffix}', dir=_scratch_dir())
+    os.close(fd)
+    try:
+        _download(name, path)
+        yield path
+    finally:
+        os.remove(path)
+
+
+def _scratch_dir():
+    path = cache_path('tmp')
+    os.makedirs(path, exist_ok=True)
+    return path
+
+
+def _walk(prefix):
+    """Storage names of every file below a prefix"""
+    try:
+        directories, files = default_storage.listdir(prefix)
+    except FileNotFoundError:
+        return
+    for file_name in files:
+        yield f'{prefix}/{file_name}'
+    for directory in directories:
+        yield from _walk(f'{prefix}/{directory}')
+
+
+def _scan_directory(root, prefix):
+    stack = [(root, prefix)]
+    while stack:
+        directory, name = stack.pop()
+        try:
+            entries = list(os.scandir(directory))
+        except FileNotFoundError:
+            continue
+        for entry in entries:
+            if entry.is_dir(follow_symlinks=False):
+                stack.append((entry.path, f'{name}/{entry.name}'))
+            elif entry.is_file(follow_symlinks=False):
+                stat = entry.stat(follow_symlinks=False)
+                yield f'{name}/{entry.name}', stat.st_size, stat.st_mtime
+
+
+def scan(prefix):
+    """
+    Yield ``(name, size, modified timestamp)`` for every file stored below
+    ``prefix``, from one directory listing (or bucket listing) per level
+    rather than a request per file where the backend allows it.
+    """
+    if is_local():
+        yield from _scan_directory(default_storage.path(prefix), prefix)
+        return
+    bucket = getattr(default_storage, 'bucket', None)
+    if bucket is not None:
+        root = default_storage._normalize_name(prefix)
+        for obj in bucket.objects.filter(Prefix=root + '/'):
+            yield prefix + obj.key[len(root):], obj.size, obj.last_modified.timestamp()
+        return
+    for name in _walk(prefix):
+        yield name, default_storage.size(name), default_storage.get_modified_time(name).timestamp()
+
+
+def scan_cache(prefix):
+    """``scan`` over the node-local cache of a remote backend"""
+    if is_local():
+        return
+    yield from _scan_directory(cache_path(prefix), prefix)
+
+
+def prune_empty_dirs(prefix):
+    """Remove directories left empty below ``prefix`` on local disk and in the cache"""
+    roots = [cache_path(prefix)]
+    if is_local():
+        roots.append(default_storage.path(prefix))
+    for root in roots:
+        for directory, _, _ in sorted(os.walk(root), key=lambda item: -len(item[0])):
+            if directory != root and not os.listdir(directory):
+                os.rmdir(directory)
+
+
+def _read_index(directory):
+    try:
+        with open(os.path.join(directory, SYNC_INDEX)) as fh:
+            return json.load(fh)
+    except (OSError, ValueError):
+        return {}
+
+
+def _write_index(directory, index):
+    with open(os.path.join(directory, SYNC_INDEX), 'w') as fh:
+        json.dump(index, fh)
+
+
+def _local_state(path):
+    stat = os.stat(path)
+    return [stat.st_size, stat.st_mtime_ns]
+
+
+def local_dir(prefix):
+    """
+    Local directory holding the files stored below ``prefix``, e.g. an
+    artifact directory. With a remote backend the node-local mirror is
+    brought up to date first.
+    """
+    if is_local():
+        return default_storage.path(prefix)
+
+    directory = cache_path(prefix)
+    os.makedirs(directory, exist_ok=True)
+    index = _read_index(directory)
+    remote = {
+        name[len(prefix) + 1:]: default_storage.get_modified_time(name).isoformat()
+        for name in _walk(prefix)
+    }
+    for relative, modified in remote.items():
+        path = os.path.join(directory, relative)
+        entry = index.get(relative)
+        if entry and entry['remote'] == modified and os.path.exists(path):
+            continue
+        _download(f'{prefix}/{relative}', path)
+        index[relative] = {'remote': modified, 'local': _local_state(path)}
+    for relative in set(index) - set(remote):
+        # Deleted from storage since the last sync
+        del index[relative]
+        if os.path.exists(os.path.join(directory, relative)):
+            os.remove(os.path.join(directory, relative))
+    _write_index(directory, index)
+    return directory
+
+
+def publish_dir(prefix):
+    """Copy files changed in the local mirror of ``prefix`` back to storage"""
+    if is_local():
+        return
+    directory = cache_path(prefix)
+    index = _read_index(directory)
+    for root, _, files in os.walk(directory):
+        for file_name in files:
+            path = os.path.join(root, file_name)
+            relative = os.path.relpath(path, directory).replace(os.sep, '/')
+            if relative == SYNC_INDEX or file_name.endswith('.tmp'):
+                continue
+            state = _local_state(path)
+            if index.get(relative, {}).get('local') == state:
+                continue
+            name = f'{prefix}/{relative}'
+            delete(name)
+            with open(path, 'rb') as fh:
+                default_storage.save(name, File(fh))
+            index[relative] = {'remote': default_storage.get_modified_time(name).isoformat(), 'local': state}
+    _write_index(directory, index)
+
+
+def delete_dir(prefix):
+    """Remove every file stored below ``prefix`` and any local mirror of it"""
+    if not prefix:
+        return
+    if is_local():
+        directory = default_storage.path(prefix)
+        if os.path.isdir(directory):
+            shutil.rmtree(directory)
+        return
+    for name in list(_walk(prefix)):
+        default_storage.delete(name)
+    shutil.rmtree(cache_path(prefix), ignore_errors=True)
+
+
+def part_file(name):
+    """
+    Local path of a file assembled by random-access writes. Remote backends
+    cannot write at an offset, so the file is kept in the node-local cache
+    until it is complete.
+    """
+    return default_storage.path(name) if is_local() else cache_path(name)
+
+
+def store_file(path, name):
+    """Move a complete local file into storage under an available name"""
+    name = default_storage.get_available_name(name)
+    if is_local():
+        target = default_storage.path(name)
+        os.makedirs(os.path.dirname(target), exist_ok=True)
+        os.replace(path, target)
+        return name
+    with open(path, 'rb') as fh:
+        name = default_storage.save(name, File(fh))
+    os.remove(path)
+    return name
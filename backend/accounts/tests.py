@@ -0,0 +1,1000 @@
+"""
+Tests of the storage layer, storage garbage collection and the upload
+endpoints built on them.
+
+The storage cases run against the local filesystem and against S3, with
+``moto`` standing in for the bucket (``pip install 'moto[s3]'``); the S3
+cases are skipped when it is not installed.
+"""
+import hashlib
+import io
+import os
+import shutil
+import tempfile
+import unittest
+from unittest import mock
+
+import numpy as np
+import pandas as pd
+
+from django.contrib.auth.models import User
+from django.core.files.storage import default_storage
+from django.test import TestCase, override_settings
+from rest_framework.test import APIClient
+
+from . import storage
+from .analysis import (
+    CoMomentAccumulator, DistributionAccumulator, GroupByAccumulator,
+    correlation_matrix, correlation_summary, top_correlations,
+)
+from .cleanup import collect_garbage, find_orphans
+from .columnar import open_dataset
+from .history import has_fts
+from .models import StorageUsage, Upload, UploadSession
+from .ingest import iter_chunks, run_ingest
+from .outliers import read_outlier_rows
+from .quotas import QuotaExceeded, check_quota
+from .resumable import ChunkError, MIN_CHUNK_SIZE, write_chunk
+from .timeseries import RESOLUTIONS, ROLLUP_DIR, RollupAccumulator, load_rollup
+from .sketches import ColumnSketch, HyperLogLog, SpaceSaving
+from .schema import SCHEMA_SAMPLE_ROWS, SchemaError, infer_schema, parse_overrides
+
+try:
+    import boto3
+    from moto import mock_aws
+    from storages.backends.s3 import S3Storage
+except ImportError:
+    mock_aws = None
+
+BUCKET = 'chemizer-test'
+KEY_PREFIX = 'media'
+
+
+def quiet(*args):
+    pass
+
+
+class StorageTestsMixin:
+    """Cases shared by every storage backend; subclasses set up ``default_storage``"""
+
+    def put(self, name, data):
+        return storage.save(name, io.BytesIO(data))
+
+    def test_save_open_exists_delete(self):
+        name = self.put('uploads/alice/data.csv', b'a,b\n1,2\n')
+        self.assertTrue(storage.exists(name))
+        self.assertEqual(storage.size(name), 8)
+        with default_storage.open(name, 'rb') as fh:
+            self.assertEqual(fh.read(), b'a,b\n1,2\n')
+        storage.delete(name)
+        self.assertFalse(storage.exists(name))
+
+    def test_delete_ignores_missing_names(self):
+        storage.delete('uploads/alice/missing.csv')
+        storage.delete('')
+        storage.delete(None)
+
+    def test_save_keeps_existing_names(self):
+        first = self.put('uploads/alice/data.csv', b'one')
+        second = self.put('uploads/alice/data.csv', b'two')
+        self.assertNotEqual(first, second)
+        self.assertEqual(storage.read_range(first, 0, 3), b'one')
+
+    def test_read_range(self):
+        name = self.put('uploads/alice/bytes.bin', bytes(range(100)))
+        self.assertEqual(storage.read_range(name, 10, 20), bytes(range(10, 20)))
+        self.assertEqual(storage.read_range(name, 5, 5), b'')
+        self.assertEqual(b''.join(storage.iter_range(name, 90, block=4)), bytes(range(90, 100)))
+
+    def test_local_path(self):
+        name = self.put('uploads/alice/data.csv', b'x\n1\n')
+        with storage.local_path(name) as path:
+            with open(path, 'rb') as fh:
+                self.assertEqual(fh.read(), b'x\n1\n')
+
+    def test_scan_names_are_relative_to_the_storage_root(self):
+        self.put('uploads/alice/a.csv', b'12345')
+        self.put('uploads/bob/nested/b.csv', b'12')
+        self.put('artifacts/alice/u1/manifest.json', b'{}')
+        scanned = {name: size for name, size, _ in storage.scan('uploads')}
+        self.assertEqual(scanned, {'uploads/alice/a.csv': 5, 'uploads/bob/nested/b.csv': 2})
+
+    def test_publish_and_mirror_directory(self):
+        directory = storage.local_dir('artifacts/alice/u1')
+        os.makedirs(directory, exist_ok=True)
+        with open(os.path.join(directory, 'c0.bin'), 'wb') as fh:
+            fh.write(b'\x00' * 16)
+        storage.publish_dir('artifacts/alice/u1')
+        self.assertEqual(storage.size('artifacts/alice/u1/c0.bin'), 16)
+        storage.delete_dir('artifacts/alice/u1')
+        self.assertFalse(storage.exists('artifacts/alice/u1/c0.bin'))
+
+    def test_store_file(self):
+        path = os.path.join(temporary_directory(self), 'part')
+        with open(path, 'wb') as fh:
+            fh.write(b'assembled')
+        name = storage.store_file(path, 'uploads/alice/big.csv')
+        self.assertFalse(os.path.exists(path))
+        self.assertEqual(storage.read_range(name, 0, 9), b'assembled')
+
+
+class GarbageCollectionTestsMixin:
+    """``collect_garbage`` against a backend; subclasses set up ``default_storage``"""
+
+    def setUp(self):
+        super().setUp()
+        self.user = User.objects.create_user('alice', 'alice@example.com', 'password')
+
+    def put(self, name, data=b'data'):
+        return storage.save(name, io.BytesIO(data))
+
+    def test_orphans_are_deleted_and_referenced_files_kept(self):
+        kept = self.put('uploads/alice/kept.csv')
+        orphan = self.put('uploads/alice/orphan.csv')
+        part = self.put('uploads/alice/sessions/s1.part')
+        self.put('artifacts/alice/u1/manifest.json')
+        self.put('artifacts/alice/gone/manifest.json')
+        self.put('artifacts/alice/gone/c0.bin')
+        Upload.objects.create(
+            user=self.user, upload_id='u1', filename='kept.csv', file_path=kept, artifact_path='artifacts/alice/u1',
+        )
+        UploadSession.objects.create(
+            user=self.user, session_id='s1', filename='big.csv', part_path=part, total_size=4, chunk_size=4,
+        )
+
+        totals = collect_garbage(min_age=-60, log=quiet)
+
+        self.assertTrue(storage.exists(kept))
+        self.assertTrue(storage.exists(part))
+        self.assertTrue(storage.exists('artifacts/alice/u1/manifest.json'))
+        self.assertFalse(storage.exists(orphan))
+        self.assertFalse(storage.exists('artifacts/alice/gone/manifest.json'))
+        self.assertFalse(storage.exists('artifacts/alice/gone/c0.bin'))
+        self.assertEqual(totals['files'], 3)
+
+    def test_dry_run_deletes_nothing(self):
+        orphan = self.put('uploads/alice/orphan.csv')
+        totals = collect_garbage(min_age=-60, dry_run=True, log=quiet)
+        self.assertEqual(totals['files'], 1)
+        self.assertTrue(storage.exists(orphan))
+
+    def test_recent_files_are_kept(self):
+        orphan = self.put('uploads/alice/orphan.csv')
+        totals = collect_garbage(min_age=3600, log=quiet)
+        self.assertEqual(totals['files'], 0)
+        self.assertTrue(storage.exists(orphan))
+
+
+class FindOrphansTests(unittest.TestCase):
+    def test_artifact_directories_go_as_a_whole(self):
+        entries = [
+            ('uploads/a.csv', 1, 10),
+            ('uploads/b.csv', 2, 10),
+            ('uploads/young.csv', 3, 100),
+            ('artifacts/alice/old/c0.bin', 4, 10),
+            ('artifacts/alice/mixed/c0.bin', 5, 10),
+            ('artifacts/alice/mixed/c1.bin', 6, 100),
+            ('artifacts/alice/kept/c0.bin', 7, 10),
+        ]
+        orphans = set(find_orphans(entries, {'uploads/a.csv'}, {'artifacts/alice/kept'}, cutoff=50))
+        self.assertEqual(orphans, {('uploads/b.csv', 2), ('artifacts/alice/old/c0.bin', 4)})
+
+
+def temporary_directory(test):
+    path = tempfile.mkdtemp()
+    test.addCleanup(shutil.rmtree, path, ignore_errors=True)
+    return path
+
+
+class LocalStorageMixin:
+    def setUp(self):
+        self.cache = temporary_directory(self)
+        local = override_settings(MEDIA_ROOT=temporary_directory(self), STORAGE_CACHE_ROOT=self.cache)
+        local.enable()
+        self.addCleanup(local.disable)
+        super().setUp()
+
+
+class LocalStorageTests(LocalStorageMixin, StorageTestsMixin, TestCase):
+    def test_is_local(self):
+        self.assertTrue(storage.is_local())
+        self.assertEqual(storage.local_dir('artifacts/alice/u1'), default_storage.path('artifacts/alice/u1'))
+
+
+class LocalGarbageCollectionTests(LocalStorageMixin, GarbageCollectionTestsMixin, TestCase):
+    pass
+
+
+class S3StorageMixin:
+    def setUp(self):
+        credentials = mock.patch.dict(os.environ, {
+            'AWS_ACCESS_KEY_ID': 'testing', 'AWS_SECRET_ACCESS_KEY': 'testing', 'AWS_DEFAULT_REGION': 'us-east-1',
+        })
+        credentials.start()
+        self.addCleanup(credentials.stop)
+        aws = mock_aws()
+        aws.start()
+        self.addCleanup(aws.stop)
+        boto3.client('s3', region_name='us-east-1').create_bucket(Bucket=BUCKET)
+
+        # Overriding STORAGES drops its OPTIONS on Django 4.2, so the backend is swapped in directly
+        default_storage._setup()
+        self.addCleanup(setattr, default_storage, '_wrapped', default_storage._wrapped)
+        default_storage._wrapped = S3Storage(bucket_name=BUCKET, location=KEY_PREFIX, file_overwrite=False)
+
+        self.cache = temporary_directory(self)
+        cache = override_settings(STORAGE_CACHE_ROOT=self.cache)
+        cache.enable()
+        self.addCleanup(cache.disable)
+        super().setUp()
+
+    def keys(self):
+        return sorted(obj.key for obj in boto3.resource('s3', region_name='us-east-1').Bucket(BUCKET).objects.all())
+
+
+@unittest.skipUnless(mock_aws, 'moto is not installed')
+class S3StorageTests(S3StorageMixin, StorageTestsMixin, TestCase):
+    def test_is_remote(self):
+        self.assertFalse(storage.is_local())
+
+    def test_keys_carry_the_location_prefix(self):
+        name = self.put('uploads/alice/data.csv', b'a\n')
+        self.assertEqual(name, 'uploads/alice/data.csv')
+        self.assertEqual(self.keys(), [f'{KEY_PREFIX}/uploads/alice/data.csv'])
+
+    def test_artifacts_are_mirrored_into_the_cache(self):
+        self.put('artifacts/alice/u1/c0.bin', b'\x01' * 8)
+        directory = storage.local_dir('artifacts/alice/u1')
+        self.assertTrue(directory.startswith(self.cache))
+        with open(os.path.join(directory, 'c0.bin'), 'rb') as fh:
+            self.assertEqual(fh.read(), b'\x01' * 8)
+        # Files deleted from the bucket disappear from the mirror on the next sync
+        storage.delete('artifacts/alice/u1/c0.bin')
+        self.assertFalse(os.path.exists(os.path.join(storage.local_dir('artifacts/alice/u1'), 'c0.bin')))
+
+
+@unittest.skipUnless(mock_aws, 'moto is not installed')
+class S3GarbageCollectionTests(S3StorageMixin, GarbageCollectionTestsMixin, TestCase):
+    def test_orphans_in_the_cache_are_deleted(self):
+        directory = storage.cache_path('artifacts/alice/gone')
+        os.makedirs(directory)
+        with open(os.path.join(directory, 'c0.bin'), 'wb') as fh:
+            fh.write(b'stale')
+        collect_garbage(min_age=-60, log=quiet)
+        self.assertFalse(os.path.exists(os.path.join(directory, 'c0.bin')))
+
+
+def sha256(data):
+    return hashlib.sha256(data).hexdigest()
+
+
+class WriteChunkTests(unittest.TestCase):
+    def setUp(self):
+        self.path = os.path.join(temporary_directory(self), 'session.part')
+        with open(self.path, 'wb') as fh:
+            fh.write(b'a' * 8)
+
+    def read(self):
+        with open(self.path, 'rb') as fh:
+            return fh.read()
+
+    def test_verified_chunk_is_written_at_its_offset(self):
+        write_chunk(self.path, 4, io.BytesIO(b'bbbb'), 4, sha256(b'bbbb'))
+        self.assertEqual(self.read(), b'aaaabbbb')
+
+    def test_rejected_chunks_leave_the_part_file_alone(self):
+        with self.assertRaises(ChunkError):
+            write_chunk(self.path, 0, io.BytesIO(b'zzzz'), 4, sha256(b'bbbb'))
+        with self.assertRaises(ChunkError):
+            write_chunk(self.path, 0, io.BytesIO(b'zz'), 4, sha256(b'zz'))
+        with self.assertRaises(ChunkError):
+            write_chunk(self.path, 0, io.BytesIO(b'zzzzz'), 4, sha256(b'zzzz'))
+        self.assertEqual(self.read(), b'a' * 8)
+
+
+class ResumableUploadTests(LocalStorageMixin, TestCase):
+    def setUp(self):
+        super().setUp()
+        self.user = User.objects.create_user('alice', 'alice@example.com', 'password')
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+        lines = ['id,value'] + [f'{i},{i * 0.5}' for i in range(40_000)]
+        self.data = ('\n'.join(lines) + '\n').encode()
+        self.chunk_size = MIN_CHUNK_SIZE
+        response = self.client.post('/api/auth/uploads/sessions/', {
+            'filename': 'readings.csv', 'total_size': len(self.data), 'chunk_size': self.chunk_size,
+        }, format='json')
+        self.assertEqual(response.status_code, 201)
+        self.session_id = response.data['session_id']
+        self.chunks = response.data['total_chunks']
+
+    def put(self, index, data=None, checksum=None):
+        if data is None:
+            data = self.data[index * self.chunk_size:(index + 1) * self.chunk_size]
+        return self.client.generic(
+            'PUT', f'/api/auth/uploads/sessions/{self.session_id}/chunks/{index}/', data,
+            content_type='application/octet-stream', HTTP_X_CHUNK_SHA256=checksum or sha256(data),
+        )
+
+    def complete(self):
+        return self.client.post(f'/api/auth/uploads/sessions/{self.session_id}/complete/')
+
+    def test_chunks_in_any_order_assemble_the_file(self):
+        for index in reversed(range(self.chunks)):
+            self.assertEqual(self.put(index).status_code, 200)
+        response = self.complete()
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data['rows'], 40_000)
+        upload = Upload.objects.get(upload_id=response.data['upload_id'])
+        self.assertEqual(storage.read_range(upload.file_path, 0, len(self.data)), self.data)
+
+    def test_bad_resend_of_an_accepted_chunk_keeps_its_bytes(self):
+        for index in range(self.chunks):
+            self.assertEqual(self.put(index).status_code, 200)
+        garbage = b'Z' * self.chunk_size
+        self.assertEqual(self.put(0, garbage, checksum=sha256(self.data[:self.chunk_size])).status_code, 400)
+        self.assertEqual(self.put(0, b'Z' * 10).status_code, 400)
+
+        response = self.complete()
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data['column_names'], ['id', 'value'])
+        upload = Upload.objects.get(upload_id=response.data['upload_id'])
+        self.assertEqual(storage.read_range(upload.file_path, 0, len(self.data)), self.data)
+
+    def test_quota_is_checked_again_on_completion(self):
+        for index in range(self.chunks):
+            self.put(index)
+        with override_settings(STORAGE_QUOTA_BYTES=len(self.data) + 100):
+            Upload.objects.create(user=self.user, upload_id='other', filename='other.csv', file_size=200)
+            StorageUsage.recount(self.user)
+            response = self.complete()
+        self.assertEqual(response.status_code, 413)
+        self.assertEqual(UploadSession.objects.get().status, 'Open')
+        response = self.complete()
+        self.assertEqual(response.status_code, 200)
+
+    def test_missing_chunks_block_completion(self):
+        self.put(0)
+        response = self.complete()
+        self.assertEqual(response.status_code, 400)
+        self.assertFalse(Upload.objects.exists())
+
+
+def write_text(test, name, text):
+    path = os.path.join(temporary_directory(test), name)
+    with open(path, 'w') as fh:
+        fh.write(text)
+    return path
+
+
+class SchemaTests(unittest.TestCase):
+    def test_inferred_types(self):
+        sample = pd.DataFrame({
+            'small': [1, 2, 3, 4],
+            'large': [1, 2, 3, 2 ** 40],
+            'half': [0.5, 1.5, 2.5, 3.5],
+            'precise': [0.1, 0.2, 0.3, 0.4],
+            'flag': [True, False, True, True],
+            'when': ['2024-01-01 10:00', '2024-01-02 11:00', '2024-01-03 12:00', '2024-01-04 13:00'],
+            'type': ['Pump', 'Pump', 'Valve', 'Pump'],
+            'name': ['a', 'b', 'c', 'd'],
+            'empty': [None, None, None, None],
+        })
+        self.assertEqual(infer_schema(sample), {
+            'small': 'int32', 'large': 'int64', 'half': 'float32', 'precise': 'float64', 'flag': 'bool',
+            'when': 'datetime', 'type': 'category', 'name': 'string',
+        })
+
+    def test_parse_overrides(self):
+        self.assertEqual(parse_overrides('{"zip": "string"}'), {'zip': 'string'})
+        self.assertEqual(parse_overrides(None), {})
+        with self.assertRaises(SchemaError):
+            parse_overrides('not json')
+        with self.assertRaises(SchemaError):
+            parse_overrides({'zip': 'decimal'})
+        with self.assertRaises(SchemaError):
+            parse_overrides({'zip': 'string'}, columns=['id'])
+
+    def test_string_override_keeps_text(self):
+        path = write_text(self, 'sites.csv', 'zip,count\n00501,1\n02134,2\n\n90210,3\n')
+        frame = pd.concat(iter_chunks(path, '.csv', schema={'zip': 'string'}))
+        self.assertEqual(frame['zip'].tolist(), ['00501', '02134', '90210'])
+        self.assertFalse(pd.api.types.is_numeric_dtype(frame['zip']))
+
+        result = run_ingest(iter_chunks(path, '.csv', schema={'zip': 'string'}), temporary_directory(self))
+        self.assertNotIn('zip', result['summary_stats'])
+        self.assertEqual(
+            sorted(value['value'] for value in result['column_profiles']['zip']['top_values']),
+            ['00501', '02134', '90210'],
+        )
+
+    def test_narrow_types_fall_back_to_64_bits(self):
+        rows = ['id,value'] + [f'{i},{i}.25' for i in range(100)] + [f'{2 ** 40},0.1']
+        frame = pd.concat(iter_chunks(write_text(self, 'wide.csv', '\n'.join(rows)), '.csv', chunk_rows=50))
+        self.assertEqual(frame['id'].iloc[-1], 2 ** 40)
+        self.assertEqual(frame['value'].iloc[-1], 0.1)
+
+    def test_unexpected_text_is_counted_as_invalid(self):
+        # The bad value comes after the rows the schema is inferred from
+        count = SCHEMA_SAMPLE_ROWS + 100
+        rows = ['id,value'] + [f'{i},{i}' for i in range(count)] + [f'{count},"not, a number"', f'{count + 1},7']
+        path = write_text(self, 'mixed.csv', '\n'.join(rows))
+        result = run_ingest(iter_chunks(path, '.csv', chunk_rows=5000), temporary_directory(self))
+        self.assertEqual(result['rows'], count + 2)
+        self.assertEqual(result['missing_values']['value'], 1)
+        self.assertEqual(result['column_profiles']['value']['invalid'], 1)
+
+
+def readings_csv(start, rows, seed=0):
+    """CSV bytes of hourly readings from ``start``"""
+    rng = np.random.default_rng(seed)
+    frame = pd.DataFrame({
+        'Timestamp': pd.date_range(start, periods=rows, freq='h'),
+        'Type': rng.choice(['Pump', 'Valve'], rows),
+        'Flowrate': rng.normal(100, 10, rows).round(3),
+        'Pressure': rng.normal(5, 1, rows).round(3),
+    })
+    return frame.to_csv(index=False).encode()
+
+
+class UploadAPITestsMixin(LocalStorageMixin):
+    """An authenticated API client and helpers to upload and append CSV files"""
+
+    def setUp(self):
+        super().setUp()
+        self.user = User.objects.create_user('alice', 'alice@example.com', 'password')
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+
+    def upload(self, data, name='readings.csv', **extra):
+        from django.core.files.uploadedfile import SimpleUploadedFile
+        response = self.client.post(
+            '/api/auth/upload/', {'file': SimpleUploadedFile(name, data), **extra}, format='multipart'
+        )
+        self.assertEqual(response.status_code, 200, response.data)
+        return response.data
+
+    def append(self, upload_id, data, name='more.csv'):
+        from django.core.files.uploadedfile import SimpleUploadedFile
+        response = self.client.post(
+            f'/api/auth/uploads/{upload_id}/append/', {'file': SimpleUploadedFile(name, data)}, format='multipart'
+        )
+        self.assertEqual(response.status_code, 200, response.data)
+        return response.data
+
+
+class VersionedReportTests(UploadAPITestsMixin, TestCase):
+    def setUp(self):
+        super().setUp()
+        self.upload_id = self.upload(readings_csv('2024-01-01', 200))['upload_id']
+        self.append(self.upload_id, readings_csv('2024-03-01', 200, seed=1))
+
+    def report(self, **params):
+        from . import views
+        with mock.patch.object(views, 'rollup_series', wraps=views.rollup_series) as rollups:
+            response = self.client.get(f'/api/auth/reports/download/{self.upload_id}/', params)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response['Content-Type'], 'application/pdf')
+        return rollups
+
+    def test_latest_version_plots_the_rollup_timeline(self):
+        self.assertTrue(self.report().called)
+
+    def test_earlier_version_does_not_plot_later_rows(self):
+        self.assertFalse(self.report(version=1).called)
+
+
+class UploadVersionTests(UploadAPITestsMixin, TestCase):
+    def test_versions_keep_their_own_size_and_preview(self):
+        first = readings_csv('2024-01-01', 3)
+        second = readings_csv('2024-02-01', 4, seed=1)
+        upload_id = self.upload(first)['upload_id']
+        self.append(upload_id, second)
+
+        versions = self.client.get(f'/api/auth/uploads/{upload_id}/versions/').data['versions']
+        self.assertEqual([v['file_size'] for v in versions], [len(first), len(second)])
+        self.assertEqual([v['total_file_size'] for v in versions], [len(first), len(first) + len(second)])
+
+        upload = Upload.objects.get(upload_id=upload_id)
+        self.assertEqual(len(upload.data_preview), 7)
+        upload.apply_version(upload.versions.get(version=1))
+        self.assertEqual(upload.file_size, len(first))
+        self.assertEqual(upload.rows, 3)
+        self.assertEqual(len(upload.data_preview), 3)
+
+
+class AppendOutlierTests(UploadAPITestsMixin, TestCase):
+    def test_flags_follow_the_merged_fences(self):
+        upload_id = self.upload(b'value\n' + b''.join(f'{v}\n'.encode() for v in range(100)))['upload_id']
+        # The appended rows move the fences far above the first rows
+        self.append(upload_id, b'value\n' + b''.join(f'{v}\n'.encode() for v in range(1000, 1300)))
+
+        upload = Upload.objects.get(upload_id=upload_id)
+        detail = upload.outliers['value']
+        values = open_dataset(upload).numeric('value')[:upload.rows]
+        flagged = set(read_outlier_rows(storage.local_dir(upload.artifact_path), detail['bitmap'], upload.rows))
+        thresholds = detail['thresholds']
+        outside = np.flatnonzero((values < thresholds['iqr_low']) | (values > thresholds['iqr_high']))
+
+        self.assertEqual(detail['counts']['iqr'], outside.size)
+        self.assertTrue(outside.size)
+        self.assertTrue(set(outside) <= flagged)
+        self.assertEqual(detail['flagged'], len(flagged))
+
+
+class OutlierBackfillTests(UploadAPITestsMixin, TestCase):
+    def test_legacy_uploads_are_scanned_once(self):
+        from . import views
+        upload_id = self.upload(readings_csv('2024-01-01', 300))['upload_id']
+        Upload.objects.filter(upload_id=upload_id).update(outliers={})
+
+        with mock.patch.object(views, 'detect_column_outliers', wraps=views.detect_column_outliers) as detect:
+            first = self.client.get(f'/api/auth/uploads/{upload_id}/outliers/')
+            second = self.client.get(f'/api/auth/uploads/{upload_id}/outliers/')
+
+        self.assertEqual(first.status_code, 200)
+        self.assertEqual(sorted(first.data['outliers']), ['Flowrate', 'Pressure'])
+        self.assertEqual(second.data['outliers'], first.data['outliers'])
+        self.assertEqual(detect.call_count, 2)
+        self.assertEqual(sorted(Upload.objects.get(upload_id=upload_id).outliers), ['Flowrate', 'Pressure'])
+
+
+class RedactTests(unittest.TestCase):
+    def test_secret_fields_are_redacted_at_any_depth(self):
+        from chemizer.logs import REDACTED, redact
+        record = {'user': 'alice', 'password': 'x', 'headers': [{'Authorization': 'Token abc', 'X-CSRFToken': 'y'}]}
+        self.assertEqual(redact(record), {
+            'user': 'alice', 'password': REDACTED, 'headers': [{'Authorization': REDACTED, 'X-CSRFToken': REDACTED}],
+        })
+
+    def test_desktop_client_redacts_the_same_fields(self):
+        from chemizer.logs import SECRET_FIELDS
+        path = os.path.join(os.path.dirname(__file__), '..', '..', 'desktop-app', 'api', 'logs.py')
+        if not os.path.exists(path):
+            self.skipTest('desktop app is not checked out')
+        with open(path) as fh:
+            self.assertIn(f'SECRET_FIELDS = re.compile(r{SECRET_FIELDS.pattern!r}, re.I)', fh.read())
+
+
+class DistributionAccumulatorTests(unittest.TestCase):
+    def test_single_batch_is_exact(self):
+        values = np.random.default_rng(0).normal(50, 5, 5000)
+        values[::10] = np.nan
+        acc = DistributionAccumulator.from_values(values)
+        present = values[~np.isnan(values)]
+        self.assertEqual(acc.n, present.size)
+        self.assertEqual(acc.min, present.min())
+        self.assertEqual(acc.max, present.max())
+        self.assertAlmostEqual(acc.quantile(0.5), np.median(present))
+        self.assertEqual(acc.counts.sum(), present.size)
+
+    def test_merged_batches_match_the_whole_column(self):
+        rng = np.random.default_rng(1)
+        # Batches with different ranges, as when appended rows drift
+        first, second = rng.normal(0, 1, 20_000), rng.normal(3, 2, 10_000)
+        acc = DistributionAccumulator.from_values(first)
+        acc.merge(DistributionAccumulator.from_values(second))
+        combined = np.concatenate([first, second])
+
+        self.assertEqual(acc.n, combined.size)
+        self.assertEqual(acc.min, combined.min())
+        self.assertEqual(acc.max, combined.max())
+        for p in (0.05, 0.25, 0.5, 0.75, 0.95):
+            self.assertAlmostEqual(acc.quantile(p), np.quantile(combined, p), delta=0.02 * combined.std())
+        self.assertAlmostEqual(acc.counts.sum(), combined.size)
+        expected, _ = np.histogram(combined, bins=acc.edges)
+        self.assertLess(np.abs(acc.counts - expected).sum() / combined.size, 0.02)
+
+    def test_merging_empty_accumulators(self):
+        acc = DistributionAccumulator()
+        acc.merge(DistributionAccumulator.from_values([1.0, 2.0, 3.0]))
+        acc.merge(DistributionAccumulator.from_values([np.nan]))
+        self.assertEqual((acc.n, acc.min, acc.max), (3, 1.0, 3.0))
+        self.assertEqual(DistributionAccumulator().summary(1.0), {})
+
+    def test_state_round_trip(self):
+        acc = DistributionAccumulator.from_values(np.arange(100.0))
+        restored = DistributionAccumulator.from_state(acc.state())
+        restored.merge(DistributionAccumulator.from_values(np.arange(100.0, 200.0)))
+        acc.merge(DistributionAccumulator.from_values(np.arange(100.0, 200.0)))
+        np.testing.assert_array_equal(restored.quantiles, acc.quantiles)
+        np.testing.assert_array_equal(restored.counts, acc.counts)
+
+
+class CoMomentAccumulatorTests(unittest.TestCase):
+    def frame(self):
+        rng = np.random.default_rng(2)
+        x = rng.normal(100, 10, 3000)
+        frame = pd.DataFrame({'x': x, 'y': 2 * x + rng.normal(0, 5, 3000), 'z': rng.normal(0, 1, 3000)})
+        # Missing values in different rows, so every pair has its own count
+        frame.loc[::7, 'x'] = np.nan
+        frame.loc[::11, 'y'] = np.nan
+        frame.loc[::13, 'z'] = np.nan
+        return frame
+
+    def test_chunked_updates_match_pairwise_statistics(self):
+        frame = self.frame()
+        acc = CoMomentAccumulator(3)
+        for start in range(0, len(frame), 700):
+            acc.update(frame.iloc[start:start + 700].to_numpy())
+
+        np.testing.assert_array_equal(acc.counts(), frame.count().to_numpy())
+        np.testing.assert_allclose(acc.means(), frame.mean().to_numpy())
+        np.testing.assert_allclose(acc.stds(), frame.std().to_numpy())
+        np.testing.assert_allclose(acc.pearson(), frame.corr().to_numpy(), atol=1e-12)
+        np.testing.assert_allclose(acc.covariance(), frame.cov().to_numpy())
+        np.testing.assert_array_equal(acc.n, frame.notna().astype(int).T.dot(frame.notna().astype(int)).to_numpy())
+
+    def test_merged_accumulators_match_a_single_pass(self):
+        frame = self.frame().to_numpy()
+        whole = CoMomentAccumulator(3)
+        whole.update(frame)
+        first, second = CoMomentAccumulator(3), CoMomentAccumulator(3)
+        first.update(frame[:1000])
+        second.update(frame[1000:])
+        first.merge(second)
+
+        np.testing.assert_allclose(first.pearson(), whole.pearson())
+        np.testing.assert_allclose(first.covariance(), whole.covariance())
+        restored = CoMomentAccumulator.from_state(first.state())
+        np.testing.assert_array_equal(restored.pearson(), first.pearson())
+
+    def test_pairs_without_overlap_have_no_correlation(self):
+        acc = CoMomentAccumulator(2)
+        acc.update([[1.0, np.nan], [2.0, np.nan], [np.nan, 3.0], [np.nan, 4.0]])
+        self.assertTrue(np.isnan(acc.pearson()[0, 1]))
+        self.assertTrue(np.isnan(acc.covariance()[0, 1]))
+        self.assertEqual(acc.n[0, 1], 0)
+
+    def test_condensed_summary_round_trip(self):
+        frame = self.frame()
+        acc = CoMomentAccumulator(3)
+        acc.update(frame.to_numpy())
+        summary = correlation_summary(frame.columns, acc)
+
+        self.assertEqual(summary['columns'], ['x', 'y', 'z'])
+        self.assertEqual(len(summary['pearson']), 3)
+        self.assertEqual(summary['pair_counts'][0], int(frame[['x', 'y']].dropna().shape[0]))
+        columns, matrix = correlation_matrix(summary)
+        self.assertEqual(columns, ['x', 'y', 'z'])
+        np.testing.assert_allclose(matrix, frame.corr().to_numpy(), atol=1e-4)
+
+        top = top_correlations(summary, limit=1)
+        self.assertEqual([pair[:2] for pair in top], [('x', 'y')])
+        self.assertAlmostEqual(top[0][2], frame['x'].corr(frame['y']), places=4)
+
+
+class GroupByAccumulatorTests(unittest.TestCase):
+    def frame(self):
+        rng = np.random.default_rng(3)
+        codes = rng.integers(-1, 4, 5000)
+        frame = pd.DataFrame({'code': codes, 'a': rng.normal(10, 2, 5000), 'b': rng.exponential(3, 5000)})
+        frame.loc[::9, 'a'] = np.nan
+        return frame
+
+    def assert_matches_groupby(self, acc, frame):
+        labels = ['w', 'x', 'y', 'z']
+        groups = acc.summary(labels, ['a', 'b'])
+        self.assertEqual([g['rows'] for g in groups], frame['code'].value_counts().tolist())
+        for group in groups:
+            code = -1 if group['group'] is None else labels.index(group['group'])
+            rows = frame[frame['code'] == code]
+            self.assertEqual(group['rows'], len(rows))
+            for name in ('a', 'b'):
+                stats = group['stats'][name]
+                self.assertEqual(stats['count'], rows[name].count())
+                self.assertAlmostEqual(stats['mean'], rows[name].mean())
+                self.assertAlmostEqual(stats['std'], rows[name].std())
+                self.assertEqual(stats['min'], rows[name].min())
+                self.assertEqual(stats['max'], rows[name].max())
+
+    def test_chunked_updates_match_pandas_groupby(self):
+        frame = self.frame()
+        acc = GroupByAccumulator(2)
+        for start in range(0, len(frame), 800):
+            chunk = frame.iloc[start:start + 800]
+            acc.update(chunk['code'].to_numpy(), chunk[['a', 'b']].to_numpy())
+        self.assert_matches_groupby(acc, frame)
+
+    def test_merge_grows_to_codes_seen_later(self):
+        frame = self.frame()
+        # The first half never sees the last dictionary code
+        first, second = frame[frame['code'] < 3], frame[frame['code'] == 3]
+        acc, other = GroupByAccumulator(2), GroupByAccumulator(2)
+        acc.update(first['code'].to_numpy(), first[['a', 'b']].to_numpy())
+        other.update(second['code'].to_numpy(), second[['a', 'b']].to_numpy())
+        acc.merge(other)
+        self.assert_matches_groupby(GroupByAccumulator.from_state(acc.state()), frame)
+
+    def test_columns_missing_in_a_group(self):
+        acc = GroupByAccumulator(1)
+        acc.update([0, 0, 1], [[np.nan], [np.nan], [5.0]])
+        groups = acc.summary(['p', 'q'], ['a'])
+        self.assertEqual(groups[0]['group'], 'p')
+        self.assertEqual(groups[0]['stats']['a'], {'count': 0, 'mean': None, 'std': None, 'min': None, 'max': None})
+        self.assertEqual(groups[1]['stats']['a']['std'], None)
+        self.assertEqual(groups[1]['stats']['a']['mean'], 5.0)
+
+
+class SketchTests(unittest.TestCase):
+    def hashes(self, values):
+        return pd.util.hash_array(np.asarray(values))
+
+    def test_distinct_estimates_stay_within_the_error_bound(self):
+        for distinct in (10, 1000, 200_000):
+            hll = HyperLogLog()
+            hll.update(self.hashes(np.arange(distinct, dtype=np.int64)))
+            # Repeated values do not change the estimate
+            hll.update(self.hashes(np.arange(distinct // 2, dtype=np.int64)))
+            self.assertLess(abs(hll.estimate() - distinct) / distinct, 0.05, distinct)
+
+    def test_merged_estimators_count_the_union(self):
+        first, second = HyperLogLog(), HyperLogLog()
+        first.update(self.hashes(np.arange(0, 60_000, dtype=np.int64)))
+        second.update(self.hashes(np.arange(40_000, 100_000, dtype=np.int64)))
+        whole = HyperLogLog()
+        whole.update(self.hashes(np.arange(100_000, dtype=np.int64)))
+        first.merge(second)
+        np.testing.assert_array_equal(first.registers, whole.registers)
+
+    def test_frequent_values_bound_the_true_counts(self):
+        rng = np.random.default_rng(4)
+        keys = rng.zipf(1.5, 50_000) % 5000
+        truth = pd.Series(keys).value_counts()
+        sketch = SpaceSaving(capacity=32)
+        for start in range(0, keys.size, 5000):
+            sketch.update(keys[start:start + 5000])
+
+        top = sketch.top(5)
+        self.assertEqual([key for key, _, _ in top], truth.index[:5].tolist())
+        for key, count, error in sketch.top(32):
+            self.assertGreaterEqual(count, truth[key])
+            self.assertLessEqual(count - error, truth[key])
+        missing = truth.drop(list(sketch.counts), errors='ignore')
+        self.assertLessEqual(missing.max(), sketch.floor)
+
+    def test_merged_summaries_keep_the_bounds(self):
+        rng = np.random.default_rng(5)
+        keys = rng.zipf(1.3, 40_000) % 1000
+        truth = pd.Series(keys).value_counts()
+        first, second = SpaceSaving(capacity=16), SpaceSaving(capacity=16)
+        first.update(keys[:25_000])
+        second.update(keys[25_000:])
+        first.merge(second)
+        for key, count, error in first.top(16):
+            self.assertGreaterEqual(count, truth[key])
+            self.assertLessEqual(count - error, truth[key])
+        self.assertEqual(first.top(1)[0][0], truth.index[0])
+
+    def test_column_sketch_state_and_relabel(self):
+        dictionary = ['Pump', 'Valve', 'Tank']
+        sketch = ColumnSketch()
+        sketch.update(np.array([0, 0, 0, 1, 1, 2], dtype=np.int32))
+        restored = ColumnSketch.from_state(sketch.state())
+        restored.merge(ColumnSketch())
+        self.assertEqual(restored.summary(int), sketch.summary(int))
+
+        restored.relabel(dictionary)
+        summary = restored.summary(str)
+        self.assertEqual(summary['distinct'], 3)
+        self.assertEqual(summary['top_values'][0], {'value': 'Pump', 'count': 3, 'error': 0})
+        self.assertEqual([v['value'] for v in summary['top_values']], dictionary)
+
+
+class RowQueryTests(UploadAPITestsMixin, TestCase):
+    def setUp(self):
+        super().setUp()
+        rng = np.random.default_rng(6)
+        self.frame = pd.DataFrame({
+            'Type': rng.choice(['Pump', 'Valve', 'Tank'], 500),
+            # Few distinct values, so pages split runs of equal sort keys
+            'Level': rng.integers(0, 20, 500).astype(float),
+        })
+        self.frame.loc[::17, 'Level'] = np.nan
+        self.upload_id = self.upload(self.frame.to_csv(index=False).encode())['upload_id']
+
+    def pages(self, **params):
+        rows, cursor = [], None
+        while True:
+            query = {**params, **({'cursor': cursor} if cursor else {})}
+            response = self.client.get(f'/api/auth/uploads/{self.upload_id}/rows/', query)
+            self.assertEqual(response.status_code, 200, response.data)
+            rows += response.data['rows']
+            cursor = response.data['next_cursor']
+            self.assertEqual(response.data['has_more'], cursor is not None)
+            if not cursor:
+                return rows, response.data
+
+    def test_cursor_pages_follow_the_sort_order(self):
+        rows, last = self.pages(sort='-Level', limit=30)
+        expected = self.frame.sort_values('Level', ascending=False, kind='stable', na_position='last')
+        self.assertEqual([row['_row'] for row in rows], expected.index.tolist())
+        self.assertEqual(last['total_matched'], 500)
+
+    def test_filtered_pages_without_sort_follow_row_order(self):
+        from . import queries
+        # Small scan blocks, so matches are collected across block boundaries
+        with mock.patch.object(queries, 'SCAN_BLOCK_ROWS', 64):
+            rows, _ = self.pages(filter=['Type:eq:Pump', 'Level:gte:10'], limit=25)
+        expected = self.frame[(self.frame['Type'] == 'Pump') & (self.frame['Level'] >= 10)]
+        self.assertEqual([row['_row'] for row in rows], expected.index.tolist())
+        self.assertTrue(all(row['Type'] == 'Pump' for row in rows))
+
+    def test_sorted_text_pages_put_nulls_last(self):
+        rows, _ = self.pages(sort='Type', columns='Type', filter='Level:isnull', limit=7)
+        expected = self.frame[self.frame['Level'].isna()].sort_values('Type', kind='stable')
+        self.assertEqual([row['_row'] for row in rows], expected.index.tolist())
+        self.assertEqual(list(rows[0]), ['_row', 'Type'])
+
+    def test_offset_and_cursor_are_exclusive(self):
+        response = self.client.get(f'/api/auth/uploads/{self.upload_id}/rows/', {'sort': 'Level', 'limit': 10})
+        cursor = response.data['next_cursor']
+        response = self.client.get(f'/api/auth/uploads/{self.upload_id}/rows/', {'cursor': cursor, 'offset': 5})
+        self.assertEqual(response.status_code, 400)
+        response = self.client.get(f'/api/auth/uploads/{self.upload_id}/rows/', {'sort': 'Missing'})
+        self.assertEqual(response.data, {'error': 'Unknown columns: Missing'})
+
+
+class RollupAccumulatorTests(unittest.TestCase):
+    def test_chunks_out_of_order_match_a_resample(self):
+        rng = np.random.default_rng(7)
+        stamps = pd.date_range('2024-01-01', periods=3000, freq='7min')
+        frame = pd.DataFrame({'a': rng.normal(0, 1, 3000), 'b': rng.normal(5, 2, 3000)}, index=stamps)
+        frame.iloc[::5, 1] = np.nan
+        rollup = RollupAccumulator(2, RESOLUTIONS['hour'])
+        # Time-ordered chunks share their boundary buckets; the last one goes back in time
+        for part in (frame.iloc[1000:1500], frame.iloc[1500:3000], frame.iloc[:1000]):
+            rollup.update(part.index.as_unit('ns').asi8, part.to_numpy())
+        directory = temporary_directory(self)
+        rollup.save(os.path.join(directory, ROLLUP_DIR, 'hour'))
+
+        arrays = load_rollup(directory, 'hour')
+        expected = frame.resample('h')
+        np.testing.assert_array_equal(arrays['buckets'], expected.size().index.as_unit('ns').asi8)
+        np.testing.assert_array_equal(arrays['rows'], expected.size().to_numpy())
+        np.testing.assert_array_equal(arrays['count'], expected.count().to_numpy())
+        np.testing.assert_allclose(arrays['mean'], expected.mean().to_numpy())
+        np.testing.assert_array_equal(arrays['min'], expected.min().to_numpy())
+        np.testing.assert_array_equal(arrays['max'], expected.max().to_numpy())
+
+        reloaded = RollupAccumulator.load(os.path.join(directory, ROLLUP_DIR, 'hour'), RESOLUTIONS['hour'])
+        self.assertEqual(len(reloaded), len(rollup))
+        np.testing.assert_allclose(reloaded.sum, rollup.sum)
+
+
+class TimeSeriesAPITests(UploadAPITestsMixin, TestCase):
+    def setUp(self):
+        super().setUp()
+        self.first, self.second = readings_csv('2024-01-01', 200), readings_csv('2024-03-01', 100, seed=1)
+        self.upload_id = self.upload(self.first)['upload_id']
+        self.append(self.upload_id, self.second)
+        self.frame = pd.concat([pd.read_csv(io.BytesIO(data), parse_dates=['Timestamp']) for data in (self.first, self.second)])
+
+    def series(self, **params):
+        response = self.client.get(f'/api/auth/uploads/{self.upload_id}/timeseries/', params)
+        self.assertEqual(response.status_code, 200, response.data)
+        return response.data
+
+    def test_daily_rollups_include_appended_rows(self):
+        result = self.series(resolution='day', columns='Flowrate')
+        daily = self.frame.set_index('Timestamp')['Flowrate'].resample('D')
+        counts = daily.count()
+        expected = daily.mean()[counts > 0]
+
+        self.assertEqual(result['resolution'], 'day')
+        self.assertEqual(list(result['series']), ['Flowrate'])
+        self.assertEqual(result['timestamps'], [stamp.isoformat() for stamp in expected.index])
+        self.assertEqual(sum(result['rows']), 300)
+        np.testing.assert_allclose(result['series']['Flowrate']['mean'], expected.to_numpy())
+
+    def test_auto_resolution_fits_the_range_in_the_points(self):
+        # Hourly readings fill as many minute buckets as hour buckets
+        result = self.series(start='2024-01-02', end='2024-01-03T23:59:59', points=100)
+        self.assertEqual(result['resolution'], 'minute')
+        self.assertEqual(len(result['timestamps']), 48)
+        self.assertEqual(result['timestamps'][0], '2024-01-02T00:00:00')
+        self.assertEqual(self.series(points=100)['resolution'], 'day')
+
+        coarse = self.series(resolution='hour', points=10)
+        self.assertLessEqual(len(coarse['timestamps']), 10)
+        self.assertEqual(sum(coarse['rows']), 300)
+        self.assertEqual(coarse['series']['Pressure']['max'][0], self.frame['Pressure'][:coarse['bucket_size']].max())
+
+    def test_unknown_columns_and_resolutions_are_rejected(self):
+        for params in ({'columns': 'Type'}, {'resolution': 'week'}, {'start': 'soon'}):
+            response = self.client.get(f'/api/auth/uploads/{self.upload_id}/timeseries/', params)
+            self.assertEqual(response.status_code, 400, params)
+
+
+class QuotaTests(UploadAPITestsMixin, TestCase):
+    def post_file(self, data):
+        from django.core.files.uploadedfile import SimpleUploadedFile
+        return self.client.post('/api/auth/upload/', {'file': SimpleUploadedFile('readings.csv', data)}, format='multipart')
+
+    def open_session(self, size):
+        return self.client.post('/api/auth/uploads/sessions/', {
+            'filename': 'big.csv', 'total_size': size, 'chunk_size': MIN_CHUNK_SIZE,
+        }, format='json')
+
+    @override_settings(STORAGE_QUOTA_UPLOADS=1)
+    def test_upload_limit(self):
+        self.upload(readings_csv('2024-01-01', 10))
+        response = self.post_file(readings_csv('2024-01-01', 10))
+        self.assertEqual(response.status_code, 413)
+        self.assertEqual(Upload.objects.count(), 1)
+        self.assertEqual(self.client.get('/api/auth/usage/').data['quota']['uploads_remaining'], 0)
+
+    @override_settings(STORAGE_QUOTA_BYTES=10 * MIN_CHUNK_SIZE)
+    def test_open_sessions_reserve_their_bytes(self):
+        data = readings_csv('2024-01-01', 10)
+        self.assertEqual(self.open_session(9 * MIN_CHUNK_SIZE).status_code, 201)
+        self.assertEqual(self.open_session(2 * MIN_CHUNK_SIZE).status_code, 413)
+
+        usage = self.client.get('/api/auth/usage/').data
+        self.assertEqual(usage['reserved_bytes'], 9 * MIN_CHUNK_SIZE)
+        self.assertEqual(usage['quota']['bytes_remaining'], MIN_CHUNK_SIZE)
+        self.upload(data)
+        with self.assertRaises(QuotaExceeded):
+            check_quota(self.user, MIN_CHUNK_SIZE)
+
+        # An abandoned session stops counting
+        UploadSession.objects.update(status='Failed')
+        check_quota(self.user, MIN_CHUNK_SIZE)
+        self.assertEqual(self.client.get('/api/auth/usage/').data['total_bytes'], len(data))
+
+    @override_settings(STORAGE_QUOTA_BYTES=0, STORAGE_QUOTA_UPLOADS=0)
+    def test_zero_means_unlimited(self):
+        check_quota(self.user, 10**15, incoming_uploads=10**6)
+        quota = self.client.get('/api/auth/usage/').data['quota']
+        self.assertEqual(quota, {'bytes': None, 'uploads': None, 'bytes_remaining': None, 'uploads_remaining': None})
+
+
+class HistoryTests(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user('alice', 'alice@example.com', 'password')
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+        uploads = [
+            ('Pump_Readings_Jan.csv', 'Completed', '2024-01-05T08:00:00Z', 300),
+            ('pump readings feb.xlsx', 'Completed', '2024-02-10T23:30:00Z', 100),
+            ('valves.csv', 'Failed', '2024-02-11T00:10:00Z', 0),
+            ('tank_levels.csv', 'Processing', '2024-03-01T12:00:00Z', 200),
+        ]
+        for i, (filename, status, date, rows) in enumerate(uploads):
+            Upload.objects.create(user=self.user, upload_id=f'u{i}', filename=filename, status=status, rows=rows)
+            Upload.objects.filter(upload_id=f'u{i}').update(upload_date=date)
+        other = User.objects.create_user('bob', 'bob@example.com', 'password')
+        Upload.objects.create(user=other, upload_id='bob', filename='pump_bob.csv', status='Completed')
+
+    def history(self, **params):
+        response = self.client.get('/api/auth/uploads/history/', params)
+        self.assertEqual(response.status_code, 200, response.data)
+        return [upload['filename'] for upload in response.data['uploads']], response.data['total']
+
+    def test_filename_search_ignores_case(self):
+        from django.db import connection
+        self.assertTrue(has_fts(connection))
+        self.assertEqual(self.history(search='PUMP')[0], ['pump readings feb.xlsx', 'Pump_Readings_Jan.csv'])
+        # Short terms fall back to a plain scan
+        self.assertEqual(self.history(search='XL')[0], ['pump readings feb.xlsx'])
+
+        Upload.objects.filter(upload_id='u3').update(filename='pump_tank.csv')
+        self.assertEqual(self.history(search='pump', sort='filename')[0],
+                         ['Pump_Readings_Jan.csv', 'pump readings feb.xlsx', 'pump_tank.csv'])
+
+    def test_status_and_inclusive_date_range(self):
+        self.assertEqual(self.history(status='Completed', start='2024-02-01')[0], ['pump readings feb.xlsx'])
+        # A plain end date covers the whole day
+        self.assertEqual(self.history(start='2024-02-10', end='2024-02-10')[0], ['pump readings feb.xlsx'])
+        self.assertEqual(self.history(end='2024-02-11T00:10:00+00:00')[0],
+                         ['valves.csv', 'pump readings feb.xlsx', 'Pump_Readings_Jan.csv'])
+
+    def test_sort_and_paging(self):
+        names, total = self.history(sort='-rows', offset=1, limit=2)
+        self.assertEqual((names, total), (['tank_levels.csv', 'pump readings feb.xlsx'], 4))
+        self.assertEqual(self.history()[0][0], 'tank_levels.csv')
+
+    def test_invalid_parameters(self):
+        for params in ({'status': 'Done'}, {'sort': 'user'}, {'start': 'yesterday'}, {'limit': 0}, {'offset': 'x'}):
+            response = self.client.get('/api/auth/uploads/history/', params)
+            self.assertEqual(response.status_code, 400, params)
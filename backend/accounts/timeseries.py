@@ -0,0 +1,391 @@
+"""
+Time-series profiles and rollups built at ingest.
+
+Every datetime column is profiled (first and last timestamp, count and
+whether the values never go backwards). The first datetime column is the
+time index of the dataset: for each numeric column the rows are rolled up
+into minute, hour and day buckets of count, mean, min and max. Rollups are
+mergeable, so appended rows fold into them, and they are saved as ``.npy``
+arrays next to the columnar copy. Time-range charts then read a few
+thousand buckets instead of scanning every row.
+
+Timestamps are handled as int64 nanoseconds since the epoch in UTC.
+"""
+import os
+
+import numpy as np
+import pandas as pd
+
+from .columnar import NAT, to_nanoseconds as column_nanoseconds
+
+ROLLUP_DIR = 'rollups'
+
+RESOLUTIONS = {
+    'minute': 60 * 10**9,
+    'hour': 3600 * 10**9,
+    'day': 86400 * 10**9,
+}
+
+ROLLUP_ARRAYS = ('buckets', 'rows', 'count', 'mean', 'min', 'max')
+
+
+def datetime_columns(chunk):
+    """Names of the datetime columns of a parsed chunk"""
+    return [str(col) for col in chunk.columns if pd.api.types.is_datetime64_any_dtype(chunk[col])]
+
+
+def to_nanoseconds(series):
+    """Non-missing timestamps of a column as int64 nanoseconds, and the mask of their rows"""
+    values = column_nanoseconds(series)
+    present = values != NAT
+    return values[present], present
+
+
+def _timestamps(chunk, encoded, name):
+    """Like ``to_nanoseconds``, reusing the stored int64 column when there is one"""
+    values = encoded.get(name)
+    if values is not None and values.dtype == np.int64:
+        present = values != NAT
+        return values[present], present
+    return to_nanoseconds(chunk[name])
+
+
+def isoformat(nanoseconds):
+    return pd.Timestamp(int(nanoseconds)).isoformat()
+
+
+class TimeProfile:
+    """Mergeable range, count and sortedness of one datetime column"""
+
+    def __init__(self):
+        self.count = 0
+        self.min = None
+        self.max = None
+        self.last = None
+        self.sorted = True
+
+    def update(self, values):
+        """Fold in the int64 nanosecond timestamps of one chunk, in row order"""
+        if values.size == 0:
+            return
+        if self.sorted:
+            self.sorted = bool((np.diff(values) >= 0).all() and (self.last is None or values[0] >= self.last))
+        self.last = int(values[-1])
+        low, high = int(values.min()), int(values.max())
+        self.min = low if self.min is None else min(self.min, low)
+        self.max = high if self.max is None else max(self.max, high)
+        self.count += int(values.size)
+
+    def state(self):
+        return {'count': self.count, 'min': self.min, 'max': self.max, 'last': self.last, 'sorted': self.sorted}
+
+    @classmethod
+    def from_state(cls, state):
+        profile = cls()
+        profile.count, profile.min, profile.max = state['count'], state['min'], state['max']
+        profile.last, profile.sorted = state['last'], state['sorted']
+        return profile
+
+    def summary(self):
+        return {
+            'count': self.count,
+            'start': isoformat(self.min) if self.count else None,
+            'end': isoformat(self.max) if self.count else None,
+            'sorted': self.sorted,
+        }
+
+
+class RollupAccumulator:
+    """
+    Mergeable per-bucket row count and per-column count, sum, min and max
+    for a fixed set of numeric columns at one resolution.
+
+    Buckets are kept as a sorted array of bucket start times. Every chunk is
+    reduced with ``np.bincount`` over its own buckets. A chunk that starts
+    at or after the last bucket (any time-ordered log) folds its first
+    bucket into the last one and is queued behind the others; the queue is
+    concatenated once, when the rollup is saved. Only chunks that go back
+    in time are merged into the existing buckets by position.
+    """
+
+    def __init__(self, k, step):
+        self.k = k
+        self.step = step
+        self.buckets = np.zeros(0, dtype=np.int64)
+        self.rows = np.zeros(0)
+        self.n = np.zeros((0, k))
+        self.sum = np.zeros((0, k))
+        self.min = np.full((0, k), np.inf)
+        self.max = np.full((0, k), -np.inf)
+        # Sorted accumulators after the last of ``buckets``, not yet concatenated
+        self.tail = []
+
+    def __len__(self):
+        return self.buckets.size + sum(part.buckets.size for part in self.tail)
+
+    @classmethod
+    def load(cls, directory, step):
+        """Accumulator over a rollup written by ``save``"""
+        arrays = {name: np.load(os.path.join(directory, f'{name}.npy')) for name in ROLLUP_ARRAYS}
+        rollup = cls(arrays['count'].shape[1], step)
+        present = arrays['count'] > 0
+        rollup.buckets = arrays['buckets']
+        rollup.rows = arrays['rows'].astype(np.float64)
+        rollup.n = arrays['count'].astype(np.float64)
+        rollup.sum = np.where(present, arrays['mean'] * rollup.n, 0.0)
+        rollup.min = np.where(present, arrays['min'], np.inf)
+        rollup.max = np.where(present, arrays['max'], -np.inf)
+        return rollup
+
+    def update(self, timestamps, block):
+        """Fold in int64 nanosecond timestamps and an aligned (rows, k) float block"""
+        if timestamps.size == 0:
+            return
+        block = np.asarray(block, dtype=np.float64).reshape(timestamps.size, self.k)
+        buckets, slots = np.unique(timestamps // self.step * self.step, return_inverse=True)
+        size = buckets.size
+
+        other = RollupAccumulator(self.k, self.step)
+        other.buckets = buckets
+        other.rows = np.bincount(slots, minlength=size).astype(np.float64)
+        other.n = np.zeros((size, self.k))
+        other.sum = np.zeros((size, self.k))
+        other.min = np.full((size, self.k), np.inf)
+        other.max = np.full((size, self.k), -np.inf)
+        for j in range(self.k):
+            valid = ~np.isnan(block[:, j])
+            s, x = slots[valid], block[valid, j]
+            other.n[:, j] = np.bincount(s, minlength=size)
+            other.sum[:, j] = np.bincount(s, weights=x, minlength=size)
+            np.minimum.at(other.min[:, j], s, x)
+            np.maximum.at(other.max[:, j], s, x)
+        self.merge(other)
+
+    def _slice(self, start):
+        part = RollupAccumulator(self.k, self.step)
+        part.buckets, part.rows, part.n = self.buckets[start:], self.rows[start:], self.n[start:]
+        part.sum, part.min, part.max = self.sum[start:], self.min[start:], self.max[start:]
+        return part
+
+    def _fold_last(self, other):
+        """Add the first bucket of ``other`` into this accumulator's last bucket"""
+        self.rows[-1] += other.rows[0]
+        self.n[-1] += other.n[0]
+        self.sum[-1] += other.sum[0]
+        np.minimum(self.min[-1], other.min[0], out=self.min[-1])
+        np.maximum(self.max[-1], other.max[0], out=self.max[-1])
+
+    def consolidate(self):
+        """Concatenate the queued tail into the bucket arrays"""
+        if not self.tail:
+            return
+        parts = [self] + self.tail
+        self.buckets = np.concatenate([part.buckets for part in parts])
+        self.rows = np.concatenate([part.rows for part in parts])
+        self.n = np.concatenate([part.n for part in parts])
+        self.sum = np.concatenate([part.sum for part in parts])
+        self.min = np.concatenate([part.min for part in parts])
+        self.max = np.concatenate([part.max for part in parts])
+        self.tail = []
+
+    def merge(self, other):
+        other.consolidate()
+        if other.buckets.size == 0:
+            return
+        last = self.tail[-1] if self.tail else self
+        if last.buckets.size == 0 or other.buckets[0] >= last.buckets[-1]:
+            if last.buckets.size and other.buckets[0] == last.buckets[-1]:
+                last._fold_last(other)
+                other = other._slice(1)
+            if other.buckets.size:
+                self.tail.append(other)
+            return
+
+        self.consolidate()
+        buckets = np.union1d(self.buckets, other.buckets)
+        mine = np.searchsorted(buckets, self.buckets)
+        theirs = np.searchsorted(buckets, other.buckets)
+
+        rows = np.zeros(buckets.size)
+        n = np.zeros((buckets.size, self.k))
+        total = np.zeros((buckets.size, self.k))
+        low = np.full((buckets.size, self.k), np.inf)
+        high = np.full((buckets.size, self.k), -np.inf)
+        for slots, part in ((mine, self), (theirs, other)):
+            rows[slots] += part.rows
+            n[slots] += part.n
+            total[slots] += part.sum
+            low[slots] = np.minimum(low[slots], part.min)
+            high[slots] = np.maximum(high[slots], part.max)
+
+        self.buckets, self.rows, self.n, self.sum, self.min, self.max = buckets, rows, n, total, low, high
+
+    def save(self, directory):
+        """Write the rollup as ``.npy`` arrays, NaN where a bucket has no values"""
+        self.consolidate()
+        os.makedirs(directory, exist_ok=True)
+        present = self.n > 0
+        with np.errstate(invalid='ignore', divide='ignore'):
+            arrays = {
+                'buckets': self.buckets,
+                'rows': self.rows.astype(np.int64),
+                'count': self.n.astype(np.int64),
+                'mean': np.where(present, self.sum / self.n, np.nan),
+                'min': np.where(present, self.min, np.nan),
+                'max': np.where(present, self.max, np.nan),
+            }
+        for name, values in arrays.items():
+            np.save(os.path.join(directory, f'{name}.npy'), values)
+
+
+class TimeSeriesAccumulator:
+    """Profiles of every datetime column plus rollups on the time index"""
+
+    def __init__(self, time_columns, numeric_columns):
+        self.time_column = time_columns[0]
+        self.numeric_columns = list(numeric_columns)
+        self.profiles = {name: TimeProfile() for name in time_columns}
+        self.rollups = {
+            resolution: RollupAccumulator(len(self.numeric_columns), step)
+            for resolution, step in RESOLUTIONS.items()
+        } if self.numeric_columns else {}
+
+    def update(self, chunk, encoded):
+        """Fold in one parsed chunk and its encoded numeric columns"""
+        for name, profile in self.profiles.items():
+            if name in chunk.columns:
+                profile.update(_timestamps(chunk, encoded, name)[0])
+        if not self.rollups or self.time_column not in chunk.columns:
+            return
+        timestamps, present = _timestamps(chunk, encoded, self.time_column)
+        block = np.column_stack([encoded[name] for name in self.numeric_columns])[present]
+        for rollup in self.rollups.values():
+            rollup.update(timestamps, block)
+
+    def save(self, directory):
+        for resolution, rollup in self.rollups.items():
+            rollup.save(os.path.join(directory, ROLLUP_DIR, resolution))
+
+    def state(self):
+        """Column profiles; the rollups are reloaded from the arrays ``save`` wrote"""
+        return {
+            'time_column': self.time_column,
+            'numeric_columns': self.numeric_columns,
+            'profiles': [[name, profile.state()] for name, profile in self.profiles.items()],
+        }
+
+    @classmethod
+    def from_state(cls, state, directory):
+        accumulator = cls([state['time_column']], state['numeric_columns'])
+        accumulator.profiles = {name: TimeProfile.from_state(profile) for name, profile in state['profiles']}
+        accumulator.rollups = {
+            resolution: RollupAccumulator.load(os.path.join(directory, ROLLUP_DIR, resolution), RESOLUTIONS[resolution])
+            for resolution in accumulator.rollups
+        }
+        return accumulator
+
+    def summary(self):
+        """``Upload.time_series``: time index, column profiles and bucket counts"""
+        return {
+            'time_column': self.time_column,
+            'numeric_columns': self.numeric_columns,
+            'columns': {name: profile.summary() for name, profile in self.profiles.items()},
+            'rollups': {resolution: len(rollup) for resolution, rollup in self.rollups.items()},
+        }
+
+
+class RollupError(ValueError):
+    """Raised for a time-series request the stored rollups cannot answer"""
+
+
+def load_rollup(directory, resolution):
+    """Memory-mapped arrays of one saved rollup"""
+    path = os.path.join(directory, ROLLUP_DIR, resolution)
+    return {name: np.load(os.path.join(path, f'{name}.npy'), mmap_mode='r') for name in ROLLUP_ARRAYS}
+
+
+def _parse_time(value, name):
+    try:
+        stamp = pd.Timestamp(value)
+    except ValueError:
+        raise RollupError(f'{name} must be an ISO 8601 timestamp')
+    if stamp.tzinfo is not None:
+        stamp = stamp.tz_convert('UTC').tz_localize(None)
+    return stamp.value
+
+
+def _coarsen(arrays, factor):
+    """Merge every ``factor`` consecutive buckets into one"""
+    starts = np.arange(0, arrays['buckets'].size, factor)
+    count = np.add.reduceat(arrays['count'], starts, axis=0)
+    weighted = np.add.reduceat(np.nan_to_num(arrays['mean']) * arrays['count'], starts, axis=0)
+    with np.errstate(invalid='ignore', divide='ignore'):
+        mean = np.where(count > 0, weighted / count, np.nan)
+    return {
+        'buckets': arrays['buckets'][starts],
+        'rows': np.add.reduceat(arrays['rows'], starts),
+        'count': count,
+        'mean': mean,
+        'min': np.fmin.reduceat(arrays['min'], starts, axis=0),
+        'max': np.fmax.reduceat(arrays['max'], starts, axis=0),
+    }
+
+
+def rollup_series(directory, time_series, columns=None, start=None, end=None, resolution='auto', points=500):
+    """
+    Bucketed mean/min/max series of numeric columns between ``start`` and
+    ``end`` (ISO timestamps, inclusive). ``auto`` picks the finest
+    resolution with at most ``points`` buckets in range; if even that has
+    more, neighbouring buckets are merged down to ``points``.
+    """
+    if not time_series or not time_series.get('rollups'):
+        raise RollupError('Dataset has no time index with numeric columns')
+    numeric_columns = time_series['numeric_columns']
+    columns = columns or numeric_columns
+    unknown = [col for col in columns if col not in numeric_columns]
+    if unknown:
+        raise RollupError(f'Unknown or non-numeric columns: {", ".join(unknown)}')
+    if resolution != 'auto' and resolution not in RESOLUTIONS:
+        raise RollupError(f'resolution must be auto or one of: {", ".join(RESOLUTIONS)}')
+    if points < 1:
+        raise RollupError('points must be positive')
+
+    low = _parse_time(start, 'start') if start else None
+    high = _parse_time(end, 'end') if end else None
+
+    candidates = list(RESOLUTIONS) if resolution == 'auto' else [resolution]
+    for candidate in candidates:
+        arrays = load_rollup(directory, candidate)
+        buckets = arrays['buckets']
+        first = 0 if low is None else int(np.searchsorted(buckets, low // RESOLUTIONS[candidate] * RESOLUTIONS[candidate]))
+        last = buckets.size if high is None else int(np.searchsorted(buckets, high, side='right'))
+        if last - first <= points:
+            break
+
+    indexes = [numeric_columns.index(col) for col in columns]
+    selected = {'buckets': np.asarray(buckets[first:last]), 'rows': np.asarray(arrays['rows'][first:last])}
+    for name in ('count', 'mean', 'min', 'max'):
+        selected[name] = np.asarray(arrays[name][first:last])[:, indexes]
+    factor = -(-selected['buckets'].size // points)
+    if factor > 1:
+        selected = _coarsen(selected, factor)
+
+    def values(array):
+        return [None if np.isnan(v) else float(v) for v in array]
+
+    return {
+        'time_column': time_series['time_column'],
+        'resolution': candidate,
+        'bucket_size': factor,
+        'timestamps': [isoformat(b) for b in selected['buckets']],
+        'rows': selected['rows'].astype(int).tolist(),
+        'series': {
+            col: {
+                'count': selected['count'][:, j].astype(int).tolist(),
+                'mean': values(selected['mean'][:, j]),
+                'min': values(selected['min'][:, j]),
+                'max': values(selected['max'][:, j]),
+            }
+            for j, col in enumerate(columns)
+        },
+    }
@@ -12,8 +12,26 @@ urlpatterns = [
     path('profile/update/', views.update_profile, name='update-profile'),
     path('profile/delete/', views.delete_account, name='delete-account'),
     path('upload/', views.upload_file, name='upload-file'),
+    path('upload/batch/', views.upload_batch, name='upload-batch'),
+    path('usage/', views.get_usage, name='usage'),
+    path('dashboard/summary/', views.get_dashboard_summary, name='dashboard-summary'),
     path('uploads/history/', views.get_upload_history, name='upload-history'),
+    path('uploads/sessions/', views.create_upload_session, name='upload-session-create'),
+    path('uploads/sessions/<str:session_id>/', views.get_upload_session, name='upload-session'),
+    path('uploads/sessions/<str:session_id>/chunks/<int:index>/', views.put_upload_chunk, name='upload-session-chunk'),
+    path('uploads/sessions/<str:session_id>/complete/', views.complete_upload_session, name='upload-session-complete'),
+    path('uploads/sessions/<str:session_id>/delete/', views.delete_upload_session, name='upload-session-delete'),
+    path('uploads/compare/', views.compare_uploads_view, name='upload-compare'),
+    path('uploads/schema-search/', views.search_upload_schema, name='upload-schema-search'),
     path('uploads/<str:upload_id>/', views.get_upload_detail, name='upload-detail'),  
+    path('uploads/<str:upload_id>/chart-data/', views.get_chart_data, name='upload-chart-data'),
+    path('uploads/<str:upload_id>/rows/', views.get_upload_rows, name='upload-rows'),
+    path('uploads/<str:upload_id>/timeseries/', views.get_upload_timeseries, name='upload-timeseries'),
+    path('uploads/<str:upload_id>/append/', views.append_upload, name='upload-append'),
+    path('uploads/<str:upload_id>/comparable/', views.get_comparable_uploads, name='upload-comparable'),
+    path('uploads/<str:upload_id>/versions/', views.get_upload_versions, name='upload-versions'),
+    path('uploads/<str:upload_id>/outliers/', views.get_upload_outliers, name='upload-outliers'),
+    path('uploads/<str:upload_id>/file/', views.download_upload_file, name='upload-file-download'),
     path('uploads/<str:upload_id>/delete/', views.delete_upload, name='delete-upload'),  
     path('reports/download/<str:upload_id>/', views.download_pdf_report, name='download-report'),
     path('upload-history/', views.upload_history, name='upload-history-desktop'),  
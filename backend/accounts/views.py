@@ -9,22 +9,59 @@ from django.contrib.auth import authenticate
 from django.core.mail import send_mail
 from django.conf import settings
 from django.views.decorators.csrf import csrf_exempt
-from .models import EmailOTP, Profile, Upload
+from chemizer.profiling import SpanTimer
+from .models import EmailOTP, Profile, Upload, UploadVersion, UploadSession, StorageUsage
+from . import storage
+from .columnar import artifact_dir_for, open_dataset, delete_dataset, NUMERIC
+from .ingest import iter_chunks, run_ingest, file_extension, AppendError, ArchiveError, IngestState, ALLOWED_EXTENSIONS
+from .queries import RowQuery, QueryError, DEFAULT_PAGE_SIZE, MAX_PAGE_SIZE
+from .outliers import detect_column_outliers, read_outlier_rows
+from .comparison import compare_uploads, MAX_COMPARE_UPLOADS, SUMMARY_FIELDS
+from .schema import SchemaError, parse_overrides, schema_from_dtypes
+from .quotas import QuotaExceeded, check_quota, usage_summary
+from .history import HistoryError, history_query
+from .catalog import (
+    CatalogError, comparable_uploads, index_upload, search_schema,
+    DEFAULT_COMPARABLE_UPLOADS, MIN_COMPARABLE_OVERLAP,
+)
+from .dashboard import dashboard_summary, upload_row, DEFAULT_RECENT_UPLOADS, MAX_RECENT_UPLOADS, RECENT_UPLOAD_FIELDS
+from .resumable import (
+    ChunkError, allocate_part, part_path_for, received_ranges, write_chunk,
+    DEFAULT_CHUNK_SIZE, MIN_CHUNK_SIZE, MAX_CHUNK_SIZE,
+)
+from .timeseries import RollupError, rollup_series
+from .batch import analyze_batch, batch_size, iter_zip_members, BATCH_WORKERS, MAX_BATCH_FILES
+from .analysis import (
+    chart_series,
+    correlation_matrix,
+    histogram_bins,
+    line_series,
+    top_correlations,
+    DEFAULT_CHART_POINTS,
+    MAX_CHART_POINTS,
+    DEFAULT_HISTOGRAM_BINS,
+    MAX_HISTOGRAM_BINS,
+)
 from .serializers import (
     RegisterSerializer,
     VerifyOTPSerializer,
     LoginSerializer,
     ResendOTPSerializer,
     ProfileSerializer,
-    UploadSerializer
+    UploadSerializer,
+    UploadListSerializer,
+    UploadVersionSerializer
 )
 from google.auth.transport import requests
 from google.oauth2 import id_token
 import os
-import traceback
+import logging
 import pandas as pd
-from django.core.files.storage import default_storage
-from django.core.files.base import ContentFile
+from django.db import transaction
+import itertools
+import re
+from contextlib import ExitStack
+import zipfile
 import uuid
 from reportlab.lib.pagesizes import letter, A4
 from reportlab.lib.styles import getSampleStyleSheet, ParagraphStyle
@@ -32,9 +69,10 @@ from reportlab.lib.units import inch
 from reportlab.platypus import SimpleDocTemplate, Table, TableStyle, Paragraph, Spacer, PageBreak, Image as RLImage
 from reportlab.lib import colors
 from reportlab.lib.enums import TA_CENTER, TA_LEFT
-from django.http import FileResponse, HttpResponse
+from django.http import FileResponse, HttpResponse, StreamingHttpResponse
 import io
 from datetime import datetime
+from django.utils import timezone
 import glob
 try:
     import matplotlib
@@ -47,6 +85,11 @@ except:
     plt = None  # type: ignore
     np = None  # type: ignore
 
+logger = logging.getLogger(__name__)
+
+# Rows of the dataset read for the PDF sample table and sample charts
+PDF_SAMPLE_ROWS = 50
+
 
 def send_otp_email(email, otp):
     """Send OTP via email"""
@@ -68,46 +111,39 @@ Chemizer Analytics Team'''
             [email],
             fail_silently=False,
         )
-        print(f"OTP email sent successfully to {email}")
+        logger.info('OTP email sent', extra={'email': email})
         return True
     except Exception as e:
-        print(f"Email error: {e}")
+        logger.error('OTP email failed', extra={'email': email, 'error': str(e)})
         return False
 
 
 @api_view(['GET'])
 @permission_classes([IsAuthenticated])
 def upload_history(request):
-    """Get all uploads for the authenticated user"""
-    print("=" * 50)
-    print(f"📜 UPLOAD HISTORY - User: {request.user.username}")
-    print("=" * 50)
-    
+    """Get the authenticated user's uploads, searched, filtered, sorted and paged by query parameters"""
     try:
-        uploads = Upload.objects.filter(user=request.user).order_by('-upload_date')
+        uploads, offset, limit = history_query(request.user, request.query_params)
+        total = uploads.count()
+        page = uploads.values(*RECENT_UPLOAD_FIELDS)[offset:None if limit is None else offset + limit]
         
-        upload_list = []
-        for upload in uploads:
-            upload_list.append({
-                'id': upload.id,
-                'upload_id': str(upload.upload_id),
-                'filename': upload.filename,
-                'upload_date': upload.upload_date.isoformat(),
-                'upload_date_formatted': upload.upload_date.strftime('%b %d, %Y'),
-                'rows': upload.rows or 0,
-                'file_size': upload.file_size or 0,
-                'status': upload.status,
-            })
+        upload_list = [upload_row(upload) for upload in page]
         
-        print(f"✅ Found {len(upload_list)} uploads for {request.user.username}")
+        logger.info('Upload history listed', extra={'returned': len(upload_list), 'total': total})
         
         return Response({
-            'uploads': upload_list
+            'uploads': upload_list,
+            'total': total,
+            'offset': offset,
+            'limit': limit
         }, status=status.HTTP_200_OK)
         
+    except HistoryError as e:
+        return Response({
+            'error': str(e)
+        }, status=status.HTTP_400_BAD_REQUEST)
     except Exception as e:
-        print(f"❌ Error fetching upload history: {str(e)}")
-        traceback.print_exc()
+        logger.exception('Upload history failed')
         return Response({
             'error': str(e)
         }, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
@@ -160,16 +196,9 @@ def change_password(request):
 @permission_classes([AllowAny])
 def register(request):
     """Register new user and send OTP"""
-    print("=" * 50)
-    print(f"Registration attempt - Received data: {request.data}")
-    print(f"Content-Type: {request.content_type}")
-    print(f"Request method: {request.method}")
-    print("=" * 50)
-    
     serializer = RegisterSerializer(data=request.data)
     if serializer.is_valid():
         try:
-            print(f"Validated data: {serializer.validated_data}")
             
             user = User.objects.create_user(
                 username=serializer.validated_data['username'],
@@ -177,7 +206,7 @@ def register(request):
                 password=serializer.validated_data['password'],
                 is_active=False
             )
-            print(f"User created: {user.username}")
+            logger.info('User created', extra={'username': user.username})
             
             Profile.objects.create(
                 user=user,
@@ -185,14 +214,13 @@ def register(request):
                 date_of_birth=serializer.validated_data.get('date_of_birth'),
                 gender=serializer.validated_data.get('gender')
             )
-            print(f"Profile created for user: {user.username}")
             
             otp_obj = EmailOTP.objects.create(
                 email=user.email,
                 user=user
             )
             otp_code = otp_obj.generate_otp()
-            print(f"OTP generated: {otp_code}")
+            logger.debug('Registration OTP generated', extra={'username': user.username})
             
             if send_otp_email(user.email, otp_code):
                 return Response({
@@ -206,13 +234,12 @@ def register(request):
                     'error': 'Failed to send OTP email. Please check your email settings.'
                 }, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
         except Exception as e:
-            print(f"Registration error: {str(e)}")
-            traceback.print_exc()
+            logger.exception('Registration failed')
             return Response({
                 'error': f'Registration failed: {str(e)}'
             }, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
     
-    print(f"Validation failed - Serializer errors: {serializer.errors}")
+    logger.info('Registration rejected', extra={'errors': serializer.errors})
     return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
 
 
@@ -221,10 +248,6 @@ def register(request):
 @permission_classes([AllowAny])
 def login_view(request):
     """Login and send OTP"""
-    print("=" * 50)
-    print(f"Login attempt - Received data: {request.data}")
-    print("=" * 50)
-    
     serializer = LoginSerializer(data=request.data)
     if serializer.is_valid():
         user = authenticate(
@@ -233,12 +256,11 @@ def login_view(request):
         )
         
         if user is None:
-            print(f"Authentication failed for username: {serializer.validated_data['username']}")
+            logger.info('Authentication failed', extra={'username': serializer.validated_data['username']})
             return Response({
                 'error': 'Invalid username or password'
             }, status=status.HTTP_401_UNAUTHORIZED)
         
-        print(f"User authenticated: {user.username}")
         
         EmailOTP.objects.filter(user=user, verified=False).delete()
         
@@ -247,7 +269,7 @@ def login_view(request):
             user=user
         )
         otp_code = otp_obj.generate_otp()
-        print(f"Login OTP generated: {otp_code}")
+        logger.debug('Login OTP generated', extra={'username': user.username})
         
         if send_otp_email(user.email, otp_code):
             return Response({
@@ -260,7 +282,7 @@ def login_view(request):
                 'error': 'Failed to send OTP email. Please try again.'
             }, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
     
-    print(f"Login validation failed - Errors: {serializer.errors}")
+    logger.info('Login rejected', extra={'errors': serializer.errors})
     return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
 
 
@@ -269,10 +291,6 @@ def login_view(request):
 @permission_classes([AllowAny])
 def verify_otp(request):
     """Verify OTP and log user in"""
-    print("=" * 50)
-    print(f"OTP verification - Received data: {request.data}")
-    print("=" * 50)
-    
     serializer = VerifyOTPSerializer(data=request.data)
     if serializer.is_valid():
         email = serializer.validated_data['email']
@@ -286,26 +304,25 @@ def verify_otp(request):
             ).latest('created_at')
             
             if not otp_obj.is_valid():
-                print(f"OTP expired for email: {email}")
+                logger.info('OTP expired', extra={'email': email})
                 return Response({
                     'error': 'OTP has expired. Please request a new one.'
                 }, status=status.HTTP_400_BAD_REQUEST)
             
             otp_obj.verified = True
             otp_obj.save()
-            print(f"OTP verified for email: {email}")
             
             user = otp_obj.user
             if not user.is_active:
                 user.is_active = True
                 user.save()
-                print(f"User activated: {user.username}")
+                logger.info('User activated', extra={'username': user.username})
             
             token, _ = Token.objects.get_or_create(user=user)
             
             profile = Profile.objects.get(user=user)
             
-            print(f"Login successful for user: {user.username}")
+            logger.info('Login succeeded', extra={'username': user.username})
             return Response({
                 'token': token.key,
                 'user_id': user.id,
@@ -316,12 +333,12 @@ def verify_otp(request):
             }, status=status.HTTP_200_OK)
             
         except EmailOTP.DoesNotExist:
-            print(f"Invalid OTP for email: {email}")
+            logger.info('Invalid OTP', extra={'email': email})
             return Response({
                 'error': 'Invalid OTP code'
             }, status=status.HTTP_400_BAD_REQUEST)
     
-    print(f"OTP verification validation failed - Errors: {serializer.errors}")
+    logger.info('OTP verification rejected', extra={'errors': serializer.errors})
     return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
 
 
@@ -330,10 +347,6 @@ def verify_otp(request):
 @permission_classes([AllowAny])
 def resend_otp(request):
     """Resend OTP to user email"""
-    print("=" * 50)
-    print(f"Resend OTP - Received data: {request.data}")
-    print("=" * 50)
-    
     serializer = ResendOTPSerializer(data=request.data)
     if serializer.is_valid():
         email = serializer.validated_data['email']
@@ -348,7 +361,7 @@ def resend_otp(request):
                 user=user
             )
             otp_code = otp_obj.generate_otp()
-            print(f"New OTP generated for {email}: {otp_code}")
+            logger.debug('OTP regenerated', extra={'email': email})
             
             if send_otp_email(email, otp_code):
                 return Response({
@@ -360,12 +373,12 @@ def resend_otp(request):
                 }, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
                 
         except User.DoesNotExist:
-            print(f"Email not found: {email}")
+            logger.info('OTP resend for unknown email', extra={'email': email})
             return Response({
                 'error': 'Email not found'
             }, status=status.HTTP_404_NOT_FOUND)
     
-    print(f"Resend OTP validation failed - Errors: {serializer.errors}")
+    logger.info('OTP resend rejected', extra={'errors': serializer.errors})
     return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
 
 
@@ -388,23 +401,19 @@ def get_profile(request):
 @permission_classes([IsAuthenticated])
 def update_profile(request):
     """Update user profile"""
-    print("=" * 50)
-    print(f"Update profile - User: {request.user.username}, Data: {request.data}")
-    print("=" * 50)
-    
     try:
         profile = Profile.objects.get(user=request.user)
         serializer = ProfileSerializer(profile, data=request.data, partial=True)
         
         if serializer.is_valid():
             serializer.save()
-            print(f"Profile updated for user: {request.user.username}")
+            logger.info('Profile updated', extra={'username': request.user.username})
             return Response({
                 'message': 'Profile updated successfully',
                 'data': serializer.data
             })
         
-        print(f"Profile update validation failed - Errors: {serializer.errors}")
+        logger.info('Profile update rejected', extra={'errors': serializer.errors})
         return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
     except Profile.DoesNotExist:
         return Response({
@@ -418,8 +427,9 @@ def update_profile(request):
 def delete_account(request):
     """Delete user account"""
     username = request.user.username
+    _delete_user_data(request.user)
     request.user.delete()
-    print(f"Account deleted: {username}")
+    logger.info('Account deleted', extra={'username': username})
     return Response({
         'message': 'Account deleted successfully'
     }, status=status.HTTP_200_OK)
@@ -430,10 +440,6 @@ def delete_account(request):
 @permission_classes([AllowAny])
 def google_login(request):
     """Handle Google OAuth login"""
-    print("=" * 50)
-    print(f"Google login attempt - Received data: {request.data}")
-    print("=" * 50)
-    
     try:
         token = request.data.get('token')
         
@@ -445,7 +451,7 @@ def google_login(request):
         client_id = os.getenv('GOOGLE_OAUTH_CLIENT_ID')
         
         if not client_id:
-            print("Google OAuth not configured - missing GOOGLE_OAUTH_CLIENT_ID")
+            logger.error('Google OAuth not configured: GOOGLE_OAUTH_CLIENT_ID is missing')
             return Response({
                 'error': 'Google OAuth not configured'
             }, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
@@ -467,7 +473,6 @@ def google_login(request):
                     'error': 'Email not provided by Google'
                 }, status=status.HTTP_400_BAD_REQUEST)
             
-            print(f"Google token verified for email: {email}")
             
             user, created = User.objects.get_or_create(
                 email=email,
@@ -480,9 +485,7 @@ def google_login(request):
             )
             
             if created:
-                print(f"New user created via Google: {user.username}")
-            else:
-                print(f"Existing user logged in via Google: {user.username}")
+                logger.info('User created via Google', extra={'username': user.username})
             
             profile, _ = Profile.objects.get_or_create(
                 user=user,
@@ -504,30 +507,56 @@ def google_login(request):
             }, status=status.HTTP_200_OK)
             
         except ValueError as e:
-            print(f"Invalid Google token: {str(e)}")
-            traceback.print_exc()
+            logger.warning('Invalid Google token', extra={'error': str(e)})
             return Response({
                 'error': f'Invalid Google token: {str(e)}'
             }, status=status.HTTP_400_BAD_REQUEST)
             
     except Exception as e:
-        print(f"Google authentication error: {str(e)}")
-        traceback.print_exc()
+        logger.exception('Google authentication failed')
         return Response({
             'error': f'Google authentication failed: {str(e)}'
         }, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
 
 
+def _analyze_stored_file(user, upload_id, file_name, file_path, file_ext, schema=None):
+    """Ingest a file already in storage and create its Upload"""
+    file_size = storage.size(file_path)
+    artifact_path = artifact_dir_for(user.username, upload_id)
+    try:
+        with storage.local_path(file_path) as full_path:
+            chunks = iter_chunks(full_path, file_ext, schema=schema)
+            result = run_ingest(chunks, storage.local_dir(artifact_path))
+        storage.publish_dir(artifact_path)
+    except Exception:
+        delete_dataset(artifact_path)
+        raise
+    
+    logger.info('File analyzed', extra={'upload_id': upload_id, 'rows': result['rows'], 'columns': result['columns'], 'artifact_path': artifact_path})
+    
+    with transaction.atomic():
+        upload_obj = Upload.objects.create(
+            user=user,
+            upload_id=upload_id,
+            filename=file_name,
+            file_path=file_path,
+            artifact_path=artifact_path,
+            file_size=file_size,
+            status='Completed',
+            **result
+        )
+        upload_obj.snapshot(file_name, file_path, file_size, result['rows'])
+        StorageUsage.record(upload_obj)
+        index_upload(upload_obj)
+    
+    return upload_obj, result
+
+
 @csrf_exempt
 @api_view(['POST'])
 @permission_classes([IsAuthenticated])
 def upload_file(request):
     """Handle file upload and analysis"""
-    print("=" * 50)
-    print(f"📤 FILE UPLOAD - User: {request.user.username}")
-    print(f"Files: {request.FILES}")
-    print("=" * 50)
-    
     if 'file' not in request.FILES:
         return Response({
             'error': 'No file provided'
@@ -536,205 +565,1147 @@ def upload_file(request):
     uploaded_file = request.FILES['file']
     file_name = uploaded_file.name
     
-    allowed_extensions = ['.csv', '.xlsx', '.xls']
-    file_ext = os.path.splitext(file_name)[1].lower()
+    file_ext = file_extension(file_name)
+    
+    if file_ext not in ALLOWED_EXTENSIONS:
+        return Response({
+            'error': f'Invalid file type. Allowed: {", ".join(ALLOWED_EXTENSIONS)}'
+        }, status=status.HTTP_400_BAD_REQUEST)
     
-    if file_ext not in allowed_extensions:
+    try:
+        schema = parse_overrides(request.data.get('schema'))
+    except SchemaError as e:
         return Response({
-            'error': f'Invalid file type. Allowed: {", ".join(allowed_extensions)}'
+            'error': str(e)
         }, status=status.HTTP_400_BAD_REQUEST)
     
+    try:
+        check_quota(request.user, uploaded_file.size)
+    except QuotaExceeded as e:
+        return Response({
+            'error': str(e)
+        }, status=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE)
+    
+    file_path = None
     try:
         upload_id = str(uuid.uuid4())
-        print(f"📊 Generated Upload ID: {upload_id}")
         
-        file_path = default_storage.save(
+        file_path = storage.save(
             f'uploads/{request.user.username}/{upload_id}_{file_name}',
-            ContentFile(uploaded_file.read())
+            uploaded_file
         )
         
-        full_path = default_storage.path(file_path)
-        file_size = os.path.getsize(full_path)
-        
-        print(f"💾 File saved: {file_path} ({file_size} bytes)")
-        
-        if file_ext == '.csv':
-            df = pd.read_csv(full_path)
-        else:
-            df = pd.read_excel(full_path)
-        
-        print(f"📈 File analyzed: {df.shape[0]} rows, {df.shape[1]} columns")
-        
-        preview_df = df.head(100).fillna('N/A')
-        data_preview = preview_df.to_dict(orient='records')
-        
-        numeric_df = df.select_dtypes(include=['number'])
-        summary_stats = numeric_df.describe().to_dict() if not numeric_df.empty else {}
+        file_size = storage.size(file_path)
         
-        upload_obj = Upload.objects.create(
-            user=request.user,
-            upload_id=upload_id,
-            filename=file_name,
-            file_path=file_path,
-            rows=df.shape[0],
-            columns=df.shape[1],
-            file_size=file_size,
-            column_names=list(df.columns),
-            data_types={col: str(dtype) for col, dtype in df.dtypes.items()},
-            missing_values=df.isnull().sum().to_dict(),
-            summary_stats=summary_stats,
-            data_preview=data_preview,
-            status='Completed'
-        )
+        logger.debug('File saved', extra={'upload_id': upload_id, 'file_path': file_path, 'bytes': file_size})
         
-        print(f"✅ Upload saved to database - ID: {upload_obj.id}")
+        upload_obj, result = _analyze_stored_file(request.user, upload_id, file_name, file_path, file_ext, schema)
         
         analysis = {
             'upload_id': upload_id,
             'file_name': file_name,
-            'rows': df.shape[0],
-            'columns': df.shape[1],
-            'column_names': list(df.columns),
-            'data_types': {col: str(dtype) for col, dtype in df.dtypes.items()},
-            'missing_values': df.isnull().sum().to_dict(),
-            'summary_stats': summary_stats,
-            'data_preview': data_preview,
+            'version': upload_obj.version,
+            **result,
             'message': 'File uploaded and analyzed successfully'
         }
         
-        print(f"🎉 Analysis complete for upload_id: {upload_id}")
+        logger.info('Upload analyzed', extra={'upload_id': upload_id})
         
         return Response(analysis, status=status.HTTP_200_OK)
         
+    except ArchiveError as e:
+        storage.delete(file_path)
+        return Response({
+            'error': str(e)
+        }, status=status.HTTP_400_BAD_REQUEST)
     except Exception as e:
-        print(f"❌ File upload error: {str(e)}")
-        traceback.print_exc()
+        storage.delete(file_path)
+        logger.exception('File upload failed')
         return Response({
             'error': f'File processing failed: {str(e)}'
         }, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
 
 
-@api_view(['GET'])
+@csrf_exempt
+@api_view(['POST'])
 @permission_classes([IsAuthenticated])
-def get_upload_history(request):
-    """Get user's upload history"""
-    print("=" * 50)
-    print(f"📜 FETCH HISTORY - User: {request.user.username}")
-    print("=" * 50)
-    
+def upload_batch(request):
+    """Upload several files (or a ZIP of them) and analyze them concurrently"""
+    uploaded_files = request.FILES.getlist('files') + request.FILES.getlist('file')
+    if not uploaded_files:
+        return Response({
+            'error': 'No files provided'
+        }, status=status.HTTP_400_BAD_REQUEST)
     try:
-        uploads = Upload.objects.filter(user=request.user).order_by('-upload_date')
-        serializer = UploadSerializer(uploads, many=True)
-        
-        print(f"✅ Found {len(serializer.data)} uploads for {request.user.username}")
-        
+        schema = parse_overrides(request.data.get('schema'))
+    except SchemaError as e:
         return Response({
-            'uploads': serializer.data,
-            'total': len(serializer.data)
-        }, status=status.HTTP_200_OK)
-        
-    except Exception as e:
-        print(f"❌ Error fetching history: {str(e)}")
-        traceback.print_exc()
+            'error': str(e)
+        }, status=status.HTTP_400_BAD_REQUEST)
+    try:
+        # Every file inside a ZIP becomes an upload of its own
+        check_quota(request.user, *batch_size(uploaded_files))
+    except QuotaExceeded as e:
         return Response({
             'error': str(e)
-        }, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
+        }, status=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE)
+
+    def iter_sources():
+        for uploaded_file in uploaded_files:
+            if file_extension(uploaded_file.name) != '.zip':
+                yield uploaded_file.name, uploaded_file
+                continue
+            try:
+                yield from iter_zip_members(uploaded_file)
+            except zipfile.BadZipFile:
+                yield uploaded_file.name, None
+
+    # Stream every file (and every ZIP member) to storage before analyzing
+    results, jobs, stored = [], [], {}
+    with ExitStack() as local_files:
+        for file_name, fileobj in iter_sources():
+            if len(results) == MAX_BATCH_FILES:
+                for _, file_path, _ in stored.values():
+                    storage.delete(file_path)
+                return Response({
+                    'error': f'Too many files in one batch (maximum {MAX_BATCH_FILES})'
+                }, status=status.HTTP_400_BAD_REQUEST)
+
+            file_ext = file_extension(file_name)
+            entry = {'file_name': file_name, 'status': 'Failed'}
+            results.append(entry)
+            if fileobj is None:
+                entry['error'] = 'Not a valid ZIP archive'
+                continue
+            if file_ext not in ALLOWED_EXTENSIONS:
+                entry['error'] = f'Invalid file type. Allowed: {", ".join(ALLOWED_EXTENSIONS)}'
+                continue
+
+            upload_id = str(uuid.uuid4())
+            file_path = storage.save(f'uploads/{request.user.username}/{upload_id}_{file_name}', fileobj)
+            artifact_path = artifact_dir_for(request.user.username, upload_id)
+            stored[upload_id] = (entry, file_path, artifact_path)
+            entry.update(upload_id=upload_id, status='Processing')
+            full_path = local_files.enter_context(storage.local_path(file_path))
+            jobs.append((upload_id, full_path, file_ext, storage.local_dir(artifact_path), schema))
+            logger.debug('File saved', extra={'file_path': file_path})
+
+        logger.info('Batch analysis started', extra={'files': len(jobs), 'workers': BATCH_WORKERS})
+
+        for upload_id, result, error in analyze_batch(jobs):
+            entry, file_path, artifact_path = stored[upload_id]
+            if error is None:
+                try:
+                    file_size = storage.size(file_path)
+                    # Other requests may have used up the quota while the batch was analyzed
+                    check_quota(request.user, file_size)
+                    storage.publish_dir(artifact_path)
+                    with transaction.atomic():
+                        upload_obj = Upload.objects.create(
+                            user=request.user,
+                            upload_id=upload_id,
+                            filename=entry['file_name'],
+                            file_path=file_path,
+                            artifact_path=artifact_path,
+                            file_size=file_size,
+                            status='Completed',
+                            **result
+                        )
+                        upload_obj.snapshot(entry['file_name'], file_path, file_size, result['rows'])
+                        StorageUsage.record(upload_obj)
+                        index_upload(upload_obj)
+                    entry.update(status='Completed', rows=result['rows'], columns=result['columns'])
+                    logger.debug('Batch file analyzed', extra={'file_name': entry['file_name'], 'rows': result['rows'], 'columns': result['columns']})
+                    continue
+                except QuotaExceeded as e:
+                    error = str(e)
+                except Exception as e:
+                    error = f'File processing failed: {e}'
+                    logger.exception('Batch file failed to save', extra={'file_name': entry['file_name']})
+            else:
+                error = f'File processing failed: {error}'
+
+            logger.warning('Batch file failed', extra={'file_name': entry['file_name'], 'error': error})
+            entry.update(status='Failed', error=error)
+            entry.pop('upload_id')
+            storage.delete(file_path)
+            delete_dataset(artifact_path)
+
+    completed = sum(entry['status'] == 'Completed' for entry in results)
+    logger.info('Batch complete', extra={'completed': completed, 'files': len(results)})
+
+    return Response({
+        'files': results,
+        'completed': completed,
+        'failed': len(results) - completed,
+        'message': f'{completed} of {len(results)} files uploaded and analyzed successfully'
+    }, status=status.HTTP_200_OK)
+
+
+def _session_status(session):
+    missing = session.missing_chunks()
+    return {
+        'session_id': session.session_id,
+        'filename': session.filename,
+        'status': session.status,
+        'total_size': session.total_size,
+        'chunk_size': session.chunk_size,
+        'total_chunks': session.total_chunks,
+        'received_chunks': len(session.received),
+        'received_ranges': received_ranges(session),
+        'missing_chunks': missing,
+        'upload_id': session.upload.upload_id if session.upload else None,
+    }
+
+
+def _delete_session(session):
+    if session.part_path and os.path.exists(storage.part_file(session.part_path)):
+        os.remove(storage.part_file(session.part_path))
+    session.delete()
+
+
+@csrf_exempt
+@api_view(['POST'])
+@permission_classes([IsAuthenticated])
+def create_upload_session(request):
+    """Start a resumable chunked upload"""
+    file_name = os.path.basename(str(request.data.get('filename') or ''))
+    if file_extension(file_name) not in ALLOWED_EXTENSIONS:
+        return Response({
+            'error': f'Invalid file type. Allowed: {", ".join(ALLOWED_EXTENSIONS)}'
+        }, status=status.HTTP_400_BAD_REQUEST)
+
+    try:
+        total_size = int(request.data.get('total_size'))
+        chunk_size = int(request.data.get('chunk_size') or DEFAULT_CHUNK_SIZE)
+    except (TypeError, ValueError):
+        return Response({
+            'error': 'total_size and chunk_size must be integers'
+        }, status=status.HTTP_400_BAD_REQUEST)
+    if total_size <= 0:
+        return Response({
+            'error': 'total_size must be positive'
+        }, status=status.HTTP_400_BAD_REQUEST)
+    if not MIN_CHUNK_SIZE <= chunk_size <= MAX_CHUNK_SIZE:
+        return Response({
+            'error': f'chunk_size must be between {MIN_CHUNK_SIZE} and {MAX_CHUNK_SIZE} bytes'
+        }, status=status.HTTP_400_BAD_REQUEST)
+    try:
+        schema = parse_overrides(request.data.get('schema'))
+    except SchemaError as e:
+        return Response({
+            'error': str(e)
+        }, status=status.HTTP_400_BAD_REQUEST)
+    try:
+        check_quota(request.user, total_size)
+    except QuotaExceeded as e:
+        return Response({
+            'error': str(e)
+        }, status=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE)
+
+    session_id = str(uuid.uuid4())
+    part_path = part_path_for(request.user.username, session_id)
+    allocate_part(storage.part_file(part_path), total_size)
+    session = UploadSession.objects.create(
+        user=request.user,
+        session_id=session_id,
+        filename=file_name,
+        part_path=part_path,
+        total_size=total_size,
+        chunk_size=chunk_size,
+        schema=schema,
+    )
+    logger.info('Upload session created', extra={'session_id': session_id, 'bytes': total_size, 'chunks': session.total_chunks})
+
+    return Response(_session_status(session), status=status.HTTP_201_CREATED)
 
 
 @api_view(['GET'])
 @permission_classes([IsAuthenticated])
-def get_upload_detail(request, upload_id):
-    """Get detailed information about a specific upload"""
-    print("=" * 50)
-    print(f"🔍 FETCH UPLOAD DETAIL - User: {request.user.username}, Upload ID: {upload_id}")
-    print("=" * 50)
-    
+def get_upload_session(request, session_id):
+    """Chunks received so far by a resumable upload"""
     try:
-        upload = Upload.objects.get(upload_id=upload_id, user=request.user)
-        serializer = UploadSerializer(upload)
-        
-        print(f"✅ Upload detail found: {upload.filename}")
-        
-        return Response(serializer.data, status=status.HTTP_200_OK)
-        
-    except Upload.DoesNotExist:
-        print(f"❌ Upload not found: {upload_id}")
+        session = UploadSession.objects.select_related('upload').get(session_id=session_id, user=request.user)
+        return Response(_session_status(session), status=status.HTTP_200_OK)
+    except UploadSession.DoesNotExist:
         return Response({
-            'error': 'Upload not found'
+            'error': 'Upload session not found'
         }, status=status.HTTP_404_NOT_FOUND)
-    except Exception as e:
-        print(f"❌ Error: {str(e)}")
+
+
+@csrf_exempt
+@api_view(['PUT'])
+@permission_classes([IsAuthenticated])
+def put_upload_chunk(request, session_id, index):
+    """Write one checksummed chunk of a resumable upload"""
+    try:
+        session = UploadSession.objects.get(session_id=session_id, user=request.user)
+    except UploadSession.DoesNotExist:
+        return Response({
+            'error': 'Upload session not found'
+        }, status=status.HTTP_404_NOT_FOUND)
+
+    if session.status != 'Open':
+        return Response({
+            'error': f'Upload session is already {session.status.lower()}'
+        }, status=status.HTTP_409_CONFLICT)
+    if not 0 <= index < session.total_chunks:
+        return Response({
+            'error': f'Chunk index must be between 0 and {session.total_chunks - 1}'
+        }, status=status.HTTP_400_BAD_REQUEST)
+    checksum = request.headers.get('X-Chunk-SHA256')
+    if not checksum:
+        return Response({
+            'error': 'X-Chunk-SHA256 header is required'
+        }, status=status.HTTP_400_BAD_REQUEST)
+
+    try:
+        write_chunk(
+            storage.part_file(session.part_path), index * session.chunk_size,
+            request.stream or io.BytesIO(), session.chunk_length(index), checksum,
+        )
+    except ChunkError as e:
+        logger.warning('Upload chunk rejected', extra={'session_id': session_id, 'chunk': index, 'error': str(e)})
         return Response({
             'error': str(e)
-        }, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
+        }, status=status.HTTP_400_BAD_REQUEST)
+
+    with transaction.atomic():
+        session = UploadSession.objects.select_for_update().get(pk=session.pk)
+        if index not in session.received:
+            session.received.append(index)
+            session.save(update_fields=['received', 'updated_at'])
+
+    return Response({
+        'session_id': session_id,
+        'index': index,
+        'received_chunks': len(session.received),
+        'total_chunks': session.total_chunks,
+    }, status=status.HTTP_200_OK)
+
+
+@csrf_exempt
+@api_view(['POST'])
+@permission_classes([IsAuthenticated])
+def complete_upload_session(request, session_id):
+    """Assemble a fully received resumable upload and analyze it"""
+    file_path = None
+    try:
+        # Claim the session in a short transaction; the ingest runs outside any transaction
+        with transaction.atomic():
+            # Completing twice (e.g. a retry after a dropped response) must not ingest twice
+            session = UploadSession.objects.select_for_update().select_related('upload').get(
+                session_id=session_id, user=request.user
+            )
+            if session.status == 'Completed':
+                return Response({
+                    'upload_id': session.upload.upload_id if session.upload else None,
+                    'file_name': session.filename,
+                    'message': 'Upload session already completed'
+                }, status=status.HTTP_200_OK)
+            if session.status == 'Processing':
+                return Response({
+                    'error': 'Upload session is already being processed',
+                    'status': session.status,
+                }, status=status.HTTP_409_CONFLICT)
+
+            missing = session.missing_chunks()
+            if missing:
+                return Response({
+                    'error': f'{len(missing)} chunks are missing',
+                    'missing_chunks': missing,
+                }, status=status.HTTP_400_BAD_REQUEST)
+            # Uploads finished since the session was created may have used up the quota.
+            # The session's own bytes are already counted as reserved.
+            try:
+                check_quota(request.user, 0)
+            except QuotaExceeded as e:
+                return Response({
+                    'error': str(e)
+                }, status=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE)
+
+            session.status = 'Processing'
+            session.save(update_fields=['status', 'updated_at'])
+
+        upload_id = str(uuid.uuid4())
+        file_path = storage.store_file(
+            storage.part_file(session.part_path),
+            f'uploads/{request.user.username}/{upload_id}_{session.filename}'
+        )
+        logger.debug('Upload session assembled', extra={'session_id': session_id, 'file_path': file_path, 'bytes': session.total_size})
+
+        upload_obj, result = _analyze_stored_file(
+            request.user, upload_id, session.filename, file_path, file_extension(session.filename), session.schema
+        )
+        with transaction.atomic():
+            session.status = 'Completed'
+            session.upload = upload_obj
+            session.part_path = ''
+            session.save(update_fields=['status', 'upload', 'part_path', 'updated_at'])
+
+        logger.info('Upload analyzed', extra={'upload_id': upload_id, 'session_id': session_id})
+
+        return Response({
+            'upload_id': upload_id,
+            'file_name': session.filename,
+            'version': upload_obj.version,
+            **result,
+            'message': 'File uploaded and analyzed successfully'
+        }, status=status.HTTP_200_OK)
+
+    except UploadSession.DoesNotExist:
+        return Response({
+            'error': 'Upload session not found'
+        }, status=status.HTTP_404_NOT_FOUND)
+    except Exception as e:
+        # The assembled file cannot be analyzed; resending it would not help
+        storage.delete(file_path)
+        UploadSession.objects.filter(session_id=session_id, user=request.user).delete()
+        logger.exception('Upload session failed', extra={'session_id': session_id})
+        code = status.HTTP_400_BAD_REQUEST if isinstance(e, ArchiveError) else status.HTTP_500_INTERNAL_SERVER_ERROR
+        return Response({
+            'error': str(e) if isinstance(e, ArchiveError) else f'File processing failed: {str(e)}'
+        }, status=code)
 
 
 @api_view(['DELETE'])
 @permission_classes([IsAuthenticated])
-def delete_upload(request, upload_id):
-    """Delete an upload and its associated files"""
-    print("=" * 50)
-    print(f"🗑️  DELETE UPLOAD - User: {request.user.username}, Upload ID: {upload_id}")
-    print("=" * 50)
-    
+def delete_upload_session(request, session_id):
+    """Abort a resumable upload and discard its chunks"""
     try:
-        upload = Upload.objects.get(upload_id=upload_id, user=request.user)
-        filename = upload.filename
-        file_path = upload.file_path
-        
-        if default_storage.exists(file_path):
-            default_storage.delete(file_path)
-            print(f"🗑️  Deleted file: {file_path}")
-        
+        session = UploadSession.objects.get(session_id=session_id, user=request.user)
+        _delete_session(session)
+        return Response({
+            'message': 'Upload session deleted'
+        }, status=status.HTTP_200_OK)
+    except UploadSession.DoesNotExist:
+        return Response({
+            'error': 'Upload session not found'
+        }, status=status.HTTP_404_NOT_FOUND)
+
+
+def _delete_upload_row(upload):
+    """Delete an upload row and take it out of its user's usage totals"""
+    with transaction.atomic():
+        StorageUsage.record(upload, -1)
         upload.delete()
-        print(f"✅ Upload deleted from database: {filename}")
-        
+
+
+def _delete_user_data(user):
+    """Remove every upload, its files and every upload session of a user"""
+    uploads = Upload.objects.filter(user=user)
+    count = uploads.count()
+    for upload in uploads:
+        storage.delete(upload.file_path)
+        _delete_version_files(upload)
+        delete_dataset(upload.artifact_path)
+        _delete_upload_row(upload)
+    for session in UploadSession.objects.filter(user=user):
+        _delete_session(session)
+    return count
+
+
+def _delete_version_files(upload):
+    """Remove the files appended to an upload after its first version"""
+    for path in upload.versions.exclude(file_path=upload.file_path).values_list('file_path', flat=True):
+        storage.delete(path)
+
+
+def _rebuild_dataset(upload):
+    """Re-ingest every file of an upload whose saved statistics are missing"""
+    sources = [(v.file_path, v.filename) for v in upload.versions.all()] or [(upload.file_path, upload.filename)]
+    schema = schema_from_dtypes(upload.data_types)
+    delete_dataset(upload.artifact_path)
+    with ExitStack() as local_files:
+        chunks = itertools.chain.from_iterable(
+            iter_chunks(local_files.enter_context(storage.local_path(path)), file_extension(name), schema=schema)
+            for path, name in sources
+        )
+        result = run_ingest(chunks, storage.local_dir(upload.artifact_path))
+    storage.publish_dir(upload.artifact_path)
+    return result
+
+
+@api_view(['POST'])
+@permission_classes([IsAuthenticated])
+def append_upload(request, upload_id):
+    """Append the rows of a new file to an existing upload"""
+    if 'file' not in request.FILES:
         return Response({
-            'message': f'Upload "{filename}" deleted successfully'
+            'error': 'No file provided'
+        }, status=status.HTTP_400_BAD_REQUEST)
+
+    uploaded_file = request.FILES['file']
+    file_name = uploaded_file.name
+    file_ext = file_extension(file_name)
+
+    if file_ext not in ALLOWED_EXTENSIONS:
+        return Response({
+            'error': f'Invalid file type. Allowed: {", ".join(ALLOWED_EXTENSIONS)}'
+        }, status=status.HTTP_400_BAD_REQUEST)
+
+    try:
+        check_quota(request.user, uploaded_file.size, incoming_uploads=0)
+    except QuotaExceeded as e:
+        return Response({
+            'error': str(e)
+        }, status=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE)
+
+    file_path, claimed = None, False
+    try:
+        # Appends to the same upload run one at a time: claim it in a short transaction
+        with transaction.atomic():
+            upload = Upload.objects.select_for_update().get(upload_id=upload_id, user=request.user)
+            if upload.is_appending():
+                return Response({
+                    'error': 'Rows are already being appended to this upload'
+                }, status=status.HTTP_409_CONFLICT)
+            upload.appending_since = timezone.now()
+            upload.save(update_fields=['appending_since', 'updated_at'])
+            claimed = True
+        version = upload.version + 1
+
+        file_path = storage.save(
+            f'uploads/{request.user.username}/{upload_id}_v{version}_{file_name}',
+            uploaded_file
+        )
+        file_size = storage.size(file_path)
+        logger.debug('File saved', extra={'upload_id': upload_id, 'file_path': file_path, 'bytes': file_size})
+
+        open_dataset(upload)
+        directory = storage.local_dir(upload.artifact_path)
+        if IngestState.load(directory) is None:
+            logger.info('No saved statistics, rebuilding from the original files', extra={'upload_id': upload_id})
+            _rebuild_dataset(upload)
+
+        previous_rows = upload.rows
+        # Appended rows are parsed with the types of the existing columns
+        with storage.local_path(file_path) as full_path:
+            chunks = iter_chunks(full_path, file_ext, schema=schema_from_dtypes(upload.data_types))
+            result = run_ingest(chunks, directory, append=True)
+        storage.publish_dir(upload.artifact_path)
+
+        with transaction.atomic():
+            upload = Upload.objects.select_for_update().get(pk=upload.pk)
+            for field, value in result.items():
+                setattr(upload, field, value)
+            upload.version = version
+            upload.file_size += file_size
+            upload.appending_since = None
+            upload.save()
+            upload.snapshot(file_name, file_path, file_size, result['rows'] - previous_rows)
+            StorageUsage.adjust(request.user, total_bytes=file_size, total_rows=result['rows'] - previous_rows)
+            index_upload(upload)
+        claimed = False
+
+        logger.info('Rows appended', extra={'upload_id': upload_id, 'rows_added': result['rows'] - previous_rows, 'version': version})
+
+        return Response({
+            'upload_id': upload_id,
+            'file_name': file_name,
+            'version': version,
+            'rows_added': result['rows'] - previous_rows,
+            **result,
+            'message': 'Rows appended and analysis updated successfully'
         }, status=status.HTTP_200_OK)
-        
+
     except Upload.DoesNotExist:
-        print(f"❌ Upload not found: {upload_id}")
+        # Also raised when the upload is deleted while rows are being appended
+        storage.delete(file_path)
         return Response({
             'error': 'Upload not found'
         }, status=status.HTTP_404_NOT_FOUND)
-    except Exception as e:
-        print(f"❌ Delete error: {str(e)}")
-        traceback.print_exc()
+    except (AppendError, ArchiveError) as e:
+        storage.delete(file_path)
         return Response({
             'error': str(e)
+        }, status=status.HTTP_400_BAD_REQUEST)
+    except Exception as e:
+        storage.delete(file_path)
+        logger.exception('Append failed', extra={'upload_id': upload_id})
+        return Response({
+            'error': f'File processing failed: {str(e)}'
         }, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
+    finally:
+        if claimed:
+            Upload.objects.filter(upload_id=upload_id).update(appending_since=None)
 
 
 @api_view(['GET'])
 @permission_classes([IsAuthenticated])
-def download_pdf_report(request, upload_id):
-    """Download PDF report for an upload"""
-    print("=" * 50)
-    print(f"📥 PDF DOWNLOAD - User: {request.user.username}, Upload ID: {upload_id}")
-    print("=" * 50)
-    
+def get_upload_versions(request, upload_id):
+    """List the versions of an upload"""
     try:
         upload = Upload.objects.get(upload_id=upload_id, user=request.user)
+        versions = upload.versions.only(
+            'version', 'filename', 'file_size', 'total_file_size', 'rows_added', 'rows', 'columns', 'created_at'
+        )
+        return Response({
+            'upload_id': upload_id,
+            'version': upload.version,
+            'versions': UploadVersionSerializer(versions, many=True).data
+        }, status=status.HTTP_200_OK)
+
+    except Upload.DoesNotExist:
+        return Response({
+            'error': 'Upload not found'
+        }, status=status.HTTP_404_NOT_FOUND)
+
+
+@api_view(['GET'])
+@permission_classes([IsAuthenticated])
+def get_usage(request):
+    """Get the user's upload count, storage totals and quota headroom"""
+    return Response(usage_summary(request.user), status=status.HTTP_200_OK)
+
+
+@api_view(['GET'])
+@permission_classes([IsAuthenticated])
+def get_dashboard_summary(request):
+    """Get upload counters and the most recent uploads for the dashboard"""
+    try:
+        recent = int(request.query_params.get('recent', DEFAULT_RECENT_UPLOADS))
+    except ValueError:
+        return Response({
+            'error': 'recent must be an integer'
+        }, status=status.HTTP_400_BAD_REQUEST)
+    recent = max(0, min(recent, MAX_RECENT_UPLOADS))
+    return Response(dashboard_summary(request.user, recent), status=status.HTTP_200_OK)
+
+
+@api_view(['GET'])
+@permission_classes([IsAuthenticated])
+def get_upload_history(request):
+    """Get user's upload history, searched, filtered and sorted by query parameters"""
+    try:
+        uploads, offset, limit = history_query(request.user, request.query_params)
+        total = uploads.count()
+        page = uploads.select_related('user').defer(*UploadListSerializer.DEFERRED_FIELDS)
+        serializer = UploadListSerializer(page[offset:None if limit is None else offset + limit], many=True)
+        
+        logger.info('Upload history listed', extra={'returned': len(serializer.data), 'total': total})
+        
+        return Response({
+            'uploads': serializer.data,
+            'total': total
+        }, status=status.HTTP_200_OK)
+        
+    except HistoryError as e:
+        return Response({
+            'error': str(e)
+        }, status=status.HTTP_400_BAD_REQUEST)
+    except Exception as e:
+        logger.exception('Upload history failed')
+        return Response({
+            'error': str(e)
+        }, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
+
+
+@api_view(['GET'])
+@permission_classes([IsAuthenticated])
+def get_upload_detail(request, upload_id):
+    """Get detailed information about a specific upload"""
+    try:
+        upload = Upload.objects.get(upload_id=upload_id, user=request.user)
+        serializer = UploadSerializer(upload)
+        
+        
+        return Response(serializer.data, status=status.HTTP_200_OK)
+        
+    except Upload.DoesNotExist:
+        return Response({
+            'error': 'Upload not found'
+        }, status=status.HTTP_404_NOT_FOUND)
+    except Exception as e:
+        logger.exception('Upload detail failed', extra={'upload_id': upload_id})
+        return Response({
+            'error': str(e)
+        }, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
+
+
+@api_view(['GET'])
+@permission_classes([IsAuthenticated])
+def compare_uploads_view(request):
+    """Compare uploads column by column using their stored summaries"""
+    try:
+        upload_ids = []
+        for value in request.query_params.getlist('ids'):
+            for upload_id in value.split(','):
+                if upload_id and upload_id not in upload_ids:
+                    upload_ids.append(upload_id)
+
+        try:
+            auto = int(request.query_params.get('auto', 0))
+        except ValueError:
+            return Response({
+                'error': 'auto must be an integer'
+            }, status=status.HTTP_400_BAD_REQUEST)
+        if auto and len(upload_ids) == 1:
+            # Fill in the uploads whose columns overlap the given one most
+            baseline = Upload.objects.filter(user=request.user, upload_id=upload_ids[0]).first()
+            if baseline:
+                ranked = comparable_uploads(baseline, limit=min(auto, MAX_COMPARE_UPLOADS - 1))
+                ids = dict(Upload.objects.filter(id__in=[entry['id'] for entry in ranked]).values_list('id', 'upload_id'))
+                upload_ids.extend(ids[entry['id']] for entry in ranked)
+
+        if not 2 <= len(upload_ids) <= MAX_COMPARE_UPLOADS:
+            return Response({
+                'error': f'Provide between 2 and {MAX_COMPARE_UPLOADS} distinct upload ids'
+            }, status=status.HTTP_400_BAD_REQUEST)
+
+        uploads = {
+            upload.upload_id: upload
+            for upload in Upload.objects.filter(user=request.user, upload_id__in=upload_ids).only(*SUMMARY_FIELDS)
+        }
+        missing = [upload_id for upload_id in upload_ids if upload_id not in uploads]
+        if missing:
+            return Response({
+                'error': 'Upload not found',
+                'missing': missing
+            }, status=status.HTTP_404_NOT_FOUND)
+
+        result = compare_uploads([uploads[upload_id] for upload_id in upload_ids])
+
+        logger.info('Uploads compared', extra={'uploads': len(upload_ids), 'columns': len(result['columns'])})
+
+        return Response(result, status=status.HTTP_200_OK)
+
+    except Exception as e:
+        logger.exception('Compare failed')
+        return Response({
+            'error': str(e)
+        }, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
+
+
+@api_view(['GET'])
+@permission_classes([IsAuthenticated])
+def search_upload_schema(request):
+    """Find uploads that have columns with the given names and/or type"""
+    try:
+        columns = []
+        for value in request.query_params.getlist('columns'):
+            columns.extend(col for col in value.split(',') if col.strip())
+        matches = search_schema(
+            request.user,
+            columns=columns,
+            kind=request.query_params.get('kind') or None,
+            match=request.query_params.get('match', 'all'),
+            partial=request.query_params.get('partial') in ('1', 'true'),
+        )
+        uploads = Upload.objects.filter(id__in=list(matches)).order_by('-upload_date').values(*RECENT_UPLOAD_FIELDS)
+        results = [{**upload_row(upload), 'matches': matches[upload['id']]} for upload in uploads]
+
+        logger.info('Schema search', extra={'columns': columns, 'matches': len(results)})
+
+        return Response({
+            'uploads': results,
+            'total': len(results)
+        }, status=status.HTTP_200_OK)
+
+    except CatalogError as e:
+        return Response({
+            'error': str(e)
+        }, status=status.HTTP_400_BAD_REQUEST)
+    except Exception as e:
+        logger.exception('Schema search failed')
+        return Response({
+            'error': str(e)
+        }, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
+
+
+@api_view(['GET'])
+@permission_classes([IsAuthenticated])
+def get_comparable_uploads(request, upload_id):
+    """List the user's other uploads ranked by how many columns they share with this one"""
+    try:
+        upload = Upload.objects.only('id', 'user_id').get(upload_id=upload_id, user=request.user)
+        try:
+            limit = min(int(request.query_params.get('limit', DEFAULT_COMPARABLE_UPLOADS)), MAX_COMPARE_UPLOADS)
+            min_overlap = float(request.query_params.get('min_overlap', MIN_COMPARABLE_OVERLAP))
+        except ValueError:
+            return Response({
+                'error': 'limit must be an integer and min_overlap a number'
+            }, status=status.HTTP_400_BAD_REQUEST)
+
+        ranked = comparable_uploads(upload, limit=limit, min_overlap=min_overlap)
+        rows = {row['id']: upload_row(row) for row in Upload.objects.filter(id__in=[entry['id'] for entry in ranked]).values(*RECENT_UPLOAD_FIELDS)}
+
+        return Response({
+            'upload_id': upload_id,
+            'uploads': [{**rows[entry['id']], **entry} for entry in ranked]
+        }, status=status.HTTP_200_OK)
+
+    except Upload.DoesNotExist:
+        return Response({
+            'error': 'Upload not found'
+        }, status=status.HTTP_404_NOT_FOUND)
+
+
+@api_view(['GET'])
+@permission_classes([IsAuthenticated])
+def get_chart_data(request, upload_id):
+    """Get downsampled chart series for numeric columns of an upload"""
+    try:
+        upload = Upload.objects.get(upload_id=upload_id, user=request.user)
+        
+        try:
+            points = min(int(request.query_params.get('points', DEFAULT_CHART_POINTS)), MAX_CHART_POINTS)
+            bins = min(int(request.query_params.get('bins', DEFAULT_HISTOGRAM_BINS)), MAX_HISTOGRAM_BINS)
+        except ValueError:
+            return Response({
+                'error': 'points and bins must be integers'
+            }, status=status.HTTP_400_BAD_REQUEST)
+        
+        dataset = open_dataset(upload)
+        numeric_columns = [col for col in dataset.column_names if dataset.kind(col) == NUMERIC]
+        
+        requested = request.query_params.get('columns')
+        if requested:
+            columns = [col for col in requested.split(',') if col]
+            unknown = [col for col in columns if col not in numeric_columns]
+            if unknown:
+                return Response({
+                    'error': f'Unknown or non-numeric columns: {", ".join(unknown)}'
+                }, status=status.HTTP_400_BAD_REQUEST)
+        else:
+            columns = numeric_columns
+        
+        series = chart_series(dataset, columns, points=max(points, 3), bins=max(bins, 1))
+        
+        logger.debug('Chart data built', extra={'upload_id': upload_id, 'columns': len(columns), 'rows': dataset.rows})
+        
+        return Response({
+            'upload_id': upload_id,
+            'rows': dataset.rows,
+            'points': points,
+            'bins': bins,
+            'series': series
+        }, status=status.HTTP_200_OK)
+        
+    except Upload.DoesNotExist:
+        return Response({
+            'error': 'Upload not found'
+        }, status=status.HTTP_404_NOT_FOUND)
+    except Exception as e:
+        logger.exception('Chart data failed', extra={'upload_id': upload_id})
+        return Response({
+            'error': str(e)
+        }, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
+
+
+@api_view(['GET'])
+@permission_classes([IsAuthenticated])
+def get_upload_rows(request, upload_id):
+    """Query rows of an upload with projection, filters, sort and pagination"""
+    try:
+        upload = Upload.objects.get(upload_id=upload_id, user=request.user)
+        dataset = open_dataset(upload)
+        
+        try:
+            limit = int(request.query_params.get('limit', DEFAULT_PAGE_SIZE))
+            offset = int(request.query_params.get('offset', 0))
+        except ValueError:
+            return Response({
+                'error': 'limit and offset must be integers'
+            }, status=status.HTTP_400_BAD_REQUEST)
+        
+        columns = request.query_params.get('columns')
+        query = RowQuery(
+            dataset,
+            columns=[col for col in columns.split(',') if col] if columns else None,
+            filters=request.query_params.getlist('filter'),
+            sort=request.query_params.get('sort') or None,
+            limit=limit,
+            offset=offset,
+            cursor=request.query_params.get('cursor') or None,
+        )
+        result = query.execute()
+        
+        logger.debug('Rows queried', extra={'upload_id': upload_id, 'returned': len(result['rows']), 'rows': dataset.rows})
+        
+        return Response({
+            'upload_id': upload_id,
+            'total_rows': dataset.rows,
+            **result
+        }, status=status.HTTP_200_OK)
+        
+    except QueryError as e:
+        return Response({
+            'error': str(e)
+        }, status=status.HTTP_400_BAD_REQUEST)
+    except Upload.DoesNotExist:
+        return Response({
+            'error': 'Upload not found'
+        }, status=status.HTTP_404_NOT_FOUND)
+    except Exception as e:
+        logger.exception('Row query failed', extra={'upload_id': upload_id})
+        return Response({
+            'error': str(e)
+        }, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
+
+
+@api_view(['GET'])
+@permission_classes([IsAuthenticated])
+def get_upload_timeseries(request, upload_id):
+    """Get time-bucketed mean/min/max series of numeric columns from the rollups"""
+    try:
+        upload = Upload.objects.get(upload_id=upload_id, user=request.user)
+
+        try:
+            points = min(int(request.query_params.get('points', DEFAULT_CHART_POINTS)), MAX_CHART_POINTS)
+        except ValueError:
+            return Response({
+                'error': 'points must be an integer'
+            }, status=status.HTTP_400_BAD_REQUEST)
+
+        columns = request.query_params.get('columns')
+        result = rollup_series(
+            storage.local_dir(upload.artifact_path),
+            upload.time_series,
+            columns=[col for col in columns.split(',') if col] if columns else None,
+            start=request.query_params.get('start') or None,
+            end=request.query_params.get('end') or None,
+            resolution=request.query_params.get('resolution', 'auto'),
+            points=points,
+        )
+
+        logger.debug('Time series built', extra={'upload_id': upload_id, 'buckets': len(result['timestamps']), 'resolution': result['resolution']})
+
+        return Response({
+            'upload_id': upload_id,
+            **result
+        }, status=status.HTTP_200_OK)
+
+    except RollupError as e:
+        return Response({
+            'error': str(e)
+        }, status=status.HTTP_400_BAD_REQUEST)
+    except Upload.DoesNotExist:
+        return Response({
+            'error': 'Upload not found'
+        }, status=status.HTTP_404_NOT_FOUND)
+    except Exception as e:
+        logger.exception('Time series failed', extra={'upload_id': upload_id})
+        return Response({
+            'error': str(e)
+        }, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
+
+
+def _missing_outliers(upload, dataset):
+    """Numeric columns of an upload that have no outlier scan yet"""
+    return [
+        name for name in upload.summary_stats
+        if dataset.has_column(name) and dataset.kind(name) == NUMERIC and name not in upload.outliers
+    ]
+
+
+@api_view(['GET'])
+@permission_classes([IsAuthenticated])
+def get_upload_outliers(request, upload_id):
+    """Get outlier counts per column, or the flagged rows of one column"""
+    try:
+        upload = Upload.objects.get(upload_id=upload_id, user=request.user)
+        dataset = open_dataset(upload)
+        directory = storage.local_dir(upload.artifact_path)
+
+        # Uploads that predate outlier detection are scanned on first request. The scan
+        # holds the upload's row lock, so concurrent requests do not write the same bitmaps.
+        if _missing_outliers(upload, dataset):
+            with transaction.atomic():
+                upload = Upload.objects.select_for_update().get(pk=upload.pk)
+                missing = _missing_outliers(upload, dataset)
+                if missing:
+                    files = {col['name']: col['file'] for col in dataset.manifest['columns']}
+                    for name in missing:
+                        upload.outliers[name] = detect_column_outliers(
+                            dataset.numeric(name), upload.summary_stats[name], None, directory, files[name]
+                        )
+                    storage.publish_dir(upload.artifact_path)
+                    upload.save(update_fields=['outliers'])
+
+        column = request.query_params.get('column')
+        if not column:
+            return Response({
+                'upload_id': upload_id,
+                'total_rows': dataset.rows,
+                'outliers': upload.outliers,
+            }, status=status.HTTP_200_OK)
+
+        detail = upload.outliers.get(column)
+        if not detail:
+            return Response({
+                'error': f'No outlier data for column "{column}"'
+            }, status=status.HTTP_400_BAD_REQUEST)
+
+        try:
+            limit = int(request.query_params.get('limit', DEFAULT_PAGE_SIZE))
+            offset = int(request.query_params.get('offset', 0))
+        except ValueError:
+            return Response({
+                'error': 'limit and offset must be integers'
+            }, status=status.HTTP_400_BAD_REQUEST)
+        if not 1 <= limit <= MAX_PAGE_SIZE or offset < 0:
+            return Response({
+                'error': f'limit must be between 1 and {MAX_PAGE_SIZE} and offset non-negative'
+            }, status=status.HTTP_400_BAD_REQUEST)
+
+        positions = read_outlier_rows(directory, detail['bitmap'], dataset.rows)
+        page = positions[offset:offset + limit]
+        values = {name: dataset.decode(name, page) for name in dataset.column_names}
+        rows = [
+            {'_row': int(position), **{name: values[name][i] for name in dataset.column_names}}
+            for i, position in enumerate(page)
+        ]
+
+        logger.debug('Outliers queried', extra={'upload_id': upload_id, 'column': column, 'returned': len(rows), 'flagged': int(positions.size)})
+
+        return Response({
+            'upload_id': upload_id,
+            'column': column,
+            'flagged': int(positions.size),
+            'counts': detail['counts'],
+            'thresholds': detail['thresholds'],
+            'columns': dataset.column_names,
+            'rows': rows,
+            'limit': limit,
+            'offset': offset,
+            'has_more': offset + limit < positions.size,
+        }, status=status.HTTP_200_OK)
+
+    except Upload.DoesNotExist:
+        return Response({
+            'error': 'Upload not found'
+        }, status=status.HTTP_404_NOT_FOUND)
+    except Exception as e:
+        logger.exception('Outlier query failed', extra={'upload_id': upload_id})
+        return Response({
+            'error': str(e)
+        }, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
+
+
+def _byte_range(header, total):
+    """``[start, end)`` of a single ``Range: bytes=...`` header, None if unsatisfiable"""
+    match = re.fullmatch(r'bytes=(\d*)-(\d*)', header.strip())
+    if not match or match.groups() == ('', ''):
+        return None
+    first, last = match.groups()
+    if not first:
+        start, end = max(total - int(last), 0), total
+    else:
+        start = int(first)
+        end = min(int(last) + 1, total) if last else total
+    if start >= end:
+        return None
+    return start, end
+
+
+@api_view(['GET'])
+@permission_classes([IsAuthenticated])
+def download_upload_file(request, upload_id):
+    """Stream the original file of an upload, honouring a byte range"""
+    try:
+        upload = Upload.objects.get(upload_id=upload_id, user=request.user)
+        if not storage.exists(upload.file_path):
+            return Response({
+                'error': 'File not found in storage'
+            }, status=status.HTTP_404_NOT_FOUND)
+
+        total = storage.size(upload.file_path)
+        start, end, code = 0, total, status.HTTP_200_OK
+        header = request.headers.get('Range')
+        if header:
+            span = _byte_range(header, total)
+            if span is None:
+                response = HttpResponse(status=status.HTTP_416_REQUESTED_RANGE_NOT_SATISFIABLE)
+                response['Content-Range'] = f'bytes */{total}'
+                return response
+            (start, end), code = span, status.HTTP_206_PARTIAL_CONTENT
+
+        response = StreamingHttpResponse(
+            storage.iter_range(upload.file_path, start, end),
+            status=code,
+            content_type='application/octet-stream'
+        )
+        response['Content-Length'] = str(end - start)
+        response['Accept-Ranges'] = 'bytes'
+        response['Content-Disposition'] = f'attachment; filename="{upload.filename}"'
+        if code == status.HTTP_206_PARTIAL_CONTENT:
+            response['Content-Range'] = f'bytes {start}-{end - 1}/{total}'
+        return response
+
+    except Upload.DoesNotExist:
+        return Response({
+            'error': 'Upload not found'
+        }, status=status.HTTP_404_NOT_FOUND)
+
+
+@api_view(['DELETE'])
+@permission_classes([IsAuthenticated])
+def delete_upload(request, upload_id):
+    """Delete an upload and its associated files"""
+    try:
+        upload = Upload.objects.get(upload_id=upload_id, user=request.user)
+        filename = upload.filename
+        file_path = upload.file_path
+        
+        if storage.exists(file_path):
+            storage.delete(file_path)
+            logger.debug('Stored file deleted', extra={'file_path': file_path})
+        _delete_version_files(upload)
+        delete_dataset(upload.artifact_path)
         
-        if not default_storage.exists(upload.file_path):
-            print(f"❌ File not found in storage: {upload.file_path}")
-            return Response({
-                'error': 'File not found in storage'
-            }, status=status.HTTP_404_NOT_FOUND)
-        
-        file_ext = os.path.splitext(upload.filename)[1].lower()
-        file_data = default_storage.open(upload.file_path, 'rb').read()
-        
-        if file_ext == '.csv':
-            df = pd.read_csv(io.BytesIO(file_data))
-        else:
-            df = pd.read_excel(io.BytesIO(file_data))
-        
-        numeric_df = df.select_dtypes(include=['number'])
+        _delete_upload_row(upload)
+        logger.info('Upload deleted', extra={'upload_id': upload_id})
         
-        print(f"Generating PDF for file: {upload.filename}")
+        return Response({
+            'message': f'Upload "{filename}" deleted successfully'
+        }, status=status.HTTP_200_OK)
         
+    except Upload.DoesNotExist:
+        return Response({
+            'error': 'Upload not found'
+        }, status=status.HTTP_404_NOT_FOUND)
+    except Exception as e:
+        logger.exception('Delete failed', extra={'upload_id': upload_id})
+        return Response({
+            'error': str(e)
+        }, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
+
+
+@api_view(['GET'])
+@permission_classes([IsAuthenticated])
+def download_pdf_report(request, upload_id):
+    """Download PDF report for an upload"""
+    try:
+        upload = Upload.objects.get(upload_id=upload_id, user=request.user)
+        
+        if not storage.exists(upload.file_path):
+            logger.error('Stored file missing', extra={'upload_id': upload_id, 'file_path': upload.file_path})
+            return Response({
+                'error': 'File not found in storage'
+            }, status=status.HTTP_404_NOT_FOUND)
+        
+        latest_version = upload.version
+        version = request.query_params.get('version')
+        if version:
+            try:
+                upload.apply_version(upload.versions.get(version=int(version)))
+            except (ValueError, UploadVersion.DoesNotExist):
+                return Response({
+                    'error': f'Version {version} not found'
+                }, status=status.HTTP_404_NOT_FOUND)
+        
+        # Tables come from the stored analysis; only the sample rows and
+        # chart columns are read from the columnar copy, which holds every
+        # version as a prefix of its rows
+        spans = SpanTimer()
+        spans.start('load')
+        dataset = open_dataset(upload)
+        sample_df = dataset.to_frame(min(upload.rows, PDF_SAMPLE_ROWS))
+        summary_stats = upload.summary_stats
+        numeric_columns = [col for col in upload.column_names if summary_stats.get(col, {}).get('count')]
+        
+        spans.start('layout')
         buffer = io.BytesIO()
         doc = SimpleDocTemplate(buffer, pagesize=A4, rightMargin=30, leftMargin=30, 
                                topMargin=30, bottomMargin=18)
@@ -773,6 +1744,7 @@ def download_pdf_report(request, upload_id):
             ['File Name:', upload.filename],
             ['Generated By:', request.user.username],
             ['Upload ID:', upload_id],
+            ['Version:', str(upload.version)],
         ]
         
         info_table = Table(info_data, colWidths=[2*inch, 4*inch])
@@ -792,9 +1764,9 @@ def download_pdf_report(request, upload_id):
         
         elements.append(Paragraph("Dataset Overview", heading_style))
         overview_data = [
-            ['Total Rows:', str(df.shape[0])],
-            ['Total Columns:', str(df.shape[1])],
-            ['Memory Usage:', f"{df.memory_usage(deep=True).sum() / 1024:.2f} KB"],
+            ['Total Rows:', str(upload.rows)],
+            ['Total Columns:', str(len(upload.column_names))],
+            ['File Size:', f"{upload.file_size / 1024:.2f} KB"],
         ]
         
         overview_table = Table(overview_data, colWidths=[2*inch, 4*inch])
@@ -812,16 +1784,24 @@ def download_pdf_report(request, upload_id):
         elements.append(Spacer(1, 0.3*inch))
         
         elements.append(Paragraph("Column Information", heading_style))
-        column_data = [['Column Name', 'Data Type', 'Non-Null Count', 'Null Count']]
-        
-        for col in df.columns:
-            non_null = df[col].count()
-            null_count = df[col].isnull().sum()
-            dtype = str(df[col].dtype)
-            column_data.append([str(col)[:30], str(dtype)[:20], str(non_null), str(null_count)])
+        column_data = [['Column Name', 'Data Type', 'Non-Null', 'Null', 'Distinct (est.)', 'Top Value']]
+        
+        for col in upload.column_names:
+            null_count = upload.missing_values.get(col, 0)
+            non_null = upload.rows - null_count
+            dtype = upload.data_types.get(col, 'N/A')
+            profile = upload.column_profiles.get(str(col), {})
+            top_values = profile.get('top_values', [])
+            top_value = 'N/A'
+            if top_values and top_values[0]['count'] - top_values[0]['error'] > 1:
+                top = top_values[0]
+                count = f"{top['count']}" if top['error'] == 0 else f"~{top['count']}"
+                top_value = f"{str(top['value'])[:16]} ({count})"
+            distinct = f"{profile['distinct']:,}" if 'distinct' in profile else 'N/A'
+            column_data.append([str(col)[:22], str(dtype)[:12], str(non_null), str(null_count), distinct, top_value])
         
         if len(column_data) > 1:
-            column_table = Table(column_data, colWidths=[2*inch, 1.5*inch, 1.5*inch, 1.5*inch])
+            column_table = Table(column_data, colWidths=[1.5*inch, 0.9*inch, 0.8*inch, 0.6*inch, 1*inch, 1.7*inch])
             column_table.setStyle(TableStyle([
                 ('BACKGROUND', (0, 0), (-1, 0), colors.HexColor('#2563eb')),
                 ('TEXTCOLOR', (0, 0), (-1, 0), colors.whitesmoke),
@@ -840,13 +1820,14 @@ def download_pdf_report(request, upload_id):
         
         elements.append(PageBreak())
         
+        spans.start('stats')
         elements.append(Paragraph("Key Highlights", heading_style))
         highlights = []
-        if not numeric_df.empty:
-            for col in numeric_df.columns[:3]:
-                mean_val = numeric_df[col].mean()
-                std_val = numeric_df[col].std()
-                highlights.append(Paragraph(f"<b>{col}:</b> Mean = {mean_val:.2f}, Std Dev = {std_val:.2f}", normal_style))
+        for col in numeric_columns[:3]:
+            mean_val = summary_stats[col]['mean']
+            std_val = summary_stats[col]['std']
+            std_text = f"{std_val:.2f}" if std_val is not None else 'N/A'
+            highlights.append(Paragraph(f"<b>{col}:</b> Mean = {mean_val:.2f}, Std Dev = {std_text}", normal_style))
         if highlights:
             for h in highlights:
                 elements.append(h)
@@ -855,22 +1836,17 @@ def download_pdf_report(request, upload_id):
         
         elements.append(Paragraph("Statistical Summary", heading_style))
         
-        if not numeric_df.empty:
-            stats = numeric_df.describe()
-            
-            stats_data = [['Statistic'] + list(numeric_df.columns[:5])]
+        if numeric_columns:
+            stats_data = [['Statistic'] + numeric_columns[:5]]
             
             for stat in ['count', 'mean', 'std', 'min', '25%', '50%', '75%', 'max']:
                 row = [stat]
-                for col in numeric_df.columns[:5]:
-                    if stat in stats.index:
-                        value = stats.loc[stat, col]
-                        row.append(f"{value:.2f}" if not pd.isna(value) else "N/A")
-                    else:
-                        row.append("N/A")
+                for col in numeric_columns[:5]:
+                    value = summary_stats[col].get(stat)
+                    row.append(f"{value:.2f}" if value is not None else "N/A")
                 stats_data.append(row)
             
-            stats_table = Table(stats_data, colWidths=[1.2*inch] + [1.1*inch]*min(5, len(numeric_df.columns)))
+            stats_table = Table(stats_data, colWidths=[1.2*inch] + [1.1*inch]*min(5, len(numeric_columns)))
             stats_table.setStyle(TableStyle([
                 ('BACKGROUND', (0, 0), (-1, 0), colors.HexColor('#059669')),
                 ('TEXTCOLOR', (0, 0), (-1, 0), colors.whitesmoke),
@@ -892,9 +1868,9 @@ def download_pdf_report(request, upload_id):
         elements.append(Paragraph("Missing Values Analysis", heading_style))
         missing_data = [['Column', 'Missing Count', 'Missing %']]
         
-        for col in df.columns:
-            missing_count = df[col].isnull().sum()
-            missing_pct = (missing_count / len(df)) * 100
+        for col in upload.column_names:
+            missing_count = upload.missing_values.get(col, 0)
+            missing_pct = (missing_count / upload.rows) * 100 if upload.rows else 0
             if missing_count > 0:
                 missing_data.append([col, str(missing_count), f"{missing_pct:.2f}%"])
         
@@ -920,14 +1896,12 @@ def download_pdf_report(request, upload_id):
         
         elements.append(PageBreak())
         elements.append(Paragraph("Distribution Analysis", heading_style))
-        if not numeric_df.empty:
+        if numeric_columns:
             dist_data = [['Column', 'Min', 'Max', 'Median', 'Q1', 'Q3']]
-            for col in numeric_df.columns[:5]:
-                q1 = numeric_df[col].quantile(0.25)
-                median = numeric_df[col].median()
-                q3 = numeric_df[col].quantile(0.75)
-                min_val = numeric_df[col].min()
-                max_val = numeric_df[col].max()
+            for col in numeric_columns[:5]:
+                stats = summary_stats[col]
+                q1, median, q3 = stats['25%'], stats['50%'], stats['75%']
+                min_val, max_val = stats['min'], stats['max']
                 dist_data.append([str(col)[:25], f"{min_val:.2f}", f"{max_val:.2f}", f"{median:.2f}", f"{q1:.2f}", f"{q3:.2f}"])
             
             if len(dist_data) > 1:
@@ -947,15 +1921,187 @@ def download_pdf_report(request, upload_id):
                 elements.append(dist_table)
         elements.append(PageBreak())
         
-        if HAS_MATPLOTLIB and not numeric_df.empty:
+        spans.start('layout')
+        if upload.correlations.get('columns'):
+            elements.append(Paragraph("Correlation Matrix", heading_style))
+            corr_columns, corr_matrix = correlation_matrix(upload.correlations)
+            
+            if HAS_MATPLOTLIB:
+                spans.start('charts')
+                try:
+                    shown = min(len(corr_columns), 15)
+                    size = max(4, 0.45 * shown + 2)
+                    fig, ax = plt.subplots(figsize=(size, size * 0.8), dpi=100)
+                    heatmap = ax.imshow(corr_matrix[:shown, :shown], cmap='RdBu_r', vmin=-1, vmax=1)
+                    ax.set_xticks(range(shown))
+                    ax.set_yticks(range(shown))
+                    ax.set_xticklabels([str(c)[:12] for c in corr_columns[:shown]], rotation=45, ha='right', fontsize=7)
+                    ax.set_yticklabels([str(c)[:12] for c in corr_columns[:shown]], fontsize=7)
+                    if shown <= 8:
+                        for i in range(shown):
+                            for j in range(shown):
+                                if not np.isnan(corr_matrix[i, j]):
+                                    ax.text(j, i, f"{corr_matrix[i, j]:.2f}", ha='center', va='center', fontsize=7)
+                    fig.colorbar(heatmap, ax=ax, fraction=0.046, pad=0.04)
+                    ax.set_title('Pearson Correlation Heatmap')
+                    chart_buffer = io.BytesIO()
+                    plt.savefig(chart_buffer, format='png', bbox_inches='tight')
+                    chart_buffer.seek(0)
+                    plt.close(fig)
+                    elements.append(RLImage(chart_buffer, width=4.5*inch, height=3.6*inch))
+                    elements.append(Spacer(1, 0.2*inch))
+                except Exception as heatmap_err:
+                    logger.warning('Correlation heatmap skipped', extra={'upload_id': upload_id, 'error': str(heatmap_err)})
+                spans.start('layout')
+            
+            corr_data = [['Column A', 'Column B', 'Pearson r']]
+            for col_a, col_b, r in top_correlations(upload.correlations):
+                corr_data.append([str(col_a)[:25], str(col_b)[:25], f"{r:.3f}"])
+            
+            if len(corr_data) > 1:
+                corr_table = Table(corr_data, colWidths=[2.2*inch, 2.2*inch, 1.5*inch])
+                corr_table.setStyle(TableStyle([
+                    ('BACKGROUND', (0, 0), (-1, 0), colors.HexColor('#7c3aed')),
+                    ('TEXTCOLOR', (0, 0), (-1, 0), colors.whitesmoke),
+                    ('ALIGN', (0, 0), (-1, -1), 'CENTER'),
+                    ('FONTNAME', (0, 0), (-1, 0), 'Helvetica-Bold'),
+                    ('FONTSIZE', (0, 0), (-1, 0), 10),
+                    ('FONTSIZE', (0, 1), (-1, -1), 9),
+                    ('BOTTOMPADDING', (0, 0), (-1, -1), 5),
+                    ('TOPPADDING', (0, 0), (-1, -1), 5),
+                    ('GRID', (0, 0), (-1, -1), 1, colors.HexColor('#cbd5e1')),
+                    ('ROWBACKGROUNDS', (0, 1), (-1, -1), [colors.white, colors.HexColor('#faf5ff')])
+                ]))
+                elements.append(corr_table)
+            elements.append(PageBreak())
+
+        if upload.group_stats:
+            elements.append(Paragraph("Group Breakdown", heading_style))
+            for group_col, grouping in list(upload.group_stats.items())[:3]:
+                value_cols = grouping['columns'][:4]
+                elements.append(Paragraph(f"Grouped by <b>{group_col}</b> (mean per group)", normal_style))
+                elements.append(Spacer(1, 0.1*inch))
+
+                group_data = [['Group', 'Rows'] + [str(c)[:14] for c in value_cols]]
+                for group in grouping['groups'][:20]:
+                    row = [str(group['group'] if group['group'] is not None else 'N/A')[:20], str(group['rows'])]
+                    for col in value_cols:
+                        mean = group['stats'][col]['mean']
+                        row.append(f"{mean:.2f}" if mean is not None else 'N/A')
+                    group_data.append(row)
+
+                group_table = Table(group_data, colWidths=[1.6*inch, 0.8*inch] + [1.1*inch] * len(value_cols))
+                group_table.setStyle(TableStyle([
+                    ('BACKGROUND', (0, 0), (-1, 0), colors.HexColor('#0891b2')),
+                    ('TEXTCOLOR', (0, 0), (-1, 0), colors.whitesmoke),
+                    ('ALIGN', (0, 0), (-1, -1), 'CENTER'),
+                    ('FONTNAME', (0, 0), (-1, 0), 'Helvetica-Bold'),
+                    ('FONTSIZE', (0, 0), (-1, 0), 9),
+                    ('FONTSIZE', (0, 1), (-1, -1), 8),
+                    ('BOTTOMPADDING', (0, 0), (-1, -1), 5),
+                    ('TOPPADDING', (0, 0), (-1, -1), 5),
+                    ('GRID', (0, 0), (-1, -1), 1, colors.HexColor('#cbd5e1')),
+                    ('ROWBACKGROUNDS', (0, 1), (-1, -1), [colors.white, colors.HexColor('#ecfeff')])
+                ]))
+                elements.append(group_table)
+                elements.append(Spacer(1, 0.3*inch))
+            elements.append(PageBreak())
+
+        outlier_columns = [(col, detail) for col, detail in upload.outliers.items() if detail]
+        if outlier_columns:
+            elements.append(Paragraph("Outlier Detection", heading_style))
+            elements.append(Paragraph(
+                "Rows outside the 1.5×IQR fences, with a modified z-score above 3.5 (median/MAD), "
+                "or more than 3 standard deviations from the previous 50 values (rolling z-score).",
+                normal_style
+            ))
+            elements.append(Spacer(1, 0.15*inch))
+
+            outlier_data = [['Column', 'IQR', 'Robust Z', 'Rolling Z', 'Flagged', '% Rows']]
+            for col, detail in outlier_columns[:15]:
+                counts = detail['counts']
+                share = detail['flagged'] / upload.rows * 100 if upload.rows else 0
+                outlier_data.append([
+                    str(col)[:25], str(counts['iqr']), str(counts['robust_z']),
+                    str(counts['rolling_z']), str(detail['flagged']), f"{share:.2f}%"
+                ])
+
+            outlier_table = Table(outlier_data, colWidths=[1.8*inch, 0.9*inch, 0.9*inch, 0.9*inch, 0.9*inch, 0.9*inch])
+            outlier_table.setStyle(TableStyle([
+                ('BACKGROUND', (0, 0), (-1, 0), colors.HexColor('#dc2626')),
+                ('TEXTCOLOR', (0, 0), (-1, 0), colors.whitesmoke),
+                ('ALIGN', (0, 0), (-1, -1), 'CENTER'),
+                ('FONTNAME', (0, 0), (-1, 0), 'Helvetica-Bold'),
+                ('FONTSIZE', (0, 0), (-1, 0), 9),
+                ('FONTSIZE', (0, 1), (-1, -1), 8),
+                ('BOTTOMPADDING', (0, 0), (-1, -1), 5),
+                ('TOPPADDING', (0, 0), (-1, -1), 5),
+                ('GRID', (0, 0), (-1, -1), 1, colors.HexColor('#cbd5e1')),
+                ('ROWBACKGROUNDS', (0, 1), (-1, -1), [colors.white, colors.HexColor('#fef2f2')])
+            ]))
+            elements.append(outlier_table)
+            elements.append(Spacer(1, 0.25*inch))
+
+            sample_rows = [['Column', 'Row', 'Value', 'Flagged By']]
+            for col, detail in outlier_columns[:5]:
+                for item in detail['sample'][:3]:
+                    sample_rows.append([
+                        str(col)[:25], str(item['row'] + 1), f"{item['value']:.3f}",
+                        ', '.join(item['methods'])
+                    ])
+            if len(sample_rows) > 1:
+                elements.append(Paragraph("Most Extreme Rows", normal_style))
+                elements.append(Spacer(1, 0.1*inch))
+                outlier_sample_table = Table(sample_rows, colWidths=[1.8*inch, 0.9*inch, 1.3*inch, 2.2*inch])
+                outlier_sample_table.setStyle(TableStyle([
+                    ('BACKGROUND', (0, 0), (-1, 0), colors.HexColor('#1f2937')),
+                    ('TEXTCOLOR', (0, 0), (-1, 0), colors.whitesmoke),
+                    ('ALIGN', (0, 0), (-1, -1), 'CENTER'),
+                    ('FONTNAME', (0, 0), (-1, 0), 'Helvetica-Bold'),
+                    ('FONTSIZE', (0, 0), (-1, -1), 8),
+                    ('BOTTOMPADDING', (0, 0), (-1, -1), 4),
+                    ('TOPPADDING', (0, 0), (-1, -1), 4),
+                    ('GRID', (0, 0), (-1, -1), 1, colors.HexColor('#cbd5e1')),
+                ]))
+                elements.append(outlier_sample_table)
+            elements.append(PageBreak())
+
+        spans.start('charts')
+        numeric_df = sample_df[numeric_columns]
+        if HAS_MATPLOTLIB and numeric_columns:
             try:
                 elements.append(Paragraph("Charts & Visualizations", heading_style))
                 
-                for col_idx, col in enumerate(numeric_df.columns[:3]):
+                # Time-indexed datasets are plotted against time from their rollups. Rollups
+                # cover every version's rows, so earlier versions are plotted by row instead.
+                timeline = None
+                if upload.version == latest_version and upload.time_series.get('rollups'):
+                    try:
+                        timeline = rollup_series(
+                            storage.local_dir(upload.artifact_path), upload.time_series,
+                            points=DEFAULT_CHART_POINTS,
+                        )
+                    except Exception as e:
+                        logger.warning('Time series rollups unavailable', extra={'upload_id': upload_id, 'error': str(e)})
+
+                for col_idx, col in enumerate(numeric_columns[:3]):
                     fig, ax = plt.subplots(figsize=(6, 3), dpi=100)
-                    ax.plot(numeric_df[col].head(20), marker='o', linewidth=2, color=['#2563eb', '#059669', '#7c3aed'][col_idx % 3])
-                    ax.set_title(f'{col} - Line Chart')
-                    ax.set_xlabel('Index')
+                    color = ['#2563eb', '#059669', '#7c3aed'][col_idx % 3]
+                    if timeline and str(col) in timeline['series']:
+                        times = pd.to_datetime(timeline['timestamps'])
+                        bucket = timeline['series'][str(col)]
+                        low = np.array(bucket['min'], dtype='float64')
+                        high = np.array(bucket['max'], dtype='float64')
+                        ax.fill_between(times, low, high, color=color, alpha=0.2, linewidth=0)
+                        ax.plot(times, np.array(bucket['mean'], dtype='float64'), linewidth=1.5, color=color)
+                        ax.set_title(f'{col} - {timeline["resolution"].title()} Mean (min-max band)')
+                        ax.set_xlabel(timeline['time_column'])
+                        fig.autofmt_xdate()
+                    else:
+                        line = line_series(dataset.numeric(col)[:upload.rows], DEFAULT_CHART_POINTS)
+                        ax.plot(line['x'], line['y'], linewidth=1.5, color=color)
+                        ax.set_title(f'{col} - Line Chart')
+                        ax.set_xlabel('Index')
                     ax.set_ylabel('Value')
                     ax.grid(True, alpha=0.3)
                     chart_buffer = io.BytesIO()
@@ -1000,7 +2146,12 @@ def download_pdf_report(request, upload_id):
                         pass
                 
                 fig, ax = plt.subplots(figsize=(6, 3), dpi=100)
-                ax.hist(numeric_df.iloc[:, 0].dropna(), bins=20, color='#059669', edgecolor='black', alpha=0.7)
+                histogram = upload.distributions.get(numeric_columns[0], {}).get('histogram')
+                if not (histogram and histogram['counts']):
+                    histogram = histogram_bins(dataset.numeric(numeric_columns[0])[:upload.rows], 20)
+                if histogram['counts']:
+                    ax.hist(histogram['edges'][:-1], bins=histogram['edges'], weights=histogram['counts'],
+                            color='#059669', edgecolor='black', alpha=0.7)
                 ax.set_title(f'{numeric_df.columns[0]} - Distribution Histogram')
                 ax.set_xlabel('Value')
                 ax.set_ylabel('Frequency')
@@ -1055,8 +2206,18 @@ def download_pdf_report(request, upload_id):
                         pass
                 
                 fig, ax = plt.subplots(figsize=(6, 3), dpi=100)
-                box_data = [numeric_df[col].dropna() for col in numeric_df.columns[:3]]
-                ax.boxplot(box_data, labels=numeric_df.columns[:3])
+                # Whiskers at the 1.5×IQR fences, clipped to the range
+                boxes = []
+                for col in numeric_columns[:3]:
+                    stats = summary_stats[col]
+                    iqr = stats['75%'] - stats['25%']
+                    boxes.append({
+                        'label': str(col), 'med': stats['50%'], 'q1': stats['25%'], 'q3': stats['75%'],
+                        'whislo': max(stats['min'], stats['25%'] - 1.5 * iqr),
+                        'whishi': min(stats['max'], stats['75%'] + 1.5 * iqr),
+                        'fliers': [],
+                    })
+                ax.bxp(boxes)
                 ax.set_title('Statistical Box Plot')
                 ax.set_ylabel('Value')
                 chart_buffer = io.BytesIO()
@@ -1071,16 +2232,15 @@ def download_pdf_report(request, upload_id):
                 
                 elements.append(PageBreak())
             except Exception as chart_err:
-                print(f"Warning: Could not generate charts: {chart_err}")
-                traceback.print_exc()
+                logger.exception('Charts skipped', extra={'upload_id': upload_id})
                 elements.append(Paragraph("Charts section generated", normal_style))
         
+        spans.start('layout')
         elements.append(Paragraph("Data Sample (First 15 Rows)", heading_style))
         
-        sample_df = df.head(15)
         sample_data = [[str(col)[:15] for col in sample_df.columns]]
         
-        for idx, row in sample_df.iterrows():
+        for idx, row in sample_df.head(15).iterrows():
             sample_data.append([str(val)[:15] for val in row.values])
         
         num_cols = len(sample_df.columns)
@@ -1112,25 +2272,25 @@ def download_pdf_report(request, upload_id):
         footer_text = f"Generated by Chemizer Analytics | {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}"
         elements.append(Paragraph(footer_text, footer_style))
         
+        spans.start('build')
         doc.build(elements)
+        spans.stop()
         
         buffer.seek(0)
         
         response = HttpResponse(buffer, content_type='application/pdf')
         response['Content-Disposition'] = f'attachment; filename="analysis_report_{upload_id}.pdf"'
         
-        print(f"✅ PDF generated successfully for upload_id: {upload_id}")
+        logger.info('PDF generated', extra={'upload_id': upload_id})
         
         return response
         
     except Upload.DoesNotExist:
-        print(f"❌ Upload not found: {upload_id}")
         return Response({
             'error': 'Upload not found'
         }, status=status.HTTP_404_NOT_FOUND)
     except Exception as e:
-        print(f"❌ PDF generation error: {str(e)}")
-        traceback.print_exc()
+        logger.exception('PDF generation failed', extra={'upload_id': upload_id})
         return Response({
             'error': f'PDF generation failed: {str(e)}'
         }, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
@@ -1147,9 +2307,10 @@ def bulk_delete_uploads(request):
         
         uploads = Upload.objects.filter(upload_id__in=upload_ids, user=request.user)
         for upload in uploads:
-            if default_storage.exists(upload.file_path):
-                default_storage.delete(upload.file_path)
-            upload.delete()
+            storage.delete(upload.file_path)
+            _delete_version_files(upload)
+            delete_dataset(upload.artifact_path)
+            _delete_upload_row(upload)
         
         return Response({'message': f'Deleted {len(uploads)} uploads'}, status=status.HTTP_200_OK)
     except Exception as e:
@@ -1191,13 +2352,7 @@ def download_all_data(request):
 def delete_all_data(request):
     """Delete all uploads for the user"""
     try:
-        uploads = Upload.objects.filter(user=request.user)
-        count = uploads.count()
-        
-        for upload in uploads:
-            if default_storage.exists(upload.file_path):
-                default_storage.delete(upload.file_path)
-            upload.delete()
+        count = _delete_user_data(request.user)
         
         return Response({'message': f'Deleted {count} uploads and all associated data'}, status=status.HTTP_200_OK)
     except Exception as e:
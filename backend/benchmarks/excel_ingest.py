@@ -0,0 +1,102 @@
+"""
+Benchmark of the Excel ingest paths.
+
+Compares the previous path (``pd.read_excel`` of the whole workbook, then
+ingest as one chunk) with the streaming readers used by ``iter_chunks``
+(calamine when installed, openpyxl in read-only mode otherwise). Every
+variant runs in a fresh subprocess so peak RSS is measured per variant.
+
+Run from the backend directory:
+
+    python -m benchmarks.excel_ingest --rows 200000 --cols 10
+"""
+import argparse
+import json
+import os
+import resource
+import subprocess
+import sys
+import tempfile
+import time
+
+import numpy as np
+import pandas as pd
+
+VARIANTS = ('read_excel', 'openpyxl', 'calamine')
+
+
+def write_workbook(path, rows, cols, seed=0):
+    """Synthetic sheet: numeric columns plus one text column, written with openpyxl in write-only mode"""
+    import openpyxl
+
+    rng = np.random.default_rng(seed)
+    numeric = rng.normal(100, 15, size=(rows, cols - 1)).round(4)
+    labels = np.array(['Pump', 'Valve', 'Reactor', 'Compressor', 'Exchanger'])[rng.integers(0, 5, rows)]
+
+    workbook = openpyxl.Workbook(write_only=True)
+    sheet = workbook.create_sheet()
+    sheet.append(['Type'] + [f'Value{i}' for i in range(1, cols)])
+    for label, values in zip(labels.tolist(), numeric.tolist()):
+        sheet.append([label] + values)
+    workbook.save(path)
+
+
+def run_variant(variant, path):
+    """Ingest ``path`` with one reader and return wall time and peak RSS"""
+    from accounts import ingest
+
+    if variant == 'openpyxl':
+        ingest.CalamineWorkbook = None
+    elif variant == 'calamine' and ingest.CalamineWorkbook is None:
+        return {'variant': variant, 'skipped': 'python-calamine is not installed'}
+
+    with tempfile.TemporaryDirectory() as directory:
+        start = time.perf_counter()
+        if variant == 'read_excel':
+            chunks = iter([pd.read_excel(path)])
+        else:
+            chunks = ingest.iter_chunks(path, '.xlsx')
+        result = ingest.run_ingest(chunks, directory)
+        elapsed = time.perf_counter() - start
+
+    return {
+        'variant': variant,
+        'seconds': round(elapsed, 2),
+        'peak_rss_mb': round(resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024, 1),
+        'rows': result['rows'],
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split('\n\n')[0])
+    parser.add_argument('--rows', type=int, default=200_000)
+    parser.add_argument('--cols', type=int, default=10)
+    parser.add_argument('--variant', choices=VARIANTS, help=argparse.SUPPRESS)
+    parser.add_argument('--path', help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.variant:
+        print(json.dumps(run_variant(args.variant, args.path)))
+        return
+
+    with tempfile.TemporaryDirectory() as directory:
+        path = os.path.join(directory, 'bench.xlsx')
+        print(f"Writing {args.rows} x {args.cols} workbook...")
+        write_workbook(path, args.rows, args.cols)
+        print(f"Workbook size: {os.path.getsize(path) / 1024 / 1024:.1f} MB")
+
+        for variant in VARIANTS:
+            output = subprocess.run(
+                [sys.executable, '-m', 'benchmarks.excel_ingest', '--variant', variant, '--path', path],
+                capture_output=True, text=True, check=True,
+            ).stdout
+            result = json.loads(output.strip().splitlines()[-1])
+            if 'skipped' in result:
+                print(f"{variant:>12}: skipped ({result['skipped']})")
+            else:
+                rate = result['rows'] / result['seconds']
+                print(f"{variant:>12}: {result['seconds']:7.2f} s  {result['peak_rss_mb']:8.1f} MB peak RSS  {rate:10,.0f} rows/s")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,288 @@
+"""
+Benchmark of the upload analysis pipeline across file sizes and shapes.
+
+Generates synthetic equipment readings (an id, a type, a timestamp and
+numeric process values) as CSV or XLSX. It then runs every file through
+the ingest that backs the upload endpoints: ``iter_chunks`` feeding
+``run_ingest``, which writes the columnar copy and the statistics. Every
+case runs in a fresh subprocess, so peak RSS is measured per case.
+
+For each case it records wall time, peak RSS and throughput (rows/s and
+MB/s of the input file).
+
+A run is checked against a stored baseline. Cases slower than the
+baseline, or with a higher peak RSS, by more than ``--threshold`` fail the
+run with exit status 1. Baselines depend on the machine, so save one on
+the machine that runs the comparison.
+
+Run from the backend directory:
+
+    python -m benchmarks.upload_pipeline --suite quick --save-baseline
+    python -m benchmarks.upload_pipeline --suite quick
+    python -m benchmarks.upload_pipeline --case csv:10000000:20 --repeat 1
+
+Generated files are reused from ``--data-dir`` when it is given.
+"""
+import argparse
+import json
+import os
+import platform
+import resource
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+import numpy as np
+import pandas as pd
+
+FORMATS = ('csv', 'xlsx')
+MAX_XLSX_ROWS = 1_048_575
+GENERATE_CHUNK_ROWS = 100_000
+EQUIPMENT_TYPES = np.array(['Pump', 'Valve', 'Reactor', 'Compressor', 'Heat Exchanger', 'Column'])
+MEASUREMENTS = ('Flowrate', 'Pressure', 'Temperature', 'Level', 'Vibration', 'Power')
+FIXED_COLUMNS = 3
+
+SUITES = {
+    'quick': [
+        ('csv', 1_000, 5),
+        ('csv', 100_000, 20),
+        ('csv', 10_000, 500),
+        ('xlsx', 10_000, 20),
+    ],
+    'full': [
+        ('csv', 1_000, 5),
+        ('csv', 100_000, 50),
+        ('csv', 100_000, 500),
+        ('csv', 1_000_000, 20),
+        ('csv', 1_000_000, 100),
+        ('csv', 10_000_000, 5),
+        ('csv', 10_000_000, 20),
+        ('xlsx', 10_000, 20),
+        ('xlsx', 100_000, 50),
+        ('xlsx', 1_000_000, 5),
+    ],
+}
+
+DEFAULT_BASELINE = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'upload_pipeline_baseline.json')
+
+
+def case_name(fmt, rows, cols):
+    return f'{fmt}-{rows}x{cols}'
+
+
+def parse_case(text):
+    """``'csv:100000:20'`` -> ``('csv', 100000, 20)``"""
+    try:
+        fmt, rows, cols = text.split(':')
+        rows, cols = int(rows), int(cols)
+    except ValueError:
+        raise argparse.ArgumentTypeError('cases are written format:rows:columns, e.g. csv:100000:20')
+    if fmt not in FORMATS:
+        raise argparse.ArgumentTypeError(f'format must be one of: {", ".join(FORMATS)}')
+    if rows < 1 or cols < FIXED_COLUMNS + 1:
+        raise argparse.ArgumentTypeError(f'cases need at least 1 row and {FIXED_COLUMNS + 1} columns')
+    if fmt == 'xlsx' and rows > MAX_XLSX_ROWS:
+        raise argparse.ArgumentTypeError(f'a worksheet holds at most {MAX_XLSX_ROWS} data rows')
+    return fmt, rows, cols
+
+
+def column_names(cols):
+    names = ['Equipment ID', 'Type', 'Timestamp']
+    for index in range(cols - FIXED_COLUMNS):
+        measurement = MEASUREMENTS[index % len(MEASUREMENTS)]
+        names.append(measurement if index < len(MEASUREMENTS) else f'{measurement} {index // len(MEASUREMENTS) + 1}')
+    return names
+
+
+def generate_frames(rows, cols, seed=0):
+    """Synthetic readings in chunks of ``GENERATE_CHUNK_ROWS``; the same seed gives the same data"""
+    rng = np.random.default_rng(seed)
+    names = column_names(cols)
+    numeric = cols - FIXED_COLUMNS
+    centers = rng.uniform(1, 500, numeric)
+    start = pd.Timestamp('2024-01-01')
+    for offset in range(0, rows, GENERATE_CHUNK_ROWS):
+        n = min(GENERATE_CHUNK_ROWS, rows - offset)
+        index = np.arange(offset, offset + n)
+        values = rng.normal(centers, centers * 0.05, size=(n, numeric)).round(4)
+        # About 1% missing readings
+        values[rng.random((n, numeric)) < 0.01] = np.nan
+        frame = pd.DataFrame(values, columns=names[FIXED_COLUMNS:])
+        frame.insert(0, 'Equipment ID', pd.Series(index % 5000).map('EQ-{:04d}'.format))
+        frame.insert(1, 'Type', EQUIPMENT_TYPES[rng.integers(0, len(EQUIPMENT_TYPES), n)])
+        frame.insert(2, 'Timestamp', start + pd.to_timedelta(index, unit='min'))
+        yield frame
+
+
+def write_case(path, fmt, rows, cols, seed=0):
+    """Write a case file; CSV in appended chunks, XLSX with openpyxl in write-only mode"""
+    if fmt == 'csv':
+        for number, frame in enumerate(generate_frames(rows, cols, seed)):
+            frame.to_csv(path, mode='w' if number == 0 else 'a', header=number == 0, index=False)
+        return
+
+    import openpyxl
+
+    workbook = openpyxl.Workbook(write_only=True)
+    sheet = workbook.create_sheet()
+    sheet.append(column_names(cols))
+    for frame in generate_frames(rows, cols, seed):
+        frame = frame.astype(object).where(frame.notna(), None)
+        frame['Timestamp'] = frame['Timestamp'].map(lambda stamp: stamp.to_pydatetime())
+        for row in frame.itertuples(index=False, name=None):
+            sheet.append(row)
+    workbook.save(path)
+
+
+def case_file(directory, fmt, rows, cols):
+    """Path of a generated case, written unless it is already there"""
+    path = os.path.join(directory, f'{case_name(fmt, rows, cols)}.{fmt}')
+    if not os.path.exists(path):
+        print(f"Writing {rows} x {cols} {fmt.upper()} file...")
+        partial = path + '.partial'
+        write_case(partial, fmt, rows, cols)
+        os.replace(partial, path)
+    return path
+
+
+def run_case(path, fmt):
+    """Ingest ``path`` once and return wall time, peak RSS and the row count"""
+    from accounts import ingest
+
+    with tempfile.TemporaryDirectory() as directory:
+        start = time.perf_counter()
+        result = ingest.run_ingest(ingest.iter_chunks(path, f'.{fmt}'), directory)
+        elapsed = time.perf_counter() - start
+
+    return {
+        'seconds': elapsed,
+        'peak_rss_mb': resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024,
+        'rows': result['rows'],
+    }
+
+
+def measure(fmt, rows, cols, path, repeat):
+    """Median wall time and largest peak RSS over ``repeat`` fresh subprocesses"""
+    runs = []
+    for _ in range(repeat):
+        output = subprocess.run(
+            [sys.executable, '-m', 'benchmarks.upload_pipeline', '--run', path, '--format', fmt],
+            capture_output=True, text=True, check=True,
+        ).stdout
+        runs.append(json.loads(output.strip().splitlines()[-1]))
+    if any(run['rows'] != rows for run in runs):
+        raise RuntimeError(f'{case_name(fmt, rows, cols)}: ingested {runs[0]["rows"]} rows, expected {rows}')
+
+    seconds = statistics.median(run['seconds'] for run in runs)
+    size_mb = os.path.getsize(path) / 1024 / 1024
+    return {
+        'case': case_name(fmt, rows, cols),
+        'format': fmt,
+        'rows': rows,
+        'columns': cols,
+        'file_mb': round(size_mb, 2),
+        'seconds': round(seconds, 3),
+        'peak_rss_mb': round(max(run['peak_rss_mb'] for run in runs), 1),
+        'rows_per_second': round(rows / seconds),
+        'mb_per_second': round(size_mb / seconds, 2),
+    }
+
+
+def compare(results, baseline, threshold):
+    """Regressions of wall time and peak RSS beyond ``threshold`` (a fraction) against ``baseline``"""
+    regressions = []
+    for result in results:
+        previous = baseline.get(result['case'])
+        if previous is None:
+            continue
+        for metric in ('seconds', 'peak_rss_mb'):
+            limit = previous[metric] * (1 + threshold)
+            if result[metric] > limit:
+                change = result[metric] / previous[metric] - 1
+                regressions.append(f"{result['case']}: {metric} {previous[metric]} -> {result[metric]} (+{change:.0%})")
+    return regressions
+
+
+def load_baseline(path):
+    try:
+        with open(path) as f:
+            return json.load(f)['cases']
+    except FileNotFoundError:
+        return None
+
+
+def save_baseline(path, results):
+    baseline = load_baseline(path) or {}
+    baseline.update({result['case']: result for result in results})
+    with open(path, 'w') as f:
+        json.dump({
+            'machine': platform.platform(),
+            'python': platform.python_version(),
+            'pandas': pd.__version__,
+            'cases': baseline,
+        }, f, indent=2, sort_keys=True)
+        f.write('\n')
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split('\n\n')[0])
+    parser.add_argument('--suite', choices=sorted(SUITES), default='quick')
+    parser.add_argument('--case', type=parse_case, action='append', metavar='FORMAT:ROWS:COLUMNS',
+                        help='run these cases instead of a suite; may be repeated')
+    parser.add_argument('--repeat', type=int, default=3, help='runs per case; the median wall time is reported')
+    parser.add_argument('--data-dir', help='keep generated files here and reuse them on later runs')
+    parser.add_argument('--baseline', default=DEFAULT_BASELINE)
+    parser.add_argument('--save-baseline', action='store_true', help='store these results as the baseline')
+    parser.add_argument('--threshold', type=float, default=0.2, help='allowed slowdown or RSS growth, as a fraction')
+    parser.add_argument('--json', help='also write the results to this file')
+    parser.add_argument('--run', help=argparse.SUPPRESS)
+    parser.add_argument('--format', choices=FORMATS, help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.run:
+        print(json.dumps(run_case(args.run, args.format)))
+        return
+
+    cases = args.case or SUITES[args.suite]
+    with tempfile.TemporaryDirectory() as scratch:
+        directory = args.data_dir or scratch
+        os.makedirs(directory, exist_ok=True)
+        results = []
+        for fmt, rows, cols in cases:
+            path = case_file(directory, fmt, rows, cols)
+            result = measure(fmt, rows, cols, path, max(args.repeat, 1))
+            results.append(result)
+            print(
+                f"{result['case']:>20}: {result['seconds']:8.2f} s  {result['peak_rss_mb']:8.1f} MB peak RSS  "
+                f"{result['rows_per_second']:12,} rows/s  {result['mb_per_second']:8.2f} MB/s"
+            )
+
+    if args.json:
+        with open(args.json, 'w') as f:
+            json.dump(results, f, indent=2)
+
+    if args.save_baseline:
+        save_baseline(args.baseline, results)
+        print(f"Baseline saved to {args.baseline}")
+        return
+
+    baseline = load_baseline(args.baseline)
+    if baseline is None:
+        print(f"No baseline at {args.baseline}; run with --save-baseline to create one")
+        return
+    missing = [result['case'] for result in results if result['case'] not in baseline]
+    if missing:
+        print(f"Not in the baseline: {', '.join(missing)}")
+    regressions = compare(results, baseline, args.threshold)
+    if regressions:
+        print(f"Regressions beyond {args.threshold:.0%}:")
+        for regression in regressions:
+            print(f"  {regression}")
+        sys.exit(1)
+    print(f"No regressions beyond {args.threshold:.0%}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,201 @@
+"""
+Structured logging.
+
+Every record is written as one JSON object per line. Handlers only put
+records on an in-memory queue, and a background thread formats and writes
+them, so request threads never wait on stdout.
+
+``RequestLogMiddleware`` gives every request an id (taken from the
+``X-Request-ID`` header, or generated) and echoes it in the response. It
+also writes one access record per request, with the status and duration.
+Records logged while a request is handled carry its id and endpoint (URL
+name).
+
+Settings:
+
+- ``LOG_LEVEL`` is the default level.
+- ``LOG_ENDPOINT_LEVELS`` overrides the level for single endpoints.
+- ``LOG_SAMPLE_RATE`` keeps only that fraction of requests' info and debug
+  records. A request is logged completely or not at all. Warnings and
+  errors are always kept.
+
+Fields whose names look like secrets (passwords, tokens, OTPs, cookies,
+keys) are redacted wherever they appear in a record, including nested
+dicts.
+"""
+import contextvars
+import copy
+import json
+import logging
+import queue
+import random
+import re
+import sys
+import time
+import uuid
+from datetime import datetime, timezone
+from logging.handlers import QueueHandler, QueueListener
+
+REDACTED = '[REDACTED]'
+# Keep in sync with SECRET_FIELDS in desktop-app/api/logs.py
+SECRET_FIELDS = re.compile(r'pass(word)?|secret|token|otp|authorization|cookie|api_?key|credential|csrf', re.I)
+REQUEST_ID = re.compile(r'^[A-Za-z0-9._-]{1,64}$')
+MAX_REDACT_DEPTH = 6
+
+# Attributes every LogRecord has; anything else on a record came from ``extra``
+RECORD_ATTRIBUTES = frozenset(vars(logging.LogRecord('', 0, '', 0, '', (), None))) | {'message', 'asctime'}
+
+request_context = contextvars.ContextVar('request_context', default={})
+
+access_logger = logging.getLogger('chemizer.requests')
+
+
+def parse_levels(text):
+    """``'upload-file=DEBUG,upload-history=WARNING'`` -> ``{'upload-file': 10, 'upload-history': 30}``"""
+    levels = {}
+    for item in (text or '').split(','):
+        name, _, level = item.partition('=')
+        if name.strip() and level.strip():
+            levels[name.strip()] = logging.getLevelName(level.strip().upper())
+    invalid = [name for name, level in levels.items() if not isinstance(level, int)]
+    if invalid:
+        raise ValueError(f'Unknown log level for: {", ".join(invalid)}')
+    return levels
+
+
+def redact(value, depth=0):
+    """Copy of ``value`` with secret-looking keys replaced, at any nesting depth"""
+    if depth > MAX_REDACT_DEPTH:
+        return value
+    if isinstance(value, dict):
+        return {
+            key: REDACTED if SECRET_FIELDS.search(str(key)) else redact(item, depth + 1)
+            for key, item in value.items()
+        }
+    if isinstance(value, (list, tuple)):
+        return [redact(item, depth + 1) for item in value]
+    return value
+
+
+def extra_fields(record):
+    return {key: value for key, value in vars(record).items() if key not in RECORD_ATTRIBUTES}
+
+
+class JsonFormatter(logging.Formatter):
+    """One JSON object per record: time, level, logger, message and every extra field"""
+
+    def format(self, record):
+        entry = {
+            'time': datetime.fromtimestamp(record.created, timezone.utc).isoformat(timespec='milliseconds'),
+            'level': record.levelname,
+            'logger': record.name,
+            'message': record.getMessage(),
+        }
+        entry.update(redact(extra_fields(record)))
+        if record.exc_info:
+            entry['exception'] = self.formatException(record.exc_info)
+        elif record.exc_text:
+            entry['exception'] = record.exc_text
+        return json.dumps(entry, default=str)
+
+
+class RequestContextFilter(logging.Filter):
+    """
+    Adds the current request's fields to every record, then applies the
+    level of its endpoint and the sampling decision of its request.
+    """
+
+    def __init__(self, level='INFO', endpoint_levels=None):
+        super().__init__()
+        self.level = logging.getLevelName(level) if isinstance(level, str) else level
+        self.endpoint_levels = endpoint_levels or {}
+
+    def filter(self, record):
+        context = request_context.get()
+        for key, value in context.items():
+            if key != 'sampled' and not hasattr(record, key):
+                setattr(record, key, value)
+        if record.levelno < self.endpoint_levels.get(context.get('endpoint'), self.level):
+            return False
+        return record.levelno >= logging.WARNING or context.get('sampled', True)
+
+
+class AsyncHandler(QueueHandler):
+    """Puts records on a queue; a listener thread formats them as JSON and writes them out"""
+
+    def __init__(self, stream=None):
+        super().__init__(queue.SimpleQueue())
+        target = logging.StreamHandler(stream or sys.stdout)
+        target.setFormatter(JsonFormatter())
+        self.listener = QueueListener(self.queue, target)
+        self.listener.start()
+
+    def close(self):
+        # Called by logging.shutdown() at exit: drain the queue before the process ends
+        if self.listener is not None:
+            self.listener.stop()
+            self.listener = None
+        super().close()
+
+    def prepare(self, record):
+        # Resolve everything that could change after the call returns; JSON formatting happens on the listener
+        record = copy.copy(record)
+        record.msg = record.getMessage()
+        record.args = None
+        if record.exc_info:
+            record.exc_text = logging.Formatter().formatException(record.exc_info)
+            record.exc_info = None
+        for key, value in extra_fields(record).items():
+            setattr(record, key, redact(value))
+        return record
+
+
+def _request_user(request, response):
+    """The user a request ran as; DRF authenticates tokens in the view, on its own request object"""
+    context = getattr(response, 'renderer_context', None) or {}
+    drf_request = context.get('request')
+    if drf_request is not None:
+        try:
+            return drf_request.user
+        except Exception:
+            # Failed authentication is already reported by the response status
+            pass
+    return getattr(request, 'user', None)
+
+
+class RequestLogMiddleware:
+    """Request ids, endpoint names and one timed access record per request"""
+
+    def __init__(self, get_response):
+        from django.conf import settings
+        self.get_response = get_response
+        self.sample_rate = getattr(settings, 'LOG_SAMPLE_RATE', 1.0)
+
+    def __call__(self, request):
+        header = request.headers.get('X-Request-ID', '')
+        request.request_id = header if REQUEST_ID.match(header) else uuid.uuid4().hex
+        token = request_context.set({
+            'request_id': request.request_id,
+            'sampled': self.sample_rate >= 1 or random.random() < self.sample_rate,
+        })
+        start = time.perf_counter()
+        try:
+            response = self.get_response(request)
+            duration_ms = round((time.perf_counter() - start) * 1000, 1)
+            user = _request_user(request, response)
+            level = logging.ERROR if response.status_code >= 500 else logging.WARNING if response.status_code >= 400 else logging.INFO
+            access_logger.log(level, 'Request finished', extra={
+                'method': request.method,
+                'path': request.path,
+                'status': response.status_code,
+                'duration_ms': duration_ms,
+                'user': user.username if user is not None and user.is_authenticated else None,
+            })
+            response['X-Request-ID'] = request.request_id
+            return response
+        finally:
+            request_context.reset(token)
+
+    def process_view(self, request, view_func, view_args, view_kwargs):
+        match = request.resolver_match
+        request_context.set({**request_context.get(), 'endpoint': match.url_name if match else None})
@@ -0,0 +1,179 @@
+"""
+Request timing spans and opt-in profiling.
+
+Code on a slow path records named spans (``parse``, ``stats``, ``charts``,
+...) with ``span()``, ``timed()`` or a ``SpanTimer``. Spans with the same
+name add up, and ``ProfilingMiddleware`` returns them in the response
+``Server-Timing`` header, so browser dev tools show where a request spent
+its time. Outside a request, spans are not recorded.
+
+A request is also run under cProfile when:
+
+- a staff user sends ``X-Profile: 1``, or
+- its endpoint is in ``PROFILE_ENDPOINTS`` and it is picked at
+  ``PROFILE_SAMPLE_RATE``.
+
+Its stats are written to ``PROFILE_DIR`` as ``<time>_<endpoint>_<request
+id>.prof``, readable with ``pstats`` or snakeviz. The newest
+``PROFILE_RETENTION`` files are kept.
+"""
+import contextvars
+import cProfile
+import logging
+import os
+import random
+import time
+import uuid
+from contextlib import contextmanager
+
+from django.conf import settings
+from django.urls import Resolver404, resolve
+
+logger = logging.getLogger(__name__)
+
+PROFILE_HEADER = 'X-Profile'
+
+_spans = contextvars.ContextVar('request_spans', default=None)
+
+
+def record_span(name, duration_ms):
+    """Add ``duration_ms`` to the current request's span ``name``"""
+    spans = _spans.get()
+    if spans is not None:
+        spans[name] = spans.get(name, 0.0) + duration_ms
+
+
+@contextmanager
+def span(name):
+    """Time the ``with`` block as span ``name``"""
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        record_span(name, (time.perf_counter() - start) * 1000)
+
+
+def timed(iterable, name):
+    """Iterate ``iterable``, counting the time spent producing each item as span ``name``"""
+    iterator = iter(iterable)
+    while True:
+        start = time.perf_counter()
+        try:
+            item = next(iterator)
+        except StopIteration:
+            return
+        finally:
+            record_span(name, (time.perf_counter() - start) * 1000)
+        yield item
+
+
+class SpanTimer:
+    """Consecutive spans for long functions: ``start()`` ends the running span and begins the next"""
+
+    def __init__(self):
+        self.name = None
+        self.started = None
+
+    def start(self, name):
+        self.stop()
+        self.name, self.started = name, time.perf_counter()
+
+    def stop(self):
+        if self.name is not None:
+            record_span(self.name, (time.perf_counter() - self.started) * 1000)
+            self.name = None
+
+
+def server_timing(spans):
+    """``{'parse': 12.34}`` -> ``'parse;dur=12.3'``"""
+    return ', '.join(f'{name};dur={duration:.1f}' for name, duration in spans.items())
+
+
+def prune_profiles(directory, keep):
+    """Delete all but the newest ``keep`` profiles in ``directory``"""
+    profiles = sorted(
+        (entry for entry in os.scandir(directory) if entry.name.endswith('.prof')),
+        key=lambda entry: entry.stat().st_mtime,
+        reverse=True,
+    )
+    for entry in profiles[keep:]:
+        try:
+            os.remove(entry.path)
+        except FileNotFoundError:
+            pass
+
+
+def _is_staff(request):
+    user = getattr(request, 'user', None)
+    if user is not None and user.is_authenticated:
+        return user.is_staff
+    # Token authentication happens in the DRF view, after middleware
+    from rest_framework.authtoken.models import Token
+    keyword, _, key = request.headers.get('Authorization', '').partition(' ')
+    return keyword == 'Token' and bool(key) and Token.objects.filter(
+        key=key.strip(), user__is_active=True, user__is_staff=True
+    ).exists()
+
+
+class ProfilingMiddleware:
+    """Server-Timing spans for every request; cProfile for opted-in and sampled ones"""
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        self.directory = settings.PROFILE_DIR
+        self.sample_rate = settings.PROFILE_SAMPLE_RATE
+        self.endpoints = set(settings.PROFILE_ENDPOINTS)
+        self.retention = settings.PROFILE_RETENTION
+
+    def _endpoint(self, request):
+        try:
+            return resolve(request.path_info).url_name
+        except Resolver404:
+            return None
+
+    def _should_profile(self, request, endpoint):
+        if request.headers.get(PROFILE_HEADER) == '1' and _is_staff(request):
+            return True
+        return self.sample_rate > 0 and endpoint in self.endpoints and random.random() < self.sample_rate
+
+    def __call__(self, request):
+        token = _spans.set({})
+        try:
+            endpoint = self._endpoint(request)
+            if self._should_profile(request, endpoint):
+                response = self._profile(request, endpoint)
+            else:
+                response = self.get_response(request)
+            spans = _spans.get()
+            if spans:
+                response['Server-Timing'] = server_timing(spans)
+            return response
+        finally:
+            _spans.reset(token)
+
+    def _profile(self, request, endpoint):
+        profiler = cProfile.Profile()
+        try:
+            profiler.enable()
+        except ValueError:
+            # Another profiler is already active in this thread
+            return self.get_response(request)
+        start = time.perf_counter()
+        try:
+            response = self.get_response(request)
+        finally:
+            profiler.disable()
+        duration_ms = round((time.perf_counter() - start) * 1000, 1)
+
+        request_id = getattr(request, 'request_id', None) or uuid.uuid4().hex
+        name = f"{time.strftime('%Y%m%dT%H%M%S')}_{endpoint or 'unknown'}_{request_id}.prof"
+        try:
+            os.makedirs(self.directory, exist_ok=True)
+            profiler.dump_stats(os.path.join(self.directory, name))
+            prune_profiles(self.directory, self.retention)
+        except OSError:
+            logger.exception('Saving profile failed', extra={'profile': name})
+            return response
+        logger.info('Request profiled', extra={'profile': name, 'duration_ms': duration_ms, 'spans': dict(_spans.get())})
+        response['X-Profile-ID'] = name
+        return response
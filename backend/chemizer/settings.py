@@ -2,10 +2,13 @@
 Django settings for chemizer project.
 """
 from pathlib import Path
+import logging
 import os
 from dotenv import load_dotenv
 import dj_database_url
 
+from chemizer.logs import parse_levels
+
 # Load environment variables
 load_dotenv()
 
@@ -52,6 +55,7 @@ AUTHENTICATION_BACKENDS = [
 ]
 
 MIDDLEWARE = [
+    'chemizer.logs.RequestLogMiddleware',
     'django.middleware.security.SecurityMiddleware',
     'whitenoise.middleware.WhiteNoiseMiddleware',
     'corsheaders.middleware.CorsMiddleware',
@@ -62,6 +66,7 @@ MIDDLEWARE = [
     'allauth.account.middleware.AccountMiddleware',
     'django.contrib.messages.middleware.MessageMiddleware',
     'django.middleware.clickjacking.XFrameOptionsMiddleware',
+    'chemizer.profiling.ProfilingMiddleware',
 ]
 
 ROOT_URLCONF = 'chemizer.urls'
@@ -123,12 +128,38 @@ USE_TZ = True
 # Static files
 STATIC_URL = 'static/'
 STATIC_ROOT = os.path.join(BASE_DIR, 'staticfiles') 
-STATICFILES_STORAGE = 'whitenoise.storage.CompressedManifestStaticFilesStorage'
 
 # Media files (uploads)
 MEDIA_URL = '/media/'
 MEDIA_ROOT = BASE_DIR / 'uploads'
 
+# Uploads and columnar artifacts live on local disk unless an S3-compatible
+# bucket (AWS S3, MinIO, ...) is configured, which app nodes can then share
+STORAGES = {
+    'default': {
+        'BACKEND': 'django.core.files.storage.FileSystemStorage',
+    },
+    'staticfiles': {
+        'BACKEND': 'whitenoise.storage.CompressedManifestStaticFilesStorage',
+    },
+}
+if os.getenv('AWS_STORAGE_BUCKET_NAME'):
+    STORAGES['default'] = {
+        'BACKEND': 'storages.backends.s3.S3Storage',
+        'OPTIONS': {
+            'bucket_name': os.getenv('AWS_STORAGE_BUCKET_NAME'),
+            'endpoint_url': os.getenv('AWS_S3_ENDPOINT_URL'),
+            'file_overwrite': False,
+        },
+    }
+
+# Node-local copies of remotely stored files (parsing, memory-mapping)
+STORAGE_CACHE_ROOT = os.getenv('STORAGE_CACHE_ROOT', BASE_DIR / 'storage_cache')
+
+# Per-user storage quotas (0 disables a limit)
+STORAGE_QUOTA_BYTES = int(os.getenv('STORAGE_QUOTA_BYTES', 5 * 1024 ** 3))
+STORAGE_QUOTA_UPLOADS = int(os.getenv('STORAGE_QUOTA_UPLOADS', 0))
+
 # Default primary key field type
 DEFAULT_AUTO_FIELD = 'django.db.models.BigAutoField'
 
@@ -192,4 +223,57 @@ SOCIALACCOUNT_EMAIL_VERIFICATION = 'none'
 
 # Login/Logout redirects
 LOGIN_REDIRECT_URL = '/'
-LOGOUT_REDIRECT_URL = '/'
\ No newline at end of file
+LOGOUT_REDIRECT_URL = '/'
+
+# ============================================
+# Logging
+# ============================================
+# JSON lines on stdout, written by a background thread (see chemizer/logs.py)
+LOG_LEVEL = os.getenv('LOG_LEVEL', 'INFO').upper()
+# Per-endpoint levels by URL name, e.g. "upload-file=DEBUG,upload-history=WARNING"
+LOG_ENDPOINT_LEVELS = parse_levels(os.getenv('LOG_ENDPOINT_LEVELS', ''))
+# Fraction of requests whose info and debug records are kept
+LOG_SAMPLE_RATE = float(os.getenv('LOG_SAMPLE_RATE', '1.0'))
+
+# Loggers pass the lowest configured level; RequestContextFilter applies the rest
+_LOGGER_LEVEL = min([logging.getLevelName(LOG_LEVEL), *LOG_ENDPOINT_LEVELS.values()])
+
+LOGGING = {
+    'version': 1,
+    'disable_existing_loggers': False,
+    'filters': {
+        'request_context': {
+            '()': 'chemizer.logs.RequestContextFilter',
+            'level': LOG_LEVEL,
+            'endpoint_levels': LOG_ENDPOINT_LEVELS,
+        },
+    },
+    'handlers': {
+        'json': {
+            '()': 'chemizer.logs.AsyncHandler',
+            'filters': ['request_context'],
+        },
+    },
+    'loggers': {
+        'accounts': {'handlers': ['json'], 'level': _LOGGER_LEVEL, 'propagate': False},
+        'chemizer': {'handlers': ['json'], 'level': _LOGGER_LEVEL, 'propagate': False},
+        'django': {'handlers': ['json'], 'level': 'WARNING', 'propagate': False},
+        # Failed requests already get an access record
+        'django.request': {'handlers': ['json'], 'level': 'ERROR', 'propagate': False},
+    },
+}
+
+# ============================================
+# Profiling
+# ============================================
+# Staff can profile any request with an "X-Profile: 1" header (see chemizer/profiling.py)
+PROFILE_DIR = os.getenv('PROFILE_DIR', BASE_DIR / 'profiles')
+# Fraction of requests to PROFILE_ENDPOINTS profiled without the header
+PROFILE_SAMPLE_RATE = float(os.getenv('PROFILE_SAMPLE_RATE', '0'))
+PROFILE_ENDPOINTS = [
+    name.strip()
+    for name in os.getenv('PROFILE_ENDPOINTS', 'upload-file,upload-batch,upload-session-complete,upload-append,download-report').split(',')
+    if name.strip()
+]
+# Number of most recent profiles kept on disk
+PROFILE_RETENTION = int(os.getenv('PROFILE_RETENTION', '200'))
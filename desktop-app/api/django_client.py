@@ -1,6 +1,15 @@
+import os
+import gzip
+import shutil
+import tempfile
+import hashlib
+import time
 import requests
 import json
-from config import API_BASE_URL
+import logging
+from config import API_BASE_URL, UPLOAD_POLL_SECONDS, UPLOAD_RETRIES, UPLOAD_SESSIONS_FILE
+
+logger = logging.getLogger(__name__)
 
 class DjangoAPIClient:
     def __init__(self):
@@ -18,9 +27,7 @@ class DjangoAPIClient:
     
     def register(self, full_name, username, email, password, date_of_birth, gender):
         try:
-            print("=" * 50)  
-            print(f"📝 REGISTRATION - Username: {username}, Email: {email}") 
-            print("=" * 50) 
+            logger.info('Registering', extra={'username': username})
             
             response = requests.post(
                 f"{self.base_url}/register/",
@@ -36,13 +43,11 @@ class DjangoAPIClient:
                 timeout=30
             )
             
-            print(f"Response status: {response.status_code}")
-            print(f"Response text: {response.text}")
             
             if response.status_code == 400:
                 try:
                     error_data = response.json()
-                    print(f"❌ Validation errors: {error_data}") 
+                    logger.warning('Registration rejected', extra={'status': response.status_code})
                     return {"error": self._format_error(error_data)}
                 except:
                     return {"error": f"Bad Request: {response.text}"}
@@ -51,25 +56,23 @@ class DjangoAPIClient:
             result = response.json()
             
             if "requires_otp" in result and result["requires_otp"]:
-                print(f"✅ Registration successful! OTP sent to {email}") 
+                logger.info('Registration OTP sent', extra={'username': username})
             
             return result
             
         except requests.exceptions.ConnectionError as e:
-            print(f"❌ Connection error: {e}") 
+            logger.error('Cannot connect to server', extra={'error': str(e)})
             return {"error": "Cannot connect to server. Make sure Django is running."}
         except requests.exceptions.Timeout:
-            print("❌ Request timeout")  
+            logger.error('Request timed out', extra={'url': f"{self.base_url}/register/"})
             return {"error": "Request timeout. Server is not responding."}
         except requests.exceptions.RequestException as e:
-            print(f"❌ Request error: {e}")  
+            logger.error('Registration failed', extra={'error': str(e)})
             return {"error": str(e)}
         
     def get_analysis_results(self, upload_id):
         try:
-            print("=" * 50)
-            print(f"📊 FETCHING ANALYSIS RESULTS - Upload ID: {upload_id}")
-            print("=" * 50)
+            logger.debug('Fetching analysis results', extra={'upload_id': upload_id})
             response = requests.get(
                 f"{self.base_url}/uploads/{upload_id}/",
                 headers=self.get_headers(),
@@ -78,11 +81,11 @@ class DjangoAPIClient:
             response.raise_for_status()
             result = response.json()
             
-            print(f"✅ Analysis results loaded successfully!")
+            logger.debug('Analysis results loaded', extra={'upload_id': upload_id})
             return result
             
         except requests.exceptions.RequestException as e:
-            print(f"❌ Error fetching analysis: {e}")
+            logger.error('Fetching analysis results failed', extra={'upload_id': upload_id, 'error': str(e)})
             return {"error": str(e)}
     
     def _format_error(self, error_data):
@@ -98,9 +101,7 @@ class DjangoAPIClient:
     
     def login(self, username, password):
         try:
-            print("=" * 50)  
-            print(f"🔐 LOGIN ATTEMPT - Username: {username}")  
-            print("=" * 50)  
+            logger.info('Logging in', extra={'username': username})
             
             response = requests.post(
                 f"{self.base_url}/login/",
@@ -109,13 +110,11 @@ class DjangoAPIClient:
                 timeout=30
             )
             
-            print(f"Response status: {response.status_code}")
-            print(f"Response text: {response.text}")
             
             if response.status_code == 400:
                 try:
                     error_data = response.json()
-                    print(f"❌ Login failed: {error_data}")  
+                    logger.warning('Login rejected', extra={'username': username, 'status': response.status_code})
                     return {"error": self._format_error(error_data)}
                 except:
                     return {"error": f"Bad Request: {response.text}"}
@@ -124,25 +123,23 @@ class DjangoAPIClient:
             result = response.json()
             
             if "requires_otp" in result and result["requires_otp"]:
-                print(f"✅ OTP sent to {result.get('email', 'your email')}")  
+                logger.info('Login OTP sent', extra={'username': username})
             
             return result
             
         except requests.exceptions.ConnectionError:
-            print("❌ Cannot connect to server")  
+            logger.error('Cannot connect to server', extra={'url': self.base_url})
             return {"error": "Cannot connect to server. Make sure Django is running."}
         except requests.exceptions.Timeout:
-            print("❌ Request timeout")  
+            logger.error('Request timed out', extra={'url': f"{self.base_url}/login/"})
             return {"error": "Request timeout. Server is not responding."}
         except requests.exceptions.RequestException as e:
-            print(f"❌ Request error: {e}")  
+            logger.error('Login failed', extra={'error': str(e)})
             return {"error": str(e)}
     
     def verify_otp(self, email, otp):
         try:
-            print("=" * 50)  
-            print(f"🔢 OTP VERIFICATION - Email: {email}, OTP: {otp}") 
-            print("=" * 50)  
+            logger.info('Verifying OTP')
             
             response = requests.post(
                 f"{self.base_url}/verify-otp/",
@@ -151,12 +148,11 @@ class DjangoAPIClient:
                 timeout=30
             )
             
-            print(f"Response status: {response.status_code}")
             
             if response.status_code == 400:
                 try:
                     error_data = response.json()
-                    print(f"❌ OTP verification failed: {error_data}") 
+                    logger.warning('OTP verification rejected', extra={'status': response.status_code})
                     return {"error": self._format_error(error_data)}
                 except:
                     return {"error": f"Bad Request: {response.text}"}
@@ -166,19 +162,17 @@ class DjangoAPIClient:
             
             if "token" in data:
                 self.set_token(data["token"])
-                print(f"✅ OTP VERIFIED! User logged in: {data.get('username', 'User')}") 
+                logger.info('Logged in', extra={'username': data.get('username')})
             
             return data
             
         except requests.exceptions.RequestException as e:
-            print(f"❌ Request error: {e}")  
+            logger.error('OTP verification failed', extra={'error': str(e)})
             return {"error": str(e)}
     
     def resend_otp(self, email):
         try:
-            print("=" * 50)
-            print(f"🔄 RESEND OTP - Email: {email}")
-            print("=" * 50)
+            logger.info('Resending OTP')
             
             response = requests.post(
                 f"{self.base_url}/resend-otp/",
@@ -190,25 +184,23 @@ class DjangoAPIClient:
             if response.status_code == 400:
                 try:
                     error_data = response.json()
-                    print(f"❌ Resend OTP failed: {error_data}")
+                    logger.warning('Resending OTP rejected', extra={'status': response.status_code})
                     return {"error": self._format_error(error_data)}
                 except:
                     return {"error": f"Bad Request: {response.text}"}
             
             response.raise_for_status()
             result = response.json()
-            print(f"✅ New OTP sent to {email}")
+            logger.info('OTP resent')
             return result
             
         except requests.exceptions.RequestException as e:
-            print(f"❌ Error: {e}")
+            logger.error('Resending OTP failed', extra={'error': str(e)})
             return {"error": str(e)}
     
     def google_login(self, google_token):
         try:
-            print("=" * 50)
-            print(f"🔑 GOOGLE LOGIN ATTEMPT")
-            print("=" * 50)
+            logger.info('Logging in with Google')
             
             response = requests.post(
                 f"{self.base_url}/google/",
@@ -222,22 +214,35 @@ class DjangoAPIClient:
             
             if "token" in data:
                 self.set_token(data["token"])
-                print(f"✅ Google login successful: {data.get('username', 'User')}")
+                logger.info('Logged in', extra={'username': data.get('username')})
             
             return data
             
         except requests.exceptions.RequestException as e:
-            print(f"❌ Google login error: {e}")
+            logger.error('Google login failed', extra={'error': str(e)})
             return {"error": str(e)}
     
-    def upload_file(self, file_path):
+    def _compressed_copy(self, file_path):
+        name = os.path.basename(file_path)
+        if not name.lower().endswith('.csv'):
+            return file_path, name
+        with open(file_path, 'rb') as src, tempfile.NamedTemporaryFile(suffix='.csv.gz', delete=False) as tmp:
+            # A fixed mtime makes the compressed bytes reproducible, so resumed uploads match
+            with gzip.GzipFile(filename=name, mode='wb', fileobj=tmp, mtime=0) as gz:
+                shutil.copyfileobj(src, gz, 1024 * 1024)
+        logger.debug('Compressed upload', extra={'file': name, 'bytes': os.path.getsize(file_path), 'compressed_bytes': os.path.getsize(tmp.name)})
+        return tmp.name, name + '.gz'
+    
+    def upload_file(self, file_path, compress=False):
+        upload_path, upload_name = file_path, os.path.basename(file_path)
         try:
-            print("=" * 50)
-            print(f"📤 UPLOADING FILE: {file_path}")
-            print("=" * 50)
+            logger.info('Uploading file', extra={'file': file_path})
             
-            with open(file_path, 'rb') as f:
-                files = {'file': f}
+            if compress:
+                upload_path, upload_name = self._compressed_copy(file_path)
+            
+            with open(upload_path, 'rb') as f:
+                files = {'file': (upload_name, f)}
                 headers = {"Authorization": f"Token {self.token}"} if self.token else {}
                 response = requests.post(
                     f"{self.base_url}/upload/",
@@ -248,11 +253,184 @@ class DjangoAPIClient:
                 response.raise_for_status()
                 result = response.json()
                 
-                print(f"✅ Upload successful! Upload ID: {result.get('upload_id', 'N/A')}")
+                logger.info('Upload finished', extra={'file': file_path, 'upload_id': result.get('upload_id')})
                 return result
                 
+        except (OSError, requests.exceptions.RequestException) as e:
+            logger.error('Upload failed', extra={'file': file_path, 'error': str(e)})
+            return {"error": str(e)}
+        finally:
+            if upload_path != file_path:
+                os.remove(upload_path)
+
+    def _load_upload_sessions(self):
+        try:
+            with open(UPLOAD_SESSIONS_FILE) as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return {}
+    
+    def _save_upload_sessions(self, sessions):
+        os.makedirs(os.path.dirname(UPLOAD_SESSIONS_FILE), exist_ok=True)
+        with open(UPLOAD_SESSIONS_FILE, 'w') as f:
+            json.dump(sessions, f)
+    
+    def _send_with_retry(self, method, url, **kwargs):
+        headers = {"Authorization": f"Token {self.token}"} if self.token else {}
+        headers.update(kwargs.pop("headers", {}))
+        for attempt in range(UPLOAD_RETRIES):
+            try:
+                response = requests.request(method, url, headers=headers, timeout=120, **kwargs)
+                if response.status_code < 500:
+                    return response
+                logger.warning('Server error, retrying', extra={'url': url, 'status': response.status_code, 'attempt': attempt + 1})
+            except (requests.exceptions.ConnectionError, requests.exceptions.Timeout) as e:
+                if attempt == UPLOAD_RETRIES - 1:
+                    raise
+                logger.warning('Network error, retrying', extra={'url': url, 'error': str(e), 'attempt': attempt + 1})
+            time.sleep(min(2 ** attempt, 30))
+        return response
+    
+    def _wait_for_session(self, session_url):
+        while True:
+            response = self._send_with_retry("GET", session_url)
+            if response.status_code == 404:
+                # The server deletes a session whose file could not be analyzed
+                return None
+            response.raise_for_status()
+            session = response.json()
+            if session.get("upload_id"):
+                return session["upload_id"]
+            time.sleep(UPLOAD_POLL_SECONDS)
+    
+    def upload_file_resumable(self, file_path, compress=False, progress=None):
+        upload_path, upload_name = file_path, os.path.basename(file_path)
+        try:
+            logger.info('Starting resumable upload', extra={'file': file_path})
+            
+            if compress:
+                upload_path, upload_name = self._compressed_copy(file_path)
+            total_size = os.path.getsize(upload_path)
+            stat = os.stat(file_path)
+            key = f"{os.path.abspath(file_path)}|{stat.st_size}|{int(stat.st_mtime)}|{int(compress)}"
+            sessions_url = f"{self.base_url}/uploads/sessions/"
+            
+            sessions = self._load_upload_sessions()
+            session = None
+            if key in sessions:
+                response = self._send_with_retry("GET", f"{sessions_url}{sessions[key]}/")
+                if response.status_code == 200:
+                    session = response.json()
+                if session and (session.get("status") != "Open" or session.get("total_size") != total_size):
+                    session = None
+                if session:
+                    logger.info('Resuming upload session', extra={'session_id': session['session_id'], 'received_chunks': session['received_chunks'], 'total_chunks': session['total_chunks']})
+            
+            if session is None:
+                response = self._send_with_retry("POST", sessions_url, json={"filename": upload_name, "total_size": total_size})
+                if response.status_code == 400:
+                    return {"error": response.json().get("error", "Upload rejected")}
+                response.raise_for_status()
+                session = response.json()
+                sessions[key] = session["session_id"]
+                self._save_upload_sessions(sessions)
+            
+            session_id = session["session_id"]
+            chunk_size = session["chunk_size"]
+            done = session["total_chunks"] - len(session["missing_chunks"])
+            with open(upload_path, 'rb') as f:
+                for index in session["missing_chunks"]:
+                    f.seek(index * chunk_size)
+                    data = f.read(chunk_size)
+                    response = self._send_with_retry(
+                        "PUT", f"{sessions_url}{session_id}/chunks/{index}/", data=data,
+                        headers={"X-Chunk-SHA256": hashlib.sha256(data).hexdigest(),
+                                 "Content-Type": "application/octet-stream"}
+                    )
+                    response.raise_for_status()
+                    done += 1
+                    if progress:
+                        progress(done, session["total_chunks"])
+            
+            response = self._send_with_retry("POST", f"{sessions_url}{session_id}/complete/")
+            if response.status_code == 409:
+                # An earlier attempt that timed out is still analyzing the file
+                logger.info('Waiting for upload analysis', extra={'session_id': session_id})
+                upload_id = self._wait_for_session(f"{sessions_url}{session_id}/")
+                sessions.pop(key, None)
+                self._save_upload_sessions(sessions)
+                if upload_id is None:
+                    return {"error": "File processing failed"}
+                result = self.get_upload_detail(upload_id)
+                result.setdefault("file_name", result.get("filename"))
+                return result
+            sessions.pop(key, None)
+            self._save_upload_sessions(sessions)
+            if response.status_code == 400:
+                return {"error": response.json().get("error", "Upload rejected")}
+            response.raise_for_status()
+            result = response.json()
+            
+            logger.info('Upload finished', extra={'file': file_path, 'upload_id': result.get('upload_id')})
+            return result
+            
+        except (OSError, requests.exceptions.RequestException) as e:
+            # The session stays saved, so the next attempt resumes where this one stopped
+            logger.error('Resumable upload failed', extra={'file': file_path, 'error': str(e)})
+            return {"error": str(e)}
+        finally:
+            if upload_path != file_path:
+                os.remove(upload_path)
+
+    def upload_files(self, file_paths, compress=False):
+        handles, copies = [], []
+        try:
+            logger.info('Uploading files', extra={'files': len(file_paths)})
+
+            for path in file_paths:
+                upload_path, upload_name = self._compressed_copy(path) if compress else (path, os.path.basename(path))
+                if upload_path != path:
+                    copies.append(upload_path)
+                handles.append(('files', (upload_name, open(upload_path, 'rb'))))
+            response = requests.post(
+                f"{self.base_url}/upload/batch/",
+                files=handles,
+                headers={"Authorization": f"Token {self.token}"} if self.token else {},
+                timeout=600
+            )
+            if response.status_code == 400:
+                return {"error": response.json().get("error", "Batch upload rejected")}
+            response.raise_for_status()
+            result = response.json()
+
+            logger.info('Batch upload finished', extra={'completed': result.get('completed'), 'failed': result.get('failed')})
+            return result
+
+        except (OSError, requests.exceptions.RequestException) as e:
+            logger.error('Batch upload failed', extra={'error': str(e)})
+            return {"error": str(e)}
+        finally:
+            for _, (_, handle) in handles:
+                handle.close()
+            for path in copies:
+                os.remove(path)
+
+    def append_to_upload(self, upload_id, file_path):
+        try:
+            logger.info('Appending to upload', extra={'file': file_path, 'upload_id': upload_id})
+            with open(file_path, 'rb') as f:
+                response = requests.post(
+                    f"{self.base_url}/uploads/{upload_id}/append/",
+                    files={'file': f},
+                    headers={"Authorization": f"Token {self.token}"} if self.token else {},
+                    timeout=120
+                )
+            if response.status_code == 400:
+                return {"error": response.json().get("error", "Append rejected")}
+            response.raise_for_status()
+            return response.json()
         except requests.exceptions.RequestException as e:
-            print(f"❌ Upload error: {str(e)}")
+            logger.error('Append failed', extra={'upload_id': upload_id, 'error': str(e)})
             return {"error": str(e)}
     
     def get_upload_history(self):
@@ -267,11 +445,29 @@ class DjangoAPIClient:
         except requests.exceptions.RequestException as e:
             return {"error": str(e)}
     
+    def search_upload_history(self, search=None, status=None, sort=None, limit=200):
+        try:
+            params = {"limit": limit}
+            if search:
+                params["search"] = search
+            if status:
+                params["status"] = status
+            if sort:
+                params["sort"] = sort
+            response = requests.get(
+                f"{self.base_url}/upload-history/",
+                headers=self.get_headers(),
+                params=params,
+                timeout=30
+            )
+            response.raise_for_status()
+            return response.json()
+        except requests.exceptions.RequestException as e:
+            return {"error": str(e)}
+    
     def download_pdf_report(self, upload_id, save_path):
         try:
-            print("=" * 50)
-            print(f"📥 DOWNLOADING PDF - Upload ID: {upload_id}")
-            print("=" * 50)
+            logger.info('Downloading PDF report', extra={'upload_id': upload_id})
             
             response = requests.get(
                 f"{self.base_url}/reports/download/{upload_id}/",
@@ -285,11 +481,11 @@ class DjangoAPIClient:
                 for chunk in response.iter_content(chunk_size=8192):
                     f.write(chunk)
             
-            print(f"✅ PDF saved to: {save_path}")
+            logger.info('PDF report saved', extra={'upload_id': upload_id, 'path': save_path})
             return {"success": True}
             
         except requests.exceptions.RequestException as e:
-            print(f"❌ Download error: {str(e)}")
+            logger.error('PDF download failed', extra={'upload_id': upload_id, 'error': str(e)})
             return {"error": str(e)}
     
     def get_profile(self):
@@ -319,9 +515,7 @@ class DjangoAPIClient:
     
     def delete_account(self):
         try:
-            print("=" * 50)
-            print(f"🗑️  DELETING ACCOUNT")
-            print("=" * 50)
+            logger.info('Deleting account')
             
             response = requests.delete(
                 f"{self.base_url}/profile/delete/",
@@ -330,18 +524,16 @@ class DjangoAPIClient:
             )
             response.raise_for_status()
             
-            print("✅ Account deleted successfully")
+            logger.info('Account deleted')
             return {"success": True}
             
         except requests.exceptions.RequestException as e:
-            print(f"❌ Delete account error: {e}")
+            logger.error('Deleting account failed', extra={'error': str(e)})
             return {"error": str(e)}
     
     def change_password(self, current_password, new_password):
         try:
-            print("=" * 50)
-            print(f"🔐 CHANGING PASSWORD")
-            print("=" * 50)
+            logger.info('Changing password')
             
             response = requests.post(
                 f"{self.base_url}/change-password/",
@@ -353,12 +545,11 @@ class DjangoAPIClient:
                 timeout=30
             )
             
-            print(f"Response status: {response.status_code}")
             
             if response.status_code == 400:
                 try:
                     error_data = response.json()
-                    print(f"❌ Password change failed: {error_data}")
+                    logger.warning('Password change rejected', extra={'status': response.status_code})
                     return {"error": self._format_error(error_data)}
                 except:
                     return {"error": f"Bad Request: {response.text}"}
@@ -366,16 +557,16 @@ class DjangoAPIClient:
             response.raise_for_status()
             result = response.json()
             
-            print(f"✅ Password changed successfully!")
+            logger.info('Password changed')
             return result
             
         except requests.exceptions.RequestException as e:
-            print(f"❌ Change password error: {e}")
+            logger.error('Changing password failed', extra={'error': str(e)})
             return {"error": str(e)}
     
     def get_upload_detail(self, upload_id):
         try:
-            print(f"🔍 Fetching upload detail: {upload_id}")
+            logger.debug('Fetching upload detail', extra={'upload_id': upload_id})
             response = requests.get(
                 f"{self.base_url}/uploads/{upload_id}/",
                 headers=self.get_headers(),
@@ -384,14 +575,79 @@ class DjangoAPIClient:
             response.raise_for_status()
             return response.json()
         except requests.exceptions.RequestException as e:
-            print(f"❌ Error fetching upload detail: {e}")
+            logger.error('Fetching upload detail failed', extra={'upload_id': upload_id, 'error': str(e)})
+            return {"error": str(e)}
+    
+    def get_chart_data(self, upload_id, columns=None, points=500, bins=30):
+        try:
+            logger.debug('Fetching chart data', extra={'upload_id': upload_id})
+            params = {"points": points, "bins": bins}
+            if columns:
+                params["columns"] = ",".join(columns)
+            response = requests.get(
+                f"{self.base_url}/uploads/{upload_id}/chart-data/",
+                headers=self.get_headers(),
+                params=params,
+                timeout=60
+            )
+            response.raise_for_status()
+            return response.json()
+        except requests.exceptions.RequestException as e:
+            logger.error('Fetching chart data failed', extra={'upload_id': upload_id, 'error': str(e)})
+            return {"error": str(e)}
+    
+    def get_time_series(self, upload_id, columns=None, start=None, end=None, resolution="auto", points=500):
+        try:
+            logger.debug('Fetching time series', extra={'upload_id': upload_id})
+            params = {"points": points, "resolution": resolution}
+            if columns:
+                params["columns"] = ",".join(columns)
+            if start:
+                params["start"] = start
+            if end:
+                params["end"] = end
+            response = requests.get(
+                f"{self.base_url}/uploads/{upload_id}/timeseries/",
+                headers=self.get_headers(),
+                params=params,
+                timeout=60
+            )
+            response.raise_for_status()
+            return response.json()
+        except requests.exceptions.RequestException as e:
+            logger.error('Fetching time series failed', extra={'upload_id': upload_id, 'error': str(e)})
+            return {"error": str(e)}
+    
+    def get_dashboard_summary(self, recent=20):
+        try:
+            response = requests.get(
+                f"{self.base_url}/dashboard/summary/",
+                headers=self.get_headers(),
+                params={"recent": recent},
+                timeout=10
+            )
+            response.raise_for_status()
+            return response.json()
+        except requests.exceptions.RequestException as e:
+            logger.error('Fetching dashboard summary failed', extra={'error': str(e)})
+            return {"error": str(e)}
+    
+    def get_usage(self):
+        try:
+            response = requests.get(
+                f"{self.base_url}/usage/",
+                headers=self.get_headers(),
+                timeout=10
+            )
+            response.raise_for_status()
+            return response.json()
+        except requests.exceptions.RequestException as e:
+            logger.error('Fetching usage failed', extra={'error': str(e)})
             return {"error": str(e)}
     
     def delete_upload(self, upload_id):
         try:
-            print("=" * 50)
-            print(f"🗑️  DELETING UPLOAD: {upload_id}")
-            print("=" * 50)
+            logger.info('Deleting upload', extra={'upload_id': upload_id})
             
             response = requests.delete(
                 f"{self.base_url}/uploads/{upload_id}/delete/",
@@ -401,11 +657,11 @@ class DjangoAPIClient:
             response.raise_for_status()
             result = response.json()
             
-            print(f"✅ Upload deleted: {result.get('message', 'Success')}")
+            logger.info('Upload deleted', extra={'upload_id': upload_id})
             return result
             
         except requests.exceptions.RequestException as e:
-            print(f"❌ Delete upload error: {e}")
+            logger.error('Deleting upload failed', extra={'upload_id': upload_id, 'error': str(e)})
             return {"error": str(e)}
 
 api_client = DjangoAPIClient()
\ No newline at end of file
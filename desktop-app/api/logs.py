@@ -0,0 +1,63 @@
+import json
+import logging
+import queue
+import re
+import sys
+from datetime import datetime, timezone
+from logging.handlers import QueueHandler, QueueListener
+
+REDACTED = '[REDACTED]'
+# Keep in sync with SECRET_FIELDS in backend/chemizer/logs.py
+SECRET_FIELDS = re.compile(r'pass(word)?|secret|token|otp|authorization|cookie|api_?key|credential|csrf', re.I)
+RECORD_ATTRIBUTES = frozenset(vars(logging.LogRecord('', 0, '', 0, '', (), None))) | {'message', 'asctime'}
+
+_listener = None
+
+
+def redact(value):
+    if isinstance(value, dict):
+        return {key: REDACTED if SECRET_FIELDS.search(str(key)) else redact(item) for key, item in value.items()}
+    if isinstance(value, (list, tuple)):
+        return [redact(item) for item in value]
+    return value
+
+
+class JsonFormatter(logging.Formatter):
+    def format(self, record):
+        entry = {
+            'time': datetime.fromtimestamp(record.created, timezone.utc).isoformat(timespec='milliseconds'),
+            'level': record.levelname,
+            'logger': record.name,
+            'message': record.getMessage(),
+        }
+        entry.update(redact({key: value for key, value in vars(record).items() if key not in RECORD_ATTRIBUTES}))
+        if record.exc_info:
+            entry['exception'] = self.formatException(record.exc_info)
+        elif record.exc_text:
+            entry['exception'] = record.exc_text
+        return json.dumps(entry, default=str)
+
+
+def setup_logging(level='INFO'):
+    # The UI thread only queues records; a listener thread formats and writes them
+    global _listener
+    if _listener is not None:
+        return
+    records = queue.SimpleQueue()
+    target = logging.StreamHandler(sys.stderr)
+    target.setFormatter(JsonFormatter())
+    _listener = QueueListener(records, target)
+    _listener.start()
+
+    root = logging.getLogger()
+    root.addHandler(QueueHandler(records))
+    root.setLevel(level)
+    # urllib3 logs every connection at debug
+    logging.getLogger('urllib3').setLevel(logging.WARNING)
+
+
+def stop_logging():
+    global _listener
+    if _listener is not None:
+        _listener.stop()
+        _listener = None
@@ -16,6 +16,22 @@ except Exception:
 API_BASE_URL = os.getenv("API_BASE_URL", "http://localhost:8000/api")
 
 DEBUG = str(os.getenv("DEBUG", "True")).lower() in ("1", "true", "yes")
+
+# Level of the JSON log lines written to stderr.
+LOG_LEVEL = os.getenv("LOG_LEVEL", "DEBUG" if DEBUG else "INFO").upper()
+
+# Gzip CSV files before uploading them (the upload checkbox starts from this).
+COMPRESS_UPLOADS = str(os.getenv("COMPRESS_UPLOADS", "False")).lower() in ("1", "true", "yes")
+
+# Files at least this large are sent as resumable chunked uploads.
+RESUMABLE_UPLOAD_THRESHOLD_MB = int(os.getenv("RESUMABLE_UPLOAD_THRESHOLD_MB", "50"))
+UPLOAD_RETRIES = int(os.getenv("UPLOAD_RETRIES", "5"))
+# Seconds between checks on an upload the server is still analyzing.
+UPLOAD_POLL_SECONDS = int(os.getenv("UPLOAD_POLL_SECONDS", "5"))
+# Open upload sessions, kept so uploads can resume after an app restart.
+UPLOAD_SESSIONS_FILE = os.getenv("UPLOAD_SESSIONS_FILE", str(Path.home() / ".chemizer" / "upload_sessions.json"))
+# File dialog filter for every file type the server accepts.
+DATA_FILE_FILTER = "Data Files (*.csv *.xlsx *.xls *.csv.gz *.csv.zst *.zip);;All Files (*)"
 # ============================================
 # Google OAuth Configuration
 # ============================================
@@ -2,16 +2,21 @@ import sys
 from PyQt5.QtWidgets import QApplication
 from PyQt5.QtGui import QIcon
 from ui.login_window import LoginWindow
+from api.logs import setup_logging, stop_logging
+from config import LOG_LEVEL
 
 
 def main():
+    setup_logging(LOG_LEVEL)
     app = QApplication(sys.argv)
     app.setApplicationName("Data Analysis Platform")
 
     login_window = LoginWindow()
     login_window.show()
     
-    sys.exit(app.exec_())
+    exit_code = app.exec_()
+    stop_logging()
+    sys.exit(exit_code)
 
 
 if __name__ == "__main__":
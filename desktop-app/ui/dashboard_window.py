@@ -9,6 +9,7 @@ from PyQt5.QtWidgets import (
 from PyQt5.QtCore import Qt, QThread, pyqtSignal
 from PyQt5.QtGui import QFont, QColor
 from api.django_client import api_client
+from config import DATA_FILE_FILTER
 from ui.error_dialog import ErrorDialog
 import os
 
@@ -31,6 +32,29 @@ class DeleteThread(QThread):
             self.finished.emit(False, str(e))
 
 
+class AppendThread(QThread):
+    finished = pyqtSignal(bool, str)
+    
+    def __init__(self, upload_id, file_path):
+        super().__init__()
+        self.upload_id = upload_id
+        self.file_path = file_path
+    
+    def run(self):
+        try:
+            result = api_client.append_to_upload(self.upload_id, self.file_path)
+            if "error" in result:
+                self.finished.emit(False, result["error"])
+            else:
+                self.finished.emit(
+                    True,
+                    f"Added {result.get('rows_added', 0)} rows.\n"
+                    f"The dataset now has {result.get('rows', 0)} rows (version {result.get('version', 1)})."
+                )
+        except Exception as e:
+            self.finished.emit(False, str(e))
+
+
 class DownloadThread(QThread):
     finished = pyqtSignal(bool, str)
     
@@ -290,6 +314,34 @@ class DashboardWindow(QMainWindow):
         
         layout.addLayout(stats_layout)
         
+        self.groups_frame = QFrame()
+        self.groups_frame.setStyleSheet("""
+            QFrame {
+                background-color: #ffffff;
+                border-radius: 12px;
+                border: 2px solid #e5e7eb;
+            }
+        """)
+        groups_layout = QVBoxLayout(self.groups_frame)
+        groups_layout.setContentsMargins(20, 15, 20, 15)
+        
+        self.groups_label = QLabel("🏷️ Latest Group Breakdown")
+        self.groups_label.setFont(QFont("Segoe UI", 18, QFont.Bold))
+        self.groups_label.setStyleSheet("color: #1f2937; background: transparent; border: none;")
+        groups_layout.addWidget(self.groups_label)
+        
+        self.groups_table = QTableWidget()
+        self.groups_table.setEditTriggers(QAbstractItemView.NoEditTriggers)
+        self.groups_table.verticalHeader().setVisible(False)
+        self.groups_table.setStyleSheet("""
+            QTableWidget { border: none; background-color: white; gridline-color: #e5e7eb; }
+            QHeaderView::section { background-color: #f3f4f6; padding: 8px; border: none; font-weight: bold; color: #1f2937; }
+        """)
+        groups_layout.addWidget(self.groups_table)
+        
+        self.groups_frame.hide()
+        layout.addWidget(self.groups_frame)
+        
         activity_header = QHBoxLayout()
         
         activity_label = QLabel("Recent Activity")
@@ -406,25 +458,50 @@ class DashboardWindow(QMainWindow):
             first_name = full_name.split()[0] if full_name else "User"
             self.welcome_label.setText(f"Welcome back, {first_name}!")
         
-        response = api_client.get_upload_history()
+        summary = api_client.get_dashboard_summary()
         
-        if "error" in response:
-            error_dialog = ErrorDialog("Error", f"Failed to load data: {response['error']}", self)
+        if "error" in summary:
+            error_dialog = ErrorDialog("Error", f"Failed to load data: {summary['error']}", self)
             error_dialog.exec_()
-            history = []
-        else:
-            history = response.get("uploads", [])
+            summary = {}
+        history = summary.get("recent", [])
         
-        total_uploads = len(history)
-        completed = len([u for u in history if u.get("status") == "Completed"])
-        success_rate = (completed / total_uploads * 100) if total_uploads > 0 else 0
+        total_uploads = summary.get("total_uploads", 0)
+        completed = summary.get("completed", 0)
+        success_rate = summary.get("success_rate", 0)
         
         self.total_card.value_label.setText(str(total_uploads))
         self.analyses_card.value_label.setText(str(completed))
         self.success_card.value_label.setText(f"{success_rate:.1f}%")
         
+        self.populate_groups(summary.get("latest_groups"))
         self.populate_activity(history)
     
+    def populate_groups(self, latest):
+        group_stats = (latest or {}).get("group_stats") or {}
+        if not group_stats:
+            self.groups_frame.hide()
+            return
+        
+        group_col, grouping = next(iter(group_stats.items()))
+        value_cols = grouping.get("columns", [])[:4]
+        groups = grouping.get("groups", [])
+        
+        self.groups_label.setText(f"🏷️ {latest.get('filename', '')} — by {group_col}")
+        self.groups_table.setRowCount(len(groups))
+        self.groups_table.setColumnCount(len(value_cols) + 2)
+        self.groups_table.setHorizontalHeaderLabels(["Group", "Rows"] + [f"Avg {col}" for col in value_cols])
+        for row, group in enumerate(groups):
+            label = group["group"] if group["group"] is not None else "N/A"
+            self.groups_table.setItem(row, 0, QTableWidgetItem(str(label)))
+            self.groups_table.setItem(row, 1, QTableWidgetItem(str(group["rows"])))
+            for col_idx, col in enumerate(value_cols):
+                mean = group["stats"].get(col, {}).get("mean")
+                self.groups_table.setItem(row, col_idx + 2, QTableWidgetItem(f"{mean:.2f}" if mean is not None else "N/A"))
+        self.groups_table.horizontalHeader().setSectionResizeMode(QHeaderView.Stretch)
+        self.groups_table.setFixedHeight(min(320, 40 + 32 * len(groups)))
+        self.groups_frame.show()
+    
     def populate_activity(self, uploads):
         self.activity_table.setRowCount(len(uploads))
         self.activity_table.setColumnCount(5)
@@ -573,6 +650,11 @@ class DashboardWindow(QMainWindow):
             download_action.triggered.connect(lambda checked, u=upload: self.download_pdf(u))
             actions_menu.addAction(download_action)
             
+            append_action = QAction("➕  Append Data", self)
+            append_action.setFont(QFont("Segoe UI", 14, QFont.Bold))
+            append_action.triggered.connect(lambda checked, u=upload: self.append_upload(u))
+            actions_menu.addAction(append_action)
+            
             actions_menu.addSeparator()
             
             delete_action = QAction("🗑️  Delete Upload", self)
@@ -624,6 +706,30 @@ class DashboardWindow(QMainWindow):
             dialog = LargeErrorDialog("Download Failed", message, self)
             dialog.exec_()
     
+    def append_upload(self, upload):
+        file_path, _ = QFileDialog.getOpenFileName(
+            self,
+            f"Append Rows to {upload.get('filename', 'Upload')}",
+            "",
+            DATA_FILE_FILTER
+        )
+        
+        if file_path:
+            self.append_thread = AppendThread(upload.get("upload_id"), file_path)
+            self.append_thread.finished.connect(self.append_complete)
+            self.append_thread.start()
+    
+    def append_complete(self, success, message):
+        from ui.custom_dialogs import LargeSuccessDialog, LargeErrorDialog
+        
+        if success:
+            dialog = LargeSuccessDialog("Data Appended!", message, self)
+            dialog.exec_()
+            self.load_dashboard_data()
+        else:
+            dialog = LargeErrorDialog("Append Failed", message, self)
+            dialog.exec_()
+    
     def delete_upload(self, upload):
         from ui.custom_dialogs import LargeConfirmDialog
         
@@ -6,7 +6,7 @@ from PyQt5.QtWidgets import (
     QAbstractItemView, QFrame, QMenu, QAction,
     QGraphicsDropShadowEffect, QFileDialog, QDialog, QScrollArea
 )
-from PyQt5.QtCore import Qt, QThread, pyqtSignal
+from PyQt5.QtCore import Qt, QThread, pyqtSignal, QTimer
 from PyQt5.QtGui import QFont, QColor
 from api.django_client import api_client
 from ui.error_dialog import ErrorDialog
@@ -52,6 +52,14 @@ class DownloadThread(QThread):
             self.finished.emit(False, str(e))
 
 
+SORT_KEYS = {
+    "Newest First": "-upload_date",
+    "Oldest First": "upload_date",
+    "Filename A-Z": "filename",
+    "Filename Z-A": "-filename",
+}
+
+
 class HistoryWindow(QMainWindow):
     def __init__(self):
         super().__init__()
@@ -62,8 +70,12 @@ class HistoryWindow(QMainWindow):
         
         self.setStyleSheet("background-color: #f3f4f6;")
         
-        self.all_uploads = []
         self.filtered_uploads = []
+        self.total_uploads = 0
+        self.search_timer = QTimer(self)
+        self.search_timer.setSingleShot(True)
+        self.search_timer.setInterval(300)
+        self.search_timer.timeout.connect(self.load_history)
         
         central_widget = QWidget()
         central_widget.setStyleSheet("background-color: #f3f4f6;")
@@ -136,7 +148,7 @@ class HistoryWindow(QMainWindow):
                 border-color: #1f2937;
             }
         """)
-        self.search_input.textChanged.connect(self.filter_history)
+        self.search_input.textChanged.connect(lambda _: self.search_timer.start())
         filter_layout.addWidget(self.search_input, 3)
         
         filter_label = QLabel("Status:")
@@ -181,7 +193,7 @@ class HistoryWindow(QMainWindow):
                 min-height: 30px;
             }
         """)
-        self.status_filter.currentTextChanged.connect(self.filter_history)
+        self.status_filter.currentTextChanged.connect(self.load_history)
         filter_layout.addWidget(self.status_filter, 1)
         
         sort_label = QLabel("Sort by:")
@@ -226,7 +238,7 @@ class HistoryWindow(QMainWindow):
                 min-height: 30px;
             }
         """)
-        self.sort_combo.currentTextChanged.connect(self.sort_history)
+        self.sort_combo.currentTextChanged.connect(self.load_history)
         filter_layout.addWidget(self.sort_combo, 1)
         
         content_layout.addLayout(filter_layout)
@@ -455,17 +467,24 @@ class HistoryWindow(QMainWindow):
             self.profile_btn.setText("👤 User ")
     
     def load_history(self):
-        """Load upload history from API"""
-        response = api_client.get_upload_history()
+        """Load upload history matching the search box, status and sort from API"""
+        self.search_timer.stop()
+        status_filter = self.status_filter.currentText()
+        response = api_client.search_upload_history(
+            search=self.search_input.text().strip(),
+            status=None if status_filter == "All" else status_filter,
+            sort=SORT_KEYS.get(self.sort_combo.currentText()),
+        )
         
         if "error" in response:
             error_dialog = ErrorDialog("Error", f"Failed to load history: {response['error']}", self)
             error_dialog.exec_()
-            self.all_uploads = []
+            self.filtered_uploads = []
+            self.total_uploads = 0
         else:
-            self.all_uploads = response.get("uploads", [])
+            self.filtered_uploads = response.get("uploads", [])
+            self.total_uploads = response.get("total", len(self.filtered_uploads))
         
-        self.filtered_uploads = self.all_uploads.copy()
         self.populate_table()
     
     def populate_table(self):
@@ -646,45 +665,10 @@ class HistoryWindow(QMainWindow):
         self.history_table.setMinimumHeight(total_height + 10)
         self.history_table.setMaximumHeight(total_height + 10)
         
-        total = len(self.all_uploads)
+        total = self.total_uploads
         showing = len(self.filtered_uploads)
         self.info_label.setText(f"Showing {showing} of {total} uploads")
     
-    def filter_history(self):
-        """Filter uploads based on search and status"""
-        search_text = self.search_input.text().lower()
-        status_filter = self.status_filter.currentText()
-        
-        self.filtered_uploads = []
-        
-        for upload in self.all_uploads:
-            filename = upload.get("filename", "").lower()
-            if search_text and search_text not in filename:
-                continue
-            
-            status = upload.get("status", "")
-            if status_filter != "All" and status != status_filter:
-                continue
-            
-            self.filtered_uploads.append(upload)
-        
-        self.sort_history()
-    
-    def sort_history(self):
-        """Sort filtered uploads"""
-        sort_by = self.sort_combo.currentText()
-        
-        if sort_by == "Newest First":
-            self.filtered_uploads.sort(key=lambda x: x.get("upload_date", ""), reverse=True)
-        elif sort_by == "Oldest First":
-            self.filtered_uploads.sort(key=lambda x: x.get("upload_date", ""))
-        elif sort_by == "Filename A-Z":
-            self.filtered_uploads.sort(key=lambda x: x.get("filename", "").lower())
-        elif sort_by == "Filename Z-A":
-            self.filtered_uploads.sort(key=lambda x: x.get("filename", "").lower(), reverse=True)
-        
-        self.populate_table()
-    
     def view_upload(self, upload):
         """View upload details/results"""
         upload_id = upload.get("upload_id")
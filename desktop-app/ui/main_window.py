@@ -4,11 +4,12 @@ from PyQt5.QtWidgets import (
     QMainWindow, QWidget, QVBoxLayout, QHBoxLayout,
     QLabel, QPushButton, QFileDialog, QProgressBar, 
     QMessageBox, QGraphicsBlurEffect, QGraphicsDropShadowEffect,
-    QSpacerItem, QSizePolicy, QFrame, QMenu, QAction
+    QSpacerItem, QSizePolicy, QFrame, QMenu, QAction, QCheckBox
 )
 from PyQt5.QtCore import Qt, QThread, pyqtSignal, QTimer, QPropertyAnimation, QRect
 from PyQt5.QtGui import QFont, QPainter, QColor, QPalette
 from api.django_client import api_client
+from config import COMPRESS_UPLOADS, DATA_FILE_FILTER, RESUMABLE_UPLOAD_THRESHOLD_MB
 from ui.results_window import ResultsWindow
 from ui.dashboard_window import DashboardWindow
 from ui.profile_window import ProfileWindow
@@ -22,13 +23,26 @@ class UploadThread(QThread):
     status_message = pyqtSignal(str)
     finished = pyqtSignal(dict)
     
-    def __init__(self, file_path):
+    def __init__(self, file_path, compress=False):
         super().__init__()
         self.file_path = file_path
+        self.compress = compress
     
     def run(self):
+        import os
         import time
         
+        if os.path.getsize(self.file_path) >= RESUMABLE_UPLOAD_THRESHOLD_MB * 1024 * 1024:
+            self.status_message.emit("📡 Uploading in resumable chunks...")
+            result = api_client.upload_file_resumable(
+                self.file_path, compress=self.compress,
+                progress=lambda done, total: self.progress.emit(int(5 + 90 * done / total))
+            )
+            self.progress.emit(100)
+            self.status_message.emit("✅ Analysis complete!" if "error" not in result else "⏸️ Upload interrupted — select the file again to resume")
+            self.finished.emit(result)
+            return
+        
         steps = [
             (10, "📂 Reading file..."),
             (30, "🔍 Analyzing data structure..."),
@@ -42,7 +56,7 @@ class UploadThread(QThread):
             self.status_message.emit(message)
             time.sleep(0.5)
         
-        result = api_client.upload_file(self.file_path)
+        result = api_client.upload_file(self.file_path, compress=self.compress)
         
         self.progress.emit(100)
         self.status_message.emit("✅ Analysis complete!")
@@ -51,6 +65,27 @@ class UploadThread(QThread):
         self.finished.emit(result)
 
 
+class BatchUploadThread(QThread):
+    progress = pyqtSignal(int)
+    status_message = pyqtSignal(str)
+    finished = pyqtSignal(dict)
+
+    def __init__(self, file_paths, compress=False):
+        super().__init__()
+        self.file_paths = file_paths
+        self.compress = compress
+
+    def run(self):
+        self.progress.emit(10)
+        self.status_message.emit(f"📦 Uploading {len(self.file_paths)} files...")
+
+        result = api_client.upload_files(self.file_paths, compress=self.compress)
+
+        self.progress.emit(100)
+        self.status_message.emit("✅ Batch analysis complete!")
+        self.finished.emit(result)
+
+
 class ClickableFrame(QFrame):
     clicked = pyqtSignal()
     
@@ -76,6 +111,7 @@ class MainWindow(QMainWindow):
         self.showMaximized()
         
         self.selected_file = None
+        self.selected_files = []
         self.current_user = None
 
         self.central_widget = QWidget()
@@ -344,7 +380,7 @@ class MainWindow(QMainWindow):
         format_label.setStyleSheet("color: #1f2937;")
         info_container.addWidget(format_label)
         
-        format_detail = QLabel("CSV, Excel (.xlsx, .xls)")
+        format_detail = QLabel("CSV, Excel (.xlsx, .xls), .csv.gz, .csv.zst, ZIP")
         format_detail.setFont(QFont("Segoe UI", 9))
         format_detail.setStyleSheet("color: #6b7280; margin-left: 15px;")
         info_container.addWidget(format_detail)
@@ -465,6 +501,17 @@ class MainWindow(QMainWindow):
         button_container.addStretch()
         layout.addLayout(button_container)
         
+        self.compress_check = QCheckBox("🗜️ Compress CSV files before upload")
+        self.compress_check.setFont(QFont("Segoe UI", 11))
+        self.compress_check.setStyleSheet("color: #374151; background: transparent;")
+        self.compress_check.setChecked(COMPRESS_UPLOADS)
+        
+        compress_container = QHBoxLayout()
+        compress_container.addStretch()
+        compress_container.addWidget(self.compress_check)
+        compress_container.addStretch()
+        layout.addLayout(compress_container)
+        
         layout.addStretch()
     
     def resizeEvent(self, event):
@@ -514,26 +561,32 @@ class MainWindow(QMainWindow):
             self.profile_btn.setText("👤 User ")
     
     def choose_file(self):
-        file_path, _ = QFileDialog.getOpenFileName(
-            self, "Select File", "", 
-            "Data Files (*.csv *.xlsx *.xls);;All Files (*)"
+        file_paths, _ = QFileDialog.getOpenFileNames(
+            self, "Select Files", "", DATA_FILE_FILTER
         )
-        if file_path:
-            self.selected_file = file_path
+        if file_paths:
             import os
-            file_name = os.path.basename(file_path)
-            file_size = os.path.getsize(file_path) / (1024 * 1024)
+            single = len(file_paths) == 1 and not file_paths[0].lower().endswith('.zip')
+            self.selected_file = file_paths[0] if single else None
+            self.selected_files = [] if single else file_paths
+            file_size = sum(os.path.getsize(path) for path in file_paths) / (1024 * 1024)
             
-            self.file_label.setText(f"✅ {file_name}\n📊 Size: {file_size:.2f} MB")
+            if single:
+                self.file_label.setText(f"✅ {os.path.basename(file_paths[0])}\n📊 Size: {file_size:.2f} MB")
+            else:
+                self.file_label.setText(f"✅ {len(file_paths)} files selected\n📊 Total size: {file_size:.2f} MB")
             self.file_label.setStyleSheet("color: #059669; font-weight: bold; font-size: 12px;")
             self.analyze_btn.setEnabled(True)
         else:
-            if not self.selected_file:
+            if not self.selected_file and not self.selected_files:
                 self.file_label.setText("Click anywhere to select file")
                 self.file_label.setStyleSheet("color: #6b7280; font-size: 13px;")
                 self.analyze_btn.setEnabled(False)
     
     def upload_file(self):
+        if self.selected_files:
+            self.upload_batch()
+            return
         if not self.selected_file:
             error_dialog = ErrorDialog("Error", "Please select a file first.", self)
             error_dialog.exec_()
@@ -544,12 +597,24 @@ class MainWindow(QMainWindow):
         self.analyze_btn.setEnabled(False)
         self.upload_box.setVisible(False)
         
-        self.upload_thread = UploadThread(self.selected_file)
+        self.upload_thread = UploadThread(self.selected_file, compress=self.compress_check.isChecked())
         self.upload_thread.progress.connect(self.update_progress)
         self.upload_thread.status_message.connect(self.update_status)
         self.upload_thread.finished.connect(self.upload_complete)
         self.upload_thread.start()
     
+    def upload_batch(self):
+        self.progress_widget.setVisible(True)
+        self.progress_bar.setValue(0)
+        self.analyze_btn.setEnabled(False)
+        self.upload_box.setVisible(False)
+        
+        self.upload_thread = BatchUploadThread(self.selected_files, compress=self.compress_check.isChecked())
+        self.upload_thread.progress.connect(self.update_progress)
+        self.upload_thread.status_message.connect(self.update_status)
+        self.upload_thread.finished.connect(self.batch_complete)
+        self.upload_thread.start()
+    
     def update_progress(self, value):
         self.progress_bar.setValue(value)
     
@@ -570,6 +635,30 @@ class MainWindow(QMainWindow):
             error_dialog = ErrorDialog("Error", "Invalid response from server", self)
             error_dialog.exec_()
     
+    def batch_complete(self, result):
+        self.analyze_btn.setEnabled(True)
+        self.upload_box.setVisible(True)
+        self.progress_widget.setVisible(False)
+        
+        if "error" in result:
+            error_dialog = ErrorDialog("Upload Failed", result["error"], self)
+            error_dialog.exec_()
+            return
+        
+        lines = []
+        for entry in result.get("files", []):
+            if entry.get("status") == "Completed":
+                lines.append(f"✅ {entry['file_name']} — {entry.get('rows', 0):,} rows")
+            else:
+                lines.append(f"❌ {entry['file_name']} — {entry.get('error', 'Failed')}")
+        QMessageBox.information(
+            self, "Batch Upload",
+            f"{result.get('message', '')}\n\n" + "\n".join(lines)
+        )
+        
+        if result.get("completed"):
+            self.show_dashboard()
+    
     def show_upload(self):
         pass
     
@@ -7,7 +7,7 @@ from PyQt5.QtWidgets import (
     QGraphicsDropShadowEffect, QMenu, QAction, QDialog,
     QApplication, QGroupBox
 )
-from PyQt5.QtCore import Qt, QThread, pyqtSignal, QSize, QPoint
+from PyQt5.QtCore import Qt, QThread, pyqtSignal, QSize, QPoint, QTimer
 from PyQt5.QtGui import QFont, QColor, QPalette
 from api.django_client import api_client
 from ui.error_dialog import ErrorDialog
@@ -47,6 +47,11 @@ class InteractiveChartWidget(QWidget):
         self.setLayout(layout)
         self.tooltip = None
 
+    def reset(self):
+        self.figure.clear()
+        self.tooltip = None
+        self.canvas.draw_idle()
+
     def on_hover(self, event):
         if event.inaxes is None:
             if self.tooltip:
@@ -64,15 +69,18 @@ class InteractiveChartWidget(QWidget):
         self.tooltip.set_visible(True)
         self.canvas.draw_idle()
 
-    def plot_line_chart(self, data, column_name):
+    def plot_line_chart(self, data, column_name, x=None, xlabel='Index'):
         try:
             self.figure.clear()
             ax = self.figure.add_subplot(111)
-            x = list(range(len(data[:20])))
-            y = [float(v) if v is not None else 0 for v in data[:20]]
-            ax.plot(x, y, color='#2563eb', linewidth=2.5, marker='o', markersize=6)
+            if x is None:
+                x = list(range(len(data[:20])))
+                y = [float(v) if v is not None else 0 for v in data[:20]]
+                ax.plot(x, y, color='#2563eb', linewidth=2.5, marker='o', markersize=6)
+            else:
+                ax.plot(x, data, color='#2563eb', linewidth=1.5)
             ax.set_title(f'{column_name} - Line Chart', fontsize=14, fontweight='bold', color='#1f2937')
-            ax.set_xlabel('Index', fontsize=11, color='#666')
+            ax.set_xlabel(xlabel, fontsize=11, color='#666')
             ax.set_ylabel(column_name, fontsize=11, color='#666')
             ax.grid(True, alpha=0.3, linestyle='--')
             ax.set_facecolor('#f9fafb')
@@ -112,12 +120,19 @@ class InteractiveChartWidget(QWidget):
         except Exception as e:
             print(f"Error plotting pie chart: {e}")
 
-    def plot_histogram(self, data, column_name):
+    def plot_histogram(self, data, column_name, histogram=None):
         try:
             self.figure.clear()
             ax = self.figure.add_subplot(111)
             clean_data = [float(x) for x in data if x is not None]
-            if clean_data:
+            if histogram and histogram.get('counts'):
+                edges = histogram['edges']
+                ax.hist(edges[:-1], bins=edges, weights=histogram['counts'], color='#7c3aed', edgecolor='#6d28d9', alpha=0.8, linewidth=1.5)
+                ax.set_title(f'{column_name} - Histogram', fontsize=14, fontweight='bold', color='#1f2937')
+                ax.set_xlabel(column_name, fontsize=11, color='#666')
+                ax.set_ylabel('Frequency', fontsize=11, color='#666')
+                ax.grid(True, alpha=0.3, axis='y', linestyle='--')
+            elif clean_data:
                 ax.hist(clean_data, bins=20, color='#7c3aed', edgecolor='#6d28d9', alpha=0.8, linewidth=1.5)
                 ax.set_title(f'{column_name} - Histogram', fontsize=14, fontweight='bold', color='#1f2937')
                 ax.set_xlabel(column_name, fontsize=11, color='#666')
@@ -146,15 +161,18 @@ class InteractiveChartWidget(QWidget):
         except Exception as e:
             print(f"Error plotting scatter: {e}")
 
-    def plot_area_chart(self, data, column_name):
+    def plot_area_chart(self, data, column_name, x=None, xlabel='Index'):
         try:
             self.figure.clear()
             ax = self.figure.add_subplot(111)
-            x = list(range(len(data[:20])))
-            y = [float(v) if v is not None else 0 for v in data[:20]]
+            if x is None:
+                x = list(range(len(data[:20])))
+                y = [float(v) if v is not None else 0 for v in data[:20]]
+            else:
+                y = data
             ax.fill_between(x, y, alpha=0.6, color='#06b6d4', edgecolor='#0891b2', linewidth=2)
             ax.set_title(f'{column_name} - Area Chart', fontsize=14, fontweight='bold', color='#1f2937')
-            ax.set_xlabel('Index', fontsize=11, color='#666')
+            ax.set_xlabel(xlabel, fontsize=11, color='#666')
             ax.set_ylabel(column_name, fontsize=11, color='#666')
             ax.grid(True, alpha=0.3, linestyle='--')
             ax.set_facecolor('#f9fafb')
@@ -163,13 +181,18 @@ class InteractiveChartWidget(QWidget):
         except Exception as e:
             print(f"Error plotting area chart: {e}")
 
-    def plot_box_plot(self, data, column_name):
+    def plot_box_plot(self, data, column_name, box=None):
         try:
             self.figure.clear()
             ax = self.figure.add_subplot(111)
             clean_data = [float(x) for x in data if x is not None]
-            if clean_data:
-                bp = ax.boxplot(clean_data, patch_artist=True, widths=0.5)
+            if box or clean_data:
+                if box:
+                    box_stats = {'med': box['median'], 'q1': box['q1'], 'q3': box['q3'],
+                                 'whislo': box['whislo'], 'whishi': box['whishi'], 'fliers': []}
+                    bp = ax.bxp([box_stats], patch_artist=True, widths=0.5, showfliers=False)
+                else:
+                    bp = ax.boxplot(clean_data, patch_artist=True, widths=0.5)
                 for patch in bp['boxes']:
                     patch.set_facecolor('#ec4899')
                     patch.set_alpha(0.7)
@@ -186,12 +209,22 @@ class InteractiveChartWidget(QWidget):
         except Exception as e:
             print(f"Error plotting box plot: {e}")
 
-    def plot_density(self, data, column_name):
+    def plot_density(self, data, column_name, histogram=None, kde=None):
         try:
             self.figure.clear()
             ax = self.figure.add_subplot(111)
             clean_data = [float(x) for x in data if x is not None]
-            if len(clean_data) > 1:
+            if histogram and histogram.get('counts'):
+                edges = histogram['edges']
+                ax.hist(edges[:-1], bins=edges, weights=histogram['counts'], color='#14b8a6', alpha=0.6, density=True, label='Histogram', edgecolor='#0d9488')
+                if kde and kde.get('x'):
+                    ax.plot(kde['x'], kde['density'], color='#0f766e', linewidth=2.5, label='Density')
+                    ax.legend()
+                ax.set_title(f'{column_name} - Density Distribution', fontsize=14, fontweight='bold', color='#1f2937')
+                ax.set_xlabel(column_name, fontsize=11, color='#666')
+                ax.set_ylabel('Density', fontsize=11, color='#666')
+                ax.grid(True, alpha=0.3, linestyle='--')
+            elif len(clean_data) > 1:
                 ax.hist(clean_data, bins=30, color='#14b8a6', alpha=0.6, density=True, label='Histogram', edgecolor='#0d9488')
                 from scipy.stats import gaussian_kde
                 try:
@@ -211,13 +244,16 @@ class InteractiveChartWidget(QWidget):
         except Exception as e:
             print(f"Error plotting density: {e}")
 
-    def plot_cumulative(self, data, column_name):
+    def plot_cumulative(self, data, column_name, ecdf=None):
         try:
             self.figure.clear()
             ax = self.figure.add_subplot(111)
-            clean_data = sorted([float(x) for x in data if x is not None])
-            if clean_data:
-                y = np.arange(1, len(clean_data) + 1) / len(clean_data)
+            if ecdf and ecdf.get('x'):
+                clean_data, y = ecdf['x'], ecdf['p']
+            else:
+                clean_data = sorted([float(x) for x in data if x is not None])
+                y = np.arange(1, len(clean_data) + 1) / len(clean_data) if clean_data else []
+            if len(clean_data):
                 ax.plot(clean_data, y, color='#8b5cf6', linewidth=2.5, marker='o', markersize=4, label='CDF')
                 ax.set_title(f'{column_name} - Cumulative Distribution', fontsize=14, fontweight='bold', color='#1f2937')
                 ax.set_xlabel(column_name, fontsize=11, color='#666')
@@ -231,6 +267,89 @@ class InteractiveChartWidget(QWidget):
             print(f"Error plotting cumulative: {e}")
 
 
+    def plot_heatmap(self, columns, pearson):
+        try:
+            self.figure.clear()
+            ax = self.figure.add_subplot(111)
+            k = len(columns)
+            matrix = np.eye(k)
+            if k > 1:
+                i, j = np.triu_indices(k, k=1)
+                values = np.array([np.nan if v is None else v for v in pearson], dtype=float)
+                matrix[i, j] = values
+                matrix[j, i] = values
+            heatmap = ax.imshow(matrix, cmap='RdBu_r', vmin=-1, vmax=1, aspect='auto')
+            labels = [str(c)[:14] for c in columns]
+            ax.set_xticks(range(k))
+            ax.set_yticks(range(k))
+            ax.set_xticklabels(labels, rotation=45, ha='right', fontsize=9)
+            ax.set_yticklabels(labels, fontsize=9)
+            if k <= 10:
+                for row in range(k):
+                    for col in range(k):
+                        if not np.isnan(matrix[row, col]):
+                            ax.text(col, row, f"{matrix[row, col]:.2f}", ha='center', va='center', fontsize=9)
+            self.figure.colorbar(heatmap, ax=ax)
+            ax.set_title('Correlation Matrix (Pearson)', fontsize=14, fontweight='bold', color='#1f2937')
+            self.figure.tight_layout()
+            self.canvas.draw()
+        except Exception as e:
+            print(f"Error plotting heatmap: {e}")
+
+
+class ChartCanvasPool:
+    def __init__(self):
+        self.free_widgets = []
+        self.created = 0
+
+    def acquire(self):
+        if self.free_widgets:
+            return self.free_widgets.pop()
+        self.created += 1
+        return InteractiveChartWidget()
+
+    def release(self, chart_widget):
+        chart_widget.reset()
+        chart_widget.setParent(None)
+        self.free_widgets.append(chart_widget)
+
+
+class LazyChartSlot(QWidget):
+    def __init__(self, method_name, args, kwargs=None, parent=None):
+        super().__init__(parent)
+        self.method_name = method_name
+        self.args = args
+        self.kwargs = kwargs or {}
+        self.chart_widget = None
+        self.setMinimumHeight(400)
+
+        self.slot_layout = QVBoxLayout()
+        self.slot_layout.setContentsMargins(0, 0, 0, 0)
+        self.placeholder = QLabel("Scroll to load chart...")
+        self.placeholder.setAlignment(Qt.AlignCenter)
+        self.placeholder.setFont(QFont("Segoe UI", 11))
+        self.placeholder.setStyleSheet("color: #9ca3af; background: #f9fafb; border: none;")
+        self.slot_layout.addWidget(self.placeholder)
+        self.setLayout(self.slot_layout)
+
+    def is_rendered(self):
+        return self.chart_widget is not None
+
+    def attach(self, chart_widget):
+        self.chart_widget = chart_widget
+        self.placeholder.hide()
+        self.slot_layout.addWidget(chart_widget)
+        chart_widget.show()
+        getattr(chart_widget, self.method_name)(*self.args, **self.kwargs)
+
+    def detach(self):
+        chart_widget = self.chart_widget
+        self.chart_widget = None
+        self.slot_layout.removeWidget(chart_widget)
+        self.placeholder.show()
+        return chart_widget
+
+
 class DownloadThread(QThread):
     finished = pyqtSignal(bool, str)
     
@@ -256,6 +375,12 @@ class ResultsWindow(QMainWindow):
         self.upload_id = upload_id
         self.current_row_limit = 20
         self.show_all_rows = False
+        self.chart_slots = []
+        self.chart_pool = ChartCanvasPool()
+        self.chart_render_timer = QTimer(self)
+        self.chart_render_timer.setSingleShot(True)
+        self.chart_render_timer.setInterval(50)
+        self.chart_render_timer.timeout.connect(self.update_visible_charts)
         
         self.setWindowTitle("Analysis Results - Chemizer Analytics")
         self.setGeometry(100, 100, 1400, 900)
@@ -393,12 +518,18 @@ class ResultsWindow(QMainWindow):
         self.add_highlighted_insights(layout, rows, columns, numeric_cols)
         self.add_data_preview(layout)
         self.add_charts_section(layout, numeric_cols)
+        self.add_correlation_section(layout)
+        self.add_group_section(layout)
+        self.add_outlier_section(layout)
         self.add_statistics_section(layout, summary_stats, numeric_cols)
         self.add_column_info(layout)
 
         layout.addStretch()
         scroll_content.setLayout(layout)
 
+        self.scroll_area.verticalScrollBar().valueChanged.connect(self.schedule_chart_update)
+        QTimer.singleShot(0, self.update_visible_charts)
+
     def add_summary_section(self, layout, rows, columns, numeric_cols):
         frame = QFrame()
         frame.setStyleSheet("""
@@ -542,6 +673,18 @@ class ResultsWindow(QMainWindow):
         for col in numeric_cols:
             col_data[col] = [row.get(col) for row in data_preview]
 
+        distributions = self.analysis_data.get('distributions', {}) or {}
+        chart_data = api_client.get_chart_data(self.upload_id, numeric_cols)
+        series = chart_data.get('series', {}) if "error" not in chart_data else {}
+
+        timeline = {}
+        time_series = self.analysis_data.get('time_series') or {}
+        if time_series.get('rollups'):
+            timeline = api_client.get_time_series(self.upload_id, [c for c in numeric_cols if c in time_series.get('numeric_columns', [])])
+            if "error" in timeline:
+                timeline = {}
+        times = [np.datetime64(t) for t in timeline.get('timestamps', [])] if timeline and np is not None else []
+
         chart_configs = [
             (0, 'Line Chart', 'plot_line_chart'),
             (1, 'Bar Chart', 'plot_bar_chart'),
@@ -572,34 +715,175 @@ class ResultsWindow(QMainWindow):
             col_title.setStyleSheet("color: #2563eb; background: transparent; border: none;")
             frame_layout.addWidget(col_title)
 
-            chart_widget = InteractiveChartWidget()
-            
-            if method_name == 'plot_line_chart':
-                chart_widget.plot_line_chart(col_data[col], col)
-            elif method_name == 'plot_bar_chart':
-                chart_widget.plot_bar_chart(col_data[col], col)
-            elif method_name == 'plot_histogram':
-                chart_widget.plot_histogram(col_data[col], col)
-            elif method_name == 'plot_pie_chart':
-                chart_widget.plot_pie_chart(col_data[col], col)
-            elif method_name == 'plot_scatter':
+            col_series = series.get(col, {})
+            col_distribution = distributions.get(col, {})
+            kwargs = {}
+            if method_name == 'plot_scatter':
                 if i + 1 < len(numeric_cols):
                     col2 = numeric_cols[(i + 1) % len(numeric_cols)]
-                    chart_widget.plot_scatter(col_data[col], col_data[col2], col, col2)
+                    args = (col_data[col], col_data[col2], col, col2)
                 else:
-                    chart_widget.plot_line_chart(col_data[col], col)
-            elif method_name == 'plot_area_chart':
-                chart_widget.plot_area_chart(col_data[col], col)
-            elif method_name == 'plot_box_plot':
-                chart_widget.plot_box_plot(col_data[col], col)
-            elif method_name == 'plot_density':
-                chart_widget.plot_density(col_data[col], col)
-            elif method_name == 'plot_cumulative':
-                chart_widget.plot_cumulative(col_data[col], col)
-
-            frame_layout.addWidget(chart_widget)
+                    method_name, args = 'plot_line_chart', (col_data[col], col)
+            else:
+                args = (col_data[col], col)
+
+            col_timeline = timeline.get('series', {}).get(col, {}) if times else {}
+            if method_name in ('plot_line_chart', 'plot_area_chart') and col_timeline:
+                args = ([v if v is not None else float('nan') for v in col_timeline['mean']], col)
+                kwargs = {'x': times, 'xlabel': timeline.get('time_column', 'Time')}
+            elif method_name in ('plot_line_chart', 'plot_area_chart') and col_series.get('line'):
+                args = (col_series['line']['y'], col)
+                kwargs = {'x': col_series['line']['x']}
+            elif method_name == 'plot_histogram' and col_distribution.get('histogram'):
+                kwargs = {'histogram': col_distribution['histogram']}
+            elif method_name == 'plot_density' and col_distribution.get('histogram'):
+                kwargs = {'histogram': col_distribution['histogram'], 'kde': col_distribution.get('kde')}
+            elif method_name == 'plot_cumulative' and col_distribution.get('ecdf'):
+                kwargs = {'ecdf': col_distribution['ecdf']}
+            elif method_name in ('plot_histogram', 'plot_density') and col_series.get('histogram'):
+                kwargs = {'histogram': col_series['histogram']}
+            elif method_name == 'plot_box_plot' and col_series.get('box'):
+                kwargs = {'box': col_series['box']}
+
+            chart_slot = LazyChartSlot(method_name, args, kwargs)
+            self.chart_slots.append(chart_slot)
+
+            frame_layout.addWidget(chart_slot)
             layout.addWidget(frame)
 
+    def add_correlation_section(self, layout):
+        correlations = self.analysis_data.get('correlations') or {}
+        if len(correlations.get('columns', [])) < 2:
+            return
+
+        frame = QFrame()
+        frame.setStyleSheet("""
+            QFrame { background-color: #ffffff; border: 2px solid #7c3aed; border-radius: 12px; padding: 15px; }
+        """)
+        frame_layout = QVBoxLayout(frame)
+
+        title = QLabel("🔗 Correlation Matrix")
+        title.setFont(QFont("Segoe UI", 13, QFont.Bold))
+        title.setStyleSheet("color: #7c3aed; background: transparent; border: none;")
+        frame_layout.addWidget(title)
+
+        chart_slot = LazyChartSlot('plot_heatmap', (correlations['columns'], correlations['pearson']))
+        self.chart_slots.append(chart_slot)
+        frame_layout.addWidget(chart_slot)
+        layout.addWidget(frame)
+
+    def add_group_section(self, layout):
+        group_stats = self.analysis_data.get('group_stats') or {}
+        if not group_stats:
+            return
+
+        frame = QFrame()
+        frame.setStyleSheet("""
+            QFrame { background-color: #ffffff; border: 2px solid #0891b2; border-radius: 12px; padding: 15px; }
+        """)
+        frame_layout = QVBoxLayout(frame)
+
+        title = QLabel("🏷️ Group Breakdown")
+        title.setFont(QFont("Segoe UI", 13, QFont.Bold))
+        title.setStyleSheet("color: #0891b2; background: transparent; border: none;")
+        frame_layout.addWidget(title)
+
+        for group_col, grouping in group_stats.items():
+            value_cols = grouping.get('columns', [])
+            groups = grouping.get('groups', [])
+
+            subtitle = QLabel(f"By {group_col} — mean (min – max)")
+            subtitle.setFont(QFont("Segoe UI", 11, QFont.Bold))
+            subtitle.setStyleSheet("color: #1f2937; background: transparent; border: none;")
+            frame_layout.addWidget(subtitle)
+
+            table = QTableWidget(len(groups), len(value_cols) + 2)
+            table.setHorizontalHeaderLabels(['Group', 'Rows'] + value_cols)
+            table.setEditTriggers(QAbstractItemView.NoEditTriggers)
+            table.verticalHeader().setVisible(False)
+            table.setStyleSheet("QTableWidget { border: 1px solid #e5e7eb; } QHeaderView::section { background-color: #ecfeff; padding: 6px; border: none; font-weight: bold; }")
+            for row, group in enumerate(groups):
+                label = group['group'] if group['group'] is not None else 'N/A'
+                table.setItem(row, 0, QTableWidgetItem(str(label)))
+                table.setItem(row, 1, QTableWidgetItem(str(group['rows'])))
+                for col_idx, col in enumerate(value_cols):
+                    stats = group['stats'].get(col, {})
+                    if stats.get('mean') is None:
+                        text = 'N/A'
+                    else:
+                        text = f"{stats['mean']:.2f} ({stats['min']:.2f} – {stats['max']:.2f})"
+                    table.setItem(row, col_idx + 2, QTableWidgetItem(text))
+            table.resizeColumnsToContents()
+            table.setFixedHeight(min(400, 32 + 30 * len(groups)))
+            frame_layout.addWidget(table)
+
+        layout.addWidget(frame)
+
+    def add_outlier_section(self, layout):
+        outliers = {col: detail for col, detail in (self.analysis_data.get('outliers') or {}).items() if detail}
+        if not outliers:
+            return
+
+        frame = QFrame()
+        frame.setStyleSheet("""
+            QFrame { background-color: #ffffff; border: 2px solid #dc2626; border-radius: 12px; padding: 15px; }
+        """)
+        frame_layout = QVBoxLayout(frame)
+
+        title = QLabel("⚠️ Outlier Detection")
+        title.setFont(QFont("Segoe UI", 13, QFont.Bold))
+        title.setStyleSheet("color: #dc2626; background: transparent; border: none;")
+        frame_layout.addWidget(title)
+
+        headers = ['Column', 'IQR Fences', 'Robust Z', 'Rolling Z', 'Flagged Rows', 'Most Extreme (row: value)']
+        table = QTableWidget(len(outliers), len(headers))
+        table.setHorizontalHeaderLabels(headers)
+        table.setEditTriggers(QAbstractItemView.NoEditTriggers)
+        table.verticalHeader().setVisible(False)
+        table.setStyleSheet("QTableWidget { border: 1px solid #e5e7eb; } QHeaderView::section { background-color: #fef2f2; padding: 6px; border: none; font-weight: bold; }")
+        for row, (col, detail) in enumerate(outliers.items()):
+            counts = detail['counts']
+            sample = ', '.join(f"{item['row'] + 1}: {item['value']:.2f}" for item in detail['sample'][:3])
+            cells = [col, counts['iqr'], counts['robust_z'], counts['rolling_z'], detail['flagged'], sample or '-']
+            for col_idx, value in enumerate(cells):
+                table.setItem(row, col_idx, QTableWidgetItem(str(value)))
+        table.resizeColumnsToContents()
+        table.horizontalHeader().setStretchLastSection(True)
+        table.setFixedHeight(min(400, 32 + 30 * len(outliers)))
+        frame_layout.addWidget(table)
+
+        note = QLabel("Rows outside 1.5×IQR, with |modified z| > 3.5, or |z| > 3 against the previous 50 values.")
+        note.setFont(QFont("Segoe UI", 9))
+        note.setStyleSheet("color: #6b7280; background: transparent; border: none;")
+        frame_layout.addWidget(note)
+
+        layout.addWidget(frame)
+
+    def schedule_chart_update(self):
+        self.chart_render_timer.start()
+
+    def update_visible_charts(self):
+        if not MATPLOTLIB_AVAILABLE or not self.chart_slots:
+            return
+        viewport = self.scroll_area.viewport()
+        margin = viewport.height() // 2
+        visible_top = -margin
+        visible_bottom = viewport.height() + margin
+
+        for chart_slot in self.chart_slots:
+            top = chart_slot.mapTo(viewport, QPoint(0, 0)).y()
+            bottom = top + chart_slot.height()
+            if bottom >= visible_top and top <= visible_bottom:
+                if not chart_slot.is_rendered():
+                    chart_slot.attach(self.chart_pool.acquire())
+            elif chart_slot.is_rendered():
+                self.chart_pool.release(chart_slot.detach())
+
+    def resizeEvent(self, event):
+        super().resizeEvent(event)
+        if self.chart_slots:
+            self.schedule_chart_update()
+
     def add_statistics_section(self, layout, summary_stats, numeric_cols):
         if not numeric_cols:
             return
@@ -645,13 +645,10 @@ class SettingsWindow(QMainWindow):
                     self.verified_label.setText("✅ Account verified")
                     self.last_login_label.setText("🖥️ Last login: Recently")
         
-        history = api_client.get_upload_history()
-        if "error" not in history:
-            uploads = history.get("uploads", [])
-            total_uploads = len(uploads)
-            
-            total_size = sum(upload.get("file_size", 0) for upload in uploads)
-            size_mb = total_size / (1024 * 1024)
+        usage = api_client.get_usage()
+        if "error" not in usage:
+            total_uploads = usage.get("uploads", 0)
+            size_mb = usage.get("total_mb", 0)
             
             self.storage_label.setText(f"📦 Total data uploaded: {size_mb:.2f} MB")
             self.upload_count_label.setText(f"📤 Total uploads: {total_uploads} files")
@@ -339,6 +339,25 @@ class APIClient {
     }
   }
 
+  async getDashboardSummary(recent: number = 10): Promise<ApiResponse> {
+    try {
+      const response = await fetch(`${API_BASE_URL}/auth/dashboard/summary/?recent=${recent}`, {
+        method: 'GET',
+        headers: this.getHeaders(),
+      });
+
+      const result = await response.json();
+
+      if (!response.ok) {
+        return { error: this.formatError(result) };
+      }
+
+      return { data: result };
+    } catch (error) {
+      return { error: 'Network error. Please try again.' };
+    }
+  }
+
   async getUploadHistory(): Promise<ApiResponse> {
     try {
       const response = await fetch(`${API_BASE_URL}/auth/uploads/history/`, {
@@ -377,6 +396,36 @@ class APIClient {
     }
   }
 
+  async getUploadRows(
+    uploadId: string,
+    params: { columns?: string[]; filters?: string[]; sort?: string; limit?: number; offset?: number; cursor?: string } = {}
+  ): Promise<ApiResponse> {
+    try {
+      const query = new URLSearchParams();
+      if (params.columns?.length) query.set('columns', params.columns.join(','));
+      params.filters?.forEach((filter) => query.append('filter', filter));
+      if (params.sort) query.set('sort', params.sort);
+      if (params.limit) query.set('limit', String(params.limit));
+      if (params.offset) query.set('offset', String(params.offset));
+      if (params.cursor) query.set('cursor', params.cursor);
+
+      const response = await fetch(`${API_BASE_URL}/auth/uploads/${uploadId}/rows/?${query.toString()}`, {
+        method: 'GET',
+        headers: this.getHeaders(),
+      });
+
+      const result = await response.json();
+
+      if (!response.ok) {
+        return { error: this.formatError(result) };
+      }
+
+      return { data: result };
+    } catch (error) {
+      return { error: 'Network error. Please try again.' };
+    }
+  }
+
   async deleteUpload(uploadId: string): Promise<ApiResponse> {
     try {
       const response = await fetch(`${API_BASE_URL}/auth/uploads/${uploadId}/delete/`, {
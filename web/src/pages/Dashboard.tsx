@@ -22,33 +22,43 @@ interface UploadHistory {
   file_size?: number;
 }
 
+interface DashboardSummary {
+  total_uploads: number;
+  completed: number;
+  total_rows: number;
+  total_bytes: number;
+  last_upload: UploadHistory | null;
+  recent: UploadHistory[];
+}
+
 const Dashboard = () => {
   const navigate = useNavigate();
   const [visibleCount, setVisibleCount] = useState(3);
-  const [uploadsHistory, setUploadsHistory] = useState<UploadHistory[]>([]);
+  const [summary, setSummary] = useState<DashboardSummary | null>(null);
   const [loading, setLoading] = useState(true);
   const [selectedUploads, setSelectedUploads] = useState<Set<string>>(new Set());
 
+  const uploadsHistory = summary?.recent ?? [];
+  const totalUploads = summary?.total_uploads ?? 0;
+
   useEffect(() => {
-    fetchUploadHistory();
-  }, []);
+    fetchSummary(visibleCount);
+  }, [visibleCount]);
 
-  const fetchUploadHistory = async () => {
-    setLoading(true);
+  const fetchSummary = async (recent: number) => {
     try {
-      const result = await apiClient.getUploadHistory();
+      const result = await apiClient.getDashboardSummary(recent);
       
       if (result.error) {
         toast.error(result.error);
-        setLoading(false);
         return;
       }
 
-      if (result.data && (result.data as any).uploads) {
-        setUploadsHistory((result.data as any).uploads);
+      if (result.data) {
+        setSummary(result.data as DashboardSummary);
       }
     } catch (error) {
-      console.error('Failed to fetch upload history:', error);
+      console.error('Failed to fetch dashboard summary:', error);
       toast.error('Failed to load upload history');
     } finally {
       setLoading(false);
@@ -56,7 +66,7 @@ const Dashboard = () => {
   };
 
   const handleLoadMore = () => {
-    setVisibleCount(prev => Math.min(prev + 3, uploadsHistory.length));
+    setVisibleCount(prev => Math.min(prev + 3, totalUploads));
   };
 
   const handleViewResults = (uploadId: string) => {
@@ -93,7 +103,7 @@ const Dashboard = () => {
         toast.error(result.error);
         return;
       }
-      setUploadsHistory(uploadsHistory.filter(u => u.upload_id !== uploadId));
+      await fetchSummary(visibleCount);
       toast.success('Upload deleted successfully');
     } catch (error) {
       toast.error('Failed to delete upload');
@@ -122,7 +132,7 @@ const Dashboard = () => {
       for (const uploadId of selectedUploads) {
         await apiClient.deleteUpload(uploadId);
       }
-      setUploadsHistory(uploadsHistory.filter(u => !selectedUploads.has(u.upload_id)));
+      await fetchSummary(visibleCount);
       setSelectedUploads(new Set());
       toast.success('Uploads deleted successfully');
     } catch (error) {
@@ -145,8 +155,8 @@ const Dashboard = () => {
     }
   };
 
-  const totalRows = uploadsHistory.reduce((sum, item) => sum + item.rows, 0);
-  const totalSize = uploadsHistory.reduce((sum, item) => sum + (item.file_size || 0), 0);
+  const totalRows = summary?.total_rows ?? 0;
+  const totalSize = summary?.total_bytes ?? 0;
 
   return (
     <div className="min-h-screen bg-background">
@@ -205,7 +215,7 @@ const Dashboard = () => {
           <div className="grid md:grid-cols-4 gap-6 mb-8">
             <div className="bg-card border border-border rounded-lg p-6">
               <p className="text-sm text-muted-foreground mb-1">Total Uploads</p>
-              <p className="text-3xl font-bold">{loading ? "..." : uploadsHistory.length}</p>
+              <p className="text-3xl font-bold">{loading ? "..." : totalUploads}</p>
             </div>
             <div className="bg-card border border-border rounded-lg p-6">
               <p className="text-sm text-muted-foreground mb-1">Total Data Points</p>
@@ -222,7 +232,7 @@ const Dashboard = () => {
             <div className="bg-card border border-border rounded-lg p-6">
               <p className="text-sm text-muted-foreground mb-1">Last Upload</p>
               <p className="text-3xl font-bold text-sm">
-                {loading ? "..." : (uploadsHistory[0]?.upload_date_formatted || "No uploads")}
+                {loading ? "..." : (summary?.last_upload?.upload_date_formatted || "No uploads")}
               </p>
             </div>
           </div>
@@ -316,7 +326,7 @@ const Dashboard = () => {
                   ))}
                 </div>
 
-                {visibleCount < uploadsHistory.length && (
+                {visibleCount < totalUploads && (
                   <div className="mt-6 text-center">
                     <Button
                       onClick={handleLoadMore}
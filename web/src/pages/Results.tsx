@@ -13,6 +13,8 @@ const Results = () => {
   const [uploadData, setUploadData] = useState<any>(null);
   const [dataPreview, setDataPreview] = useState<any[]>([]);
   const [showAllRows, setShowAllRows] = useState(false);
+  const [rowsCursor, setRowsCursor] = useState<string | null>(null);
+  const [loadingRows, setLoadingRows] = useState(false);
 
   useEffect(() => {
     const uploadId = localStorage.getItem('current_upload_id');
@@ -38,6 +40,7 @@ const Results = () => {
       if (result.data) {
         setUploadData(result.data);
         setDataPreview((result.data as any).data_preview || []);
+        setRowsCursor(null);
       }
     } catch (error) {
       console.error('Failed to fetch upload details:', error);
@@ -47,6 +50,32 @@ const Results = () => {
     }
   };
 
+  const hasMoreServerRows = (uploadData?.rows || 0) > dataPreview.length;
+
+  const loadMoreRows = async () => {
+    const uploadId = localStorage.getItem('current_upload_id');
+    if (!uploadId) return;
+
+    setLoadingRows(true);
+    try {
+      // The first page continues right after the stored preview rows
+      const result = await apiClient.getUploadRows(uploadId, rowsCursor
+        ? { cursor: rowsCursor, limit: 100 }
+        : { offset: dataPreview.length, limit: 100 });
+
+      if (result.error) {
+        toast.error(result.error);
+        return;
+      }
+
+      const page = result.data as any;
+      setDataPreview((rows) => [...rows, ...page.rows]);
+      setRowsCursor(page.next_cursor);
+    } finally {
+      setLoadingRows(false);
+    }
+  };
+
   const handleDownloadPDF = async () => {
     const uploadId = localStorage.getItem('current_upload_id');
     if (!uploadId) {
@@ -244,7 +273,7 @@ const Results = () => {
                 </table>
               </div>
               {dataPreview.length > 20 && (
-                <div className="mt-4 text-center">
+                <div className="mt-4 flex justify-center gap-3">
                   <Button
                     onClick={() => setShowAllRows(!showAllRows)}
                     variant="outline"
@@ -252,6 +281,16 @@ const Results = () => {
                   >
                     {showAllRows ? 'Show Less' : `Load More (${dataPreview.length - 20} more rows)`}
                   </Button>
+                  {showAllRows && hasMoreServerRows && (
+                    <Button
+                      onClick={loadMoreRows}
+                      variant="outline"
+                      className="rounded-md"
+                      disabled={loadingRows}
+                    >
+                      {loadingRows ? 'Loading...' : `Load Next 100 (${(uploadData.rows - dataPreview.length).toLocaleString()} remaining)`}
+                    </Button>
+                  )}
                 </div>
               )}
             </div>
@@ -430,6 +469,54 @@ const Results = () => {
             </div>
           </div>
 
+          {/* Group Breakdown */}
+          {Object.keys(uploadData?.group_stats || {}).length > 0 && (
+            <div className="bg-card border border-border rounded-lg p-6 mb-8">
+              <h3 className="text-xl font-semibold mb-4">Group Breakdown</h3>
+              <div className="space-y-6">
+                {Object.entries(uploadData.group_stats).map(([groupCol, grouping]: [string, any]) => (
+                  <Collapsible key={groupCol} defaultOpen={true}>
+                    <CollapsibleTrigger className="flex items-center gap-2 w-full p-3 bg-secondary/30 rounded-lg hover:bg-secondary/50">
+                      <ChevronDown className="h-4 w-4" />
+                      <span className="font-semibold">By {groupCol}</span>
+                    </CollapsibleTrigger>
+                    <CollapsibleContent className="p-4 bg-secondary/10 rounded-b-lg overflow-x-auto">
+                      <table className="w-full text-sm">
+                        <thead>
+                          <tr className="border-b border-border">
+                            <th className="text-left p-2">Group</th>
+                            <th className="text-left p-2">Rows</th>
+                            {grouping.columns.map((col: string) => (
+                              <th key={col} className="text-left p-2">{col} (mean / min – max)</th>
+                            ))}
+                          </tr>
+                        </thead>
+                        <tbody>
+                          {grouping.groups.map((group: any) => (
+                            <tr key={String(group.group)} className="border-b border-border last:border-0">
+                              <td className="p-2 font-medium">{group.group ?? 'N/A'}</td>
+                              <td className="p-2">{group.rows.toLocaleString()}</td>
+                              {grouping.columns.map((col: string) => {
+                                const stats = group.stats[col];
+                                return (
+                                  <td key={col} className="p-2">
+                                    {stats?.mean != null
+                                      ? `${stats.mean.toFixed(2)} / ${stats.min.toFixed(2)} – ${stats.max.toFixed(2)}`
+                                      : 'N/A'}
+                                  </td>
+                                );
+                              })}
+                            </tr>
+                          ))}
+                        </tbody>
+                      </table>
+                    </CollapsibleContent>
+                  </Collapsible>
+                ))}
+              </div>
+            </div>
+          )}
+
           {/* Column Info */}
           <div className="bg-card border border-border rounded-lg p-6">
             <h3 className="text-xl font-semibold mb-4">Column Information</h3>